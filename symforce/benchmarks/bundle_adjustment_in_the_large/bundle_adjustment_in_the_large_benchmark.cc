@@ -0,0 +1,88 @@
+/* ----------------------------------------------------------------------------
+ * SymForce - Copyright 2022, Skydio, Inc.
+ * This source code is under the Apache 2.0 license found in the LICENSE file.
+ * ---------------------------------------------------------------------------- */
+
+///
+/// Run with:
+///
+///     build/bin/benchmarks/bundle_adjustment_in_the_large_benchmark
+///
+/// Compares the Cholesky, conjugate gradient, and Schur complement linear solvers on a problem from
+/// the Bundle-Adjustment-in-the-Large dataset.  Download the dataset first with
+/// symforce/examples/bundle_adjustment_in_the_large/download_dataset.py.  The problem defaults to
+/// problem-21-11315-pre.txt, and may be set with the SYMFORCE_BAL_PROBLEM environment variable.
+///
+/// See run_benchmarks.py for more information
+///
+
+#include <chrono>
+#include <cstdlib>
+#include <fstream>
+#include <string>
+#include <thread>
+
+#include <catch2/catch_test_macros.hpp>
+#include <spdlog/spdlog.h>
+
+#include <symforce/examples/bundle_adjustment_in_the_large/common.h>
+#include <symforce/opt/optimizer.h>
+#include <symforce/opt/tic_toc.h>
+
+using namespace bundle_adjustment_in_the_large;
+
+namespace {
+
+std::string ProblemPath() {
+  const char* const problem = std::getenv("SYMFORCE_BAL_PROBLEM");
+  if (problem != nullptr) {
+    return problem;
+  }
+  return std::string(SYMFORCE_BAL_DATA_DIR) + "/problem-21-11315-pre.txt";
+}
+
+void RunBundleAdjustment(const sym::linear_solver_t linear_solver, const std::string& name) {
+  const std::string path = ProblemPath();
+  if (!std::ifstream(path).good()) {
+    WARN("BAL problem " << path << " not found, run download_dataset.py first");
+    return;
+  }
+
+  const Problem problem = ReadProblem(path);
+  sym::Valuesd values = problem.values;
+
+  sym::optimizer_params_t params = sym::DefaultOptimizerParams();
+  params.verbose = false;
+  params.linear_solver = linear_solver;
+  params.schur_eliminated_key_letter = POINT.Letter();
+
+  sym::Optimizerd optimizer(params, problem.factors, sym::kDefaultEpsilond, name);
+  sym::OptimizationStatsd stats;
+
+  std::chrono::milliseconds timespan(100);
+  std::this_thread::sleep_for(timespan);
+
+  {
+    SYM_TIME_SCOPE("{}/optimize", name);
+    optimizer.Optimize(&values, /* num_iterations */ -1, /* populate_best_linearization */ false,
+                       &stats);
+  }
+
+  spdlog::info("{}: {} cameras, {} points, {} observations, initial error {}, final error {}", name,
+               problem.num_cameras, problem.num_points, problem.num_observations,
+               stats.iterations.front().new_error, stats.iterations.at(stats.best_index).new_error);
+}
+
+}  // namespace
+
+TEST_CASE("sym_bal_cholesky") {
+  RunBundleAdjustment(sym::linear_solver_t::CHOLESKY, "sym_bal_cholesky");
+}
+
+TEST_CASE("sym_bal_conjugate_gradient") {
+  RunBundleAdjustment(sym::linear_solver_t::CONJUGATE_GRADIENT, "sym_bal_conjugate_gradient");
+}
+
+TEST_CASE("sym_bal_schur") {
+  RunBundleAdjustment(sym::linear_solver_t::SCHUR, "sym_bal_schur");
+}
@@ -0,0 +1,119 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+"""
+Benchmark of the generated Pose3 between factor in plain Python, numba called on each input, and
+the parallel numba batch function
+"""
+
+import argh
+from pathlib import Path
+import tempfile
+import timeit
+
+import numpy as np
+
+import sym
+from symforce import codegen
+from symforce import typing as T
+from symforce.codegen import codegen_util
+from symforce.codegen.geo_factors_codegen import between_factor
+import symforce.symbolic as sf
+
+
+def generate(output_dir: Path, use_numba: bool) -> T.Any:
+    """
+    Generate the linearization of the Pose3 between factor, and return the generated module
+    """
+    config = codegen.PythonConfig(use_numba=use_numba)
+    namespace = "between_factor_numba" if use_numba else "between_factor_python"
+    data = (
+        codegen.Codegen.function(
+            func=between_factor,
+            input_types=[sf.Pose3, sf.Pose3, sf.Pose3, sf.M66, sf.Symbol],
+            output_names=["res"],
+            config=config,
+        )
+        .with_linearization(name="between_factor_pose3", which_args=["a", "b"])
+        .generate_function(output_dir=output_dir, namespace=namespace)
+    )
+    return codegen_util.load_generated_package(
+        f"{namespace}.between_factor_pose3", data.function_dir
+    )
+
+
+def random_inputs(num_inputs: int) -> T.List[T.Tuple[sym.Pose3, sym.Pose3, sym.Pose3]]:
+    return [
+        tuple(sym.Pose3.from_tangent(np.random.normal(size=6)) for _ in range(3))
+        for _ in range(num_inputs)
+    ]
+
+
+@argh.arg("--num-inputs", help="Number of factors to linearize")
+@argh.arg("--number", help="Number of times to run each benchmark, the best time is reported")
+@argh.arg(
+    "--output-dir",
+    help="Where to generate the functions, which also holds the numba cache between runs",
+)
+def main(num_inputs: int = 10000, number: int = 5, output_dir: str = None) -> None:
+    if output_dir is None:
+        output_dir = str(Path(tempfile.gettempdir()) / "numba_between_factor")
+
+    python_module = generate(Path(output_dir), use_numba=False)
+    numba_module = generate(Path(output_dir), use_numba=True)
+
+    poses = random_inputs(num_inputs)
+    # Matrices are flat arrays in storage order for both functions
+    sqrt_info = np.eye(6).flatten(order="F")
+    epsilon = sf.numeric_epsilon
+
+    # Inputs of the numba functions, as flat float64 arrays of their storage
+    storage = [tuple(np.array(pose.to_storage()) for pose in input_poses) for input_poses in poses]
+    batch_storage = [np.array([input_storage[i] for input_storage in storage]) for i in range(3)]
+    batch_sqrt_info = np.tile(sqrt_info, (num_inputs, 1))
+    batch_epsilon = np.full(num_inputs, epsilon)
+
+    def run_python() -> None:
+        for a, b, a_T_b in poses:
+            python_module.between_factor_pose3(a, b, a_T_b, sqrt_info, epsilon)
+
+    def run_numba() -> None:
+        for a, b, a_T_b in storage:
+            numba_module.between_factor_pose3(a, b, a_T_b, sqrt_info, epsilon)
+
+    def run_numba_batch() -> None:
+        numba_module.between_factor_pose3_batch(*batch_storage, batch_sqrt_info, batch_epsilon)
+
+    # Check that the results agree, which also runs everything once before timing
+    batch_outputs = numba_module.between_factor_pose3_batch(
+        *batch_storage, batch_sqrt_info, batch_epsilon
+    )
+    for i in (0, num_inputs - 1):
+        python_outputs = python_module.between_factor_pose3(*poses[i], sqrt_info, epsilon)
+        numba_outputs = numba_module.between_factor_pose3(*storage[i], sqrt_info, epsilon)
+        for python_output, numba_output, batch_output in zip(
+            python_outputs, numba_outputs, batch_outputs
+        ):
+            np.testing.assert_allclose(python_output, numba_output, atol=1e-9)
+            np.testing.assert_allclose(python_output, batch_output[i], atol=1e-9)
+
+    times = {
+        name: min(timeit.repeat(run, number=1, repeat=number))
+        for name, run in (
+            ("python", run_python),
+            ("numba", run_numba),
+            ("numba batch", run_numba_batch),
+        )
+    }
+
+    print(f"Linearizing {num_inputs} Pose3 between factors")
+    for name, run_time in times.items():
+        print(
+            f"{name:>12}: {run_time * 1e3:9.3f} ms total, {run_time / num_inputs * 1e6:8.3f} us "
+            f"per factor ({times['python'] / run_time:.1f}x python)"
+        )
+
+
+if __name__ == "__main__":
+    argh.dispatch_command(main)
@@ -0,0 +1,75 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+"""
+Micro-benchmark of the Ops.implementation dispatch cache on a large nested Values
+"""
+
+import argh
+import timeit
+from unittest import mock
+
+import symforce.symbolic as sf
+from symforce import typing as T
+from symforce.ops import StorageOps
+from symforce.ops.ops import Ops
+from symforce.values import Values
+
+
+def make_values(num_keys: int) -> Values:
+    """
+    A nested Values with a mix of scalars, matrices, geo types and sequences
+    """
+    values = Values()
+    for i in range(num_keys):
+        with values.scope(f"states{i}"):
+            values["pose"] = sf.Pose3.symbolic(f"pose{i}")
+            values["velocity"] = sf.V3.symbolic(f"velocity{i}")
+            values["time"] = sf.Symbol(f"t{i}")
+            values["landmarks"] = [sf.Rot3.symbolic(f"landmark{i}_{j}") for j in range(2)]
+    return values
+
+
+def time_ops(values: Values, number: int) -> T.Dict[str, float]:
+    """
+    Returns the time in seconds of each StorageOps-heavy operation on values
+    """
+    storage = values.to_storage()
+    leaf_types = [type(value) for value in values.values_recursive()]
+    return {
+        "implementation": timeit.timeit(
+            lambda: [StorageOps.implementation(leaf_type) for leaf_type in leaf_types],
+            number=number,
+        )
+        / number,
+        "to_storage": timeit.timeit(values.to_storage, number=number) / number,
+        "index": timeit.timeit(values.index, number=number) / number,
+        "from_storage": timeit.timeit(lambda: values.from_storage(storage), number=number) / number,
+    }
+
+
+@argh.arg("--num-keys", help="Number of top-level entries in the Values")
+@argh.arg("--number", help="Number of times to run each operation")
+def main(num_keys: int = 1000, number: int = 5) -> None:
+    values = make_values(num_keys)
+
+    cached = time_ops(values, number)
+
+    # Bypass the cache, by looking up the implementation every time
+    def find_implementation(cls: T.Type[Ops], impl_type: T.Type) -> T.Type:
+        return cls._find_implementation(impl_type)
+
+    with mock.patch.object(Ops, "implementation", classmethod(find_implementation)):
+        uncached = time_ops(values, number)
+
+    print(f"Values with {num_keys} nested entries, {len(values.keys_recursive())} leaves")
+    for name, cached_time in cached.items():
+        print(
+            f"{name:>14}: {uncached[name] * 1e3:8.2f} ms uncached, {cached_time * 1e3:8.2f} ms "
+            f"cached ({uncached[name] / cached_time:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    argh.dispatch_command(main)
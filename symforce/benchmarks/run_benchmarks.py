@@ -22,6 +22,13 @@ from symforce import path_util
 from symforce import typing as T
 
 CONFIG = {
+    "bundle_adjustment_in_the_large": {
+        "double": {
+            "sym_bal_cholesky",
+            "sym_bal_conjugate_gradient",
+            "sym_bal_schur",
+        },
+    },
     "inverse_compose_jacobian": {
         "double": {
             "gtsam_chained",
@@ -8,6 +8,7 @@ from sympy.printing.c import get_math_macros
 from sympy.printing.cxx import CXX11CodePrinter
 
 from symforce import typing as T
+from symforce.codegen.printers.symengine_code_printer import SymengineCodePrinter
 
 
 class CppCodePrinter(CXX11CodePrinter):
@@ -53,6 +54,33 @@ class CppCodePrinter(CXX11CodePrinter):
         Customizations:
             * Convert small powers into multiplies, divides, and square roots.
         """
+        return self._format_pow(
+            exp=expr.exp,
+            base_str=self._print(expr.base),
+            base_is_symbol=isinstance(expr.base, sympy.Symbol),
+            exp_str=self._print(expr.exp),
+            exp_is_symbol=isinstance(expr.exp, sympy.Symbol),
+        )
+
+    def _format_pow(
+        self,
+        exp: sympy.Expr,
+        base_str: str,
+        base_is_symbol: bool,
+        exp_str: str,
+        exp_is_symbol: bool,
+    ) -> str:
+        """
+        Format base**exp from the printed base and exponent, for `_print_Pow` and
+        `SymengineCppCodePrinter`
+
+        Args:
+            exp: The exponent, which determines whether the power is special-cased
+            base_str: The printed base
+            base_is_symbol: Whether the base is a Symbol
+            exp_str: The printed exponent
+            exp_is_symbol: Whether the exponent is a Symbol
+        """
         # std::pow(float, integral_type), std::pow(integral_type, float), and
         # std::sqrt(integral_type) will convert all arguments to double; so, we have to cast
         # arguments to Scalar first.  We can't just cast them if they're sympy.Integer, because they
@@ -62,31 +90,22 @@ class CppCodePrinter(CXX11CodePrinter):
         # a Symbol
         # https://en.cppreference.com/w/cpp/numeric/math/pow
         # https://en.cppreference.com/w/cpp/numeric/math/sqrt
-        raw_base_str = self._print(expr.base)
-        if isinstance(expr.base, sympy.Symbol):
-            base_str = raw_base_str
-        else:
-            base_str = f"Scalar({raw_base_str})"
-
-        raw_exp_str = self._print(expr.exp)
-        if isinstance(expr.exp, sympy.Symbol):
-            exp_str = raw_exp_str
-        else:
-            exp_str = f"Scalar({raw_exp_str})"
+        scalar_base_str = base_str if base_is_symbol else f"Scalar({base_str})"
+        scalar_exp_str = exp_str if exp_is_symbol else f"Scalar({exp_str})"
 
         # We don't special-case 2, because std::pow(x, 2) compiles to x * x under all circumstances
         # we tested (floats or doubles, fast-math or not)
 
-        if expr.exp == -1:
-            return f"{self._print_Float(sympy.S(1.0))} / ({raw_base_str})"
-        elif expr.exp == 3:
-            return f"[&]() {{ const Scalar base = {raw_base_str}; return base * base * base; }}()"
-        elif expr.exp == sympy.S.One / 2:
-            return f"{self._ns}sqrt({base_str})"
-        elif expr.exp == sympy.S(3) / 2:
-            return f"({raw_base_str} * {self._ns}sqrt({base_str}))"
+        if exp == -1:
+            return f"{self._print_Float(sympy.S(1.0))} / ({base_str})"
+        elif exp == 3:
+            return f"[&]() {{ const Scalar base = {base_str}; return base * base * base; }}()"
+        elif exp == sympy.S.One / 2:
+            return f"{self._ns}sqrt({scalar_base_str})"
+        elif exp == sympy.S(3) / 2:
+            return f"({base_str} * {self._ns}sqrt({scalar_base_str}))"
         else:
-            return f"{self._ns}pow({base_str}, {exp_str})"
+            return f"{self._ns}pow({scalar_base_str}, {scalar_exp_str})"
 
     def _print_Max(self, expr: sympy.Max) -> str:
         """
@@ -159,3 +178,25 @@ class ComplexCppCodePrinter(CppCodePrinter):  # pylint: disable=too-many-ancesto
             * Cast to Scalar, since the literal is of type std::complex<double>
         """
         return "Scalar(1i)"
+
+
+class SymengineCppCodePrinter(SymengineCodePrinter):
+    """
+    Prints symengine expressions the same way as CppCodePrinter prints their SymPy equivalents,
+    without converting them to SymPy
+    """
+
+    def __init__(self, sympy_printer: T.Optional[CppCodePrinter] = None) -> None:
+        super().__init__(sympy_printer or CppCodePrinter())
+
+    def _print_pow(self, base: T.Any, exp: sympy.Rational) -> str:
+        """
+        Matches CppCodePrinter._print_Pow
+        """
+        return self.sympy_printer._format_pow(
+            exp=exp,
+            base_str=self._print(base),
+            base_is_symbol=not self._native(base) and isinstance(self._leaf(base), sympy.Symbol),
+            exp_str=self.sympy_printer._print(exp),
+            exp_is_symbol=False,
+        )
@@ -8,6 +8,7 @@ from sympy.printing.codeprinter import CodePrinter
 
 from symforce import typing as T
 from symforce.codegen.codegen_config import CodegenConfig
+from symforce.codegen.printers.symengine_code_printer import SymengineCodePrinter
 
 CURRENT_DIR = Path(__file__).parent
 
@@ -23,6 +24,10 @@ class CppConfig(CodegenConfig):
         use_eigen_types: Use eigen_lcm types for vectors instead of lists
         autoformat: Run a code formatter on the generated code
         cse_optimizations: Optimizations argument to pass to sf.cse
+        cse_groups: Groups of output keys to perform common sub-expression elimination on
+                    separately, see CodegenConfig
+        cse_jobs: Number of processes to run common sub-expression elimination and printing of
+                  the cse_groups in
         support_complex: Generate code that can work with std::complex or with regular float types
         force_no_inline: Mark generated functions as `__attribute__((noinline))`
         zero_initialization_sparsity_threshold: Threshold between 0 and 1 for the sparsity below
@@ -69,6 +74,14 @@ class CppConfig(CodegenConfig):
         else:
             return cpp_code_printer.CppCodePrinter()
 
+    def symengine_printer(self) -> T.Optional[SymengineCodePrinter]:
+        from symforce.codegen.backends.cpp import cpp_code_printer
+
+        printer = self.printer()
+        if type(printer) is not cpp_code_printer.CppCodePrinter:
+            return None
+        return cpp_code_printer.SymengineCppCodePrinter(printer)
+
     @staticmethod
     def format_data_accessor(prefix: str, index: int) -> str:
         return f"{prefix}.Data()[{index}]"
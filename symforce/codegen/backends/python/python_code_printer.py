@@ -4,8 +4,14 @@
 # ----------------------------------------------------------------------------
 
 import sympy
+from sympy.printing.numpy import NumPyPrinter
+from sympy.printing.precedence import PRECEDENCE
+from sympy.printing.precedence import precedence
 from sympy.printing.pycode import PythonCodePrinter as _PythonCodePrinter
 
+from symforce import typing as T
+from symforce.codegen.printers.symengine_code_printer import SymengineCodePrinter
+
 
 class PythonCodePrinter(_PythonCodePrinter):
     """
@@ -20,6 +26,56 @@ class PythonCodePrinter(_PythonCodePrinter):
         """
         return f"{expr.p}./{expr.q}."
 
+    def _hprint_Pow(self, expr: sympy.Pow, rational: bool = False, sqrt: str = "math.sqrt") -> str:
+        """
+        Customizations:
+            * Formats the result with `_format_pow`, which is shared with
+              `SymenginePythonCodePrinter`
+        """
+        level = precedence(expr)
+        return self._format_pow(
+            exp=expr.exp,
+            base_str=self._print(expr.base),
+            parenthesize_base=precedence(expr.base) <= level,
+            exp_str=self.parenthesize(expr.exp, level, strict=False),
+            rational=rational,
+            commutative=expr.is_commutative,
+            sqrt=sqrt,
+        )
+
+    def _format_pow(
+        self,
+        exp: sympy.Expr,
+        base_str: str,
+        parenthesize_base: bool,
+        exp_str: str,
+        rational: bool = False,
+        commutative: bool = True,
+        sqrt: str = "math.sqrt",
+    ) -> str:
+        """
+        Format base**exp from the printed base and exponent, in the same way as
+        `AbstractPythonCodePrinter._hprint_Pow`
+
+        Args:
+            exp: The exponent, which determines whether the power is printed as a square root
+            base_str: The printed base
+            parenthesize_base: Whether the base needs to be parenthesized in base**exp
+            exp_str: The printed exponent, parenthesized if needed
+            rational: If True, square roots are printed as powers
+            commutative: Whether the power is commutative
+            sqrt: The square root function
+        """
+        if exp == sympy.S.Half and not rational:
+            return "{}({})".format(self._module_format(sqrt), base_str)
+
+        if commutative and -exp is sympy.S.Half and not rational:
+            return "{}/{}({})".format(self._print(sympy.S.One), self._module_format(sqrt), base_str)
+
+        if parenthesize_base:
+            base_str = f"({base_str})"
+        return f"{base_str}**{exp_str}"
+
     def _print_Max(self, expr: sympy.Max) -> str:
         """
         Max is not supported by default, so we add a version here.
@@ -59,3 +115,67 @@ class PythonCodePrinter(_PythonCodePrinter):
         return "{}[int({})]".format(
             expr.parent, self._print(expr.j + expr.i * expr.parent.shape[1])
         )
+
+
+class PythonVectorizedCodePrinter(NumPyPrinter):
+    """
+    Symforce customized code printer for vectorized Python, where every symbol is a numpy array
+    of values to evaluate at.  Uses elementwise numpy functions instead of the scalar functions
+    from `math`.
+    """
+
+    def __init__(self, settings: T.Optional[T.Dict[str, T.Any]] = None) -> None:
+        super().__init__(dict(settings or {}, fully_qualified_modules=True))
+
+    def _print_Rational(self, expr: sympy.Rational) -> str:
+        """
+        Customizations:
+            * Decimal points for Python2 support, doesn't exist in some sympy versions.
+        """
+        return f"{expr.p}./{expr.q}."
+
+    def _print_Max(self, expr: sympy.Max) -> str:
+        """
+        Elementwise max, which unlike numpy.amax supports mixing scalars and arrays.
+        """
+        result = self._print(expr.args[0])
+        for arg in expr.args[1:]:
+            result = f"numpy.maximum({result}, {self._print(arg)})"
+        return result
+
+    def _print_Min(self, expr: sympy.Min) -> str:
+        """
+        Elementwise min, which unlike numpy.amin supports mixing scalars and arrays.
+        """
+        result = self._print(expr.args[0])
+        for arg in expr.args[1:]:
+            result = f"numpy.minimum({result}, {self._print(arg)})"
+        return result
+
+    def _print_Heaviside(self, expr: "sympy.Heaviside") -> str:  # type: ignore[override]
+        """
+        Heaviside with the same value at 0 as `PythonCodePrinter`.
+        """
+        return f"numpy.heaviside({self._print(expr.args[0])}, 1.0)"
+
+
+class SymenginePythonCodePrinter(SymengineCodePrinter):
+    """
+    Prints symengine expressions the same way as PythonCodePrinter prints their SymPy
+    equivalents, without converting them to SymPy
+    """
+
+    def __init__(self, sympy_printer: T.Optional[PythonCodePrinter] = None) -> None:
+        super().__init__(sympy_printer or PythonCodePrinter())
+
+    def _print_pow(self, base: T.Any, exp: sympy.Rational) -> str:
+        """
+        Matches PythonCodePrinter._hprint_Pow
+        """
+        printer = self.sympy_printer
+        return printer._format_pow(
+            exp=exp,
+            base_str=self._print(base),
+            parenthesize_base=self._precedence(base) <= PRECEDENCE["Pow"],
+            exp_str=printer.parenthesize(exp, PRECEDENCE["Pow"]),
+        )
@@ -8,6 +8,7 @@ from sympy.printing.codeprinter import CodePrinter
 
 from symforce import typing as T
 from symforce.codegen.codegen_config import CodegenConfig
+from symforce.codegen.printers.symengine_code_printer import SymengineCodePrinter
 
 
 CURRENT_DIR = Path(__file__).parent
@@ -24,12 +25,30 @@ class PythonConfig(CodegenConfig):
         use_eigen_types: Use eigen_lcm types for vectors instead of lists
         autoformat: Run a code formatter on the generated code
         cse_optimizations: Optimizations argument to pass to sf.cse
-        use_numba: Add the `@numba.njit` decorator to generated functions.  This will greatly
-                   speed up functions by compiling them to machine code, but has large overhead
-                   on the first call and some overhead on subsequent calls, so it should not be
-                   used for small functions or functions that are only called a handfull of
-                   times.
+        cse_groups: Groups of output keys to perform common sub-expression elimination on
+                    separately, see CodegenConfig
+        cse_jobs: Number of processes to run common sub-expression elimination and printing of
+                  the cse_groups in
+        use_numba: Compile generated functions with `numba.njit`, which greatly speeds them up.
+                   Geo and cam inputs and outputs are flat float64 arrays of their storage, and
+                   matrices are flat float64 arrays in storage (column-major) order.  The
+                   functions are compiled for explicit float64 signatures when the module is
+                   imported, and the compiled code is cached on disk next to the generated
+                   module, so only the first import pays for compilation.  A parallel
+                   `<name>_batch` function is also generated, which evaluates the function over N
+                   inputs at once, where each input is an array of shape (N, storage_dim), or
+                   (N,) for scalars.
         matrix_is_1D: sf.Matrix symbols get formatted as a 1D array
+        vectorized: Generate functions which evaluate over N inputs at once using numpy.  Each
+                    input is an array of shape (N, storage_dim), or (N,) for scalars, and
+                    outputs are arrays of shape (N, storage_dim), (N, rows, cols) for matrices,
+                    or (N,) for scalars.  Inputs with no leading dimension are broadcast.
+        outputs_in_place: Generate functions which write their outputs into arrays passed as
+                          arguments after the inputs, instead of allocating and returning them.
+                          Every output must be a dense matrix; column vectors are written into
+                          arrays of shape (rows,), and other matrices into arrays of shape
+                          (rows, cols), which may have any strides.  Outputs passed as None are
+                          not written.
     """
 
     doc_comment_line_prefix: str = ""
@@ -37,6 +56,14 @@ class PythonConfig(CodegenConfig):
     use_eigen_types: bool = True
     use_numba: bool = False
     matrix_is_1d: bool = True
+    vectorized: bool = False
+    outputs_in_place: bool = False
+
+    def __post_init__(self) -> None:
+        if self.vectorized and self.use_numba:
+            raise ValueError("use_numba is not supported for vectorized functions")
+        if self.outputs_in_place and (self.vectorized or self.use_numba):
+            raise ValueError("outputs_in_place is not supported for vectorized or numba functions")
 
     @classmethod
     def backend_name(cls) -> str:
@@ -55,4 +82,14 @@ class PythonConfig(CodegenConfig):
     def printer(self) -> CodePrinter:
         from symforce.codegen.backends.python import python_code_printer
 
+        if self.vectorized:
+            return python_code_printer.PythonVectorizedCodePrinter()
         return python_code_printer.PythonCodePrinter()
+
+    def symengine_printer(self) -> T.Optional[SymengineCodePrinter]:
+        from symforce.codegen.backends.python import python_code_printer
+
+        printer = self.printer()
+        if type(printer) is not python_code_printer.PythonCodePrinter:
+            return None
+        return python_code_printer.SymenginePythonCodePrinter(printer)
@@ -8,6 +8,7 @@ import pathlib
 import tempfile
 import textwrap
 import collections
+import functools
 
 from symforce import logger
 import symforce.symbolic as sf
@@ -238,9 +239,41 @@ def cam_cal_from_points(
     )
 
 
-def generate(config: CodegenConfig, output_dir: str = None) -> str:
+def _render_class_templates(
+    cls: T.Type,
+    config: CodegenConfig,
+    cam_package_dir: pathlib.Path,
+    relative_paths: T.Sequence[T.Tuple[str, str]],
+) -> None:
+    """
+    Build the template data for cls, and render its templates at the given (base_dir,
+    relative_path) pairs, where "CLASS" in relative_path is replaced by the name of cls.
+    """
+    data = cam_class_data(cls, config=config)
+
+    templates = template_util.TemplateList(config.template_dir())
+    for base_dir, relative_path in relative_paths:
+        template_path = pathlib.Path(base_dir, relative_path + ".jinja")
+        output_path = cam_package_dir / relative_path.replace(
+            "CLASS", python_util.camelcase_to_snakecase(cls.__name__)
+        )
+        templates.add(template_path, data, output_path=output_path)
+    templates.render()
+
+
+def generate(config: CodegenConfig, output_dir: str = None, jobs: int = 1) -> str:
     """
     Generate the cam package for the given language.
+
+    Always renders and formats the whole package; unlike `Codegen.generate_function`, there is no
+    incremental mode.  Files whose contents are unchanged are not rewritten though, so their
+    modification times are preserved.
+
+    Args:
+        config: Language and configuration to generate the package with
+        output_dir: Directory to generate the package in, defaults to a new temporary directory
+        jobs: Number of processes to generate the camera types (and the geo package) in; the
+              generated package is identical for any number of jobs
     """
     # Create output directory if needed
     if output_dir is None:
@@ -260,25 +293,25 @@ def generate(config: CodegenConfig, output_dir: str = None) -> str:
         # First generate the geo package as it's a dependency of the cam package
         from symforce.codegen import geo_package_codegen
 
-        geo_package_codegen.generate(config=config, output_dir=output_dir)
-
-        # Build up templates for each type
-
-        for cls in DEFAULT_CAM_TYPES:
-            data = cam_class_data(cls, config=config)
-
-            for base_dir, relative_path in (
-                ("cam_package", "CLASS.py"),
-                ("cam_package", "ops/CLASS/camera_ops.py"),
-                ("cam_package", "ops/CLASS/__init__.py"),
-                (".", "ops/CLASS/group_ops.py"),
-                (".", "ops/CLASS/lie_group_ops.py"),
-            ):
-                template_path = pathlib.Path(base_dir, relative_path + ".jinja")
-                output_path = cam_package_dir / relative_path.replace(
-                    "CLASS", python_util.camelcase_to_snakecase(cls.__name__)
-                )
-                templates.add(template_path, data, output_path=output_path)
+        geo_package_codegen.generate(config=config, output_dir=output_dir, jobs=jobs)
+
+        # Render templates for each type
+        python_util.forked_map(
+            functools.partial(
+                _render_class_templates,
+                config=config,
+                cam_package_dir=cam_package_dir,
+                relative_paths=(
+                    ("cam_package", "CLASS.py"),
+                    ("cam_package", "ops/CLASS/camera_ops.py"),
+                    ("cam_package", "ops/CLASS/__init__.py"),
+                    (".", "ops/CLASS/group_ops.py"),
+                    (".", "ops/CLASS/lie_group_ops.py"),
+                ),
+            ),
+            DEFAULT_CAM_TYPES,
+            jobs=jobs,
+        )
 
         # Package init
         # NOTE(brad): We already do this in geo_package_codegen.py. We need it there in case we
@@ -313,27 +346,28 @@ def generate(config: CodegenConfig, output_dir: str = None) -> str:
         # First generate the geo package as it's a dependency of the cam package
         from symforce.codegen import geo_package_codegen
 
-        geo_package_codegen.generate(config=config, output_dir=output_dir)
-
-        # Build up templates for each type
-        for cls in DEFAULT_CAM_TYPES:
-            data = cam_class_data(cls, config=config)
-
-            for base_dir, relative_path in (
-                ("cam_package", "CLASS.h"),
-                ("cam_package", "CLASS.cc"),
-                (".", "ops/CLASS/storage_ops.h"),
-                (".", "ops/CLASS/storage_ops.cc"),
-                (".", "ops/CLASS/group_ops.h"),
-                (".", "ops/CLASS/group_ops.cc"),
-                (".", "ops/CLASS/lie_group_ops.h"),
-                (".", "ops/CLASS/lie_group_ops.cc"),
-            ):
-                template_path = pathlib.Path(base_dir, relative_path + ".jinja")
-                output_path = cam_package_dir / relative_path.replace(
-                    "CLASS", python_util.camelcase_to_snakecase(cls.__name__)
-                )
-                templates.add(template_path, data, output_path=output_path)
+        geo_package_codegen.generate(config=config, output_dir=output_dir, jobs=jobs)
+
+        # Render templates for each type
+        python_util.forked_map(
+            functools.partial(
+                _render_class_templates,
+                config=config,
+                cam_package_dir=cam_package_dir,
+                relative_paths=(
+                    ("cam_package", "CLASS.h"),
+                    ("cam_package", "CLASS.cc"),
+                    (".", "ops/CLASS/storage_ops.h"),
+                    (".", "ops/CLASS/storage_ops.cc"),
+                    (".", "ops/CLASS/group_ops.h"),
+                    (".", "ops/CLASS/group_ops.cc"),
+                    (".", "ops/CLASS/lie_group_ops.h"),
+                    (".", "ops/CLASS/lie_group_ops.cc"),
+                ),
+            ),
+            DEFAULT_CAM_TYPES,
+            jobs=jobs,
+        )
 
         # Add Camera and PosedCamera
         templates.add(
@@ -370,12 +404,12 @@ def generate(config: CodegenConfig, output_dir: str = None) -> str:
                     cpp_cam_types=[
                         f"sym::{cls.__name__}<{scalar}>"
                         for cls in DEFAULT_CAM_TYPES
-                        for scalar in data["scalar_types"]
+                        for scalar in Codegen.common_data()["scalar_types"]
                     ],
                     fully_implemented_cpp_cam_types=[
                         f"sym::{cls.__name__}<{scalar}>"
                         for cls in DEFAULT_CAM_TYPES
-                        for scalar in data["scalar_types"]
+                        for scalar in Codegen.common_data()["scalar_types"]
                         if supports_camera_ray_from_pixel(cls)
                     ],
                 ),
@@ -9,6 +9,7 @@ import copy
 import dataclasses
 import enum
 import functools
+import hashlib
 import os
 import pathlib
 from pathlib import Path
@@ -26,6 +27,9 @@ from symforce.codegen import template_util
 from symforce.codegen import codegen_util
 from symforce.codegen import codegen_config
 from symforce.codegen import types_package_codegen
+from symforce.codegen.codegen_manifest import CodegenManifest
+from symforce.codegen.similarity_index import SimilarityIndex
+from symforce.codegen.backends.python.python_config import PythonConfig
 from symforce.type_helpers import symbolic_inputs
 
 CURRENT_DIR = Path(__file__).parent
@@ -146,6 +150,13 @@ class Codegen:
             for key in sparse_matrices:
                 self.sparse_mat_data[key] = codegen_util.CSCFormat.from_matrix(outputs[key])
 
+        if isinstance(config, PythonConfig) and config.vectorized:
+            self._check_array_arguments("vectorized")
+        if isinstance(config, PythonConfig) and config.use_numba:
+            self._check_array_arguments("numba")
+        if isinstance(config, PythonConfig) and config.outputs_in_place:
+            self._check_in_place_outputs()
+
         self.docstring = (
             docstring or Codegen.default_docstring(inputs=inputs, outputs=outputs)
         ).rstrip()
@@ -156,6 +167,39 @@ class Codegen:
         self.unique_namespaces: T.Optional[T.Set[str]] = None
         self.namespace: T.Optional[str] = None
 
+    def _check_array_arguments(self, kind: str) -> None:
+        """
+        Check that the inputs and outputs can be used in a vectorized or numba Python function,
+        where every argument is stored as a numpy array (or is a scalar).
+
+        Args:
+            kind: The kind of function, for error messages
+        """
+        if self.sparse_mat_data:
+            raise ValueError(f"Sparse matrices are not supported for {kind} functions")
+
+        for key, value in list(self.inputs.items()) + list(self.outputs.items()):
+            if isinstance(value, (Values, list, tuple, sf.DataBuffer)):
+                raise ValueError(
+                    f"Only scalars, matrices, and geo and cam types are supported for {kind} "
+                    f'functions, got "{key}" of type {type(value)}'
+                )
+
+    def _check_in_place_outputs(self) -> None:
+        """
+        Check that the outputs can be written in place by a Python function, which needs every
+        output to be a dense matrix (see `PythonConfig.outputs_in_place`)
+        """
+        if self.sparse_mat_data:
+            raise ValueError("Sparse matrices are not supported for outputs_in_place functions")
+
+        for key, value in self.outputs.items():
+            if not isinstance(value, sf.Matrix):
+                raise ValueError(
+                    "Only matrix outputs are supported for outputs_in_place functions, got "
+                    f'"{key}" of type {type(value)}'
+                )
+
     @classmethod
     def function(
         cls,
@@ -309,6 +353,8 @@ class Codegen:
         namespace: str = "sym",
         generated_file_name: str = None,
         skip_directory_nesting: bool = False,
+        incremental: bool = False,
+        generate_lcm_bindings: bool = True,
     ) -> GeneratedPaths:
         """
         Generates a function that computes the given outputs from the given inputs.
@@ -334,6 +380,19 @@ class Codegen:
                                  no file extension
             skip_directory_nesting: Generate the output file directly into output_dir instead of
                                     adding the usual directory structure inside output_dir
+            incremental: Record the generated function in a manifest in output_dir (see
+                         CodegenManifest), and skip generating it if the manifest shows the same
+                         function was already generated there, with the same arguments,
+                         templates and symforce.codegen sources, and its files still exist.
+                         Generated files which are already up to date are never rewritten, so
+                         their modification times are preserved either way.  Only applies to this
+                         function; the geo and cam package generators have no manifest, and always
+                         render their packages.
+            generate_lcm_bindings: Generate the language-specific LCM bindings of any generated
+                                   types with skymarshal.  The generated python functions don't
+                                   use the bindings, so this may be disabled if the bindings aren't
+                                   needed otherwise.  The .lcm type definitions are always
+                                   generated.
         """
         assert (
             self.name is not None
@@ -355,6 +414,39 @@ class Codegen:
         if generated_file_name is None:
             generated_file_name = self.name
 
+        backend_name = self.config.backend_name()
+        if skip_directory_nesting:
+            out_function_dir = output_dir
+        else:
+            out_function_dir = output_dir / backend_name / "symforce" / namespace
+
+        if incremental:
+            manifest = CodegenManifest(output_dir)
+            manifest_name = os.path.relpath(out_function_dir / generated_file_name, output_dir)
+            manifest_key = self._manifest_key(
+                output_dir=output_dir,
+                lcm_bindings_output_dir=lcm_bindings_output_dir,
+                shared_types=shared_types,
+                namespace=namespace,
+                generated_file_name=generated_file_name,
+                skip_directory_nesting=skip_directory_nesting,
+                generate_lcm_bindings=generate_lcm_bindings,
+            )
+            generated_files = manifest.up_to_date_files(manifest_name, manifest_key)
+            if generated_files is not None:
+                logger.info(
+                    f'Skipping {backend_name} function "{self.name}" at "{out_function_dir}", '
+                    "which is up to date"
+                )
+                return GeneratedPaths(
+                    output_dir=output_dir,
+                    lcm_type_dir=output_dir / "lcmtypes",
+                    function_dir=out_function_dir,
+                    python_types_dir=lcm_bindings_output_dir / "python",
+                    cpp_types_dir=lcm_bindings_output_dir / "cpp" / "lcmtypes",
+                    generated_files=generated_files,
+                )
+
         # List of (template_path, output_path, data, template_dir)
         templates = template_util.TemplateList()
 
@@ -400,12 +492,6 @@ class Codegen:
         template_data = dict(self.common_data(), spec=self)
         template_dir = self.config.template_dir()
 
-        backend_name = self.config.backend_name()
-        if skip_directory_nesting:
-            out_function_dir = output_dir
-        else:
-            out_function_dir = output_dir / backend_name / "symforce" / namespace
-
         logger.info(f'Creating {backend_name} function from "{self.name}" at "{out_function_dir}"')
 
         # Get templates to render
@@ -422,19 +508,55 @@ class Codegen:
 
         lcm_data = codegen_util.generate_lcm_types(
             lcm_type_dir=types_codegen_data["lcm_type_dir"],
-            lcm_files=types_codegen_data["lcm_files"],
+            lcm_files=types_codegen_data["lcm_files"] if generate_lcm_bindings else [],
             lcm_output_dir=types_codegen_data["lcm_bindings_output_dir"],
         )
 
+        generated_files = [Path(v.output_path) for v in templates.items]
+        if incremental:
+            manifest.update(manifest_name, manifest_key, generated_files)
+
         return GeneratedPaths(
             output_dir=output_dir,
             lcm_type_dir=Path(types_codegen_data["lcm_type_dir"]),
             function_dir=out_function_dir,
             python_types_dir=lcm_data["python_types_dir"],
             cpp_types_dir=lcm_data["cpp_types_dir"],
-            generated_files=[Path(v.output_path) for v in templates.items],
+            generated_files=generated_files,
         )
 
+    def _manifest_key(
+        self,
+        output_dir: Path,
+        lcm_bindings_output_dir: Path,
+        shared_types: T.Optional[T.Mapping[str, str]],
+        namespace: str,
+        generated_file_name: str,
+        skip_directory_nesting: bool,
+        generate_lcm_bindings: bool,
+    ) -> str:
+        """
+        Returns a hash of everything which determines the files generated by generate_function
+        with the given arguments, for its CodegenManifest entry.  Includes the SimilarityIndex, the
+        name and docstring (which the SimilarityIndex leaves out), the templates, and the
+        symforce.codegen sources (which include the code printers).
+        """
+        contents = [
+            SimilarityIndex.from_codegen(self).stable_hash(),
+            repr(self.name),
+            repr(self.docstring),
+            repr(namespace),
+            repr(generated_file_name),
+            repr(skip_directory_nesting),
+            repr(generate_lcm_bindings),
+            repr(sorted((shared_types or {}).items())),
+            os.path.relpath(lcm_bindings_output_dir, output_dir),
+            template_util.templates_hash(self.config.template_dir()),
+            template_util.templates_hash(template_util.LCM_TEMPLATE_DIR),
+            codegen_util.codegen_sources_hash(),
+        ]
+        return hashlib.sha256("\n".join(contents).encode()).hexdigest()
+
     @staticmethod
     def default_docstring(
         inputs: Values, outputs: Values, original_function: T.Callable = None
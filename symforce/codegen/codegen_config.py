@@ -8,6 +8,7 @@ from pathlib import Path
 from sympy.printing.codeprinter import CodePrinter
 
 from symforce import typing as T
+from symforce.codegen.printers.symengine_code_printer import SymengineCodePrinter
 
 CURRENT_DIR = Path(__file__).parent
 
@@ -26,6 +27,11 @@ class CodegenConfig:
         autoformat: Run a code formatter on the generated code
         cse_optimizations: Optimizations argument to pass to sf.cse
         matrix_is_1d: Whether sf.Matrix symbols get formatted as 1D
+        cse_groups: Groups of output keys to perform common sub-expression elimination on
+                    separately, e.g. to split the residual from the hessian.  Outputs not in any
+                    group form one more group.  By default all outputs are in one group.
+        cse_jobs: Number of processes to run common sub-expression elimination and printing of
+                  the cse_groups in.  This does not change the generated code.
     """
 
     doc_comment_line_prefix: str
@@ -37,6 +43,8 @@ class CodegenConfig:
     ] = None
     # TODO(hayk): Remove this parameter (by making everything 2D?)
     matrix_is_1d: bool = False
+    cse_groups: T.Optional[T.Sequence[T.Sequence[str]]] = None
+    cse_jobs: int = 1
 
     @classmethod
     @abstractmethod
@@ -70,6 +78,14 @@ class CodegenConfig:
         """
         pass
 
+    def symengine_printer(self) -> T.Optional[SymengineCodePrinter]:
+        """
+        Return an instance of a printer which prints symengine expressions directly, with the same
+        output as printer(), or None if this config doesn't have one.  If None, expressions are
+        converted to SymPy and printed with printer().
+        """
+        return None
+
     # TODO(hayk): Move this into code printer.
     @staticmethod
     def format_data_accessor(prefix: str, index: int) -> str:
@@ -0,0 +1,97 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+"""
+Manifest of the functions generated into an output directory, used by
+`Codegen.generate_function(incremental=True)` to skip regenerating functions which have not changed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import tempfile
+
+from symforce import logger
+from symforce import python_util
+from symforce import typing as T
+
+
+class CodegenManifest:
+    """
+    Records, for each function generated into a directory, a hash of everything that determines
+    its generated code, and the files that were generated for it.
+
+    The manifest is a json file named FILE_NAME in the directory.  Entries are named by the caller
+    (`Codegen.generate_function` uses the path of the generated function relative to the
+    directory), and file paths are stored relative to the directory, so the directory may be moved.
+
+    Args:
+        directory: The output directory the manifest describes
+    """
+
+    FILE_NAME = ".symforce_codegen_manifest.json"
+
+    # Incremented when the format of the manifest changes, which invalidates existing manifests
+    VERSION = 1
+
+    def __init__(self, directory: T.Openable) -> None:
+        self.directory = Path(directory)
+        self.path = self.directory / self.FILE_NAME
+
+    def _load(self) -> T.Dict[str, T.Dict[str, T.Any]]:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as ex:
+            logger.warning(f"Ignoring unreadable codegen manifest {self.path}: {ex}")
+            return {}
+
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def up_to_date_files(self, name: str, key: str) -> T.Optional[T.List[Path]]:
+        """
+        If the entry for name was recorded with key, and all of its files still exist, returns
+        the paths of its files.
+
+        Otherwise, returns None.
+        """
+        entry = self._load().get(name)
+        if entry is None or entry.get("key") != key:
+            return None
+
+        files = [self.directory / path for path in entry["files"]]
+        if not all(path.is_file() for path in files):
+            return None
+
+        return files
+
+    def update(self, name: str, key: str, files: T.Iterable[T.Openable]) -> None:
+        """
+        Record that files were generated for name with key, replacing any previous entry for name
+        """
+        entries = self._load()
+        entries[name] = {
+            "key": key,
+            "files": [os.path.relpath(path, self.directory) for path in files],
+        }
+
+        # Write to a temporary file and rename it into place, so that the manifest is never
+        # partially written
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=self.FILE_NAME, dir=self.directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(
+                    {"version": self.VERSION, "entries": entries}, f, indent=2, sort_keys=True
+                )
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+        finally:
+            python_util.remove_if_exists(tmp_path)
@@ -16,6 +16,7 @@ import itertools
 from pathlib import Path
 import sympy
 import sys
+import tempfile
 
 import symforce
 from symforce import ops
@@ -24,6 +25,7 @@ import symforce.symbolic as sf
 from symforce import typing as T
 from symforce.codegen import format_util
 from symforce.codegen import codegen_config
+from symforce.codegen.lcm_types_cache import LcmTypesCache
 from symforce import python_util
 from symforce import _sympy_count_ops
 
@@ -99,6 +101,15 @@ class CSCFormat:
         )
 
 
+def codegen_sources_hash() -> str:
+    """
+    Returns a hex digest of the python sources (including the code printers) and templates of
+    symforce.codegen, which determine the code generated for a given Codegen object.  Used to
+    invalidate caches of generated code when working on symforce itself.
+    """
+    return python_util.files_hash(Path(__file__).parent, (".py", ".jinja"))
+
+
 def print_code(
     inputs: Values,
     outputs: Values,
@@ -109,6 +120,11 @@ def print_code(
     """
     Return executable code lines from the given input/output values.
 
+    If config.cse_groups is set, common sub-expression elimination and printing is done separately
+    for each group of outputs, in up to config.cse_jobs processes.  The temporaries of group i are
+    named "_tmp{i}_{j}", and are listed in the order of the groups.  The result does not depend on
+    the number of processes.
+
     Args:
         inputs: Values object specifying names and symbolic inputs
         outputs: Values object specifying names and output expressions (written in terms
@@ -124,6 +140,97 @@ def print_code(
         T.List[OutputWithTerms]: Collection of lines of code per sparse output variable
         int: Total number of ops
     """
+    if config.cse_groups is None:
+        groups = [(outputs, "_tmp")]
+    else:
+        groups = [
+            (group_outputs, f"_tmp{i}_")
+            for i, group_outputs in enumerate(_get_output_groups(outputs, config.cse_groups))
+        ]
+
+    printed_groups = python_util.forked_map(
+        lambda group: _print_code_group(inputs, group[0], sparse_mat_data, config, cse, group[1]),
+        groups,
+        jobs=config.cse_jobs,
+    )
+
+    # Merge the groups, keeping the outputs in their original order
+    intermediate_terms: T.List[T.Tuple[str, str]] = []
+    output_terms: T.Dict[str, T_terms_printed] = {}
+    for printed_group in printed_groups:
+        intermediate_terms.extend(printed_group.intermediate_terms)
+        output_terms.update(printed_group.output_terms)
+
+    # Pack names and types with outputs
+    dense_terms = [
+        OutputWithTerms(key, value, output_terms[key])
+        for key, value in outputs.items()
+        if key not in sparse_mat_data
+    ]
+    sparse_terms = [
+        OutputWithTerms(key, sparse_mat_data[key].nonzero_elements, output_terms[key])
+        for key in outputs.keys()
+        if key in sparse_mat_data
+    ]
+
+    return PrintCodeResult(
+        intermediate_terms=intermediate_terms,
+        dense_terms=dense_terms,
+        sparse_terms=sparse_terms,
+        total_ops=sum(printed_group.total_ops for printed_group in printed_groups),
+    )
+
+
+class _PrintedGroup(T.NamedTuple):
+    """
+    The code printed by _print_code_group for a group of outputs, keyed by output name.
+    """
+
+    intermediate_terms: T_terms_printed
+    output_terms: T.Dict[str, T_terms_printed]
+    total_ops: int
+
+
+def _get_output_groups(outputs: Values, cse_groups: T.Sequence[T.Sequence[str]]) -> T.List[Values]:
+    """
+    Split outputs into the groups of keys given by cse_groups, followed by a group of any
+    remaining outputs.
+    """
+    grouped_keys: T.Set[str] = set()
+    groups = []
+    for group_keys in cse_groups:
+        group_outputs = Values()
+        for key in group_keys:
+            if key not in outputs.keys():
+                raise ValueError(f"cse_groups contains {key}, which is not an output")
+            if key in grouped_keys:
+                raise ValueError(f"cse_groups contains {key} more than once")
+            grouped_keys.add(key)
+            group_outputs[key] = outputs[key]
+        groups.append(group_outputs)
+
+    remaining_outputs = Values()
+    for key, value in outputs.items():
+        if key not in grouped_keys:
+            remaining_outputs[key] = value
+    if remaining_outputs:
+        groups.append(remaining_outputs)
+
+    return groups
+
+
+def _print_code_group(
+    inputs: Values,
+    outputs: Values,
+    sparse_mat_data: T.Dict[str, CSCFormat],
+    config: codegen_config.CodegenConfig,
+    cse: bool,
+    tmp_prefix: str,
+) -> _PrintedGroup:
+    """
+    Print the code for the given outputs, with temporaries named by tmp_prefix.  Arguments are as
+    for print_code.
+    """
     # Split outputs into dense and sparse outputs, since we treat them differently when doing codegen
     dense_outputs = Values()
     sparse_outputs = Values()
@@ -143,6 +250,7 @@ def print_code(
         temps, simplified_outputs = perform_cse(
             output_exprs=output_exprs,
             cse_optimizations=config.cse_optimizations,
+            tmp_prefix=tmp_prefix,
         )
     else:
         temps = []
@@ -158,57 +266,54 @@ def print_code(
         config=config,
     )
 
-    simpify_list = lambda lst: [sympy.S(term) for term in lst]
-    simpify_nested_lists = lambda nested_lsts: [simpify_list(lst) for lst in nested_lsts]
-
-    temps_formatted = simpify_list(temps_formatted)
-    dense_outputs_formatted = simpify_nested_lists(dense_outputs_formatted)
-    sparse_outputs_formatted = simpify_nested_lists(sparse_outputs_formatted)
-
-    def count_ops(expr: T.Any) -> int:
-        op_count = _sympy_count_ops.count_ops(expr)
-        assert isinstance(op_count, int)
-        return op_count
+    # With symengine, count ops and print directly from the symengine expressions if the config
+    # supports it, which gives the same result as converting everything to sympy first
+    symengine_printer = None
+    if symforce.get_symbolic_api() == "symengine":
+        symengine_printer = config.symengine_printer()
+
+    if symengine_printer is not None:
+        total_ops = (
+            symengine_printer.count_ops(temps_formatted)
+            + symengine_printer.count_ops(dense_outputs_formatted)
+            + symengine_printer.count_ops(sparse_outputs_formatted)
+        )
 
-    total_ops = (
-        count_ops(temps_formatted)
-        + count_ops(dense_outputs_formatted)
-        + count_ops(sparse_outputs_formatted)
-    )
+        doprint = symengine_printer.doprint
+    else:
+        simpify_list = lambda lst: [sympy.S(term) for term in lst]
+        simpify_nested_lists = lambda nested_lsts: [simpify_list(lst) for lst in nested_lsts]
+
+        temps_formatted = simpify_list(temps_formatted)
+        dense_outputs_formatted = simpify_nested_lists(dense_outputs_formatted)
+        sparse_outputs_formatted = simpify_nested_lists(sparse_outputs_formatted)
+
+        def count_ops(expr: T.Any) -> int:
+            op_count = _sympy_count_ops.count_ops(expr)
+            assert isinstance(op_count, int)
+            return op_count
+
+        total_ops = (
+            count_ops(temps_formatted)
+            + count_ops(dense_outputs_formatted)
+            + count_ops(sparse_outputs_formatted)
+        )
 
-    # Get printer
-    printer = config.printer()
+        # Get printer
+        doprint = config.printer().doprint
 
     # Print code
-    intermediate_terms = [(str(var), printer.doprint(t)) for var, t in temps_formatted]
-    dense_outputs_code_no_names = [
-        [(str(var), printer.doprint(t)) for var, t in single_output_terms]
-        for single_output_terms in dense_outputs_formatted
-    ]
-    sparse_outputs_code_no_names = [
-        [(str(var), printer.doprint(t)) for var, t in single_output_terms]
-        for single_output_terms in sparse_outputs_formatted
-    ]
-
-    # Pack names and types with outputs
-    dense_terms = [
-        OutputWithTerms(key, value, output_code_no_name)
-        for output_code_no_name, (key, value) in zip(
-            dense_outputs_code_no_names, dense_outputs.items()
+    intermediate_terms = [(str(var), doprint(t)) for var, t in temps_formatted]
+    output_terms = {
+        key: [(str(var), doprint(t)) for var, t in single_output_terms]
+        for key, single_output_terms in itertools.chain(
+            zip(dense_outputs.keys(), dense_outputs_formatted),
+            zip(sparse_outputs.keys(), sparse_outputs_formatted),
         )
-    ]
-    sparse_terms = [
-        OutputWithTerms(key, value, sparse_output_code_no_name)
-        for sparse_output_code_no_name, (key, value) in zip(
-            sparse_outputs_code_no_names, sparse_outputs.items()
-        )
-    ]
+    }
 
-    return PrintCodeResult(
-        intermediate_terms=intermediate_terms,
-        dense_terms=dense_terms,
-        sparse_terms=sparse_terms,
-        total_ops=total_ops,
+    return _PrintedGroup(
+        intermediate_terms=intermediate_terms, output_terms=output_terms, total_ops=total_ops
     )
 
 
@@ -217,6 +322,7 @@ def perform_cse(
     cse_optimizations: T.Union[
         T.Literal["basic"], T.Sequence[T.Tuple[T.Callable, T.Callable]]
     ] = None,
+    tmp_prefix: str = "_tmp",
 ) -> T.Tuple[T_terms, DenseAndSparseOutputTerms]:
     """
     Run common sub-expression elimination on the given input/output values.
@@ -224,6 +330,7 @@ def perform_cse(
     Args:
         output_exprs: expressions on which to perform cse
         cse_optimizations: optimizations to be forwarded to sf.cse
+        tmp_prefix: prefix of the names of the temporaries, which are numbered from 0
 
     Returns:
         T_terms: Temporary variables holding the common sub-expressions found within output_exprs
@@ -236,7 +343,7 @@ def perform_cse(
 
     def tmp_symbols() -> T.Iterable[sf.Symbol]:
         for i in itertools.count():
-            yield sf.Symbol(f"_tmp{i}")
+            yield sf.Symbol(f"{tmp_prefix}{i}")
 
     if cse_optimizations is not None:
         if symforce.get_symbolic_api() == "symengine":
@@ -607,12 +714,30 @@ def get_base_instance(obj: T.Sequence[T.Any]) -> T.Any:
     return obj
 
 
+# Cache of generated LCM bindings used by generate_lcm_types, or None to disable caching
+_lcm_types_cache = LcmTypesCache.from_environment()
+
+
+def set_lcm_types_cache(cache: T.Optional[LcmTypesCache]) -> None:
+    """
+    Set the cache of generated LCM bindings used by generate_lcm_types, or None to always run
+    skymarshal.  The default is given by environment variables, see
+    `LcmTypesCache.from_environment`.
+    """
+    global _lcm_types_cache  # pylint: disable=global-statement
+    _lcm_types_cache = cache
+
+
 def generate_lcm_types(
     lcm_type_dir: T.Openable, lcm_files: T.Sequence[str], lcm_output_dir: T.Openable = None
 ) -> T.Dict[str, Path]:
     """
     Generates the language-specific type files for all symforce generated ".lcm" files.
 
+    The generated files are cached by the contents of the ".lcm" files (see
+    `set_lcm_types_cache`), so skymarshal only runs for types which have not been generated
+    before.  Files in the output directory which are already up to date are not rewritten.
+
     Args:
         lcm_type_dir: Directory containing symforce-generated .lcm files
         lcm_files: List of .lcm files to process
@@ -626,7 +751,6 @@ def generate_lcm_types(
 
     python_types_dir = lcm_output_dir / "python"
     cpp_types_dir = lcm_output_dir / "cpp" / "lcmtypes"
-    lcm_include_dir = "lcmtypes"
 
     result = {"python_types_dir": python_types_dir, "cpp_types_dir": cpp_types_dir}
 
@@ -635,10 +759,44 @@ def generate_lcm_types(
     if not lcm_files:
         return result
 
+    cache = _lcm_types_cache
+    key = None
+    bindings_dir = None
+    if cache is not None:
+        key = LcmTypesCache.key(lcm_type_dir)
+        bindings_dir = cache.get(key)
+    generated_dir = None
+    if bindings_dir is None:
+        generated_dir = Path(tempfile.mkdtemp(prefix="sf_lcm_types_"))
+        _run_skymarshal(lcm_type_dir, generated_dir)
+        if cache is not None and key is not None:
+            bindings_dir = cache.add_directory(key, generated_dir)
+        else:
+            bindings_dir = generated_dir
+
+    try:
+        _copy_changed_files(bindings_dir / "python", python_types_dir)
+        _copy_changed_files(bindings_dir / "cpp" / "lcmtypes", cpp_types_dir)
+    finally:
+        if generated_dir is not None:
+            python_util.remove_if_exists(generated_dir)
+
+    return result
+
+
+def _run_skymarshal(lcm_type_dir: Path, output_dir: Path) -> None:
+    """
+    Generate and format the python and C++ bindings for the .lcm files in lcm_type_dir, into the
+    python and cpp/lcmtypes subdirectories of output_dir
+    """
     from skymarshal import skymarshal
     from skymarshal.emit_python import SkymarshalPython
     from skymarshal.emit_cpp import SkymarshalCpp
 
+    python_types_dir = output_dir / "python"
+    cpp_types_dir = output_dir / "cpp" / "lcmtypes"
+    lcm_include_dir = "lcmtypes"
+
     skymarshal.main(
         [SkymarshalPython, SkymarshalCpp],
         args=[
@@ -660,7 +818,14 @@ def generate_lcm_types(
     # Autoformat generated python files
     format_util.format_py_dir(python_types_dir)
 
-    return result
+
+def _copy_changed_files(source_dir: Path, dest_dir: Path) -> None:
+    """
+    Copy all files in source_dir into dest_dir, recursively, other than files in dest_dir which
+    already have the same contents
+    """
+    for path in python_util.files_in_dir(source_dir, relative=True):
+        python_util.write_if_changed(dest_dir / path, (source_dir / path).read_text())
 
 
 def flat_symbols_from_values(values: Values) -> T.List[T.Any]:
@@ -5,8 +5,11 @@
 
 import black
 import copy
+import functools
+import hashlib
 import os
 import pathlib
+import tempfile
 
 from symforce import python_util
 from symforce import typing as T
@@ -14,11 +17,102 @@ from symforce import typing as T
 # TODO(aaron): Put this in a pyproject.toml and fetch from there
 BLACK_FILE_MODE = black.FileMode(line_length=100)
 
+# Maximum number of files to pass to one clang-format command
+_CLANG_FORMAT_BATCH_SIZE = 256
+
+
+def _cache_enabled() -> bool:
+    """
+    Whether formatted file contents are cached, i.e. the SYMFORCE_FORMAT_CACHE_DIR environment
+    variable is set.  Cache keys are only computed if this is True, since computing them isn't
+    free (e.g. for C++ it needs the style file and the clang-format version).
+    """
+    return bool(os.environ.get("SYMFORCE_FORMAT_CACHE_DIR"))
+
+
+def _cache_key(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _cache_get(key: T.Optional[str]) -> T.Optional[str]:
+    """
+    Look up formatted file contents in the directory given by the SYMFORCE_FORMAT_CACHE_DIR
+    environment variable, if it's set.  A key of None is never found.
+    """
+    cache_dir = os.environ.get("SYMFORCE_FORMAT_CACHE_DIR")
+    if not cache_dir or key is None:
+        return None
+
+    try:
+        return pathlib.Path(cache_dir, key).read_text()
+    except OSError:
+        return None
+
+
+def _cache_set(key: T.Optional[str], formatted_file_contents: str) -> None:
+    cache_dir = os.environ.get("SYMFORCE_FORMAT_CACHE_DIR")
+    if cache_dir and key is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file and rename, so that concurrent readers never see a
+            # partially written entry
+            with tempfile.NamedTemporaryFile(
+                "w", dir=cache_dir, prefix=f".{key}", delete=False
+            ) as f:
+                f.write(formatted_file_contents)
+            os.replace(f.name, os.path.join(cache_dir, key))
+        except OSError:
+            pass
+
+
+@functools.lru_cache
+def _clang_format_version() -> str:
+    return python_util.execute_subprocess(["clang-format", "--version"], log_stdout=False)
+
+
+@functools.lru_cache
+def _read_clang_format_style(style_path: pathlib.Path) -> str:
+    return style_path.read_text()
+
+
+def _find_clang_format_style(filename: T.Openable) -> T.Optional[pathlib.Path]:
+    """
+    Returns the style file clang-format would use for a file at the given path, i.e. the first
+    .clang-format or _clang-format file found traversing upwards from it.
+    """
+    for directory in pathlib.Path(filename).absolute().parents:
+        for style_name in (".clang-format", "_clang-format"):
+            if (directory / style_name).is_file():
+                return directory / style_name
+    return None
+
+
+def _format_cpp_cache_key(file_contents: str, filename: str) -> T.Optional[str]:
+    """
+    Identifies the result of formatting file_contents as filename, which depends on the
+    clang-format version, the style file, and the file name (which determines include ordering).
+
+    Returns None if the cache is disabled.
+    """
+    if not _cache_enabled():
+        return None
+
+    style_path = _find_clang_format_style(filename)
+    return _cache_key(
+        "clang-format",
+        _clang_format_version(),
+        _read_clang_format_style(style_path) if style_path is not None else "",
+        os.path.basename(filename),
+        file_contents,
+    )
+
 
 def format_cpp(file_contents: str, filename: str) -> str:
     """
     Autoformat a given C++ file using clang-format
 
+    Formatted contents are cached, see format_cpp_files.
+
     Args:
         file_contents (str): The unformatted contents of the file
         filename (str): A name that this file might have on disk; this does not have to be a real
@@ -29,6 +123,11 @@ def format_cpp(file_contents: str, filename: str) -> str:
     Returns:
         formatted_file_contents (str): The contents of the file after formatting
     """
+    cache_key = _format_cpp_cache_key(file_contents, filename)
+    formatted_file_contents = _cache_get(cache_key)
+    if formatted_file_contents is not None:
+        return formatted_file_contents
+
     formatted_file_contents = T.cast(
         str,
         python_util.execute_subprocess(
@@ -38,14 +137,83 @@ def format_cpp(file_contents: str, filename: str) -> str:
         ),
     )
 
+    _cache_set(cache_key, formatted_file_contents)
     return formatted_file_contents
 
 
+def format_cpp_files(files: T.Sequence[T.Tuple[str, str]]) -> T.List[str]:
+    """
+    Autoformat many C++ files using clang-format, with one clang-format command per batch of files
+    rather than per file.
+
+    If the SYMFORCE_FORMAT_CACHE_DIR environment variable is set, formatted contents are cached
+    in that directory by a hash of the unformatted contents, file name, style and clang-format
+    version, so files which haven't changed are not formatted again when they are regenerated.
+
+    Args:
+        files: (file_contents, filename) pairs, as the arguments to format_cpp
+
+    Returns:
+        The formatted contents of each file
+    """
+    cache_keys = [
+        _format_cpp_cache_key(file_contents, filename) for file_contents, filename in files
+    ]
+    formatted = [_cache_get(cache_key) for cache_key in cache_keys]
+
+    # Group the files to format by style file.  clang-format needs the files on disk to format
+    # more than one at once, so they're written to a temporary directory, where clang-format
+    # wouldn't find the style file on its own
+    to_format: T.Dict[T.Optional[pathlib.Path], T.List[int]] = {}
+    for i, (cached, (_, filename)) in enumerate(zip(formatted, files)):
+        if cached is None:
+            to_format.setdefault(_find_clang_format_style(filename), []).append(i)
+
+    for style_path, indices in to_format.items():
+        if style_path is None or len(indices) == 1:
+            for i in indices:
+                formatted[i] = format_cpp(*files[i])
+            continue
+
+        for batch_start in range(0, len(indices), _CLANG_FORMAT_BATCH_SIZE):
+            batch = indices[batch_start : batch_start + _CLANG_FORMAT_BATCH_SIZE]
+            with tempfile.TemporaryDirectory(prefix="sf_format_cpp_") as tmpdir:
+                # Each file gets its own directory, to keep its name without collisions
+                paths = []
+                for i in batch:
+                    path = pathlib.Path(tmpdir, str(i), os.path.basename(files[i][1]))
+                    path.parent.mkdir()
+                    path.write_text(files[i][0])
+                    paths.append(path)
+
+                python_util.execute_subprocess(
+                    ["clang-format", "-i", f"--style=file:{style_path}"]
+                    + [os.fspath(path) for path in paths],
+                    log_stdout=False,
+                )
+
+                for i, path in zip(batch, paths):
+                    formatted_file_contents = path.read_text()
+                    _cache_set(cache_keys[i], formatted_file_contents)
+                    formatted[i] = formatted_file_contents
+
+    return T.cast(T.List[str], formatted)
+
+
 def format_py(file_contents: str) -> str:
     """
     Autoformat a given Python file using black
     """
-    return black.format_str(file_contents, mode=BLACK_FILE_MODE)
+    cache_key = (
+        _cache_key("black", black.__version__, repr(BLACK_FILE_MODE), file_contents)
+        if _cache_enabled()
+        else None
+    )
+    formatted_file_contents = _cache_get(cache_key)
+    if formatted_file_contents is None:
+        formatted_file_contents = black.format_str(file_contents, mode=BLACK_FILE_MODE)
+        _cache_set(cache_key, formatted_file_contents)
+    return formatted_file_contents
 
 
 def format_pyi(file_contents: str) -> str:
@@ -54,7 +222,16 @@ def format_pyi(file_contents: str) -> str:
     """
     mode = copy.copy(BLACK_FILE_MODE)
     mode.is_pyi = True
-    return black.format_str(file_contents, mode=mode)
+    cache_key = (
+        _cache_key("black", black.__version__, repr(mode), file_contents)
+        if _cache_enabled()
+        else None
+    )
+    formatted_file_contents = _cache_get(cache_key)
+    if formatted_file_contents is None:
+        formatted_file_contents = black.format_str(file_contents, mode=mode)
+        _cache_set(cache_key, formatted_file_contents)
+    return formatted_file_contents
 
 
 def format_py_dir(dirname: T.Openable) -> None:
@@ -254,11 +254,7 @@ def generate(output_dir: str) -> None:
     files_dict = get_between_factors(types=TYPES)
     get_pose3_extra_factors(files_dict)
 
-    # Create output dir
+    # Write out, leaving files which are already up to date untouched
     factors_dir = os.path.join(output_dir, "factors")
-    os.makedirs(factors_dir)
-
-    # Write out
     for filename, code in files_dict.items():
-        with open(os.path.join(factors_dir, filename), "w") as f:
-            f.write(code)
+        python_util.write_if_changed(os.path.join(factors_dir, filename), code)
@@ -129,10 +129,43 @@ def _custom_generated_methods(config: CodegenConfig) -> T.Dict[T.Type, T.List[Co
     }
 
 
-def generate(config: CodegenConfig, output_dir: str = None) -> str:
+def _render_class_templates(
+    cls: T.Type,
+    config: CodegenConfig,
+    package_dir: Path,
+    relative_paths: T.Sequence[T.Tuple[str, str]],
+    custom_generated_methods: T.Dict[T.Type, T.List[Codegen]],
+) -> None:
+    """
+    Build the template data for cls, and render its templates at the given (base_dir,
+    relative_path) pairs, where "CLASS" in relative_path is replaced by the name of cls.
+    """
+    data = geo_class_common_data(cls, config)
+    data["matrix_type_aliases"] = _matrix_type_aliases()[cls]
+    data["custom_generated_methods"] = custom_generated_methods[cls]
+
+    templates = template_util.TemplateList(config.template_dir())
+    for base_dir, relative_path in relative_paths:
+        template_path = Path(base_dir, relative_path + ".jinja")
+        output_path = package_dir / relative_path.replace("CLASS", cls.__name__.lower())
+        templates.add(template_path, data, output_path=output_path)
+    templates.render()
+
+
+def generate(config: CodegenConfig, output_dir: str = None, jobs: int = 1) -> str:
     """
     Generate the geo package for the given language.
 
+    Always renders and formats the whole package; unlike `Codegen.generate_function`, there is no
+    incremental mode.  Files whose contents are unchanged are not rewritten though, so their
+    modification times are preserved.
+
+    Args:
+        config: Language and configuration to generate the package with
+        output_dir: Directory to generate the package in, defaults to a new temporary directory
+        jobs: Number of processes to generate the geo types in; the generated package is
+              identical for any number of jobs
+
     TODO(hayk): Take scalar_type list here.
     """
     # Create output directory if needed
@@ -146,28 +179,28 @@ def generate(config: CodegenConfig, output_dir: str = None) -> str:
     template_dir = config.template_dir()
     templates = template_util.TemplateList(template_dir)
 
-    matrix_type_aliases = _matrix_type_aliases()
     custom_generated_methods = _custom_generated_methods(config)
 
     if isinstance(config, PythonConfig):
         logger.info(f'Creating Python package at: "{package_dir}"')
 
-        # Build up templates for each type
-
-        for cls in DEFAULT_GEO_TYPES:
-            data = geo_class_common_data(cls, config)
-            data["matrix_type_aliases"] = matrix_type_aliases[cls]
-            data["custom_generated_methods"] = custom_generated_methods[cls]
-
-            for base_dir, relative_path in (
-                ("geo_package", "CLASS.py"),
-                (".", "ops/CLASS/__init__.py"),
-                (".", "ops/CLASS/group_ops.py"),
-                (".", "ops/CLASS/lie_group_ops.py"),
-            ):
-                template_path = Path(base_dir, relative_path + ".jinja")
-                output_path = package_dir / relative_path.replace("CLASS", cls.__name__.lower())
-                templates.add(template_path, data, output_path=output_path)
+        # Render templates for each type
+        python_util.forked_map(
+            functools.partial(
+                _render_class_templates,
+                config=config,
+                package_dir=package_dir,
+                relative_paths=(
+                    ("geo_package", "CLASS.py"),
+                    (".", "ops/CLASS/__init__.py"),
+                    (".", "ops/CLASS/group_ops.py"),
+                    (".", "ops/CLASS/lie_group_ops.py"),
+                ),
+                custom_generated_methods=custom_generated_methods,
+            ),
+            DEFAULT_GEO_TYPES,
+            jobs=jobs,
+        )
 
         templates.add(
             template_path=Path("ops", "__init__.py.jinja"),
@@ -198,25 +231,27 @@ def generate(config: CodegenConfig, output_dir: str = None) -> str:
 
         logger.info(f'Creating C++ package at: "{package_dir}"')
 
-        # Build up templates for each type
-        for cls in DEFAULT_GEO_TYPES:
-            data = geo_class_common_data(cls, config)
-            data["matrix_type_aliases"] = matrix_type_aliases[cls]
-            data["custom_generated_methods"] = custom_generated_methods[cls]
-
-            for base_dir, relative_path in (
-                ("geo_package", "CLASS.h"),
-                ("geo_package", "CLASS.cc"),
-                (".", "ops/CLASS/storage_ops.h"),
-                (".", "ops/CLASS/storage_ops.cc"),
-                (".", "ops/CLASS/group_ops.h"),
-                (".", "ops/CLASS/group_ops.cc"),
-                (".", "ops/CLASS/lie_group_ops.h"),
-                (".", "ops/CLASS/lie_group_ops.cc"),
-            ):
-                template_path = Path(base_dir, f"{relative_path}.jinja")
-                output_path = package_dir / relative_path.replace("CLASS", cls.__name__.lower())
-                templates.add(template_path, data, output_path=output_path)
+        # Render templates for each type
+        python_util.forked_map(
+            functools.partial(
+                _render_class_templates,
+                config=config,
+                package_dir=package_dir,
+                relative_paths=(
+                    ("geo_package", "CLASS.h"),
+                    ("geo_package", "CLASS.cc"),
+                    (".", "ops/CLASS/storage_ops.h"),
+                    (".", "ops/CLASS/storage_ops.cc"),
+                    (".", "ops/CLASS/group_ops.h"),
+                    (".", "ops/CLASS/group_ops.cc"),
+                    (".", "ops/CLASS/lie_group_ops.h"),
+                    (".", "ops/CLASS/lie_group_ops.cc"),
+                ),
+                custom_generated_methods=custom_generated_methods,
+            ),
+            DEFAULT_GEO_TYPES,
+            jobs=jobs,
+        )
 
         # Render non geo type specific templates
         for template_name in python_util.files_in_dir(
@@ -245,12 +280,12 @@ def generate(config: CodegenConfig, output_dir: str = None) -> str:
                     cpp_geo_types=[
                         f"sym::{cls.__name__}<{scalar}>"
                         for cls in DEFAULT_GEO_TYPES
-                        for scalar in data["scalar_types"]
+                        for scalar in Codegen.common_data()["scalar_types"]
                     ],
                     cpp_matrix_types=[
                         f"sym::Vector{i}<{scalar}>"
                         for i in range(1, 10)
-                        for scalar in data["scalar_types"]
+                        for scalar in Codegen.common_data()["scalar_types"]
                     ],
                 ),
             )
@@ -0,0 +1,75 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+from symforce import python_util
+from symforce import typing as T
+from symforce.internal.directory_cache import DirectoryCache
+
+
+class LcmTypesCache(DirectoryCache):
+    """
+    Persistent cache of the language-specific bindings generated by skymarshal from a directory
+    of .lcm files, shared between processes.  Used by `codegen_util.generate_lcm_types`.
+
+    Each entry is a directory in `directory`, named by a content hash of the .lcm files and the
+    skymarshal sources (see `LcmTypesCache.key`), containing the generated `python` and `cpp`
+    directories.
+
+    The total size of the cache is limited to `max_size` bytes; when a new entry takes the cache
+    over this limit, the least recently used entries are evicted.
+
+    Args:
+        directory: Directory to store cache entries in, created if it does not exist
+        max_size: Maximum total size of the cache entries, in bytes
+    """
+
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, directory: T.Openable, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        super().__init__(directory, max_size)
+
+    @classmethod
+    def from_environment(cls) -> T.Optional[LcmTypesCache]:
+        """
+        Construct the default cache, which is disabled unless configured.
+
+        The cache is enabled by setting the SYMFORCE_LCM_TYPES_CACHE_DIR environment variable to
+        the directory of the cache; if it is unset or empty, this returns None.  The size limit in
+        bytes may be set with SYMFORCE_LCM_TYPES_CACHE_MAX_SIZE.
+        """
+        directory = os.environ.get("SYMFORCE_LCM_TYPES_CACHE_DIR")
+        if not directory:
+            return None
+
+        max_size = int(os.environ.get("SYMFORCE_LCM_TYPES_CACHE_MAX_SIZE", cls.DEFAULT_MAX_SIZE))
+        return cls(directory, max_size)
+
+    @staticmethod
+    def key(lcm_type_dir: T.Openable) -> str:
+        """
+        Returns the name of the cache entry for the bindings of the .lcm files in lcm_type_dir.
+
+        Includes a hash of the skymarshal sources and templates, which generate the bindings, and
+        the black version, since the generated python is formatted with black.
+        """
+        # Imported here so that black and skymarshal are only required to generate code
+        import black  # pylint: disable=import-outside-toplevel
+        import skymarshal  # pylint: disable=import-outside-toplevel
+
+        digest = hashlib.sha256()
+        skymarshal_hash = python_util.files_hash(
+            Path(skymarshal.__file__).parent, (".py", ".template")
+        )
+        digest.update(f"{skymarshal_hash}\n{black.__version__}\n".encode())
+        for path in sorted(Path(lcm_type_dir).glob("*.lcm")):
+            digest.update(f"{path.name}\n".encode())
+            digest.update(path.read_bytes())
+        return digest.hexdigest()
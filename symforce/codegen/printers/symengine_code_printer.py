@@ -0,0 +1,635 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+"""
+Printing and op counting of symengine expressions without converting them to SymPy first.
+
+Codegen historically converted every expression to SymPy with `sympy.S`, counted its ops with
+`symforce._sympy_count_ops.count_ops`, and printed it with a SymPy code printer.  The conversion
+re-evaluates the whole tree in SymPy, and is the most expensive part of printing.
+
+`SymengineCodePrinter` walks the symengine tree directly instead.  Sums, products, and powers
+(the vast majority of nodes in generated code) are handled here, following the SymPy printers'
+term ordering, parenthesization, and op counting rules exactly, so the output is identical to the
+SymPy path.  Everything else (symbols, numbers, constants, and functions) is small, and is
+converted to SymPy individually and handled by the SymPy printer.
+
+Some expressions are restructured by SymPy when they're converted, e.g. SymPy distributes the
+coefficient of `2*(x + y)`.  Whenever an expression contains something like that, which isn't
+handled here, the whole expression is converted to SymPy and handled as before.
+"""
+
+import sympy
+from sympy.core.numbers import NumberSymbol
+from sympy.printing.codeprinter import CodePrinter
+from sympy.printing.precedence import PRECEDENCE
+from sympy.printing.precedence import precedence
+
+from symforce import _sympy_count_ops
+from symforce import typing as T
+
+# SymPy sort key of S.One, e.g. the exponent part of the sort key of a Symbol
+_ONE_SORT_KEY = sympy.S.One.sort_key()
+_ADD_CLASS_KEY = sympy.Add.class_key()
+_MUL_CLASS_KEY = sympy.Mul.class_key()
+
+_FLOAT_TYPES = ("RealDouble", "RealMPFR")
+
+
+class _Unsupported(Exception):
+    """
+    Raised for an expression which is converted to SymPy to be printed or counted
+    """
+
+
+class SymengineCodePrinter:
+    """
+    Prints symengine expressions with the same output as `sympy_printer.doprint(sympy.S(expr))`,
+    and counts their ops with the same result as `_sympy_count_ops.count_ops(sympy.S(expr))`.
+
+    Subclasses implement `_print_pow` to match the `_print_Pow` of their SymPy printer.  The
+    results for subexpressions are cached, so an instance should only be used for one set of
+    expressions, as in `codegen_util.print_code`.
+
+    Args:
+        sympy_printer: The SymPy code printer to match, and to print the leaves of expressions with
+    """
+
+    def __init__(self, sympy_printer: CodePrinter) -> None:
+        self.sympy_printer = sympy_printer
+
+        self._is_constant: T.Dict[T.Any, bool] = {}
+        self._leaves: T.Dict[T.Any, sympy.Basic] = {}
+        self._is_native: T.Dict[T.Any, bool] = {}
+        self._sort_keys: T.Dict[T.Any, T.Tuple] = {}
+        self._ordered_terms: T.Dict[T.Any, T.List[T.Any]] = {}
+        self._printed: T.Dict[T.Any, str] = {}
+        self._op_counts: T.Dict[T.Any, int] = {}
+
+    def doprint(self, expr: T.Any) -> str:
+        """
+        Print the expression as code
+        """
+        printer = self.sympy_printer
+        try:
+            if not hasattr(expr, "is_Number"):
+                raise _Unsupported()
+            printer._not_supported = set()
+            printer._number_symbols = set()
+            if self._native(expr):
+                # Everything printed by the sympy printer is nested inside expr, which matters
+                # e.g. for the precision of floats
+                printer._print_level += 1
+                try:
+                    code = self._print(expr)
+                finally:
+                    printer._print_level -= 1
+            elif self._leaf(expr).is_Atom:
+                code = self._print_leaf(expr)
+            else:
+                return printer.doprint(self._leaf(expr))
+        except _Unsupported:
+            return printer.doprint(sympy.S(expr))
+
+        return "\n".join(printer._format_code(code.splitlines()))
+
+    def count_ops(self, expr: T.Any) -> int:
+        """
+        Count the ops in the expression, or the sum of the ops in a (nested) sequence of
+        expressions
+        """
+        if isinstance(expr, (list, tuple)):
+            return sum(self.count_ops(item) for item in expr)
+
+        try:
+            if not hasattr(expr, "is_Number"):
+                raise _Unsupported()
+            return self._count_ops(expr)
+        except _Unsupported:
+            op_count = _sympy_count_ops.count_ops(sympy.S(expr))
+            assert isinstance(op_count, int)
+            return op_count
+
+    def _print_pow(self, base: T.Any, exp: sympy.Rational) -> str:
+        """
+        Print base**exp, where base is a symengine expression and exp is a SymPy Rational, as the
+        `_print_Pow` of the SymPy printer does
+        """
+        raise NotImplementedError()
+
+    # --------------------------------------------------------------------------
+    # Structure
+    # --------------------------------------------------------------------------
+
+    def _constant(self, node: T.Any) -> bool:
+        """
+        Whether the node has no symbols in it
+        """
+        constant = self._is_constant.get(node)
+        if constant is None:
+            if node.args:
+                constant = all(self._constant(arg) for arg in node.args)
+            else:
+                constant = type(node).__name__ not in ("Symbol", "Dummy")
+            self._is_constant[node] = constant
+        return constant
+
+    def _native(self, node: T.Any) -> bool:
+        """
+        Whether the node is an Add, Mul, or Pow handled here, as opposed to a leaf which is
+        converted to SymPy.  Raises _Unsupported if SymPy would restructure the node.
+        """
+        native = self._is_native.get(node)
+        if native is None:
+            node_type = type(node).__name__
+            if node_type not in ("Add", "Mul", "Pow") or self._constant(node):
+                native = False
+            elif node_type == "Add" and any(self._distributes(term) for term in node.args):
+                # SymPy flattens the distributed terms into this sum and collects them, so the sum
+                # is converted as a whole
+                native = False
+            else:
+                self._check(node)
+                native = True
+            self._is_native[node] = native
+        return native
+
+    def _distributes(self, node: T.Any) -> bool:
+        """
+        Whether SymPy distributes the coefficient of the node over a sum, e.g. for 2*(x + y)
+        """
+        return (
+            type(node).__name__ == "Mul"
+            and len(node.args) == 2
+            and node.args[0].is_Number
+            and type(node.args[1]).__name__ == "Add"
+            and self._leaf(node.args[0]).is_Rational
+        )
+
+    def _check(self, node: T.Any) -> None:
+        """
+        Raise _Unsupported if the SymPy equivalent of the node isn't structured the same way
+        """
+        node_type = type(node).__name__
+        if node_type == "Mul":
+            if self._distributes(node):
+                raise _Unsupported()
+
+            _, factors = self._coeff_factors(node)
+            leaf_factors = [factor for factor in factors if not self._native(factor)]
+            if sum(self._constant(factor) for factor in leaf_factors) > 1:
+                # SymPy may combine constant factors, e.g. sqrt(2)*sqrt(3)
+                raise _Unsupported()
+            for factor in leaf_factors:
+                leaf = self._leaf(factor)
+                if leaf.is_Pow and not leaf.exp.is_positive:
+                    raise _Unsupported()
+        elif node_type == "Pow":
+            base, exp = node.args
+            sympy_exp = self._leaf(exp)
+            if not sympy_exp.is_Rational:
+                raise _Unsupported()
+
+            if self._native(base):
+                if type(base).__name__ != "Add":
+                    raise _Unsupported()
+                # SymPy pulls the largest coefficient out of sums with float coefficients
+                if abs(sympy_exp) != 1 and any(
+                    type(term.args[0] if type(term).__name__ == "Mul" else term).__name__
+                    in _FLOAT_TYPES
+                    for term in base.args
+                ):
+                    raise _Unsupported()
+            else:
+                sympy_base = self._leaf(base)
+                if not sympy_base.is_Symbol:
+                    sympy_pow = sympy.Pow(sympy_base, sympy_exp)
+                    if not sympy_pow.is_Pow or sympy_pow.args != (sympy_base, sympy_exp):
+                        raise _Unsupported()
+
+    def _leaf(self, node: T.Any) -> sympy.Basic:
+        """
+        The SymPy equivalent of a leaf of the expression
+        """
+        leaf = self._leaves.get(node)
+        if leaf is None:
+            leaf = sympy.S(node)
+            if (
+                not (node.is_Number and leaf.is_Number)
+                and type(leaf).__name__ != type(node).__name__
+            ):
+                raise _Unsupported()
+            self._leaves[node] = leaf
+        return leaf
+
+    def _coeff_factors(self, node: T.Any) -> T.Tuple[T.Optional[sympy.Number], T.List[T.Any]]:
+        """
+        The numerical coefficient (or None) and the other factors of a Mul
+        """
+        args = node.args
+        if args[0].is_Number:
+            return self._leaf(args[0]), list(args[1:])
+        return None, list(args)
+
+    # --------------------------------------------------------------------------
+    # Ordering
+    # --------------------------------------------------------------------------
+
+    def _sort_key(self, node: T.Any) -> T.Tuple:
+        """
+        The SymPy sort_key of the node
+        """
+        key = self._sort_keys.get(node)
+        if key is None:
+            if not self._native(node):
+                key = self._leaf(node).sort_key()
+            elif type(node).__name__ == "Mul":
+                coeff, factors = self._coeff_factors(node)
+                if coeff is None:
+                    coeff = sympy.S.One
+                if len(factors) == 1:
+                    key = self._sort_key_with_coeff(factors[0], coeff)
+                else:
+                    factor_keys = tuple(sorted(self._sort_key(factor) for factor in factors))
+                    key = (_MUL_CLASS_KEY, (len(factor_keys), factor_keys), _ONE_SORT_KEY, coeff)
+            else:
+                key = self._sort_key_with_coeff(node, sympy.S.One)
+            self._sort_keys[node] = key
+        return key
+
+    def _sort_key_with_coeff(self, node: T.Any, coeff: sympy.Number) -> T.Tuple:
+        """
+        The SymPy sort_key of coeff*node, for a node which isn't a Mul
+        """
+        if not self._native(node):
+            leaf = self._leaf(node)
+            if leaf.is_Dummy:
+                return self._class_and_args_key(node) + (_ONE_SORT_KEY, coeff)
+            return leaf.sort_key()[:3] + (coeff,)
+        elif type(node).__name__ == "Pow":
+            return self._pow_sort_key(node.args[0], self._leaf(node.args[1]), coeff)
+        return self._class_and_args_key(node) + (_ONE_SORT_KEY, coeff)
+
+    def _pow_sort_key(self, base: T.Any, exp: sympy.Rational, coeff: sympy.Number) -> T.Tuple:
+        """
+        The SymPy sort_key of coeff*base**exp
+        """
+        return self._class_and_args_key(base) + (exp.sort_key(), coeff)
+
+    def _class_and_args_key(self, node: T.Any) -> T.Tuple:
+        """
+        The first two elements of the sort_key of an expression containing the node, i.e. the class
+        key and the key of the args, for a node which isn't a Mul or Pow
+        """
+        if self._native(node):
+            term_keys = tuple(self._sort_key(term) for term in self._terms(node))
+            return (_ADD_CLASS_KEY, (len(term_keys), term_keys))
+
+        leaf = self._leaf(node)
+        if leaf.is_Dummy:
+            return (leaf.class_key(), (1, (leaf.sort_key(),)))
+        return leaf.sort_key()[:2]
+
+    def _terms(self, node: T.Any) -> T.List[T.Any]:
+        """
+        The terms of an Add, in the order of Add.as_ordered_terms
+        """
+        terms = self._ordered_terms.get(node)
+        if terms is None:
+            terms = self._order_terms(list(node.args))
+            self._ordered_terms[node] = terms
+        return terms
+
+    def _order_terms(self, terms: T.List[T.Any]) -> T.List[T.Any]:
+        # Special case of Add(Number, Mul(Number, expr)), with the first number positive and the
+        # second negative
+        if len(terms) == 2:
+            numbers = [
+                term
+                for term in terms
+                if not self._native(term)
+                and isinstance(self._leaf(term), (sympy.Number, NumberSymbol))
+            ]
+            if len(numbers) == 1:
+                number = numbers[0]
+                (other,) = [term for term in terms if term is not number]
+                if (
+                    self._native(other)
+                    and type(other).__name__ == "Mul"
+                    and len(other.args) == 2
+                    and other.args[0].is_Number
+                    and self._leaf(number).is_positive
+                    and self._leaf(other.args[0]).is_negative
+                ):
+                    return [number, other]
+
+        # Otherwise, sort by monomial as in Expr.as_terms
+        gens: T.Dict[T.Tuple[T.Any, int], T.Tuple] = {}
+        decomposed_terms = []
+        for term in terms:
+            coeff: T.Any
+            if not self._native(term) and term.is_Number:
+                coeff, factors = self._leaf(term), []
+            elif self._native(term) and type(term).__name__ == "Mul":
+                coeff, factors = self._coeff_factors(term)
+                if coeff is None:
+                    coeff = sympy.S.One
+            else:
+                coeff, factors = sympy.S.One, [term]
+
+            coeff = complex(coeff)
+            powers = {}
+            for factor in factors:
+                if not self._native(factor) and self._constant(factor):
+                    try:
+                        coeff *= complex(self._leaf(factor))
+                    except (TypeError, ValueError):
+                        pass
+                    else:
+                        continue
+
+                if self._native(factor) and type(factor).__name__ == "Pow":
+                    base, exp_node = factor.args
+                    exp = self._leaf(exp_node)
+                    gen = (base, int(exp.q))
+                    if gen not in gens:
+                        if exp.q == 1:
+                            gens[gen] = self._sort_key(base)
+                        else:
+                            gens[gen] = self._pow_sort_key(
+                                base, sympy.Rational(1, exp.q), sympy.S.One
+                            )
+                    power = int(exp.p)
+                else:
+                    if not self._native(factor) and self._leaf(factor).is_Pow:
+                        raise _Unsupported()
+                    gen = (factor, 1)
+                    if gen not in gens:
+                        gens[gen] = self._sort_key(factor)
+                    power = 1
+
+                if gen in powers:
+                    raise _Unsupported()
+                powers[gen] = power
+
+            decomposed_terms.append((term, coeff, powers))
+
+        sorted_gens = sorted(gens, key=lambda gen: gens[gen])
+
+        keyed_terms = []
+        for term, coeff, powers in decomposed_terms:
+            monom = tuple(-powers.get(gen, 0) for gen in sorted_gens)
+            keyed_terms.append(
+                ((monom, (), ((bool(coeff.imag), coeff.imag), (coeff.real, coeff.imag))), term)
+            )
+
+        keyed_terms.sort(key=lambda keyed_term: keyed_term[0])
+        for (key, _), (next_key, _) in zip(keyed_terms, keyed_terms[1:]):
+            if key == next_key:
+                # SymPy keeps the order of terms with the same key, which we don't know
+                raise _Unsupported()
+
+        return [term for _, term in keyed_terms]
+
+    # --------------------------------------------------------------------------
+    # Printing
+    # --------------------------------------------------------------------------
+
+    def _precedence(self, node: T.Any) -> int:
+        if not self._native(node):
+            return precedence(self._leaf(node))
+
+        node_type = type(node).__name__
+        if node_type == "Add":
+            return PRECEDENCE["Add"]
+        elif node_type == "Mul":
+            coeff, _ = self._coeff_factors(node)
+            if coeff is not None and coeff.is_negative:
+                return PRECEDENCE["Add"]
+            return PRECEDENCE["Mul"]
+        else:
+            return PRECEDENCE["Pow"]
+
+    def _parenthesize(self, node: T.Any, level: float) -> str:
+        if self._precedence(node) <= level:
+            return f"({self._print(node)})"
+        return self._print(node)
+
+    def _print(self, node: T.Any) -> str:
+        printed = self._printed.get(node)
+        if printed is None:
+            if not self._native(node):
+                printed = self._print_leaf(node)
+            elif type(node).__name__ == "Add":
+                printed = self._print_add(node)
+            elif type(node).__name__ == "Mul":
+                printed = self._print_mul(node)
+            else:
+                base, exp = node.args
+                printed = self._print_pow(base, self._leaf(exp))
+            self._printed[node] = printed
+        return printed
+
+    def _print_leaf(self, node: T.Any) -> str:
+        printer = self.sympy_printer
+        printed = printer._print(self._leaf(node))
+        if printer._not_supported or printer._number_symbols:
+            # These need to be declared by doprint
+            raise _Unsupported()
+        return printed
+
+    def _print_add(self, node: T.Any) -> str:
+        """
+        Matches StrPrinter._print_Add
+        """
+        add_precedence = PRECEDENCE["Add"]
+        pieces = []
+        for term in self._terms(node):
+            printed = self._print(term)
+            if printed.startswith("-"):
+                sign = "-"
+                printed = printed[1:]
+            else:
+                sign = "+"
+            if self._precedence(term) < add_precedence:
+                printed = f"({printed})"
+            pieces.extend([sign, printed])
+
+        sign = pieces.pop(0)
+        if sign == "+":
+            sign = ""
+        return sign + " ".join(pieces)
+
+    def _print_mul(self, node: T.Any) -> str:
+        """
+        Matches CodePrinter._print_Mul
+        """
+        mul_precedence = self._precedence(node)
+
+        coeff, factors = self._coeff_factors(node)
+        sign = ""
+        if coeff is not None and coeff.is_negative:
+            coeff = -coeff
+            sign = "-"
+
+        # Each item is either a node, or a tuple (base, exp) for base**exp
+        numerator: T.List[T.Any] = []
+        denominator: T.List[T.Any] = []
+        for factor in sorted(factors, key=self._sort_key):
+            if self._native(factor) and type(factor).__name__ == "Pow":
+                base, exp_node = factor.args
+                exp = self._leaf(exp_node)
+                if exp.is_negative:
+                    denominator.append(base if exp == -1 else (base, -exp))
+                    continue
+            numerator.append(factor)
+
+        def parenthesize(item: T.Any, level: float) -> str:
+            if isinstance(item, tuple):
+                printed = self._print_pow(*item)
+                return f"({printed})" if PRECEDENCE["Pow"] <= level else printed
+            if isinstance(item, sympy.Basic):
+                return self.sympy_printer.parenthesize(item, level)
+            return self._parenthesize(item, level)
+
+        if coeff is not None and coeff is not sympy.S.One:
+            numerator.insert(0, coeff)
+        if not numerator:
+            numerator.append(sympy.S.One)
+
+        if len(numerator) == 1 and sign == "-":
+            numerator_strs = [
+                parenthesize(numerator[0], 0.5 * (PRECEDENCE["Pow"] + PRECEDENCE["Mul"]))
+            ]
+        else:
+            numerator_strs = [parenthesize(item, mul_precedence) for item in numerator]
+        denominator_strs = [parenthesize(item, mul_precedence) for item in denominator]
+
+        if not denominator:
+            return sign + "*".join(numerator_strs)
+        elif len(denominator) == 1:
+            return sign + "*".join(numerator_strs) + "/" + denominator_strs[0]
+        else:
+            return sign + "*".join(numerator_strs) + "/({})".format("*".join(denominator_strs))
+
+    # --------------------------------------------------------------------------
+    # Op counting
+    # --------------------------------------------------------------------------
+
+    def _count_ops(self, node: T.Any) -> int:
+        """
+        Matches _sympy_count_ops.count_ops
+        """
+        op_count = self._op_counts.get(node)
+        if op_count is None:
+            node_type = type(node).__name__
+            if not self._native(node):
+                op_count = _sympy_count_ops.count_ops(self._leaf(node))
+            elif node_type == "Add":
+                op_count = len(node.args) - 1
+                negative_terms = 0
+                for term in node.args:
+                    is_negative, term_op_count = self._count_ops_without_sign(term)
+                    negative_terms += is_negative
+                    op_count += term_op_count
+                if negative_terms == len(node.args):
+                    op_count += 1
+            elif node_type == "Mul":
+                op_count = self._count_mul_ops(*self._coeff_factors(node))
+            else:
+                # Division if the exponent is -1, otherwise a power
+                op_count = 1 + self._count_ops(node.args[0])
+            self._op_counts[node] = op_count
+        return op_count
+
+    def _count_ops_without_sign(self, node: T.Any) -> T.Tuple[bool, int]:
+        """
+        Whether the term has a negative coefficient, and the op count of the negated term if so
+        """
+        if self._native(node):
+            if type(node).__name__ == "Mul":
+                coeff, factors = self._coeff_factors(node)
+                if coeff is not None and coeff.is_negative:
+                    return True, self._count_mul_ops(-coeff, factors)
+            return False, self._count_ops(node)
+
+        leaf = self._leaf(node)
+        if _sympy_count_ops._coeff_isneg(leaf):
+            return True, _sympy_count_ops.count_ops(-leaf)
+        return False, self._count_ops(node)
+
+    def _count_mul_ops(self, coeff: T.Optional[sympy.Number], factors: T.List[T.Any]) -> int:
+        """
+        The op count of coeff*factors, which count_ops splits into a numerator and denominator with
+        sympy.fraction
+        """
+        op_count = 0
+        if coeff is not None and coeff.is_negative:
+            op_count += 1
+            coeff = -coeff
+        if coeff is sympy.S.One:
+            coeff = None
+
+        numerator_coeff = None
+        denominator_coeff = None
+        if coeff is not None and coeff.is_Rational and not coeff.is_Integer:
+            if coeff.p != 1:
+                numerator_coeff = sympy.Integer(coeff.p)
+            denominator_coeff = sympy.Integer(coeff.q)
+        else:
+            numerator_coeff = coeff
+
+        numerator: T.List[T.Any] = []
+        denominator: T.List[T.Any] = []
+        for factor in factors:
+            if self._native(factor):
+                if type(factor).__name__ == "Pow":
+                    base, exp_node = factor.args
+                    exp = self._leaf(exp_node)
+                    if exp.is_negative:
+                        denominator.append(base if exp == -1 else (base, -exp))
+                        continue
+            elif self._leaf(factor).is_Pow:
+                # Checked to have a positive exponent
+                pass
+            numerator.append(factor)
+
+        numerator_is_integer = not numerator and (
+            numerator_coeff is None or numerator_coeff.is_Integer
+        )
+        if numerator_is_integer:
+            return op_count + 1 + self._count_product_ops(denominator_coeff, denominator)
+        elif denominator_coeff is not None or denominator:
+            if denominator:
+                op_count += self._count_product_ops(denominator_coeff, denominator)
+            return op_count + 1 + self._count_product_ops(numerator_coeff, numerator)
+        else:
+            num_args = len(factors) + (coeff is not None)
+            return op_count + num_args - 1 + sum(self._count_ops(factor) for factor in factors)
+
+    def _count_product_ops(self, coeff: T.Optional[sympy.Number], items: T.List[T.Any]) -> int:
+        """
+        The op count of the product of the coefficient and items (each a node, or a tuple (base,
+        exp) for base**exp), all of which have positive exponents
+        """
+        if not items:
+            return 0
+
+        if coeff is not None and coeff.is_Rational and len(items) == 1:
+            item = items[0]
+            if not isinstance(item, tuple) and type(item).__name__ == "Add":
+                # SymPy distributes the coefficient over the sum
+                raise _Unsupported()
+
+        def count_item(item: T.Any) -> int:
+            if isinstance(item, tuple):
+                return 1 + self._count_ops(item[0])
+            return self._count_ops(item)
+
+        if coeff is None and len(items) == 1:
+            return count_item(items[0])
+
+        num_args = len(items) + (coeff is not None)
+        return num_args - 1 + sum(count_item(item) for item in items)
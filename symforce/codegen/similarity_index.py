@@ -6,7 +6,9 @@
 from __future__ import annotations
 
 import dataclasses
+import hashlib
 
+import symforce
 from symforce.codegen import codegen_config
 from symforce.values import Values
 from symforce import typing as T
@@ -33,9 +35,29 @@ class SimilarityIndex:
     sorted_sparse_matrices: T.Tuple[str, ...] = dataclasses.field(init=False)
     sparse_matrices: dataclasses.InitVar[T.Iterable[str]]
 
+    # Fields of the config which don't change the generated code
+    _IGNORED_CONFIG_FIELDS = ("cse_jobs",)
+
     def __post_init__(self, sparse_matrices: T.List[str]) -> None:
         self.sorted_sparse_matrices = tuple(sorted(sparse_matrices))
 
+    def _config_items(self) -> T.Tuple[T.Tuple[str, T.Any], ...]:
+        """
+        Returns the (name, value) pairs of the fields of the config which affect the generated
+        code, with sequences (e.g. cse_groups) converted to tuples so that they can be hashed.
+        """
+
+        def hashable(value: T.Any) -> T.Any:
+            if isinstance(value, (list, tuple)):
+                return tuple(hashable(v) for v in value)
+            return value
+
+        return tuple(
+            (name, hashable(value))
+            for name, value in dataclasses.asdict(self.config).items()
+            if name not in self._IGNORED_CONFIG_FIELDS
+        )
+
     @staticmethod
     def from_codegen(co: codegen.Codegen) -> SimilarityIndex:
         """
@@ -68,6 +90,49 @@ class SimilarityIndex:
                 tuple(self.outputs.to_storage()),
                 self.return_key,
                 self.sorted_sparse_matrices,
-                tuple(dataclasses.asdict(self.config).items()),
+                self._config_items(),
             )
         )
+
+    def __eq__(self, other: T.Any) -> bool:
+        if not isinstance(other, SimilarityIndex):
+            return NotImplemented
+        return (
+            type(self.config) is type(other.config)
+            and self._config_items() == other._config_items()
+            and self.inputs == other.inputs
+            and self.outputs == other.outputs
+            and self.return_key == other.return_key
+            and self.sorted_sparse_matrices == other.sorted_sparse_matrices
+        )
+
+    def stable_hash(self) -> str:
+        """
+        Returns a hex digest of this SimilarityIndex which, unlike `__hash__`, is stable across
+        processes, and so can be used to identify generated functions on disk.
+
+        Includes the symforce version and symbolic API, since either can change the generated
+        code for the same SimilarityIndex.
+        """
+
+        def stable_repr(value: T.Any) -> str:
+            # Functions (e.g. in cse_optimizations) are identified by name rather than address
+            if callable(value) and hasattr(value, "__qualname__"):
+                return f"{getattr(value, '__module__', '')}.{value.__qualname__}"
+            if isinstance(value, (list, tuple)):
+                return "({})".format(", ".join(stable_repr(v) for v in value))
+            return repr(value)
+
+        contents = [
+            symforce.__version__,
+            symforce.get_symbolic_api(),
+            type(self.config).__qualname__,
+            stable_repr(list(self._config_items())),
+            repr(self.inputs.index()),
+            stable_repr([str(x) for x in self.inputs.to_storage()]),
+            repr(self.outputs.index()),
+            stable_repr([str(x) for x in self.outputs.to_storage()]),
+            repr(self.return_key),
+            repr(self.sorted_sparse_matrices),
+        ]
+        return hashlib.sha256("\n".join(contents).encode()).hexdigest()
@@ -286,13 +286,17 @@ def inverse_range_landmark_ray_reprojection_error_residual(
     return whitened_residual
 
 
-def generate(output_dir: str, config: codegen.CodegenConfig = None) -> None:
+def generate(
+    output_dir: str, config: codegen.CodegenConfig = None, incremental: bool = False
+) -> None:
     """
     Generate the SLAM package for the given language.
 
     Args:
         output_dir: Directory to generate outputs into
         config: CodegenConfig, defaults to the default C++ config
+        incremental: Skip generating functions which are already up to date, see
+            Codegen.generate_function
     """
     # Subdirectory for everything we'll generate
     factors_dir = os.path.join(output_dir, "factors")
@@ -307,7 +311,7 @@ def generate(output_dir: str, config: codegen.CodegenConfig = None) -> None:
     codegen.Codegen.function(
         func=inverse_range_landmark_prior_residual, config=config
     ).with_linearization(which_args=["landmark_inverse_range"]).generate_function(
-        output_dir=factors_dir, skip_directory_nesting=True
+        output_dir=factors_dir, skip_directory_nesting=True, incremental=incremental
     )
 
     for cam_type in cam_types:
@@ -338,7 +342,7 @@ def generate(output_dir: str, config: codegen.CodegenConfig = None) -> None:
             ).with_linearization(
                 which_args=["source_pose", "target_pose", "source_inverse_range"]
             ).generate_function(
-                output_dir=factors_dir, skip_directory_nesting=True
+                output_dir=factors_dir, skip_directory_nesting=True, incremental=incremental
             )
 
             codegen.Codegen.function(
@@ -356,7 +360,9 @@ def generate(output_dir: str, config: codegen.CodegenConfig = None) -> None:
                     sf.Scalar,
                 ],
                 output_names=["reprojection_delta", "is_valid"],
-            ).generate_function(output_dir=factors_dir, skip_directory_nesting=True)
+            ).generate_function(
+                output_dir=factors_dir, skip_directory_nesting=True, incremental=incremental
+            )
 
         except NotImplementedError:
             # Not all cameras implement backprojection
@@ -382,7 +388,7 @@ def generate(output_dir: str, config: codegen.CodegenConfig = None) -> None:
             ).with_linearization(
                 which_args=["source_pose", "target_pose", "source_inverse_range"]
             ).generate_function(
-                output_dir=factors_dir, skip_directory_nesting=True
+                output_dir=factors_dir, skip_directory_nesting=True, incremental=incremental
             )
 
             codegen.Codegen.function(
@@ -399,4 +405,6 @@ def generate(output_dir: str, config: codegen.CodegenConfig = None) -> None:
                     sf.Scalar,
                 ],
                 output_names=["reprojection_delta", "is_valid"],
-            ).generate_function(output_dir=factors_dir, skip_directory_nesting=True)
+            ).generate_function(
+                output_dir=factors_dir, skip_directory_nesting=True, incremental=incremental
+            )
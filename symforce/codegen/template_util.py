@@ -15,6 +15,7 @@ from pathlib import Path
 import textwrap
 
 from symforce import logger
+from symforce import python_util
 from symforce import typing as T
 from symforce.codegen import format_util
 
@@ -81,15 +82,8 @@ class FileType(enum.Enum):
         # hidden in a function. We might want to somehow pass the config through to render a
         # template so we can move things into the backend code. (tag=centralize-language-diffs)
         if self in (FileType.CPP, FileType.CUDA):
-            # Come up with a fake filename to give to the formatter just for formatting purposes,
-            # even if this isn't being written to disk
-            if output_path is not None:
-                format_cpp_filename = os.path.basename(output_path)
-            else:
-                format_cpp_filename = os.fspath(template_name).replace(".jinja", "")
-
             return format_util.format_cpp(
-                file_contents, filename=str(CURRENT_DIR / format_cpp_filename)
+                file_contents, filename=_format_cpp_filename(template_name, output_path)
             )
         elif self == FileType.PYTHON:
             return format_util.format_py(file_contents)
@@ -101,6 +95,19 @@ class FileType(enum.Enum):
             raise NotImplementedError(f"Unknown autoformatter for {self}")
 
 
+def _format_cpp_filename(template_name: T.Openable, output_path: T.Openable = None) -> str:
+    """
+    Come up with a fake filename to give to the formatter just for formatting purposes, even if
+    this isn't being written to disk
+    """
+    if output_path is not None:
+        format_cpp_filename = os.path.basename(output_path)
+    else:
+        format_cpp_filename = os.fspath(template_name).replace(".jinja", "")
+
+    return str(CURRENT_DIR / format_cpp_filename)
+
+
 class RelEnvironment(jinja2.Environment):
     """
     Override join_path() to enable relative template paths. Modified from the below post.
@@ -129,22 +136,54 @@ def add_preamble(source: str, name: Path, comment_prefix: str) -> str:
     )
 
 
-@functools.lru_cache
 def jinja_env(template_dir: T.Openable) -> RelEnvironment:
+    """
+    Returns the Jinja environment for template_dir, which is shared by all calls with the same
+    directory so that compiled templates are reused.
+
+    If the SYMFORCE_TEMPLATE_BYTECODE_CACHE_DIR environment variable is set, compiled templates are
+    also cached in that directory, so they can be reused by later processes.
+    """
+    return _jinja_env(
+        os.path.abspath(template_dir), os.environ.get("SYMFORCE_TEMPLATE_BYTECODE_CACHE_DIR")
+    )
+
+
+@functools.lru_cache
+def _jinja_env(template_dir: str, bytecode_cache_dir: T.Optional[str]) -> RelEnvironment:
     """
     Helper function to cache the Jinja environment, which enables caching of loaded templates
     """
-    loader = jinja2.FileSystemLoader(os.fspath(template_dir))
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+
+    loader = jinja2.FileSystemLoader(template_dir)
     env = RelEnvironment(
         loader=loader,
         trim_blocks=True,
         lstrip_blocks=True,
         keep_trailing_newline=True,
         undefined=jinja2.StrictUndefined,
+        # Templates don't change while we're generating code, so don't check their modification
+        # times on every load, and don't evict any of them
+        auto_reload=False,
+        cache_size=-1,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+        if bytecode_cache_dir
+        else None,
     )
     return env
 
 
+def templates_hash(template_dir: T.Openable) -> str:
+    """
+    Returns a hex digest of the contents of all the templates in template_dir, to detect changes
+    to the templates (e.g. when checking whether generated code is up to date).  Templates don't
+    change while we're generating code, so this is only computed once per directory.
+    """
+    return python_util.files_hash(template_dir, (".jinja",))
+
+
 def render_template(
     template_path: T.Openable,
     data: T.Dict[str, T.Any],
@@ -163,43 +202,53 @@ def render_template(
         output_path: If provided, writes to file
         autoformat: Run a code formatter on the generated code
     """
-    if not isinstance(template_path, Path):
-        template_path = Path(template_path)
-
-    if not isinstance(template_dir, Path):
-        template_dir = Path(template_dir)
-
-    logger.debug(f"Template  IN <-- {template_dir / template_path}")
-    if output_path:
-        logger.debug(f"Template OUT --> {output_path}")
-
-    filetype = FileType.from_template_path(Path(template_path))
-
-    template = jinja_env(template_dir).get_template(os.fspath(template_path))
-    rendered_str = add_preamble(
-        str(template.render(**data)),
-        template_path,
-        comment_prefix=filetype.comment_prefix(),
+    template_path = Path(template_path)
+    rendered_str = _render_loaded_template(
+        template=jinja_env(template_dir).get_template(os.fspath(template_path)),
+        template_path=template_path,
+        data=data,
+        output_path=output_path,
     )
 
     if autoformat:
-        rendered_str = filetype.autoformat(
+        rendered_str = FileType.from_template_path(template_path).autoformat(
             file_contents=rendered_str,
             template_name=template_path,
             output_path=output_path,
         )
 
     if output_path:
-        directory = os.path.dirname(output_path)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-
-        with open(output_path, "w") as f:
-            f.write(rendered_str)
+        _write_output(rendered_str, output_path)
 
     return rendered_str
 
 
+def _render_loaded_template(
+    template: jinja2.Template,
+    template_path: Path,
+    data: T.Dict[str, T.Any],
+    output_path: T.Optional[T.Openable],
+) -> str:
+    """
+    Render a template which has already been loaded from template_path, without formatting it.
+    """
+    logger.debug(f"Template  IN <-- {template.filename}")
+    if output_path:
+        logger.debug(f"Template OUT --> {output_path}")
+
+    return add_preamble(
+        str(template.render(**data)),
+        template_path,
+        comment_prefix=FileType.from_template_path(template_path).comment_prefix(),
+    )
+
+
+def _write_output(rendered_str: str, output_path: T.Openable) -> None:
+    # Files which are already up to date are not rewritten, so that their modification times are
+    # preserved
+    python_util.write_if_changed(output_path, rendered_str)
+
+
 class TemplateList:
     """
     Helper class to keep a list of (template_path, output_path, template_dir, data)
@@ -242,15 +291,55 @@ class TemplateList:
         )
 
     def render(self, autoformat: bool = True) -> T.List[str]:
+        # Look up the environment and load each template only once, since many entries typically
+        # share a template (e.g. one per generated type)
+        loaded_templates: T.Dict[T.Tuple[T.Openable, str], jinja2.Template] = {}
+
         rendered_templates = []
         for entry in self.items:
+            key = (entry.template_dir, os.fspath(entry.template_path))
+            if key not in loaded_templates:
+                loaded_templates[key] = jinja_env(entry.template_dir).get_template(key[1])
+
             rendered_templates.append(
-                render_template(
-                    template_path=entry.template_path,
-                    output_path=entry.output_path,
+                _render_loaded_template(
+                    template=loaded_templates[key],
+                    template_path=Path(entry.template_path),
                     data=entry.data,
-                    template_dir=entry.template_dir,
-                    autoformat=autoformat,
+                    output_path=entry.output_path,
                 )
             )
+
+        if autoformat:
+            # C++ files are formatted together, to avoid running clang-format once per file
+            cpp_indices = []
+            for i, entry in enumerate(self.items):
+                filetype = FileType.from_template_path(Path(entry.template_path))
+                if filetype in (FileType.CPP, FileType.CUDA):
+                    cpp_indices.append(i)
+                else:
+                    rendered_templates[i] = filetype.autoformat(
+                        file_contents=rendered_templates[i],
+                        template_name=entry.template_path,
+                        output_path=entry.output_path,
+                    )
+
+            formatted_cpp = format_util.format_cpp_files(
+                [
+                    (
+                        rendered_templates[i],
+                        _format_cpp_filename(
+                            self.items[i].template_path, self.items[i].output_path
+                        ),
+                    )
+                    for i in cpp_indices
+                ]
+            )
+            for i, formatted in zip(cpp_indices, formatted_cpp):
+                rendered_templates[i] = formatted
+
+        for entry, rendered_str in zip(self.items, rendered_templates):
+            if entry.output_path:
+                _write_output(rendered_str, entry.output_path)
+
         return rendered_templates
@@ -3,132 +3,81 @@
  * This source code is under the Apache 2.0 license found in the LICENSE file.
  * ---------------------------------------------------------------------------- */
 
-#include <fstream>
+#include <chrono>
+#include <map>
+#include <string>
 
 #include <spdlog/spdlog.h>
 
-#include <sym/pose3.h>
-#include <symforce/opt/factor.h>
 #include <symforce/opt/optimizer.h>
-#include <symforce/opt/values.h>
 
-#include "./gen/keys.h"
-#include "./gen/snavely_reprojection_factor.h"
+#include "./common.h"
 
-using namespace sym::Keys;
+using namespace bundle_adjustment_in_the_large;
 
-/**
- * Create a `sym::Factor` for the reprojection residual, attached to the given camera and point
- * variables.  It's also attached to fixed entries in the Values for the pixel measurement and the
- * constant EPSILON.
- */
-sym::Factord MakeFactor(int camera, int point, int pixel) {
-  return sym::Factord::Hessian(sym::SnavelyReprojectionFactor<double>,
-                               /* all_keys = */
-                               {
-                                   sym::Key::WithSuper(CAM_T_WORLD, camera),
-                                   sym::Key::WithSuper(INTRINSICS, camera),
-                                   sym::Key::WithSuper(POINT, point),
-                                   sym::Key::WithSuper(PIXEL, pixel),
-                                   EPSILON,
-                               },
-                               /* optimized_keys = */
-                               {
-                                   sym::Key::WithSuper(CAM_T_WORLD, camera),
-                                   sym::Key::WithSuper(INTRINSICS, camera),
-                                   sym::Key::WithSuper(POINT, point),
-                               });
-}
-
-/**
- * A struct to represent the problem definition
- */
-struct Problem {
-  std::vector<sym::Factord> factors;
-  sym::Valuesd values;
-  int num_cameras;
-  int num_points;
-  int num_observations;
-};
+namespace {
 
-/**
- * Read the problem description from the given path
- *
- * See https://grail.cs.washington.edu/projects/bal/ for file format description
- */
-Problem ReadProblem(const std::string& filename) {
-  std::ifstream file(filename);
-
-  int num_cameras, num_points, num_observations;
-  file >> num_cameras;
-  file >> num_points;
-  file >> num_observations;
-
-  std::vector<sym::Factord> factors;
-  sym::Valuesd values;
-
-  for (int i = 0; i < num_observations; i++) {
-    int camera, point;
-    file >> camera;
-    file >> point;
-
-    double px, py;
-    file >> px;
-    file >> py;
-
-    factors.push_back(MakeFactor(camera, point, i));
-    values.Set(sym::Key::WithSuper(PIXEL, i), Eigen::Vector2d(px, py));
-  }
+// Optimize the problem with the given linear solver, and return the time taken in seconds
+double Optimize(const Problem& problem, const sym::linear_solver_t linear_solver) {
+  sym::optimizer_params_t params = sym::DefaultOptimizerParams();
+  params.linear_solver = linear_solver;
+  // The points are eliminated when using the Schur complement, leaving the reduced camera system
+  params.schur_eliminated_key_letter = POINT.Letter();
 
-  for (int i = 0; i < num_cameras; i++) {
-    double rx, ry, rz, tx, ty, tz, f, k1, k2;
-    file >> rx;
-    file >> ry;
-    file >> rz;
-    file >> tx;
-    file >> ty;
-    file >> tz;
-    file >> f;
-    file >> k1;
-    file >> k2;
-
-    values.Set(sym::Key::WithSuper(CAM_T_WORLD, i),
-               sym::Pose3d(sym::Rot3d::FromTangent(Eigen::Vector3d(rx, ry, rz)),
-                           Eigen::Vector3d(tx, ty, tz)));
-    values.Set(sym::Key::WithSuper(INTRINSICS, i), Eigen::Vector3d(f, k1, k2));
-  }
+  // Create a copy of the Values - we'll optimize this one in place
+  sym::Valuesd optimized_values = problem.values;
 
-  for (int i = 0; i < num_points; i++) {
-    double x, y, z;
-    file >> x;
-    file >> y;
-    file >> z;
+  const auto start = std::chrono::steady_clock::now();
 
-    values.Set(sym::Key::WithSuper(POINT, i), Eigen::Vector3d(x, y, z));
-  }
+  sym::Optimizerd optimizer{params, problem.factors};
+  const auto stats = optimizer.Optimize(&optimized_values);
 
-  values.Set(EPSILON, sym::kDefaultEpsilond);
+  const double seconds =
+      std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
 
-  return {std::move(factors), std::move(values), num_cameras, num_points, num_observations};
+  spdlog::info("Finished in {} iterations and {:.3f} seconds with the {} solver",
+               stats.iterations.size(), seconds, linear_solver.string_value());
+  return seconds;
 }
 
+}  // namespace
+
 /**
  * Example usage: `bundle_adjustment_in_the_large_example data/problem-21-11315-pre.txt`
+ *
+ * An optional second argument selects the linear solver, one of `cholesky` (the default),
+ * `conjugate_gradient`, or `schur`.  Pass `all` to optimize with each of them, and report the
+ * speedup of each relative to `cholesky`
  */
 int main(int argc, char** argv) {
   spdlog::set_level(spdlog::level::info);
 
-  SYM_ASSERT(argc == 2);
+  SYM_ASSERT(argc == 2 || argc == 3);
+
+  const std::map<std::string, sym::linear_solver_t> linear_solvers = {
+      {"cholesky", sym::linear_solver_t::CHOLESKY},
+      {"conjugate_gradient", sym::linear_solver_t::CONJUGATE_GRADIENT},
+      {"schur", sym::linear_solver_t::SCHUR},
+  };
+
+  const std::string linear_solver = argc == 3 ? argv[2] : "cholesky";
+  SYM_ASSERT(linear_solver == "all" || linear_solvers.count(linear_solver) == 1);
 
   // Read the problem from disk, and create the Values and factors
   const auto problem = ReadProblem(argv[1]);
 
-  // Create a copy of the Values - we'll optimize this one in place
-  sym::Valuesd optimized_values = problem.values;
-
-  // Optimize
-  sym::Optimizerd optimizer{sym::DefaultOptimizerParams(), std::move(problem.factors)};
-  const auto stats = optimizer.Optimize(&optimized_values);
+  if (linear_solver != "all") {
+    Optimize(problem, linear_solvers.at(linear_solver));
+    return 0;
+  }
 
-  spdlog::info("Finished in {} iterations", stats.iterations.size());
+  const double cholesky_seconds = Optimize(problem, sym::linear_solver_t::CHOLESKY);
+  for (const auto& name_and_solver : linear_solvers) {
+    if (name_and_solver.second == sym::linear_solver_t::CHOLESKY) {
+      continue;
+    }
+    const double seconds = Optimize(problem, name_and_solver.second);
+    spdlog::info("Speedup of {} relative to cholesky: {:.2f}x", name_and_solver.first,
+                 cholesky_seconds / seconds);
+  }
 }
@@ -0,0 +1,159 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+"""
+A cache of directories on disk, shared between processes, with least recently used eviction.  The
+base of the persistent caches of generated code, e.g. `codegen.lcm_types_cache.LcmTypesCache`.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+from symforce import python_util
+from symforce import typing as T
+
+
+class DirectoryCache:
+    """
+    Persistent cache of directories, shared between processes.
+
+    Each entry is a directory in `directory`, named by its key.  Entries are written to a staging
+    directory inside `directory` and then atomically renamed into place, so that other processes
+    never see partially written entries.
+
+    If max_size is not None, the total size of the cache is limited to max_size bytes; when a new
+    entry takes the cache over this limit, the least recently used entries are evicted.
+
+    Args:
+        directory: Directory to store cache entries in, created if it does not exist
+        max_size: Maximum total size of the cache entries in bytes, or None for no limit
+    """
+
+    # Prefix of directories of entries which are still being written
+    _STAGING_PREFIX = ".staging_"
+
+    def __init__(self, directory: T.Openable, max_size: T.Optional[int] = None) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def get(self, key: str) -> T.Optional[Path]:
+        """
+        If an entry has been added under key, marks it as most recently used and returns its
+        directory.
+
+        Otherwise, returns None.
+        """
+        entry_dir = self.directory / key
+        if not entry_dir.is_dir():
+            return None
+
+        # Entries are ordered for eviction by their modification time
+        try:
+            os.utime(entry_dir)
+        except OSError:
+            pass
+
+        return entry_dir
+
+    def add(self, key: str, write_entry: T.Callable[[Path], None]) -> Path:
+        """
+        Adds an entry under key, whose contents are written by write_entry into the directory it
+        is passed, evicts entries as needed to satisfy the size limit, and returns the directory of
+        the entry.
+
+        If an entry for key already exists (e.g. it was added by another process), the new
+        contents are discarded.  If write_entry raises, nothing is added.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        staging_dir = Path(tempfile.mkdtemp(prefix=self._STAGING_PREFIX, dir=self.directory))
+        try:
+            write_entry(staging_dir)
+            try:
+                os.rename(staging_dir, self.directory / key)
+            except OSError:
+                # Another process already added this entry
+                pass
+        finally:
+            python_util.remove_if_exists(staging_dir)
+
+        self._evict(keep=key)
+
+        return self.directory / key
+
+    def add_directory(self, key: str, source_dir: T.Openable) -> Path:
+        """
+        Moves the contents of source_dir into a new entry under key, like `add`, and deletes
+        source_dir.
+        """
+
+        def move_contents(entry_dir: Path) -> None:
+            for child in Path(source_dir).iterdir():
+                shutil.move(os.fspath(child), os.fspath(entry_dir / child.name))
+
+        try:
+            return self.add(key, move_contents)
+        finally:
+            python_util.remove_if_exists(source_dir)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the entry under key, if there is one
+        """
+        python_util.remove_if_exists(self.directory / key)
+
+    def clear(self) -> None:
+        """
+        Removes all entries from the cache.
+        """
+        python_util.remove_if_exists(self.directory)
+
+    def size(self) -> int:
+        """
+        Returns the total size of the cache entries, in bytes.
+        """
+        return sum(size for _, size in self._entries())
+
+    def _entries(self) -> T.List[T.Tuple[Path, int]]:
+        """
+        Returns the (directory, size in bytes) of each complete entry, from least to most recently
+        used.
+        """
+        if not self.directory.is_dir():
+            return []
+
+        entries = []
+        for entry_dir in self.directory.iterdir():
+            if entry_dir.name.startswith(self._STAGING_PREFIX) or not entry_dir.is_dir():
+                continue
+            try:
+                last_used = entry_dir.stat().st_mtime
+                size = sum(path.stat().st_size for path in entry_dir.rglob("*") if path.is_file())
+            except OSError:
+                continue
+            entries.append((last_used, entry_dir, size))
+
+        return [(entry_dir, size) for _, entry_dir, size in sorted(entries)]
+
+    def _evict(self, keep: str) -> None:
+        """
+        Removes least recently used entries, other than keep, until the cache fits in max_size.
+        """
+        if self.max_size is None:
+            return
+
+        entries = self._entries()
+        total_size = sum(size for _, size in entries)
+        for entry_dir, size in entries:
+            if total_size <= self.max_size:
+                break
+            if entry_dir.name == keep:
+                continue
+            python_util.remove_if_exists(entry_dir)
+            total_size -= size
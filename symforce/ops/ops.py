@@ -31,6 +31,10 @@ class Ops:
     # is (float, (StorageOps, ScalarStorageOps)).
     IMPLEMENTATIONS: T.Dict[T.Type, T.Tuple[T.Type, T.Type]] = {}
 
+    # Cache of the results of implementation(), keyed by (OpsClass, DataType).  Cleared whenever
+    # a type is registered, since that can change the implementation for any type.
+    _IMPLEMENTATION_CACHE: T.Dict[T.Tuple[T.Type, T.Type], T.Type] = {}
+
     @classmethod
     def register(cls, impl_type: T.Type, impl_ops: T.Type) -> None:
         """
@@ -48,6 +52,7 @@ class Ops:
         """
         assert impl_type not in cls.IMPLEMENTATIONS
         cls.IMPLEMENTATIONS[impl_type] = (cls, impl_ops)
+        Ops._IMPLEMENTATION_CACHE.clear()
 
     @classmethod
     def implementation(cls, impl_type: T.Type) -> T.Type:
@@ -60,6 +65,18 @@ class Ops:
             NotImplementedError: If impl_type or one of its parent classes is not registered
             with the calling class or one of its subclasses.
         """
+        try:
+            return Ops._IMPLEMENTATION_CACHE[(cls, impl_type)]
+        except KeyError:
+            impl = cls._find_implementation(impl_type)
+            Ops._IMPLEMENTATION_CACHE[(cls, impl_type)] = impl
+            return impl
+
+    @classmethod
+    def _find_implementation(cls, impl_type: T.Type) -> T.Type:
+        """
+        Uncached implementation of implementation()
+        """
         registered_and_base: T.List[T.Tuple[T.Type, T.Type]] = []
         for base_class in inspect.getmro(impl_type):
             reg_class_and_impl = cls.IMPLEMENTATIONS.get(base_class, None)
@@ -0,0 +1,109 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from symforce import logger
+from symforce import typing as T
+from symforce.internal.directory_cache import DirectoryCache
+from symforce.codegen import codegen_util
+from symforce.codegen.similarity_index import SimilarityIndex
+
+
+class DiskResidualCache(DirectoryCache):
+    """
+    Persistent cache of generated python linearization functions, shared between processes.
+
+    Each entry is a directory in `directory`, named by a content hash of the SimilarityIndex of
+    the residual and the optimized keys (see `DiskResidualCache.key`), containing the generated
+    code and a metadata file with the namespace and name of the generated function.
+
+    The total size of the cache is limited to `max_size` bytes; when a new entry takes the cache
+    over this limit, the least recently used entries are evicted.
+
+    Args:
+        directory: Directory to store cache entries in, created if it does not exist
+        max_size: Maximum total size of the cache entries, in bytes
+    """
+
+    DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+    METADATA_FILE = "metadata.json"
+
+    def __init__(self, directory: T.Openable, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        super().__init__(directory, max_size)
+
+    @classmethod
+    def from_environment(cls) -> T.Optional[DiskResidualCache]:
+        """
+        Construct the default cache, which is disabled unless configured.
+
+        The cache is enabled by setting the SYMFORCE_FACTOR_CACHE_DIR environment variable to the
+        directory of the cache; if it is unset or empty, this returns None.  The size limit in
+        bytes may be set with SYMFORCE_FACTOR_CACHE_MAX_SIZE.
+        """
+        directory = os.environ.get("SYMFORCE_FACTOR_CACHE_DIR")
+        if not directory:
+            return None
+
+        max_size = int(os.environ.get("SYMFORCE_FACTOR_CACHE_MAX_SIZE", cls.DEFAULT_MAX_SIZE))
+        return cls(directory, max_size)
+
+    @staticmethod
+    def key(index: SimilarityIndex, optimized_keys: T.Iterable[str]) -> str:
+        """
+        Returns the name of the cache entry for the linearization of the residual described by
+        index with respect to optimized_keys.  The order of the optimized keys is significant.
+
+        Includes a hash of the sources of symforce.codegen, so that entries generated by a
+        different version of the code generator (e.g. in a development tree) are not used.
+        """
+        contents = "\n".join(
+            [codegen_util.codegen_sources_hash(), index.stable_hash(), *optimized_keys]
+        )
+        return hashlib.sha256(contents.encode()).hexdigest()
+
+    def get_residual(self, key: str) -> T.Optional[T.Callable]:
+        """
+        If an entry has been cached with cache_residual under key, loads the generated function
+        and marks the entry as most recently used.
+
+        Otherwise, returns None.
+        """
+        entry_dir = self.get(key)
+        if entry_dir is None:
+            return None
+
+        try:
+            metadata = json.loads((entry_dir / self.METADATA_FILE).read_text())
+            function_dir = entry_dir / "python" / "symforce" / metadata["namespace"]
+            return getattr(
+                codegen_util.load_generated_package(
+                    f"{metadata['namespace']}.{metadata['name']}", function_dir
+                ),
+                metadata["name"],
+            )
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.warning(f"Removing unreadable factor cache entry {entry_dir}: {ex}")
+            self.remove(key)
+            return None
+
+    def cache_residual(self, key: str, output_dir: T.Openable, namespace: str, name: str) -> None:
+        """
+        Moves output_dir, the output directory of the generated python function namespace.name,
+        into the cache under key, then evicts entries as needed to satisfy the size limit.
+
+        If an entry for key already exists (e.g. it was added by another process), output_dir is
+        deleted instead.
+        """
+        (Path(output_dir) / self.METADATA_FILE).write_text(
+            json.dumps({"namespace": namespace, "name": name})
+        )
+        self.add_directory(key, output_dir)
@@ -25,7 +25,8 @@ class GeneratedResidualCache:
     Utility class for keeping track of residuals which have already been generated.
 
     Functions like a dict whose keys are pairs of codegen_util.SimilarityIndex
-    and T.Set[str], and whose values are residuals.
+    and T.Sequence[str], and whose values are residuals.  The order of the optimized keys is
+    significant, since it determines the order of the columns of the generated jacobian.
 
     Since the "keys" are made up of mutable objects, they are deep copied when cached.
     """
@@ -43,9 +44,7 @@ class GeneratedResidualCache:
         Otherwise, returns None.
         """
 
-        return self._dict.get(
-            _GRCKey(index=index, optimized_keys=tuple(sorted(optimized_keys))), None
-        )
+        return self._dict.get(_GRCKey(index=index, optimized_keys=tuple(optimized_keys)), None)
 
     def cache_residual(
         self, index: SimilarityIndex, optimized_keys: T.Iterable[str], residual: T.Callable
@@ -57,5 +56,5 @@ class GeneratedResidualCache:
         """
 
         self._dict[
-            _GRCKey(index=copy.deepcopy(index), optimized_keys=tuple(sorted(optimized_keys)))
+            _GRCKey(index=copy.deepcopy(index), optimized_keys=tuple(optimized_keys))
         ] = residual
@@ -0,0 +1,394 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+from __future__ import annotations
+
+import dataclasses
+
+import numpy as np
+import scipy.sparse
+
+from symforce import cc_sym
+from symforce import typing as T
+from symforce.opt.cpp_factor_compiler import CompiledLinearization
+from symforce.opt.numeric_factor import NumericFactor
+
+
+@dataclasses.dataclass(frozen=True)
+class _StorageLayout:
+    """
+    Location of the inputs of a NumericFactorBatch in the C++ Values it is linearized at, computed
+    on the first linearization and recomputed only if the keys move within the Values' storage.
+
+    Attributes:
+        offsets: Offsets of the index entries the layout was computed for
+        entries: Index entry of each of the batch's keys
+        index: Index of the batch's keys, for reading their storage with Values.to_storage
+        arg_positions: For each argument of the linearization function, the positions in the
+                       storage of the batch's keys of that argument for every factor, with shape
+                       (N, storage_dim)
+    """
+
+    offsets: T.Tuple[int, ...]
+    entries: T.List[T.Any]
+    index: T.Any
+    arg_positions: T.List[np.ndarray]
+
+
+@dataclasses.dataclass(frozen=True)
+class _BatchStructure:
+    """
+    Sparsity structure of the stacked linearization of a NumericFactorBatch, computed on the first
+    linearization (once the residual and tangent dimensions are known) and reused afterwards.
+
+    Attributes:
+        residual_dim: Dimension of the residual of each factor
+        tangent_dim: Dimension of the combined tangent space of the batch's optimized keys
+        jacobian_order: Permutation from the flattened (N, residual_dim, factor_tangent_dim)
+                        jacobians into the data array of the stacked CSC jacobian
+        jacobian_indices: Row indices of the stacked CSC jacobian
+        jacobian_indptr: Column pointers of the stacked CSC jacobian
+        hessian_lower_rows: Rows of the lower triangle of each factor's hessian
+        hessian_lower_cols: Columns of the lower triangle of each factor's hessian
+        hessian_inverse: Map from the flattened (N, num_lower_entries) factor hessian entries to
+                         entries of the data array of the stacked CSC hessian
+        hessian_indices: Row indices of the stacked CSC hessian
+        hessian_indptr: Column pointers of the stacked CSC hessian
+        rhs_cols: Columns of the batch tangent space for the flattened (N, factor_tangent_dim)
+                  factor rhs vectors
+    """
+
+    residual_dim: int
+    tangent_dim: int
+    jacobian_order: np.ndarray
+    jacobian_indices: np.ndarray
+    jacobian_indptr: np.ndarray
+    hessian_lower_rows: np.ndarray
+    hessian_lower_cols: np.ndarray
+    hessian_inverse: np.ndarray
+    hessian_indices: np.ndarray
+    hessian_indptr: np.ndarray
+    rhs_cols: np.ndarray
+
+
+class NumericFactorBatch:
+    """
+    A group of NumericFactors that share the same linearization function, linearized together
+    as a single sparse C++ Factor.
+
+    The C++ Linearizer calls back into Python once per batch on each relinearization, rather than
+    once per factor. The inputs for every factor in the batch are gathered in one pass over the
+    C++ Values, and the stacked residuals, jacobians, hessians and right-hand-sides are scattered
+    into a single sparse linearization with a fixed sparsity pattern.
+
+    If the factors were constructed with a `batch_linearization_function`, it is called once per
+    relinearization on the stacked storage of each argument, with shape (N, storage_dim).
+    Otherwise `linearization_function` is called for each factor in the batch.
+
+    Args:
+        factors: The factors in the batch. They must share the same linearization function, and
+            have their optimized keys at the same positions in their keys.
+    """
+
+    def __init__(self, factors: T.Sequence[NumericFactor]) -> None:
+        if len(factors) == 0:
+            raise ValueError("A NumericFactorBatch must contain at least one factor")
+
+        self.factors = list(factors)
+        self.linearization_function = self.factors[0].linearization_function
+        self.batch_linearization_function = self.factors[0].batch_linearization_function
+
+        optimized_positions = NumericFactorBatch._optimized_positions(self.factors[0])
+        for factor in self.factors:
+            if factor.linearization_function is not self.linearization_function:
+                raise ValueError(
+                    "All factors in a batch must share the same linearization function"
+                )
+            if NumericFactorBatch._optimized_positions(factor) != optimized_positions:
+                raise ValueError(
+                    "All factors in a batch must have their optimized keys at the same positions"
+                )
+
+        # The unique keys and optimized keys of all the factors, in order of first appearance
+        self.keys = list(dict.fromkeys(key for factor in self.factors for key in factor.keys))
+        self.optimized_keys = list(
+            dict.fromkeys(key for factor in self.factors for key in factor.optimized_keys)
+        )
+
+        # For each factor, the position of each of its keys in self.keys, and of each of its
+        # optimized keys in self.optimized_keys
+        key_positions = {key: i for i, key in enumerate(self.keys)}
+        self._key_indices = np.array(
+            [[key_positions[key] for key in factor.keys] for factor in self.factors],
+            dtype=np.int64,
+        ).reshape(len(self.factors), -1)
+        optimized_key_positions = {key: i for i, key in enumerate(self.optimized_keys)}
+        self._optimized_key_indices = np.array(
+            [
+                [optimized_key_positions[key] for key in factor.optimized_keys]
+                for factor in self.factors
+            ],
+            dtype=np.int64,
+        ).reshape(len(self.factors), -1)
+
+        # The keys passed to the C++ Factor, in the order of the index entries passed to
+        # linearize.  The optimized keys go first, so that their index entries are at the start.
+        optimized_keys_set = set(self.optimized_keys)
+        self._keys_to_func = self.optimized_keys + [
+            key for key in self.keys if key not in optimized_keys_set
+        ]
+        # The position in self._keys_to_func of each of self.keys
+        keys_to_func_positions = {key: i for i, key in enumerate(self._keys_to_func)}
+        self._key_entry_positions = [keys_to_func_positions[key] for key in self.keys]
+
+        self._layout: T.Optional[_StorageLayout] = None
+        self._structure: T.Optional[_BatchStructure] = None
+
+    @staticmethod
+    def _optimized_positions(factor: NumericFactor) -> T.Tuple[int, ...]:
+        return tuple(list(factor.keys).index(key) for key in factor.optimized_keys)
+
+    def _compute_layout(
+        self,
+        values: cc_sym.Values,
+        index_entries: T.Sequence[T.Any],
+        offsets: T.Tuple[int, ...],
+        cc_key_map: T.Mapping[str, cc_sym.Key],
+    ) -> _StorageLayout:
+        """
+        Compute where the arguments of each factor are in the storage of values
+
+        Args:
+            values: The C++ Values to linearize at
+            index_entries: Index entries in `values` for each key in self._keys_to_func
+            offsets: The offset of each of index_entries
+            cc_key_map: Mapping from Python keys to C++ keys
+        """
+        entries = [index_entries[i] for i in self._key_entry_positions]
+
+        # Positions of the storage of each key in the flat array returned by values.to_storage
+        # for the index of the batch's keys
+        storage_dims = np.array([entry.storage_dim for entry in entries], dtype=np.int64)
+        storage_offsets = np.concatenate([[0], np.cumsum(storage_dims)[:-1]]).astype(np.int64)
+        arg_positions = [
+            storage_offsets[key_indices][:, np.newaxis]
+            + np.arange(storage_dims[key_indices[0]], dtype=np.int64)
+            for key_indices in self._key_indices.T
+        ]
+
+        return _StorageLayout(
+            offsets=offsets,
+            entries=entries,
+            index=values.create_index([cc_key_map[key] for key in self.keys]),
+            arg_positions=arg_positions,
+        )
+
+    def _evaluate(
+        self,
+        values: cc_sym.Values,
+        index_entries: T.Sequence[T.Any],
+        cc_key_map: T.Mapping[str, cc_sym.Key],
+    ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evaluate the linearization of every factor in the batch, stacked along the first axis
+        """
+        # The layout is reused as long as the keys are at the same place in the storage, which is
+        # the case for every relinearization within an optimization
+        offsets = tuple(entry.offset for entry in index_entries)
+        if self._layout is None or self._layout.offsets != offsets:
+            self._layout = self._compute_layout(values, index_entries, offsets, cc_key_map)
+        layout = self._layout
+        num_factors = len(self.factors)
+
+        if self.batch_linearization_function is not None:
+            # Only the storage of the batch's keys is copied out of the Values
+            storage = values.to_storage(layout.index)
+            outputs = self.batch_linearization_function(
+                *(storage[positions] for positions in layout.arg_positions)
+            )
+        else:
+            inputs = [values.at(entry) for entry in layout.entries]
+            outputs = tuple(
+                np.stack(stacked)
+                for stacked in zip(
+                    *(
+                        self.linearization_function(*[inputs[i] for i in key_indices])
+                        for key_indices in self._key_indices
+                    )
+                )
+            )
+
+        residual, jacobian, hessian, rhs = (np.asarray(output) for output in outputs)
+        residual = residual.reshape(num_factors, -1)
+        jacobian = jacobian.reshape(num_factors, residual.shape[1], -1)
+        hessian = hessian.reshape(num_factors, jacobian.shape[2], jacobian.shape[2])
+        rhs = rhs.reshape(num_factors, jacobian.shape[2])
+        return residual, jacobian, hessian, rhs
+
+    def _compute_structure(self, residual_dim: int, tangent_dims: np.ndarray) -> _BatchStructure:
+        """
+        Compute the sparsity structure of the stacked linearization
+
+        Args:
+            residual_dim: Dimension of the residual of each factor
+            tangent_dims: Tangent dimension of each of self.optimized_keys
+        """
+        num_factors = len(self.factors)
+        tangent_dim = int(np.sum(tangent_dims))
+        tangent_offsets = np.concatenate([[0], np.cumsum(tangent_dims)[:-1]]).astype(np.int64)
+
+        # The column in the batch tangent space of each column of each factor's jacobian, with
+        # shape (num_factors, factor_tangent_dim)
+        factor_cols = np.hstack(
+            [np.zeros((num_factors, 0), dtype=np.int64)]
+            + [
+                tangent_offsets[key_indices][:, np.newaxis]
+                + np.arange(tangent_dims[key_indices[0]], dtype=np.int64)
+                for key_indices in self._optimized_key_indices.T
+            ]
+        )
+        factor_tangent_dim = factor_cols.shape[1]
+
+        # Jacobian - each factor fills a dense block of rows, so there are no duplicate entries
+        jacobian_rows = np.broadcast_to(
+            np.arange(num_factors * residual_dim, dtype=np.int64).reshape(
+                num_factors, residual_dim, 1
+            ),
+            (num_factors, residual_dim, factor_tangent_dim),
+        ).ravel()
+        jacobian_cols = np.broadcast_to(
+            factor_cols[:, np.newaxis, :], (num_factors, residual_dim, factor_tangent_dim)
+        ).ravel()
+        jacobian_order = np.lexsort((jacobian_rows, jacobian_cols))
+
+        # Hessian - only the lower triangle is stored, and factors sharing keys contribute to the
+        # same entries, which are summed
+        hessian_lower_rows, hessian_lower_cols = np.tril_indices(factor_tangent_dim)
+        rows = factor_cols[:, hessian_lower_rows].ravel()
+        cols = factor_cols[:, hessian_lower_cols].ravel()
+        unique_entries, hessian_inverse = np.unique(
+            np.minimum(rows, cols) * tangent_dim + np.maximum(rows, cols), return_inverse=True
+        )
+
+        def indptr(cols: np.ndarray) -> np.ndarray:
+            return np.concatenate([[0], np.cumsum(np.bincount(cols, minlength=tangent_dim))])
+
+        return _BatchStructure(
+            residual_dim=residual_dim,
+            tangent_dim=tangent_dim,
+            jacobian_order=jacobian_order,
+            jacobian_indices=jacobian_rows[jacobian_order],
+            jacobian_indptr=indptr(jacobian_cols),
+            hessian_lower_rows=hessian_lower_rows,
+            hessian_lower_cols=hessian_lower_cols,
+            hessian_inverse=hessian_inverse.ravel(),
+            hessian_indices=unique_entries % tangent_dim,
+            hessian_indptr=indptr(unique_entries // tangent_dim),
+            rhs_cols=factor_cols.ravel(),
+        )
+
+    def linearize(
+        self,
+        values: cc_sym.Values,
+        index_entries: T.Sequence[T.Any],
+        cc_key_map: T.Mapping[str, cc_sym.Key],
+    ) -> T.Tuple[np.ndarray, scipy.sparse.csc_matrix, scipy.sparse.csc_matrix, np.ndarray]:
+        """
+        Evaluate the stacked linearization of the batch at the given C++ Values
+
+        Args:
+            values: The C++ Values to linearize at
+            index_entries: Index entries in `values` for each of the keys of the factor, in the
+                order of self._keys_to_func, which starts with self.optimized_keys
+            cc_key_map: Mapping from Python keys to C++ keys
+
+        Returns:
+            The stacked residual, the sparse jacobian, the lower triangle of the sparse hessian,
+            and the right-hand-side
+        """
+        residual, jacobian, hessian, rhs = self._evaluate(values, index_entries, cc_key_map)
+
+        if self._structure is None:
+            self._structure = self._compute_structure(
+                residual_dim=residual.shape[1],
+                tangent_dims=np.array(
+                    [entry.tangent_dim for entry in index_entries[: len(self.optimized_keys)]],
+                    dtype=np.int64,
+                ),
+            )
+        structure = self._structure
+
+        shape = (len(self.factors) * structure.residual_dim, structure.tangent_dim)
+        jacobian_csc = scipy.sparse.csc_matrix(
+            (
+                jacobian.ravel()[structure.jacobian_order],
+                structure.jacobian_indices,
+                structure.jacobian_indptr,
+            ),
+            shape=shape,
+        )
+
+        hessian_data = np.bincount(
+            structure.hessian_inverse,
+            weights=hessian[:, structure.hessian_lower_rows, structure.hessian_lower_cols].ravel(),
+            minlength=len(structure.hessian_indices),
+        )
+        hessian_csc = scipy.sparse.csc_matrix(
+            (hessian_data, structure.hessian_indices, structure.hessian_indptr),
+            shape=(structure.tangent_dim, structure.tangent_dim),
+        )
+
+        rhs_combined = np.bincount(
+            structure.rhs_cols, weights=rhs.ravel(), minlength=structure.tangent_dim
+        )
+
+        return residual.ravel(), jacobian_csc, hessian_csc, rhs_combined
+
+    def cc_factor(self, cc_key_map: T.Mapping[str, cc_sym.Key]) -> cc_sym.Factor:
+        """
+        Create a single sparse C++ Factor linearizing every factor in this batch
+
+        Args:
+            cc_key_map: Mapping from Python keys (strings, like returned by
+                        `Values.keys_recursive()`) to C++ keys
+        Returns:
+            A C++ wrapped Factor object
+        """
+
+        def wrapped(
+            values: cc_sym.Values, index_entries: T.Sequence[T.Any]
+        ) -> T.Tuple[np.ndarray, scipy.sparse.csc_matrix, scipy.sparse.csc_matrix, np.ndarray]:
+            return self.linearize(values, index_entries, cc_key_map)
+
+        return cc_sym.Factor(
+            wrapped,
+            [cc_key_map[key] for key in self._keys_to_func],
+            [cc_key_map[key] for key in self.optimized_keys],
+            sparse=True,
+        )
+
+
+def batch_numeric_factors(
+    factors: T.Iterable[NumericFactor],
+) -> T.List[T.Union[NumericFactor, NumericFactorBatch]]:
+    """
+    Group factors which share the same linearization function into NumericFactorBatches
+
+    Factors which do not share their linearization function with any other factor, and factors
+    with a compiled linearization function (which are faster as native factors than batched in
+    Python), are returned unchanged. Batches are returned in order of the first factor in each
+    batch.
+    """
+    groups: T.Dict[T.Tuple[int, T.Tuple[int, ...]], T.List[NumericFactor]] = {}
+    for factor in factors:
+        if isinstance(factor.linearization_function, CompiledLinearization):
+            group_key = (id(factor), ())
+        else:
+            group_key = (
+                id(factor.linearization_function),
+                NumericFactorBatch._optimized_positions(factor),  # pylint: disable=protected-access
+            )
+        groups.setdefault(group_key, []).append(factor)
+
+    return [group[0] if len(group) == 1 else NumericFactorBatch(group) for group in groups.values()]
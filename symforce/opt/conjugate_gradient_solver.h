@@ -0,0 +1,126 @@
+/* ----------------------------------------------------------------------------
+ * SymForce - Copyright 2022, Skydio, Inc.
+ * This source code is under the Apache 2.0 license found in the LICENSE file.
+ * ---------------------------------------------------------------------------- */
+
+#pragma once
+
+#include <vector>
+
+#include <Eigen/Dense>
+#include <Eigen/Sparse>
+
+namespace sym {
+
+// Iteratively solves A * x = b, where A is a sparse symmetric positive definite matrix and b is a
+// dense vector or matrix, using the preconditioned conjugate gradient method.
+//
+// Implements the same interface as SparseCholeskySolver, so it can be used as the linear solver
+// for the LevenbergMarquardtSolver.  Unlike a factorization, it doesn't need any memory beyond a
+// copy of A and a few vectors, and each iteration only costs one product with A, so it can be much
+// cheaper than a factorization for large problems with lots of fill-in (e.g. bundle adjustment).
+// The solution is approximate, to within the given tolerance.
+//
+// The preconditioner is block-Jacobi: the inverses of the dense blocks on the diagonal of A, which
+// are found from its sparsity pattern.  For a Hessian from the Linearizer, each block is (at
+// least) the block of a single variable.
+template <typename _MatrixType>
+class ConjugateGradientSolver {
+ public:
+  using MatrixType = _MatrixType;
+  using Scalar = typename MatrixType::Scalar;
+  using StorageIndex = typename MatrixType::StorageIndex;
+  using VectorType = Eigen::Matrix<Scalar, Eigen::Dynamic, 1>;
+  using RhsType = Eigen::Matrix<Scalar, Eigen::Dynamic, Eigen::Dynamic>;
+
+  static_assert(static_cast<int>(MatrixType::Options) == Eigen::ColMajor,
+                "Matrix must be column major");
+
+  // Args:
+  //     max_iterations: Max number of iterations for each column of the rhs.  If <= 0, the
+  //         dimension of A is used, for which conjugate gradient is exact in exact arithmetic
+  //     tolerance: Iteration stops when the norm of the residual is less than tolerance times the
+  //         norm of the rhs
+  //     max_block_dim: Max dimension of the diagonal blocks used for the preconditioner
+  explicit ConjugateGradientSolver(const int max_iterations = 0, const Scalar tolerance = 1e-6,
+                                   const int max_block_dim = 16)
+      : max_iterations_(max_iterations), tolerance_(tolerance), max_block_dim_(max_block_dim) {}
+
+  bool IsInitialized() const {
+    return is_initialized_;
+  }
+
+  void SetMaxIterations(const int max_iterations) {
+    max_iterations_ = max_iterations;
+  }
+
+  void SetTolerance(const Scalar tolerance) {
+    tolerance_ = tolerance;
+  }
+
+  // Find the blocks of the preconditioner from the sparsity pattern of A, and allocate storage.
+  //
+  // `A` should be lower triangular
+  void ComputeSymbolicSparsity(const MatrixType& A);
+
+  // Store A and compute the preconditioner.  A must have the same sparsity pattern as the matrix
+  // passed to ComputeSymbolicSparsity
+  void Factorize(const MatrixType& A);
+
+  // Returns x for A x = b, where x and b are dense
+  template <typename Rhs>
+  RhsType Solve(const Eigen::MatrixBase<Rhs>& b) const;
+
+  // Solves in place for x in A x = b, where x and b are dense
+  template <typename Rhs>
+  void SolveInPlace(Eigen::MatrixBase<Rhs>* const b) const;
+
+  // The max number of iterations over the columns of the rhs in the last solve
+  int LastIterations() const {
+    return last_iterations_;
+  }
+
+  // The max residual norm relative to the rhs norm over the columns of the rhs in the last solve
+  Scalar LastRelativeResidual() const {
+    return last_relative_residual_;
+  }
+
+ private:
+  // Solve A x = b for a single column, starting from x = 0
+  void SolveColumn(const Eigen::Ref<const VectorType>& b, Eigen::Ref<VectorType> x) const;
+
+  // Apply the preconditioner, z = M^{-1} r
+  void Precondition(const VectorType& r, VectorType* const z) const;
+
+  int max_iterations_;
+  Scalar tolerance_;
+  int max_block_dim_;
+
+  bool is_initialized_{false};
+
+  // The lower triangle of A, from Factorize
+  MatrixType A_lower_;
+
+  // Start index and dimension of each block on the diagonal, from ComputeSymbolicSparsity
+  struct Block {
+    int start;
+    int dim;
+  };
+  std::vector<Block> blocks_;
+
+  // Inverse of each block on the diagonal, from Factorize
+  std::vector<RhsType> block_inverses_;
+
+  // Working storage for SolveColumn
+  mutable VectorType r_;
+  mutable VectorType z_;
+  mutable VectorType p_;
+  mutable VectorType A_p_;
+
+  mutable int last_iterations_{0};
+  mutable Scalar last_relative_residual_{0};
+};
+
+}  // namespace sym
+
+#include "./conjugate_gradient_solver.tcc"
@@ -0,0 +1,164 @@
+/* ----------------------------------------------------------------------------
+ * SymForce - Copyright 2022, Skydio, Inc.
+ * This source code is under the Apache 2.0 license found in the LICENSE file.
+ * ---------------------------------------------------------------------------- */
+
+#pragma once
+
+#include <algorithm>
+
+#include "./assert.h"
+#include "./conjugate_gradient_solver.h"
+
+namespace sym {
+
+template <typename _MatrixType>
+void ConjugateGradientSolver<_MatrixType>::ComputeSymbolicSparsity(const MatrixType& A) {
+  SYM_ASSERT(A.rows() == A.cols());
+  const int N = A.cols();
+
+  // For each column j, the last row i such that rows j through i of column j are all nonzero, or
+  // j - 1 if the diagonal is zero
+  std::vector<int> dense_run_end(N);
+  for (int j = 0; j < N; ++j) {
+    int run_end = j - 1;
+    for (typename MatrixType::InnerIterator it(A, j); it; ++it) {
+      if (it.row() < j) {
+        continue;
+      }
+      if (it.row() != run_end + 1) {
+        break;
+      }
+      run_end = it.row();
+    }
+    dense_run_end[j] = run_end;
+  }
+
+  // Greedily grow each block while the block stays dense
+  blocks_.clear();
+  int start = 0;
+  while (start < N) {
+    int end = start + 1;
+    int min_run_end = dense_run_end[start];
+    while (end < N && end - start < max_block_dim_ && min_run_end >= end &&
+           dense_run_end[end] >= end) {
+      min_run_end = std::min(min_run_end, dense_run_end[end]);
+      ++end;
+    }
+    blocks_.push_back({start, end - start});
+    start = end;
+  }
+
+  block_inverses_.resize(blocks_.size());
+  for (size_t i = 0; i < blocks_.size(); ++i) {
+    block_inverses_[i].resize(blocks_[i].dim, blocks_[i].dim);
+  }
+
+  r_.resize(N);
+  z_.resize(N);
+  p_.resize(N);
+  A_p_.resize(N);
+
+  is_initialized_ = true;
+}
+
+template <typename _MatrixType>
+void ConjugateGradientSolver<_MatrixType>::Factorize(const MatrixType& A) {
+  SYM_ASSERT(is_initialized_);
+  SYM_ASSERT(A.rows() == r_.rows() && A.cols() == r_.rows());
+
+  A_lower_ = A;
+
+  for (size_t i = 0; i < blocks_.size(); ++i) {
+    const Block& block = blocks_[i];
+    const RhsType dense_block = A.block(block.start, block.start, block.dim, block.dim);
+    const Eigen::LLT<RhsType> llt = dense_block.template selfadjointView<Eigen::Lower>().llt();
+    if (llt.info() == Eigen::Success) {
+      block_inverses_[i] = llt.solve(RhsType::Identity(block.dim, block.dim));
+    } else {
+      // Don't precondition blocks that aren't positive definite
+      block_inverses_[i].setIdentity();
+    }
+  }
+}
+
+template <typename _MatrixType>
+void ConjugateGradientSolver<_MatrixType>::Precondition(const VectorType& r,
+                                                        VectorType* const z) const {
+  for (size_t i = 0; i < blocks_.size(); ++i) {
+    const Block& block = blocks_[i];
+    z->segment(block.start, block.dim).noalias() =
+        block_inverses_[i] * r.segment(block.start, block.dim);
+  }
+}
+
+template <typename _MatrixType>
+void ConjugateGradientSolver<_MatrixType>::SolveColumn(const Eigen::Ref<const VectorType>& b,
+                                                       Eigen::Ref<VectorType> x) const {
+  x.setZero();
+
+  const Scalar b_norm = b.norm();
+  if (b_norm == 0) {
+    return;
+  }
+
+  const int max_iterations = max_iterations_ > 0 ? max_iterations_ : b.rows();
+  const Scalar threshold = tolerance_ * b_norm;
+
+  r_ = b;
+  Precondition(r_, &z_);
+  p_ = z_;
+  Scalar r_dot_z = r_.dot(z_);
+  Scalar r_norm = b_norm;
+
+  int iteration = 0;
+  while (iteration < max_iterations && r_norm > threshold) {
+    A_p_.noalias() = A_lower_.template selfadjointView<Eigen::Lower>() * p_;
+    const Scalar p_dot_A_p = p_.dot(A_p_);
+    if (!(p_dot_A_p > 0)) {
+      // A is not positive definite along p (or p is zero), so no further progress is possible
+      break;
+    }
+
+    const Scalar alpha = r_dot_z / p_dot_A_p;
+    x += alpha * p_;
+    r_ -= alpha * A_p_;
+    r_norm = r_.norm();
+    ++iteration;
+
+    Precondition(r_, &z_);
+    const Scalar new_r_dot_z = r_.dot(z_);
+    p_ = z_ + (new_r_dot_z / r_dot_z) * p_;
+    r_dot_z = new_r_dot_z;
+  }
+
+  last_iterations_ = std::max(last_iterations_, iteration);
+  last_relative_residual_ = std::max(last_relative_residual_, r_norm / b_norm);
+}
+
+template <typename _MatrixType>
+template <typename Rhs>
+typename ConjugateGradientSolver<_MatrixType>::RhsType ConjugateGradientSolver<_MatrixType>::Solve(
+    const Eigen::MatrixBase<Rhs>& b) const {
+  RhsType x = b;
+  SolveInPlace(&x);
+  return x;
+}
+
+template <typename _MatrixType>
+template <typename Rhs>
+void ConjugateGradientSolver<_MatrixType>::SolveInPlace(Eigen::MatrixBase<Rhs>* const b) const {
+  SYM_ASSERT(is_initialized_);
+  SYM_ASSERT(b->rows() == A_lower_.rows());
+
+  last_iterations_ = 0;
+  last_relative_residual_ = 0;
+
+  VectorType x(b->rows());
+  for (Eigen::Index col = 0; col < b->cols(); ++col) {
+    SolveColumn(b->col(col), x);
+    b->col(col) = x;
+  }
+}
+
+}  // namespace sym
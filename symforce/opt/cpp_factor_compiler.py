@@ -0,0 +1,389 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+"""
+Compilation of generated C++ linearization functions into native `cc_sym.Factor`s, used by
+`Factor.to_numeric_factor` for factors generated with `CppConfig`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.machinery
+import importlib.util
+import os
+from pathlib import Path
+import shlex
+import sys
+import sysconfig
+
+import numpy as np
+
+import symforce
+from symforce import cc_sym
+from symforce import logger
+from symforce import path_util
+from symforce import python_util
+from symforce import typing as T
+from symforce.codegen.similarity_index import SimilarityIndex
+from symforce.internal.directory_cache import DirectoryCache
+
+_MODULE_TEMPLATE = """\
+#include <vector>
+
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <symforce/opt/factor.h>
+#include <symforce/opt/key.h>
+
+#include "symforce/{namespace}/{name}.h"
+
+PYBIND11_MODULE({module_name}, module) {{
+  module.def("make_factor", [](const std::vector<sym::Key>& keys_to_func,
+                               const std::vector<sym::Key>& keys_to_optimize) {{
+    return sym::Factord::Hessian({namespace}::{function_name}<double>, keys_to_func,
+                                 keys_to_optimize);
+  }});
+}}
+"""
+
+
+class CompiledLinearization:
+    """
+    A generated C++ linearization function compiled into an extension module.
+
+    Construct native factors with `cc_factor`, which evaluate the linearization without calling
+    back into python.  Calling this object evaluates the linearization once from python, with the
+    same arguments and outputs as the equivalent generated python linearization function.
+
+    Args:
+        make_factor: Function of the compiled module, which constructs a `cc_sym.Factor` from its
+            keys_to_func and keys_to_optimize
+        num_args: The number of arguments of the linearization function
+        optimized_args: The indices of the arguments the linearization is computed with respect to
+    """
+
+    def __init__(
+        self,
+        make_factor: T.Callable[[T.List[cc_sym.Key], T.List[cc_sym.Key]], cc_sym.Factor],
+        num_args: int,
+        optimized_args: T.Sequence[int],
+    ) -> None:
+        self.make_factor = make_factor
+        self.num_args = num_args
+        self.optimized_args = list(optimized_args)
+
+    def cc_factor(
+        self, keys_to_func: T.Sequence[cc_sym.Key], keys_to_optimize: T.Sequence[cc_sym.Key]
+    ) -> cc_sym.Factor:
+        """
+        Construct a native factor on the given keys
+        """
+        return self.make_factor(list(keys_to_func), list(keys_to_optimize))
+
+    def __call__(self, *args: T.Any) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if len(args) != self.num_args:
+            raise TypeError(f"Expected {self.num_args} arguments, got {len(args)}")
+
+        keys = [cc_sym.Key("x", i) for i in range(self.num_args)]
+        values = cc_sym.Values()
+        for key, arg in zip(keys, args):
+            values.set(key, arg)
+
+        factor = self.cc_factor(keys, [keys[i] for i in self.optimized_args])
+        residual, jacobian = factor.linearize(values)
+
+        # Like the generated functions, only the lower triangle of the hessian is filled
+        return residual, jacobian, np.tril(jacobian.T @ jacobian), jacobian.T @ residual
+
+
+class CppFactorCompiler(DirectoryCache):
+    """
+    Compiles generated C++ linearization functions into python extension modules, and caches the
+    compiled modules on disk so that the compiler only runs for factors which have not been
+    compiled before.
+
+    Each entry is a directory in `directory`, named by a content hash of the SimilarityIndex of
+    the residual, the optimized keys, the compiler command, and the symforce headers and libraries
+    it is built against (see `CppFactorCompiler.key`), containing the compiled module.
+
+    The total size of the cache is limited to `max_size` bytes; when a new entry takes the cache
+    over this limit, the least recently used entries are evicted.
+
+    The module is compiled against the headers of pybind11, python, Eigen, the symforce C++
+    libraries, and the symforce lcmtypes, and linked against the symforce_opt library, using the
+    same compiler and pybind11 version as cc_sym.  Headers and libraries installed with symforce,
+    or found in the source tree and build directory, are used by default; anything else should be
+    passed in compile_flags and link_flags.
+
+    Args:
+        directory: Directory to store compiled modules in, created if it does not exist
+        compiler: The C++ compiler executable
+        compile_flags: Flags passed to the compiler in addition to the defaults, e.g. include
+            directories
+        link_flags: Flags passed to the compiler in addition to the defaults when linking, e.g.
+            library directories
+        max_size: Maximum total size of the compiled modules, in bytes
+    """
+
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+    DEFAULT_COMPILE_FLAGS = ("-std=c++14", "-O2", "-shared", "-fPIC", "-fvisibility=hidden")
+
+    MODULE_SOURCE_FILE = "factor_module.cc"
+
+    def __init__(
+        self,
+        directory: T.Openable,
+        compiler: str = "c++",
+        compile_flags: T.Sequence[str] = (),
+        link_flags: T.Sequence[str] = (),
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        super().__init__(directory, max_size)
+        self.compiler = compiler
+        self.compile_flags = list(compile_flags)
+        self.link_flags = list(link_flags)
+
+        # Modules loaded by this process, by key
+        self._loaded_modules: T.Dict[str, T.Any] = {}
+
+    @classmethod
+    def from_environment(cls) -> CppFactorCompiler:
+        """
+        Construct the default compiler.
+
+        The cache location is given by the SYMFORCE_CPP_FACTOR_CACHE_DIR environment variable,
+        which defaults to `$XDG_CACHE_HOME/symforce/cpp_factors` (or
+        `~/.cache/symforce/cpp_factors`), and its size limit in bytes by
+        SYMFORCE_CPP_FACTOR_CACHE_MAX_SIZE.  The compiler is given by CXX, and additional flags for
+        compiling and linking by SYMFORCE_CPP_FACTOR_CXXFLAGS and SYMFORCE_CPP_FACTOR_LDFLAGS.
+        """
+        directory = os.environ.get("SYMFORCE_CPP_FACTOR_CACHE_DIR")
+        if not directory:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+            directory = os.fspath(Path(cache_home) / "symforce" / "cpp_factors")
+
+        return cls(
+            directory,
+            compiler=os.environ.get("CXX", "c++"),
+            compile_flags=shlex.split(os.environ.get("SYMFORCE_CPP_FACTOR_CXXFLAGS", "")),
+            link_flags=shlex.split(os.environ.get("SYMFORCE_CPP_FACTOR_LDFLAGS", "")),
+            max_size=int(
+                os.environ.get("SYMFORCE_CPP_FACTOR_CACHE_MAX_SIZE", cls.DEFAULT_MAX_SIZE)
+            ),
+        )
+
+    def command(
+        self,
+        source_file: T.Openable,
+        output_file: T.Openable,
+        extra_include_dirs: T.Iterable[T.Openable] = (),
+    ) -> T.List[str]:
+        """
+        Returns the command to compile source_file into the extension module output_file, with
+        the generated code in extra_include_dirs
+        """
+        include_dirs, library_dirs = self._search_dirs(extra_include_dirs)
+
+        return [
+            self.compiler,
+            *self.DEFAULT_COMPILE_FLAGS,
+            *[f"-I{include_dir}" for include_dir in include_dirs],
+            *self.compile_flags,
+            os.fspath(source_file),
+            "-o",
+            os.fspath(output_file),
+            *[f"-L{library_dir}" for library_dir in library_dirs],
+            *[f"-Wl,-rpath,{library_dir}" for library_dir in library_dirs],
+            *self.link_flags,
+            "-lsymforce_opt",
+        ]
+
+    @staticmethod
+    def _search_dirs(
+        extra_include_dirs: T.Iterable[T.Openable] = (),
+    ) -> T.Tuple[T.List[Path], T.List[Path]]:
+        """
+        Returns the existing default include and library directories, after extra_include_dirs
+        """
+        # Imported here so that pybind11 is only required to compile factors
+        import pybind11  # pylint: disable=import-outside-toplevel
+
+        include_dirs = [Path(include_dir) for include_dir in extra_include_dirs]
+        include_dirs.extend([Path(pybind11.get_include()), Path(sysconfig.get_paths()["include"])])
+        library_dirs = []
+
+        # Headers and libraries installed with symforce
+        include_dirs.append(Path(sys.prefix) / "include")
+        library_dirs.append(Path(sys.prefix) / "lib")
+
+        # Headers in the source tree, and headers and libraries in the build directory
+        source_dir = path_util.symforce_dir()
+        include_dirs.extend(
+            [
+                source_dir,
+                source_dir / "gen" / "cpp",
+                source_dir / "third_party" / "eigen_lcm" / "lcmtypes" / "eigen_lcm_lcm" / "cpp",
+                source_dir / "third_party" / "skymarshal" / "include",
+            ]
+        )
+        try:
+            binary_output_dir = path_util.binary_output_dir()
+        except path_util.MissingManifestException:
+            pass
+        else:
+            include_dirs.append(binary_output_dir / "lcmtypes" / "cpp")
+            library_dirs.append(binary_output_dir / "symforce" / "opt")
+
+        return (
+            [include_dir for include_dir in include_dirs if include_dir.is_dir()],
+            [library_dir for library_dir in library_dirs if library_dir.is_dir()],
+        )
+
+    def _dependencies(self) -> T.List[str]:
+        """
+        Returns identifiers of the symforce headers and libraries the modules are built against:
+        a hash of the symforce and sym headers in the include directories, and the path, size,
+        and modification time of cc_sym and of each symforce_opt library in the library
+        directories (including directories passed in compile_flags and link_flags)
+        """
+        include_dirs, library_dirs = self._search_dirs()
+        include_dirs.extend(
+            Path(flag[len("-I") :]) for flag in self.compile_flags if flag.startswith("-I")
+        )
+        library_dirs.extend(
+            Path(flag[len("-L") :]) for flag in self.link_flags if flag.startswith("-L")
+        )
+
+        dependencies = []
+        for include_dir in include_dirs:
+            for headers_dir in (include_dir / "symforce" / "opt", include_dir / "sym"):
+                if headers_dir.is_dir():
+                    dependencies.append(python_util.files_hash(headers_dir, (".h", ".tcc")))
+
+        library_files = [
+            library_file
+            for library_dir in library_dirs
+            for library_file in sorted(library_dir.glob("libsymforce_opt.*"))
+        ]
+        cc_sym_module = sys.modules.get("cc_sym")
+        if cc_sym_module is not None and getattr(cc_sym_module, "__file__", None) is not None:
+            library_files.append(Path(cc_sym_module.__file__))
+        for library_file in library_files:
+            try:
+                stat = library_file.stat()
+            except OSError:
+                continue
+            dependencies.append(f"{library_file}:{stat.st_size}:{stat.st_mtime_ns}")
+
+        return dependencies
+
+    def key(self, index: SimilarityIndex, optimized_keys: T.Iterable[str]) -> str:
+        """
+        Returns the name of the cache entry for the linearization of the residual described by
+        index with respect to optimized_keys.  The order of the optimized keys is significant.
+
+        Includes the symforce headers and libraries the module is built against, so that modules
+        built against a different version of them (e.g. after rebuilding symforce) are not used.
+        """
+        contents = "\n".join(
+            [
+                index.stable_hash(),
+                *optimized_keys,
+                symforce.__version__,
+                sysconfig.get_config_var("EXT_SUFFIX"),
+                self.compiler,
+                *self.compile_flags,
+                *self.link_flags,
+                *self._dependencies(),
+            ]
+        )
+        return hashlib.sha256(contents.encode()).hexdigest()
+
+    @staticmethod
+    def _module_name(key: str) -> str:
+        return f"sym_factor_{key}"
+
+    def _module_file(self, key: str) -> Path:
+        return (
+            self.directory / key / (self._module_name(key) + sysconfig.get_config_var("EXT_SUFFIX"))
+        )
+
+    def _load(self, key: str) -> T.Any:
+        """
+        Load the compiled module for key
+        """
+        module = self._loaded_modules.get(key)
+        if module is None:
+            module_name = self._module_name(key)
+            module_file = self._module_file(key)
+            spec = importlib.util.spec_from_file_location(
+                module_name,
+                module_file,
+                loader=importlib.machinery.ExtensionFileLoader(module_name, os.fspath(module_file)),
+            )
+            assert spec is not None
+            module = importlib.util.module_from_spec(spec)
+            self._loaded_modules[key] = module
+        return module
+
+    def get_factor_function(
+        self, key: str
+    ) -> T.Optional[T.Callable[[T.List[cc_sym.Key], T.List[cc_sym.Key]], cc_sym.Factor]]:
+        """
+        If a module has been compiled with compile under key, loads it and returns its
+        make_factor function.
+
+        Otherwise, returns None.
+        """
+        if key not in self._loaded_modules and (
+            self.get(key) is None or not self._module_file(key).exists()
+        ):
+            return None
+        return self._load(key).make_factor
+
+    def compile(
+        self, key: str, output_dir: T.Openable, namespace: str, name: str
+    ) -> T.Callable[[T.List[cc_sym.Key], T.List[cc_sym.Key]], cc_sym.Factor]:
+        """
+        Compiles the generated C++ linearization function namespace.name in output_dir into a
+        module cached under key, loads it, and returns its make_factor function.
+
+        Raises:
+            subprocess.CalledProcessError: If the compiler fails
+        """
+
+        def compile_module(entry_dir: Path) -> None:
+            source_file = entry_dir / self.MODULE_SOURCE_FILE
+            source_file.write_text(
+                _MODULE_TEMPLATE.format(
+                    module_name=self._module_name(key),
+                    namespace=namespace,
+                    name=name,
+                    function_name=python_util.snakecase_to_camelcase(name),
+                )
+            )
+
+            logger.info(f"Compiling C++ factor {namespace}.{name}")
+            python_util.execute_subprocess(
+                self.command(
+                    source_file,
+                    entry_dir / self._module_file(key).name,
+                    extra_include_dirs=[Path(output_dir) / "cpp"],
+                )
+            )
+
+        self.add(key, compile_module)
+
+        return self._load(key).make_factor
+
+    def clear(self) -> None:
+        """
+        Removes all compiled modules from the cache.  Modules already loaded by this process
+        remain loaded.
+        """
+        super().clear()
@@ -13,11 +13,17 @@ import logging
 from symforce import typing as T
 from symforce.codegen import Codegen
 from symforce.codegen import codegen_config
+from symforce.codegen.backends.cpp.cpp_config import CppConfig
 from symforce.codegen.backends.python.python_config import PythonConfig
+from symforce import ops
 from symforce import python_util
+from symforce.opt.cpp_factor_compiler import CompiledLinearization
+from symforce.opt.cpp_factor_compiler import CppFactorCompiler
+from symforce.opt.numeric_factor import InPlaceLinearization
 from symforce.opt.numeric_factor import NumericFactor
 from symforce.values import Values
 from symforce.codegen.similarity_index import SimilarityIndex
+from symforce.opt._internal.disk_residual_cache import DiskResidualCache
 from symforce.opt._internal.generated_residual_cache import GeneratedResidualCache
 import symforce.symbolic as sf
 from symforce import logger
@@ -37,7 +43,8 @@ class Factor:
             return a symbolic expression for the residual.
         config: The language the numeric factor will be generated in. Defaults to Python, which
             does not require any compilation. Also does not autoformat by default in order to
-            speed up code generation.
+            speed up code generation.  With `CppConfig`, the numeric factor is compiled into a
+            native factor, see `to_numeric_factor`.
         custom_jacobian_func: A functor that computes the jacobian, typically unnecessary unless
             you want to override the jacobian computed by SymForce, e.g. to stop derivatives
             with respect to certain variables or directions, or because the jacobian can be
@@ -50,6 +57,8 @@ class Factor:
     """
 
     _generated_residual_cache = GeneratedResidualCache()
+    _disk_residual_cache = DiskResidualCache.from_environment()
+    _cpp_factor_compiler = CppFactorCompiler.from_environment()
 
     def __init__(
         self,
@@ -72,6 +81,45 @@ class Factor:
             custom_jacobian_func=custom_jacobian_func,
         )
 
+    @staticmethod
+    def set_disk_cache(
+        directory: T.Optional[T.Openable], max_size: int = DiskResidualCache.DEFAULT_MAX_SIZE
+    ) -> None:
+        """
+        Sets the location of the persistent cache of generated linearization functions used by
+        `to_numeric_factor`, which lets later processes skip generating identical factors.
+
+        The cache is disabled unless the SYMFORCE_FACTOR_CACHE_DIR environment variable is set,
+        see `DiskResidualCache.from_environment`.
+
+        Args:
+            directory: Directory of the cache, or None to disable the cache
+            max_size: Maximum size of the cache in bytes, past which the least recently used
+                entries are evicted
+        """
+        Factor._disk_residual_cache = (
+            DiskResidualCache(directory, max_size) if directory is not None else None
+        )
+
+    @staticmethod
+    def clear_disk_cache() -> None:
+        """
+        Removes all entries from the persistent cache of generated linearization functions, if it
+        is enabled.
+        """
+        if Factor._disk_residual_cache is not None:
+            Factor._disk_residual_cache.clear()
+
+    @staticmethod
+    def set_cpp_factor_compiler(compiler: CppFactorCompiler) -> None:
+        """
+        Sets the compiler, and the cache of compiled modules, used by `to_numeric_factor` for
+        factors generated with `CppConfig`.
+
+        The default is given by environment variables, see `CppFactorCompiler.from_environment`.
+        """
+        Factor._cpp_factor_compiler = compiler
+
     @classmethod
     def from_inputs_and_residual(
         cls,
@@ -185,8 +233,12 @@ class Factor:
             "jacobian"
         ]
 
+        # The generated python function doesn't use the LCM bindings of any types in its
+        # arguments, so don't generate them
         output_data = codegen_with_linearization.generate_function(
-            output_dir=output_dir, namespace=namespace
+            output_dir=output_dir,
+            namespace=namespace,
+            generate_lcm_bindings=not isinstance(self.codegen.config, PythonConfig),
         )
 
         metadata = dataclasses.asdict(output_data)
@@ -199,15 +251,32 @@ class Factor:
         optimized_keys: T.Sequence[str],
         output_dir: T.Openable = None,
         namespace: str = None,
+        batch_linearization: bool = False,
     ) -> NumericFactor:
         """
         Constructs a NumericFactor from this Factor, including generating a linearization
         function.
 
+        If this Factor was constructed with `CppConfig`, the generated C++ linearization function
+        is compiled into a python extension module, which constructs a native `cc_sym.Factor` that
+        is linearized without calling back into python.  Compiled modules are cached on disk by
+        the CppFactorCompiler set with `set_cpp_factor_compiler`, so the compiler only runs for
+        factors of a form which has not been compiled before.
+
+        Otherwise, unless output_dir is given, the python linearization function is generated with
+        `PythonConfig(outputs_in_place=True)` and wrapped in an `InPlaceLinearization`, so that the
+        `cc_sym.Factor` passes the storage of the linearized factor to it to fill directly.
+
         Args:
             optimized_keys: Keys which we compute the linearization of the residual with respect to.
             output_dir: Where the generated linearization function will be output
             namespace: Namespace of the generated linearization function
+            batch_linearization: Also generate a vectorized linearization function (see
+                `PythonConfig.vectorized`), used as the `batch_linearization_function` of the
+                NumericFactor when it is linearized together with other factors (see the
+                `batch_factors` argument of `Optimizer`).  Ignored for factors which can't be
+                vectorized, e.g. C++ or numba factors, or factors with arguments which are not
+                scalars, matrices, or geo or cam types.
         """
         if namespace is None:
             namespace = f"sym_{uuid.uuid4().hex}"
@@ -220,23 +289,146 @@ class Factor:
                     + " this factor."
                 )
 
-        if not isinstance(self.codegen.config, PythonConfig):
+        if not isinstance(self.codegen.config, (PythonConfig, CppConfig)):
             raise NotImplementedError(
-                "We currently only support generating and then loading python factors."
+                "We currently only support generating and then loading python or C++ factors."
             )
 
+        batch_linearization_function = None
+        if batch_linearization:
+            vectorized_factor = self._vectorized()
+            if vectorized_factor is not None:
+                batch_linearization_function = vectorized_factor._linearization_function(
+                    optimized_keys, output_dir, f"{namespace}_vectorized"
+                )
+
+        # Python linearization functions are generated to write their outputs in place, so that
+        # they can fill the storage of the linearized C++ factor directly.  Functions generated
+        # into output_dir keep the usual signature, so that they can be loaded with
+        # NumericFactor.from_file_python.
+        linearization_factor = self
+        if output_dir is None:
+            linearization_factor = self._in_place() or self
+        linearization_function = linearization_factor._linearization_function(
+            optimized_keys, output_dir, namespace
+        )
+
+        return NumericFactor(
+            keys=self.keys,
+            optimized_keys=optimized_keys,
+            linearization_function=linearization_function,
+            batch_linearization_function=batch_linearization_function,
+        )
+
+    def _vectorized(self) -> T.Optional[Factor]:
+        """
+        Returns a copy of this factor generated with `PythonConfig(vectorized=True)`, or None if
+        this factor can't be vectorized.
+        """
+        config = self.codegen.config
+        if not isinstance(config, PythonConfig) or config.use_numba or config.vectorized:
+            return None
+
+        try:
+            codegen = Codegen(
+                inputs=self.codegen.inputs,
+                outputs=self.codegen.outputs,
+                config=dataclasses.replace(config, vectorized=True),
+                name=self.codegen.name,
+                return_key=self.codegen.return_key,
+                sparse_matrices=list(self.codegen.sparse_mat_data),
+                docstring=self.codegen.docstring,
+            )
+        except ValueError:
+            # The inputs or outputs are not supported for vectorized functions
+            return None
+
+        vectorized_factor = Factor.__new__(Factor)
+        vectorized_factor._initialize(
+            keys=self.keys, codegen_obj=codegen, custom_jacobian_func=self.custom_jacobian_func
+        )
+        return vectorized_factor
+
+    def _in_place(self) -> T.Optional[Factor]:
+        """
+        Returns a copy of this factor generated with `PythonConfig(outputs_in_place=True)`, or None
+        if this factor is not a python factor which can write its outputs in place.
+        """
+        config = self.codegen.config
+        if not isinstance(config, PythonConfig) or config.use_numba or config.vectorized:
+            return None
+        if config.outputs_in_place:
+            return self
+
+        try:
+            codegen = Codegen(
+                inputs=self.codegen.inputs,
+                outputs=self.codegen.outputs,
+                config=dataclasses.replace(config, outputs_in_place=True),
+                name=self.codegen.name,
+                return_key=self.codegen.return_key,
+                sparse_matrices=list(self.codegen.sparse_mat_data),
+                docstring=self.codegen.docstring,
+            )
+        except ValueError:
+            # The residual is not a matrix
+            return None
+
+        in_place_factor = Factor.__new__(Factor)
+        in_place_factor._initialize(
+            keys=self.keys, codegen_obj=codegen, custom_jacobian_func=self.custom_jacobian_func
+        )
+        return in_place_factor
+
+    def _linearization_function(
+        self, optimized_keys: T.Sequence[str], output_dir: T.Optional[T.Openable], namespace: str
+    ) -> T.Callable:
+        """
+        Loads the linearization function from one of the caches, or generates it if it is not
+        cached.  See `to_numeric_factor`.
+        """
         # If we have already generated a factor of the same form, load the previously generated
-        # factor.
+        # factor.  Unless a custom jacobian (which is a function of the keys) is given, the
+        # generated function only depends on which arguments are optimized, so factors of the same
+        # form on different keys share a linearization function.
         similarity_index = SimilarityIndex.from_codegen(self.codegen)
+        if self.custom_jacobian_func is None:
+            codegen_keys = list(self.codegen.inputs.keys())
+            cache_keys = [codegen_keys[self.keys.index(key)] for key in optimized_keys]
+        else:
+            cache_keys = list(optimized_keys)
         cached_residual = Factor._generated_residual_cache.get_residual(
-            similarity_index, optimized_keys
+            similarity_index, cache_keys
         )
         if cached_residual is not None:
-            return NumericFactor(
-                keys=self.keys,
-                optimized_keys=optimized_keys,
-                linearization_function=cached_residual,
+            return cached_residual
+
+        # C++ factors are cached by the CppFactorCompiler
+        if isinstance(self.codegen.config, CppConfig):
+            compiled_linearization = self._compile_linearization(
+                optimized_keys, similarity_index, cache_keys, output_dir, namespace
+            )
+            Factor._generated_residual_cache.cache_residual(
+                similarity_index, cache_keys, compiled_linearization
             )
+            return compiled_linearization
+
+        # For python factors, try the persistent cache, which is shared between processes.  Factors with a
+        # custom jacobian aren't cached on disk, since the SimilarityIndex doesn't describe it.
+        disk_cache_key = None
+        if (
+            Factor._disk_residual_cache is not None
+            and output_dir is None
+            and self.custom_jacobian_func is None
+        ):
+            disk_cache_key = DiskResidualCache.key(similarity_index, cache_keys)
+            cached_residual = Factor._disk_residual_cache.get_residual(disk_cache_key)
+            if cached_residual is not None:
+                cached_residual = self._wrap_python_linearization(cached_residual, optimized_keys)
+                Factor._generated_residual_cache.cache_residual(
+                    similarity_index, cache_keys, cached_residual
+                )
+                return cached_residual
 
         # Compute the linearization of the residual and generate code
         output_data = self.generate(optimized_keys, output_dir, namespace)
@@ -250,15 +442,86 @@ class Factor:
             name=output_data["name"],
         )
 
+        linearization_function = self._wrap_python_linearization(
+            numeric_factor.linearization_function, optimized_keys
+        )
         Factor._generated_residual_cache.cache_residual(
-            similarity_index, optimized_keys, numeric_factor.linearization_function
+            similarity_index, cache_keys, linearization_function
         )
 
-        if output_dir is None and logger.level != logging.DEBUG:
+        if disk_cache_key is not None:
+            assert Factor._disk_residual_cache is not None
+            Factor._disk_residual_cache.cache_residual(
+                disk_cache_key, output_data["output_dir"], namespace, output_data["name"]
+            )
+        elif output_dir is None and logger.level != logging.DEBUG:
             # We generated the function into a temp directory; delete it now that it's loaded.
             python_util.remove_if_exists(output_data["output_dir"])
 
-        return numeric_factor
+        return linearization_function
+
+    def _wrap_python_linearization(
+        self, function: T.Callable, optimized_keys: T.Sequence[str]
+    ) -> T.Callable:
+        """
+        Wraps a generated python linearization function in an InPlaceLinearization if it writes
+        its outputs in place, otherwise returns it unchanged
+        """
+        assert isinstance(self.codegen.config, PythonConfig)
+        if not self.codegen.config.outputs_in_place:
+            return function
+
+        residual = list(self.codegen.outputs.values())[0]
+        if self.custom_jacobian_func is not None:
+            tangent_dim = self.custom_jacobian_func(optimized_keys).shape[1]
+        else:
+            tangent_dim = sum(
+                ops.LieGroupOps.tangent_dim(self.codegen.inputs[codegen_key])
+                for codegen_key, key in zip(self.codegen.inputs.keys(), self.keys)
+                if key in optimized_keys
+            )
+        return InPlaceLinearization(
+            function, residual_dim=residual.shape[0], tangent_dim=tangent_dim
+        )
+
+    def _compile_linearization(
+        self,
+        optimized_keys: T.Sequence[str],
+        similarity_index: SimilarityIndex,
+        cache_keys: T.Sequence[str],
+        output_dir: T.Optional[T.Openable],
+        namespace: str,
+    ) -> CompiledLinearization:
+        """
+        Loads the compiled C++ linearization function from the cache of the CppFactorCompiler, or
+        generates and compiles it if it is not cached.
+        """
+        compiler = Factor._cpp_factor_compiler
+
+        # The SimilarityIndex doesn't describe a custom jacobian, so it is part of the key
+        key_contents = list(cache_keys)
+        if self.custom_jacobian_func is not None:
+            key_contents.append(str(self.custom_jacobian_func(optimized_keys)))
+        key = compiler.key(similarity_index, key_contents)
+
+        make_factor = compiler.get_factor_function(key)
+        if make_factor is None:
+            output_data = self.generate(optimized_keys, output_dir, namespace)
+            try:
+                make_factor = compiler.compile(
+                    key, output_data["output_dir"], namespace, output_data["name"]
+                )
+            finally:
+                if output_dir is None and logger.level != logging.DEBUG:
+                    # We generated the function into a temp directory; delete it now that it's
+                    # compiled.
+                    python_util.remove_if_exists(output_data["output_dir"])
+
+        return CompiledLinearization(
+            make_factor=make_factor,
+            num_args=len(self.keys),
+            optimized_args=[self.keys.index(opt_key) for opt_key in optimized_keys],
+        )
 
 
 def visualize_factors(factors: T.Sequence[Factor], outfile: T.Openable = None) -> graphviz.Graph:
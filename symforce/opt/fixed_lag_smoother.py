@@ -0,0 +1,305 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import numpy as np
+
+from symforce import cc_sym
+from symforce import ops
+from symforce import typing as T
+import symforce.symbolic as sf
+from symforce.opt.factor import Factor
+from symforce.opt.numeric_factor import NumericFactor
+from symforce.opt.optimizer import Optimizer
+from symforce.values import Values
+
+
+class FixedLagSmoother:
+    """
+    Optimizes a sliding window of variables, which is updated in place as new factors and variables
+    are added and old variables are removed.
+
+    Removed variables are marginalized: the factors touching them are linearized at the current
+    estimate, and replaced by a single dense prior factor on the remaining variables they touched,
+    computed with the Schur complement.  The cost of each step therefore depends on the size of
+    the window, not on the length of the history.
+
+    Example usage:
+
+        smoother = FixedLagSmoother(params=Optimizer.Params(verbose=False))
+        for i, measurement in enumerate(measurements):
+            smoother.add(
+                factors=[Factor(keys=[f"x{i - 1}", f"x{i}", ...], residual=odometry), ...],
+                values=Values(**{f"x{i}": initial_guess, ...}),
+                optimized_keys=[f"x{i}"],
+            )
+            result = smoother.optimize()
+            if i >= window_size:
+                smoother.marginalize([f"x{i - window_size}"])
+
+    The marginal prior is linear in the local coordinates of its keys around their values when
+    they were marginalized, with a fixed jacobian.  It depends only on the values of its keys, so
+    the window can still be linearized incrementally.
+
+    Args:
+        params: Params for the underlying Optimizer
+        epsilon: Epsilon used when computing local coordinates for the marginal priors
+    """
+
+    def __init__(
+        self, params: T.Optional[Optimizer.Params] = None, epsilon: float = sf.numeric_epsilon
+    ) -> None:
+        self.params = params
+        self.epsilon = epsilon
+
+        self.values = Values()
+        self.optimized_keys: T.List[str] = []
+        self.factors: T.List[NumericFactor] = []
+
+        # Created on first use, and updated lazily whenever the factors or keys change, so that
+        # the keys and factors which stay in the window keep their C++ keys and factors
+        self._optimizer: T.Optional[Optimizer] = None
+        self._factors_changed = False
+
+        # Shared by the window optimizer and the optimizers used to compute marginal priors, whose
+        # sparsity patterns repeat from step to step
+        self._analysis_cache = cc_sym.SymbolicAnalysisCache()
+
+    def add(
+        self,
+        factors: T.Iterable[T.Union[Factor, NumericFactor]] = (),
+        values: T.Optional[Values] = None,
+        optimized_keys: T.Sequence[str] = (),
+    ) -> None:
+        """
+        Add factors and variables to the window
+
+        Args:
+            factors: New factors.  Symbolic factors are converted to NumericFactors, linearized
+                with respect to their keys which are optimized, including optimized_keys.
+            values: Initial guesses for new optimized keys, and values for any new constant keys
+            optimized_keys: New keys to optimize.  Optimized keys of NumericFactors are also added
+                automatically.
+        """
+        for key in optimized_keys:
+            if key in self.optimized_keys:
+                raise ValueError(f"Key {key} is already optimized")
+            self.optimized_keys.append(key)
+
+        if values is not None:
+            self.values.set_many(values.items_recursive())
+
+        for factor in factors:
+            if isinstance(factor, Factor):
+                factor = factor.to_numeric_factor(
+                    [key for key in self.optimized_keys if key in factor.keys]
+                )
+            else:
+                self.optimized_keys.extend(
+                    key for key in factor.optimized_keys if key not in self.optimized_keys
+                )
+            self.factors.append(factor)
+
+        self._factors_changed = True
+
+    def optimize(self) -> Optimizer.Result:
+        """
+        Optimize the window from the current values, and update the values with the result
+
+        Returns:
+            The optimization results, see `Optimizer.Result`
+        """
+        result = self.optimizer().optimize(self.values)
+        self.values = result.optimized_values
+        return result
+
+    def optimizer(self) -> Optimizer:
+        """
+        The Optimizer for the current window
+
+        The same Optimizer is kept for the lifetime of the smoother, and updated with
+        `Optimizer.update_factors` when the window changes.
+        """
+        if self._optimizer is None:
+            self._optimizer = Optimizer(
+                factors=self.factors,
+                optimized_keys=self.optimized_keys,
+                params=self.params,
+                analysis_cache=self._analysis_cache,
+            )
+        elif self._factors_changed:
+            self._optimizer.update_factors(self.factors, self.optimized_keys)
+        self._factors_changed = False
+        return self._optimizer
+
+    def marginalize(self, keys: T.Sequence[str]) -> None:
+        """
+        Remove the given optimized keys from the window, replacing the factors touching them with a
+        prior on the other optimized keys those factors touch
+
+        The prior is computed at the current values, so this is typically called after `optimize`.
+        Constant keys which are no longer used by any factor are removed from the values.
+
+        Args:
+            keys: The optimized keys to marginalize
+        """
+        marginalized_keys = list(keys)
+        marginalized_key_set = set(marginalized_keys)
+        for key in marginalized_keys:
+            if key not in self.optimized_keys:
+                raise ValueError(f"Key {key} is not an optimized key of the window")
+
+        marginalized_factors = []
+        remaining_factors = []
+        for factor in self.factors:
+            if marginalized_key_set.intersection(factor.optimized_keys):
+                marginalized_factors.append(factor)
+            else:
+                remaining_factors.append(factor)
+
+        # The remaining optimized keys connected to the marginalized keys by a factor, which the
+        # new prior will be on
+        separator_keys = [
+            key
+            for key in self.optimized_keys
+            if key not in marginalized_key_set
+            and any(key in factor.optimized_keys for factor in marginalized_factors)
+        ]
+
+        if marginalized_factors and separator_keys:
+            prior = self._marginal_prior(marginalized_factors, separator_keys, marginalized_keys)
+            if prior is not None:
+                remaining_factors.append(prior)
+
+        self.factors = remaining_factors
+        self.optimized_keys = [
+            key for key in self.optimized_keys if key not in marginalized_key_set
+        ]
+
+        used_keys = set(key for factor in self.factors for key in factor.keys)
+        values = Values()
+        values.set_many(
+            (key, value) for key, value in self.values.items_recursive() if key in used_keys
+        )
+        self.values = values
+
+        self._factors_changed = True
+
+    def _marginal_prior(
+        self,
+        factors: T.Sequence[NumericFactor],
+        separator_keys: T.Sequence[str],
+        marginalized_keys: T.Sequence[str],
+    ) -> T.Optional[NumericFactor]:
+        """
+        Linearize factors at the current values, and eliminate marginalized_keys from the
+        linearization to get a prior on separator_keys
+
+        Returns None if the factors carry no information about separator_keys.
+        """
+        optimizer = Optimizer(
+            factors=factors,
+            optimized_keys=list(separator_keys) + list(marginalized_keys),
+            params=self.params,
+            analysis_cache=self._analysis_cache,
+        )
+        linearization = optimizer.linearize(self.values)
+
+        hessian_lower = linearization.hessian_lower.toarray()
+        hessian = hessian_lower + np.tril(hessian_lower, -1).T
+        rhs = np.asarray(linearization.rhs)
+
+        index = optimizer.linearization_index()
+
+        def tangent_indices(keys: T.Sequence[str]) -> np.ndarray:
+            return np.concatenate(
+                [
+                    np.arange(index[key].offset, index[key].offset + index[key].tangent_dim)
+                    for key in keys
+                ]
+            )
+
+        s = tangent_indices(separator_keys)
+        m = tangent_indices(marginalized_keys)
+
+        # Schur complement of the marginalized block: S = H_ss - H_sm H_mm^-1 H_ms, and likewise
+        # for the rhs.  H_mm is singular if the factors leave some direction of the marginalized
+        # keys unconstrained, so it is inverted on its nonzero eigenvalues only; the unconstrained
+        # directions carry no information about the separator keys.
+        hessian_sm = hessian[np.ix_(s, m)]
+        eigenvalues_mm, eigenvectors_mm = _information_directions(hessian[np.ix_(m, m)])
+        hessian_mm_inv_ms_and_rhs = eigenvectors_mm @ (
+            (eigenvectors_mm.T @ np.column_stack([hessian_sm.T, rhs[m]]))
+            / eigenvalues_mm[:, np.newaxis]
+        )
+        schur_hessian = hessian[np.ix_(s, s)] - hessian_sm @ hessian_mm_inv_ms_and_rhs[:, :-1]
+        schur_rhs = rhs[s] - hessian_sm @ hessian_mm_inv_ms_and_rhs[:, -1]
+
+        return _linear_prior(
+            keys=separator_keys,
+            linearization_point=[self.values[key] for key in separator_keys],
+            hessian=schur_hessian,
+            rhs=schur_rhs,
+            epsilon=self.epsilon,
+        )
+
+
+def _information_directions(hessian: np.ndarray) -> T.Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the eigenvalues and eigenvectors (as columns) of the symmetric part of hessian,
+    dropping directions with zero or negligible information relative to the largest eigenvalue
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh((hessian + hessian.T) / 2)
+    keep = eigenvalues > max(eigenvalues.max(initial=0.0), 0.0) * 1e-12
+    return eigenvalues[keep], eigenvectors[:, keep]
+
+
+def _linear_prior(
+    keys: T.Sequence[str],
+    linearization_point: T.Sequence[T.Any],
+    hessian: np.ndarray,
+    rhs: np.ndarray,
+    epsilon: float,
+) -> T.Optional[NumericFactor]:
+    """
+    Create a factor with the given hessian and rhs at linearization_point, whose residual is linear
+    in the local coordinates of its keys around linearization_point
+
+    The hessian is factored as J^T J, with J having one row per nonzero eigenvalue, so that the
+    prior is well defined even if the hessian is singular (e.g. if some directions were not
+    constrained by the marginalized factors).  Returns None if the hessian is zero.
+    """
+    eigenvalues, eigenvectors = _information_directions(hessian)
+    if eigenvalues.size == 0:
+        return None
+
+    sqrt_eigenvalues = np.sqrt(eigenvalues)
+    jacobian = sqrt_eigenvalues[:, np.newaxis] * eigenvectors.T
+    residual_at_linearization_point = (eigenvectors.T @ rhs) / sqrt_eigenvalues
+
+    storages = [ops.StorageOps.to_storage(value) for value in linearization_point]
+    prior_hessian = jacobian.T @ jacobian
+
+    def linearization_function(
+        *values: T.Any,
+    ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        delta = np.concatenate(
+            [
+                np.asarray(
+                    ops.LieGroupOps.local_coordinates(
+                        ops.StorageOps.from_storage(value, storage), value, epsilon=epsilon
+                    ),
+                    dtype=np.float64,
+                ).ravel()
+                for value, storage in zip(values, storages)
+            ]
+        )
+        residual = residual_at_linearization_point + jacobian @ delta
+        return residual, jacobian, prior_hessian, jacobian.T @ residual
+
+    return NumericFactor(
+        keys=list(keys), optimized_keys=list(keys), linearization_function=linearization_function
+    )
@@ -5,6 +5,8 @@
 
 #pragma once
 
+#include <algorithm>
+
 #include <Eigen/Sparse>
 
 #include <sym/util/typedefs.h>
@@ -14,6 +16,21 @@
 namespace sym {
 namespace internal {
 
+/**
+ * Returns true if a and b are compressed and have the same sparsity pattern
+ */
+template <typename Scalar>
+bool HaveSameSparsityPattern(const Eigen::SparseMatrix<Scalar>& a,
+                             const Eigen::SparseMatrix<Scalar>& b) {
+  if (!a.isCompressed() || !b.isCompressed() || a.rows() != b.rows() || a.cols() != b.cols() ||
+      a.nonZeros() != b.nonZeros()) {
+    return false;
+  }
+
+  return std::equal(a.outerIndexPtr(), a.outerIndexPtr() + a.outerSize() + 1, b.outerIndexPtr()) &&
+         std::equal(a.innerIndexPtr(), a.innerIndexPtr() + a.nonZeros(), b.innerIndexPtr());
+}
+
 /**
  * Computes a block of the covariance matrix
  *
@@ -29,25 +46,28 @@ namespace internal {
  *     hessian_lower: The lower triangular portion of the Hessian.  This will be modified in place
  *     block_dim: The dimension of B
  *     covariance_block: The matrix in which the result is stored
+ *     schur_solver: The solver to use.  If it is already initialized, it must have been used for a
+ *                   hessian with the same sparsity pattern and block_dim, and its symbolic sparsity
+ *                   is reused.  Otherwise, the symbolic sparsity is computed for this hessian.
  */
 template <typename Scalar>
-void ComputeCovarianceBlockWithSchurComplement(Eigen::SparseMatrix<Scalar>* const hessian_lower,
-                                               const size_t block_dim, const Scalar epsilon,
-                                               sym::MatrixX<Scalar>* const covariance_block) {
+void ComputeCovarianceBlockWithSchurComplement(
+    Eigen::SparseMatrix<Scalar>* const hessian_lower, const size_t block_dim, const Scalar epsilon,
+    sym::MatrixX<Scalar>* const covariance_block,
+    sym::SparseSchurSolver<Eigen::SparseMatrix<Scalar>>* const schur_solver) {
   const int marginalized_dim = hessian_lower->rows() - block_dim;
 
   // Damp the C portion of the hessian, which is the block we need to invert directly
   hessian_lower->diagonal().tail(marginalized_dim).array() += epsilon;
 
-  // Compute the inverse of the Schur complement
-  // TODO(aaron): Cache the solver and the sparsity pattern for this. Similarly this doesn't handle
-  // numerical vs symbolic nonzeros, which shouldn't be an issue if we aren't saving the sparsity
-  // pattern
-  sym::SparseSchurSolver<Eigen::SparseMatrix<Scalar>> schur_solver{};
-  schur_solver.ComputeSymbolicSparsity(*hessian_lower, marginalized_dim);
-  schur_solver.Factorize(*hessian_lower);
+  // Compute the inverse of the Schur complement.  The sparsity pattern is the structural one from
+  // the linearization, so entries which happen to be numerically zero don't invalidate it
+  if (!schur_solver->IsInitialized()) {
+    schur_solver->ComputeSymbolicSparsity(*hessian_lower, marginalized_dim);
+  }
+  schur_solver->Factorize(*hessian_lower);
   *covariance_block = sym::MatrixX<Scalar>::Identity(block_dim, block_dim);
-  schur_solver.SInvInPlace(covariance_block);
+  schur_solver->SInvInPlace(covariance_block);
 }
 
 }  // namespace internal
@@ -0,0 +1,153 @@
+/* ----------------------------------------------------------------------------
+ * SymForce - Copyright 2022, Skydio, Inc.
+ * This source code is under the Apache 2.0 license found in the LICENSE file.
+ * ---------------------------------------------------------------------------- */
+
+#pragma once
+
+#include <atomic>
+#include <condition_variable>
+#include <cstdint>
+#include <exception>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+namespace sym {
+namespace internal {
+
+/**
+ * Fixed-size pool of threads for running the iterations of a loop in parallel
+ *
+ * The thread calling ParallelFor also runs iterations, so a pool of num_threads threads starts
+ * num_threads - 1 worker threads.  The workers are started once, on construction, and sleep
+ * between calls to ParallelFor.
+ */
+class ThreadPool {
+ public:
+  explicit ThreadPool(const int num_threads) {
+    for (int i = 1; i < num_threads; ++i) {
+      workers_.emplace_back([this] { WorkerLoop(); });
+    }
+  }
+
+  ~ThreadPool() {
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      stopping_ = true;
+    }
+    work_available_.notify_all();
+    for (std::thread& worker : workers_) {
+      worker.join();
+    }
+  }
+
+  ThreadPool(const ThreadPool&) = delete;
+  ThreadPool& operator=(const ThreadPool&) = delete;
+
+  int NumThreads() const {
+    return static_cast<int>(workers_.size()) + 1;
+  }
+
+  /**
+   * Call func(i) for each i in [0, size), and wait for all of the calls to finish.  Iterations
+   * are handed out to threads one at a time, so the order in which they run is unspecified.
+   *
+   * If any of the calls throw, the remaining iterations still run, and then the exception thrown
+   * by the lowest i is rethrown on the calling thread.
+   */
+  template <typename Func>
+  void ParallelFor(const int size, const Func& func) {
+    std::atomic<int> next_index{0};
+    std::mutex exception_mutex;
+    std::exception_ptr exception;
+    int exception_index = size;
+
+    const std::function<void()> task = [&]() {
+      for (int i = next_index++; i < size; i = next_index++) {
+        try {
+          func(i);
+        } catch (...) {
+          std::lock_guard<std::mutex> lock(exception_mutex);
+          if (i < exception_index) {
+            exception = std::current_exception();
+            exception_index = i;
+          }
+        }
+      }
+    };
+
+    if (workers_.empty() || size <= 1) {
+      task();
+    } else {
+      Run(task);
+    }
+
+    if (exception) {
+      std::rethrow_exception(exception);
+    }
+  }
+
+ private:
+  /**
+   * Run task on every thread of the pool, including the calling thread, and wait for all of them
+   * to return
+   */
+  void Run(const std::function<void()>& task) {
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      task_ = &task;
+      num_running_ = workers_.size();
+      ++generation_;
+    }
+    work_available_.notify_all();
+
+    task();
+
+    std::unique_lock<std::mutex> lock(mutex_);
+    work_done_.wait(lock, [this] { return num_running_ == 0; });
+    task_ = nullptr;
+  }
+
+  void WorkerLoop() {
+    uint64_t last_generation = 0;
+    while (true) {
+      const std::function<void()>* task;
+      {
+        std::unique_lock<std::mutex> lock(mutex_);
+        work_available_.wait(lock, [&] { return stopping_ || generation_ != last_generation; });
+        if (stopping_) {
+          return;
+        }
+        last_generation = generation_;
+        task = task_;
+      }
+
+      (*task)();
+
+      {
+        std::lock_guard<std::mutex> lock(mutex_);
+        --num_running_;
+      }
+      work_done_.notify_one();
+    }
+  }
+
+  std::vector<std::thread> workers_;
+
+  std::mutex mutex_;
+  std::condition_variable work_available_;
+  std::condition_variable work_done_;
+
+  // The task for the current call to Run, and the number of workers still running it
+  const std::function<void()>* task_{nullptr};
+  size_t num_running_{0};
+
+  // Incremented on each call to Run, so that workers can tell when there is a new task
+  uint64_t generation_{0};
+  bool stopping_{false};
+};
+
+}  // namespace internal
+}  // namespace sym
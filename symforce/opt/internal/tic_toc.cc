@@ -24,21 +24,66 @@ double ToSeconds(const Duration& duration) {
   return static_cast<double>(duration.count()) * Duration::period::num / Duration::period::den;
 }
 
+double ToMicroseconds(const Duration& duration) {
+  return std::chrono::duration<double, std::micro>(duration).count();
+}
+
+// Escape a string for use in a JSON string literal
+std::string JsonEscape(const std::string& str) {
+  std::string escaped;
+  escaped.reserve(str.size());
+  for (const char c : str) {
+    switch (c) {
+      case '"':
+        escaped += "\\\"";
+        break;
+      case '\\':
+        escaped += "\\\\";
+        break;
+      case '\n':
+        escaped += "\\n";
+        break;
+      case '\t':
+        escaped += "\\t";
+        break;
+      default:
+        if (static_cast<unsigned char>(c) < 0x20) {
+          escaped += fmt::format("\\u{:04x}", static_cast<int>(c));
+        } else {
+          escaped += c;
+        }
+    }
+  }
+  return escaped;
+}
+
 }  // namespace
 
 TimePoint GetMonotonicTime() {
   return Clock::now();
 }
 
+bool TicTocEnabled() {
+  return g_tic_toc.Enabled();
+}
+
 // Accumulate a duration specified by the startime and end time with the named block
-void TicTocUpdate(const std::string& name, const Duration& duration) {
-  g_thread_ctx.Update(name, duration);
+void TicTocUpdate(const std::string& name, const TimePoint& start, const Duration& duration) {
+  g_thread_ctx.Update(name, start, duration);
+}
+
+TicTocManager& GetTicTocManager() {
+  return g_tic_toc;
 }
 
 // --------------------------------------------------------------------------------------------
 //                                          TicTocStats
 // --------------------------------------------------------------------------------------------
 
+TicTocStats::TicTocStats(const int64_t num_tics, const Duration& total_time,
+                         const Duration& min_time, const Duration& max_time)
+    : num_tics_(num_tics), total_time_(total_time), min_time_(min_time), max_time_(max_time) {}
+
 void TicTocStats::Update(const Duration& duration) {
   num_tics_++;
   total_time_ += duration;
@@ -76,24 +121,85 @@ int64_t TicTocStats::Count() const {
   return num_tics_;
 }
 
+// --------------------------------------------------------------------------------------------
+//                                    ThreadTicTocStats
+// --------------------------------------------------------------------------------------------
+
+// There is a single writer, so the read-modify-writes don't need to be atomic, just the stores
+void ThreadTicTocStats::Update(const Duration& duration) {
+  const Duration::rep count = duration.count();
+  num_tics_.store(num_tics_.load(std::memory_order_relaxed) + 1, std::memory_order_relaxed);
+  total_time_.store(total_time_.load(std::memory_order_relaxed) + count,
+                    std::memory_order_relaxed);
+  if (count < min_time_.load(std::memory_order_relaxed)) {
+    min_time_.store(count, std::memory_order_relaxed);
+  }
+  if (count > max_time_.load(std::memory_order_relaxed)) {
+    max_time_.store(count, std::memory_order_relaxed);
+  }
+}
+
+void ThreadTicTocStats::Clear() {
+  num_tics_.store(0, std::memory_order_relaxed);
+  total_time_.store(0, std::memory_order_relaxed);
+  min_time_.store(std::numeric_limits<Duration::rep>::max(), std::memory_order_relaxed);
+  max_time_.store(std::numeric_limits<Duration::rep>::min(), std::memory_order_relaxed);
+}
+
+TicTocStats ThreadTicTocStats::Load() const {
+  return TicTocStats(num_tics_.load(std::memory_order_relaxed),
+                     Duration(total_time_.load(std::memory_order_relaxed)),
+                     Duration(min_time_.load(std::memory_order_relaxed)),
+                     Duration(max_time_.load(std::memory_order_relaxed)));
+}
+
 // --------------------------------------------------------------------------------------------
 //                                    ThreadContext
 // --------------------------------------------------------------------------------------------
 
+ThreadContext::ThreadContext()
+    : thread_index_(g_tic_toc.Register(this)), reset_count_(g_tic_toc.ResetCount()) {}
+
 ThreadContext::~ThreadContext() {
-  g_tic_toc.Consume(block_map_);
+  g_tic_toc.Consume(this);
+}
+
+void ThreadContext::Update(const std::string& name, const TimePoint& start,
+                           const Duration& duration) {
+  const uint64_t reset_count = g_tic_toc.ResetCount();
+  if (reset_count != reset_count_.load(std::memory_order_relaxed)) {
+    for (auto& pair : block_map_) {
+      pair.second.Clear();
+    }
+    reset_count_.store(reset_count, std::memory_order_release);
+  }
+
+  // Only this thread modifies block_map_, so it can be searched without locking
+  auto it = block_map_.find(name);
+  if (it == block_map_.end()) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    it = block_map_
+             .emplace(std::piecewise_construct, std::forward_as_tuple(name),
+                      std::forward_as_tuple())
+             .first;
+  }
+  it->second.Update(duration);
+
+  if (g_tic_toc.TraceEnabled()) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    trace_events_.push_back({name, start, duration});
+  }
 }
 
-void ThreadContext::Update(const std::string& name, const Duration& duration) {
-  // This intentionally default-constructs the block if it doesn't exist
-  block_map_[name].Update(duration);
+bool ThreadContext::IsCurrent() const {
+  return reset_count_.load(std::memory_order_acquire) == g_tic_toc.ResetCount();
 }
 
 // --------------------------------------------------------------------------------------------
 //                                    TicTocManager
 // --------------------------------------------------------------------------------------------
 
-TicTocManager::TicTocManager() {
+TicTocManager::TicTocManager() : epoch_(GetMonotonicTime()) {
   // Allow env variable to disable print on destruction
   if (std::getenv("SYMFORCE_TIC_TOC_QUIET") != nullptr) {
     print_on_destruction_ = false;
@@ -107,28 +213,19 @@ TicTocManager::~TicTocManager() {
 }
 
 void TicTocManager::PrintTimingResults(std::ostream& out) const {
-  std::vector<std::pair<std::string, TicTocStats>> blocks;
-
-  {
-    std::lock_guard<std::mutex> lock(tictoc_blocks_mutex_);
-    blocks.reserve(tictoc_blocks_.size());
-    for (const auto& block_pair : tictoc_blocks_) {
-      blocks.push_back(block_pair);
-    }
-  }
+  std::vector<TicTocBlockStats> blocks = GetStats();
 
   if (blocks.empty()) {
     return;
   }
 
   // Sort blocks by total time
-  std::sort(blocks.begin(), blocks.end(), [](const auto& a, const auto& b) {
-    return a.second.TotalTime() > b.second.TotalTime();
-  });
+  std::sort(blocks.begin(), blocks.end(),
+            [](const auto& a, const auto& b) { return a.total_time > b.total_time; });
 
   int longest_name = 0;
   for (const auto& block : blocks) {
-    longest_name = std::max<int>(block.first.size(), longest_name);
+    longest_name = std::max<int>(block.name.size(), longest_name);
   }
 
   const std::string header_fmt =
@@ -148,26 +245,124 @@ void TicTocManager::PrintTimingResults(std::ostream& out) const {
   fmt::print(out, legend);
   fmt::print(out, separator + "\n");
 
-  for (const auto& block_pair : blocks) {
-    const auto& name = block_pair.first;
-    const auto& block = block_pair.second;
+  for (const auto& block : blocks) {
+    fmt::print(out, output_fmt, block.name, block.count, float(block.total_time),
+               float(block.average_time), float(block.max_time), float(block.min_time));
+  }
+}
+
+void TicTocManager::Reset() {
+  std::lock_guard<std::mutex> lock(mutex_);
+
+  // Each thread clears its own stats on its next update
+  reset_count_++;
+  for (ThreadContext* const context : contexts_) {
+    std::lock_guard<std::mutex> context_lock(context->mutex_);
+    context->trace_events_.clear();
+  }
+  exited_blocks_.clear();
+  exited_trace_events_.clear();
+}
 
-    fmt::print(out, output_fmt, name, block.Count(), float(block.TotalTime()),
-               float(block.AverageTime()), float(block.MaxTime()), float(block.MinTime()));
+std::vector<TicTocBlockStats> TicTocManager::GetStats(const bool per_thread) const {
+  std::map<int, std::unordered_map<std::string, TicTocStats>> blocks_by_thread;
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    blocks_by_thread = CollectBlocksWithoutLock();
+  }
+
+  // Sorted by name, then thread index
+  std::map<std::pair<std::string, int>, TicTocStats> blocks;
+  for (const auto& thread_blocks : blocks_by_thread) {
+    const int thread_index = per_thread ? thread_blocks.first : -1;
+    for (const auto& block : thread_blocks.second) {
+      // This intentionally default-constructs the block if it doesn't exist
+      blocks[{block.first, thread_index}].Merge(block.second);
+    }
+  }
+
+  std::vector<TicTocBlockStats> stats;
+  stats.reserve(blocks.size());
+  for (const auto& block : blocks) {
+    const TicTocStats& block_stats = block.second;
+    if (block_stats.Count() == 0) {
+      continue;
+    }
+    stats.push_back({block.first.first, block.first.second, block_stats.Count(),
+                     block_stats.TotalTime(), block_stats.AverageTime(), block_stats.MinTime(),
+                     block_stats.MaxTime()});
   }
+  return stats;
 }
 
-void TicTocManager::Consume(const std::unordered_map<std::string, TicTocStats>& thread_map) {
+void TicTocManager::WriteChromeTrace(std::ostream& out) const {
+  std::map<int, std::vector<TicTocTraceEvent>> events_by_thread;
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    events_by_thread = exited_trace_events_;
+    for (ThreadContext* const context : contexts_) {
+      std::lock_guard<std::mutex> context_lock(context->mutex_);
+      std::vector<TicTocTraceEvent>& events = events_by_thread[context->thread_index_];
+      events.insert(events.end(), context->trace_events_.begin(), context->trace_events_.end());
+    }
+  }
+
+  // Complete ("X") events from the Trace Event Format, with times in microseconds
+  fmt::print(out, "{{\"traceEvents\": [");
+  bool first = true;
+  for (const auto& thread_events : events_by_thread) {
+    for (const TicTocTraceEvent& event : thread_events.second) {
+      fmt::print(out,
+                 "{}\n  {{\"name\": \"{}\", \"cat\": \"symforce\", \"ph\": \"X\", \"ts\": {:.3f}, "
+                 "\"dur\": {:.3f}, \"pid\": 0, \"tid\": {}}}",
+                 first ? "" : ",", JsonEscape(event.name), ToMicroseconds(event.start - epoch_),
+                 ToMicroseconds(event.duration), thread_events.first);
+      first = false;
+    }
+  }
+  fmt::print(out, "\n], \"displayTimeUnit\": \"ms\"}}\n");
+}
+
+int TicTocManager::Register(ThreadContext* const context) {
+  std::lock_guard<std::mutex> lock(mutex_);
+  contexts_.push_back(context);
+  return next_thread_index_++;
+}
+
+void TicTocManager::Consume(ThreadContext* const context) {
   // Lock the consumer thread
-  std::lock_guard<std::mutex> lock(tictoc_blocks_mutex_);
-  for (const auto& pair : thread_map) {
-    GetStatsWithoutLock(pair.first).Merge(pair.second);
+  std::lock_guard<std::mutex> lock(mutex_);
+  contexts_.erase(std::remove(contexts_.begin(), contexts_.end(), context), contexts_.end());
+
+  std::lock_guard<std::mutex> context_lock(context->mutex_);
+  if (context->IsCurrent()) {
+    auto& blocks = exited_blocks_[context->thread_index_];
+    for (const auto& pair : context->block_map_) {
+      // This intentionally default-constructs the block if it doesn't exist
+      blocks[pair.first].Merge(pair.second.Load());
+    }
+  }
+
+  if (!context->trace_events_.empty()) {
+    auto& events = exited_trace_events_[context->thread_index_];
+    events.insert(events.end(), context->trace_events_.begin(), context->trace_events_.end());
   }
 }
 
-TicTocStats& TicTocManager::GetStatsWithoutLock(const std::string& name) {
-  // This intentionally default-constructs the block if it doesn't exist
-  return tictoc_blocks_[name];
+std::map<int, std::unordered_map<std::string, TicTocStats>>
+TicTocManager::CollectBlocksWithoutLock() const {
+  std::map<int, std::unordered_map<std::string, TicTocStats>> blocks_by_thread = exited_blocks_;
+  for (ThreadContext* const context : contexts_) {
+    std::lock_guard<std::mutex> context_lock(context->mutex_);
+    if (!context->IsCurrent()) {
+      continue;
+    }
+    auto& blocks = blocks_by_thread[context->thread_index_];
+    for (const auto& pair : context->block_map_) {
+      blocks[pair.first].Merge(pair.second.Load());
+    }
+  }
+  return blocks_by_thread;
 }
 
 }  // namespace internal
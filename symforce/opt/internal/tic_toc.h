@@ -4,8 +4,11 @@
  * ---------------------------------------------------------------------------- */
 
 #include <algorithm>
+#include <atomic>
 #include <chrono>
 #include <iostream>
+#include <limits>
+#include <map>
 #include <mutex>
 #include <string>
 #include <thread>
@@ -20,24 +23,33 @@ using TimePoint = std::chrono::time_point<Clock>;
 using Duration = TimePoint::duration;
 
 TimePoint GetMonotonicTime();
-void TicTocUpdate(const std::string& name, const Duration& duration);
+bool TicTocEnabled();
+void TicTocUpdate(const std::string& name, const TimePoint& start, const Duration& duration);
 
 class ScopedTicToc {
  public:
-  explicit ScopedTicToc(const std::string& name) : name_(name), start_(GetMonotonicTime()) {}
+  explicit ScopedTicToc(const std::string& name)
+      : name_(name), enabled_(TicTocEnabled()), start_(GetMonotonicTime()) {}
 
   ~ScopedTicToc() {
-    TicTocUpdate(name_, GetMonotonicTime() - start_);
+    if (enabled_) {
+      TicTocUpdate(name_, start_, GetMonotonicTime() - start_);
+    }
   }
 
  private:
   std::string name_;
+  bool enabled_;
   TimePoint start_;
 };
 
 // Stores accumulated statistics about time spent doing something.
 class TicTocStats {
  public:
+  TicTocStats() = default;
+  TicTocStats(int64_t num_tics, const Duration& total_time, const Duration& min_time,
+              const Duration& max_time);
+
   void Update(const Duration& duration);
   void Merge(const TicTocStats& other);
 
@@ -54,17 +66,77 @@ class TicTocStats {
   Duration max_time_{std::numeric_limits<Duration::rep>::min()};
 };
 
+// The statistics of a block on a single thread.  Only written by that thread, without locking, and
+// may be read by other threads at any time, in which case the fields may not all reflect the same
+// runs of the block.
+class ThreadTicTocStats {
+ public:
+  // Add a sample, only called from the owning thread
+  void Update(const Duration& duration);
+
+  // Remove all samples, only called from the owning thread
+  void Clear();
+
+  TicTocStats Load() const;
+
+ private:
+  std::atomic<int64_t> num_tics_{0};
+  std::atomic<Duration::rep> total_time_{0};
+  std::atomic<Duration::rep> min_time_{std::numeric_limits<Duration::rep>::max()};
+  std::atomic<Duration::rep> max_time_{std::numeric_limits<Duration::rep>::min()};
+};
+
+// A single run of a block, recorded while tracing is enabled
+struct TicTocTraceEvent {
+  std::string name;
+  TimePoint start;
+  Duration duration;
+};
+
+// Statistics for a single block, as returned by GetTicTocStats
+struct TicTocBlockStats {
+  std::string name;
+  // Index of the thread the block ran on, or -1 for the total over all threads
+  int thread_index;
+  int64_t count;
+  double total_time;
+  double average_time;
+  double min_time;
+  double max_time;
+};
+
 // Each thread gets one of these
 class ThreadContext {
  public:
-  ThreadContext() = default;
+  // Registers the context with the TicTocManager
+  ThreadContext();
+
+  // Hands the recorded blocks and events over to the TicTocManager
   ~ThreadContext();
 
   // Add a sample of length Duration to the block for name
-  void Update(const std::string& name, const Duration& duration);
+  void Update(const std::string& name, const TimePoint& start, const Duration& duration);
 
  private:
-  std::unordered_map<std::string, TicTocStats> block_map_;
+  friend class TicTocManager;
+
+  // Whether block_map_ has been cleared since the last TicTocManager::Reset, i.e. whether its
+  // stats are current
+  bool IsCurrent() const;
+
+  // Index of the thread in the order the threads first timed a block
+  int thread_index_;
+
+  // The TicTocManager::ResetCount when block_map_ was last cleared.  When the TicTocManager is
+  // reset, this thread clears its own stats on its next update, and the stats are ignored until
+  // then, so that updates do not need to lock mutex_
+  std::atomic<uint64_t> reset_count_;
+
+  // Locked by this thread when adding a block to block_map_ or recording a trace event, and by
+  // the TicTocManager when reading them.  Updating the stats of an existing block does not lock
+  std::mutex mutex_;
+  std::unordered_map<std::string, ThreadTicTocStats> block_map_;
+  std::vector<TicTocTraceEvent> trace_events_;
 };
 
 class TicTocManager {
@@ -80,20 +152,74 @@ class TicTocManager {
     print_on_destruction_ = print_on_destruction;
   }
 
-  // Lock the global blockmap, then merge blocks from the thread blockmap into blocks from the
-  // global blockmap. Called from the producer thread on termination and locks the consumer thread.
-  void Consume(const std::unordered_map<std::string, TicTocStats>& thread_map);
+  // Whether blocks are timed.  Blocks that start while disabled are not recorded.  Default true.
+  bool Enabled() const {
+    return enabled_;
+  }
+
+  void SetEnabled(const bool enabled) {
+    enabled_ = enabled;
+  }
+
+  // Whether every run of each block is recorded for WriteChromeTrace, in addition to the
+  // aggregate stats.  This uses memory proportional to the number of runs.  Default false.
+  bool TraceEnabled() const {
+    return trace_enabled_;
+  }
+
+  void SetTraceEnabled(const bool trace_enabled) {
+    trace_enabled_ = trace_enabled;
+  }
+
+  // Clear all recorded stats and trace events, from all threads
+  void Reset();
+
+  // Number of calls to Reset
+  uint64_t ResetCount() const {
+    return reset_count_;
+  }
+
+  // Get the stats for each block, sorted by name.  If per_thread is true, there is one entry for
+  // each block on each thread, otherwise one entry for each block with the total over all threads.
+  std::vector<TicTocBlockStats> GetStats(bool per_thread = false) const;
+
+  // Write the recorded trace events as JSON in the Chrome trace event format, which can be viewed
+  // with chrome://tracing or https://ui.perfetto.dev
+  void WriteChromeTrace(std::ostream& out) const;
+
+  // Register a new thread context, and return its thread index
+  int Register(ThreadContext* context);
+
+  // Merge the blocks and events from the context into those from exited threads, and unregister
+  // it.  Called from the producer thread on termination.
+  void Consume(ThreadContext* context);
 
  private:
-  // Return the TicTocBlock for the given name, select out of tictoc_blocks_ and created if it does
-  // not yet exist. This function does not lock tictoc_blocks_ structure.
-  TicTocStats& GetStatsWithoutLock(const std::string& name);
+  // Stats for each block on each thread, keyed by thread index.  Must be called with mutex_ held
+  std::map<int, std::unordered_map<std::string, TicTocStats>> CollectBlocksWithoutLock() const;
+
+  std::atomic<bool> enabled_{true};
+  std::atomic<bool> trace_enabled_{false};
+  std::atomic<uint64_t> reset_count_{0};
 
-  std::unordered_map<std::string, TicTocStats> tictoc_blocks_;
-  mutable std::mutex tictoc_blocks_mutex_;
+  // Trace event times are relative to this
+  const TimePoint epoch_;
+
+  // Protects everything below
+  mutable std::mutex mutex_;
+
+  int next_thread_index_{0};
+  std::vector<ThreadContext*> contexts_;
+
+  // Blocks and events from threads which have exited, keyed by thread index
+  std::map<int, std::unordered_map<std::string, TicTocStats>> exited_blocks_;
+  std::map<int, std::vector<TicTocTraceEvent>> exited_trace_events_;
 
   bool print_on_destruction_{true};
 };
 
+// Access the global TicTocManager, which aggregates the blocks timed with SYM_TIME_SCOPE
+TicTocManager& GetTicTocManager();
+
 }  // namespace internal
 }  // namespace sym
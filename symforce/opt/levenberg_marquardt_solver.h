@@ -12,8 +12,11 @@
 #include <lcmtypes/sym/optimizer_params_t.hpp>
 
 #include "./cholesky/sparse_cholesky_solver.h"
+#include "./conjugate_gradient_solver.h"
 #include "./internal/levenberg_marquardt_state.h"
 #include "./optimization_stats.h"
+#include "./sparse_schur_solver.h"
+#include "./symbolic_analysis_cache.h"
 #include "./tic_toc.h"
 #include "./values.h"
 
@@ -123,17 +126,34 @@ class LevenbergMarquardtSolver {
   using Scalar = ScalarType;
   using LinearSolver = LinearSolverType;
   using StateType = internal::LevenbergMarquardtState<Scalar>;
+  using AnalysisCache = SymbolicAnalysisCache<LinearSolver>;
 
   // Function that evaluates the objective function and produces a quadratic approximation of
   // it by linearizing a least-squares residual.
   using LinearizeFunc = std::function<void(const Values<Scalar>&, Linearization<Scalar>* const)>;
 
   LevenbergMarquardtSolver(const optimizer_params_t& p, const std::string& id, const Scalar epsilon)
-      : p_(p), id_(id), epsilon_(epsilon) {}
+      : p_(p), id_(id), epsilon_(epsilon), cg_solver_(p.cg_max_iterations, p.cg_tolerance) {}
 
   LevenbergMarquardtSolver(const optimizer_params_t& p, const std::string& id, const Scalar epsilon,
                            const LinearSolver& linear_solver)
-      : p_(p), id_(id), epsilon_(epsilon), linear_solver_(linear_solver) {}
+      : p_(p),
+        id_(id),
+        epsilon_(epsilon),
+        linear_solver_(linear_solver),
+        cg_solver_(p.cg_max_iterations, p.cg_tolerance) {}
+
+  // Construct a solver which gets the symbolic analysis of the hessian from analysis_cache, which
+  // may be shared with other solvers.  See SymbolicAnalysisCache for details.
+  LevenbergMarquardtSolver(const optimizer_params_t& p, const std::string& id, const Scalar epsilon,
+                           const LinearSolver& linear_solver,
+                           std::shared_ptr<AnalysisCache> analysis_cache)
+      : p_(p),
+        id_(id),
+        epsilon_(epsilon),
+        linear_solver_(linear_solver),
+        analysis_cache_(std::move(analysis_cache)),
+        cg_solver_(p.cg_max_iterations, p.cg_tolerance) {}
 
   void SetIndex(const index_t& index) {
     index_ = index;
@@ -169,6 +189,16 @@ class LevenbergMarquardtSolver {
 
   void UpdateParams(const optimizer_params_t& p);
 
+  // Set the cache to get the symbolic analysis of the hessian from, or nullptr to compute it
+  // without a cache.  Only takes effect if the hessian has not yet been analyzed.
+  void SetAnalysisCache(std::shared_ptr<AnalysisCache> analysis_cache) {
+    analysis_cache_ = std::move(analysis_cache);
+  }
+
+  const std::shared_ptr<AnalysisCache>& GetAnalysisCache() const {
+    return analysis_cache_;
+  }
+
   // Run one iteration of the optimization. Returns true if the optimization should early exit.
   bool Iterate(const LinearizeFunc& func, OptimizationStats<Scalar>* const stats,
                const bool debug_stats = false);
@@ -194,6 +224,17 @@ class LevenbergMarquardtSolver {
 
   void CheckHessianDiagonal(const Eigen::SparseMatrix<Scalar>& hessian_lower_damped);
 
+  // Compute the symbolic sparsity of linear_solver_ for the given hessian
+  void AnalyzeLinearSolver(const Eigen::SparseMatrix<Scalar>& hessian_lower);
+
+  // Compute the symbolic sparsity of schur_solver_ for the given hessian, eliminating the keys
+  // with letter p_.schur_eliminated_key_letter, which must be at the end of index_
+  void AnalyzeSchurSolver(const Eigen::SparseMatrix<Scalar>& hessian_lower);
+
+  // Solve for the update with the linear solver selected by the params
+  void SolveLinearSystem(const Eigen::SparseMatrix<Scalar>& hessian_lower_damped,
+                         const VectorX<Scalar>& rhs);
+
   void PopulateIterationStats(optimization_iteration_t* const iteration_stats,
                               const StateType& state, const Scalar new_error,
                               const Scalar relative_reduction, const bool debug_stats) const;
@@ -211,6 +252,13 @@ class LevenbergMarquardtSolver {
 
   LinearSolver linear_solver_{};
   bool solver_analyzed_{false};
+  std::shared_ptr<AnalysisCache> analysis_cache_{};
+
+  // Solver used instead of linear_solver_ when p_.linear_solver is CONJUGATE_GRADIENT
+  ConjugateGradientSolver<Eigen::SparseMatrix<Scalar>> cg_solver_;
+
+  // Solver used instead of linear_solver_ when p_.linear_solver is SCHUR
+  SparseSchurSolver<Eigen::SparseMatrix<Scalar>> schur_solver_{};
 
   // Current elementwise max of the Hessian diagonal across all iterations, used for damping
   bool have_max_diagonal_{false};
@@ -3,6 +3,8 @@
  * This source code is under the Apache 2.0 license found in the LICENSE file.
  * ---------------------------------------------------------------------------- */
 
+#include <algorithm>
+
 #include <fmt/ranges.h>
 #include <spdlog/spdlog.h>
 
@@ -69,6 +71,115 @@ void LevenbergMarquardtSolver<ScalarType, LinearSolverType>::CheckHessianDiagona
   }
 }
 
+template <typename ScalarType, typename LinearSolverType>
+void LevenbergMarquardtSolver<ScalarType, LinearSolverType>::AnalyzeLinearSolver(
+    const Eigen::SparseMatrix<Scalar>& hessian_lower) {
+  // TODO(aaron): Do this with the ones linearization computed by the Linearizer
+  SYM_TIME_SCOPE("LM<{}>: AnalyzePattern", id_);
+  Eigen::SparseMatrix<Scalar> H_analyze = hessian_lower;
+  H_analyze.diagonal().array() = 1.0;  // Make sure the diagonal is nonzero for analysis
+  if (analysis_cache_) {
+    analysis_cache_->ComputeSymbolicSparsity(H_analyze, &linear_solver_);
+  } else {
+    linear_solver_.ComputeSymbolicSparsity(H_analyze);
+  }
+  solver_analyzed_ = true;
+}
+
+template <typename ScalarType, typename LinearSolverType>
+void LevenbergMarquardtSolver<ScalarType, LinearSolverType>::AnalyzeSchurSolver(
+    const Eigen::SparseMatrix<Scalar>& hessian_lower) {
+  SYM_TIME_SCOPE("LM<{}>: AnalyzePattern", id_);
+
+  // The eliminated keys are a suffix of the index, see OrderKeysForLinearSolver
+  const auto is_eliminated = [this](const index_entry_t& entry) {
+    return entry.key.letter == p_.schur_eliminated_key_letter;
+  };
+  const auto first_eliminated =
+      std::find_if(index_.entries.rbegin(), index_.entries.rend(),
+                   [&is_eliminated](const index_entry_t& entry) { return !is_eliminated(entry); })
+          .base();
+  if (std::any_of(index_.entries.begin(), first_eliminated, is_eliminated)) {
+    throw std::runtime_error(
+        fmt::format("LM<{}> Keys with letter '{}' must be ordered after all other keys for the "
+                    "Schur solver",
+                    id_, static_cast<char>(p_.schur_eliminated_key_letter)));
+  }
+
+  int C_dim = 0;
+  for (auto it = first_eliminated; it != index_.entries.end(); ++it) {
+    C_dim += it->tangent_dim;
+  }
+  if (C_dim == 0) {
+    throw std::runtime_error(
+        fmt::format("LM<{}> No keys with letter '{}' to eliminate with the Schur solver", id_,
+                    static_cast<char>(p_.schur_eliminated_key_letter)));
+  }
+
+  Eigen::SparseMatrix<Scalar> H_analyze = hessian_lower;
+  H_analyze.diagonal().array() = 1.0;  // Make sure the diagonal is nonzero for analysis
+  schur_solver_.ComputeSymbolicSparsity(H_analyze, C_dim);
+}
+
+template <typename ScalarType, typename LinearSolverType>
+void LevenbergMarquardtSolver<ScalarType, LinearSolverType>::SolveLinearSystem(
+    const Eigen::SparseMatrix<Scalar>& hessian_lower_damped, const VectorX<Scalar>& rhs) {
+  if (p_.linear_solver == linear_solver_t::CONJUGATE_GRADIENT) {
+    if (!cg_solver_.IsInitialized()) {
+      SYM_TIME_SCOPE("LM<{}>: AnalyzePattern", id_);
+      cg_solver_.ComputeSymbolicSparsity(hessian_lower_damped);
+    }
+
+    {
+      SYM_TIME_SCOPE("LM<{}>: ConjugateGradientPrecondition", id_);
+      cg_solver_.Factorize(hessian_lower_damped);
+    }
+
+    {
+      SYM_TIME_SCOPE("LM<{}>: ConjugateGradientSolve", id_);
+      update_ = cg_solver_.Solve(rhs);
+    }
+
+    if (p_.verbose) {
+      spdlog::info("LM<{}> Conjugate gradient: {} iterations, relative residual {}", id_,
+                   cg_solver_.LastIterations(), cg_solver_.LastRelativeResidual());
+    }
+    return;
+  }
+
+  if (p_.linear_solver == linear_solver_t::SCHUR) {
+    if (!schur_solver_.IsInitialized()) {
+      AnalyzeSchurSolver(hessian_lower_damped);
+    }
+
+    {
+      SYM_TIME_SCOPE("LM<{}>: SchurFactorize", id_);
+      schur_solver_.Factorize(hessian_lower_damped);
+    }
+
+    {
+      SYM_TIME_SCOPE("LM<{}>: SchurSolve", id_);
+      update_ = schur_solver_.Solve(rhs);
+    }
+    return;
+  }
+
+  // Analyze the sparsity pattern for efficient repeated factorization
+  if (!solver_analyzed_) {
+    AnalyzeLinearSolver(hessian_lower_damped);
+  }
+
+  {
+    SYM_TIME_SCOPE("LM<{}>: SparseFactorize", id_);
+    linear_solver_.Factorize(hessian_lower_damped);
+  }
+
+  {
+    SYM_TIME_SCOPE("LM<{}>: SparseSolve", id_);
+    update_ = linear_solver_.Solve(rhs);
+  }
+}
+
 template <typename ScalarType, typename LinearSolverType>
 void LevenbergMarquardtSolver<ScalarType, LinearSolverType>::PopulateIterationStats(
     optimization_iteration_t* const iteration_stats, const StateType& state_,
@@ -134,6 +245,8 @@ void LevenbergMarquardtSolver<ScalarType, LinearSolverType>::UpdateParams(
     spdlog::info("LM<{}>: UPDATING OPTIMIZER PARAMS", id_);
   }
   p_ = p;
+  cg_solver_.SetMaxIterations(p_.cg_max_iterations);
+  cg_solver_.SetTolerance(p_.cg_tolerance);
 }
 
 template <typename ScalarType, typename LinearSolverType>
@@ -173,31 +286,13 @@ bool LevenbergMarquardtSolver<ScalarType, LinearSolverType>::Iterate(
     }
   }
 
-  // Analyze the sparsity pattern for efficient repeated factorization
-  if (!solver_analyzed_) {
-    // TODO(aaron): Do this with the ones linearization computed by the Linearizer
-    SYM_TIME_SCOPE("LM<{}>: AnalyzePattern", id_);
-    Eigen::SparseMatrix<Scalar> H_analyze = state_.Init().GetLinearization().hessian_lower;
-    H_analyze.diagonal().array() = 1.0;  // Make sure the diagonal is nonzero for analysis
-    linear_solver_.ComputeSymbolicSparsity(H_analyze);
-    solver_analyzed_ = true;
-  }
-
   // TODO(aaron): Get rid of this copy
   H_damped_ = DampHessian(state_.Init().GetLinearization().hessian_lower, &have_max_diagonal_,
                           &max_diagonal_, current_lambda_);
 
   CheckHessianDiagonal(H_damped_);
 
-  {
-    SYM_TIME_SCOPE("LM<{}>: SparseFactorize", id_);
-    linear_solver_.Factorize(H_damped_);
-  }
-
-  {
-    SYM_TIME_SCOPE("LM<{}>: SparseSolve", id_);
-    update_ = linear_solver_.Solve(state_.Init().GetLinearization().rhs);
-  }
+  SolveLinearSystem(H_damped_, state_.Init().GetLinearization().rhs);
 
   {
     SYM_TIME_SCOPE("LM<{}>: Update", id_);
@@ -275,6 +370,12 @@ void LevenbergMarquardtSolver<ScalarType, LinearSolverType>::ComputeCovariance(
   H_damped_ = hessian_lower;
   H_damped_.diagonal().array() += epsilon_;
 
+  // The covariance is always computed with linear_solver_, which may not have been used to
+  // optimize if the conjugate gradient solver was selected
+  if (!solver_analyzed_) {
+    AnalyzeLinearSolver(hessian_lower);
+  }
+
   // TODO(hayk, aaron): This solver assumes a dense RHS, should add support for a sparse RHS
   linear_solver_.Factorize(H_damped_);
   *covariance = MatrixX<Scalar>::Identity(H_damped_.rows(), H_damped_.rows());
@@ -5,6 +5,9 @@
 
 #include "./linearizer.h"
 
+#include <algorithm>
+#include <unordered_map>
+
 #include "./assert.h"
 #include "./internal/linearizer_utils.h"
 
@@ -17,7 +20,7 @@ namespace sym {
 template <typename ScalarType>
 Linearizer<ScalarType>::Linearizer(const std::string& name,
                                    const std::vector<Factor<Scalar>>& factors,
-                                   const std::vector<Key>& key_order)
+                                   const std::vector<Key>& key_order, const int num_threads)
     : name_(name), factors_(&factors), dense_linearized_factors_(), sparse_linearized_factors_() {
   if (key_order.empty()) {
     keys_ = ComputeKeysToOptimize(factors);
@@ -25,13 +28,18 @@ Linearizer<ScalarType>::Linearizer(const std::string& name,
     keys_ = key_order;
   }
 
+  linearized_factor_indices_.reserve(factors_->size());
   for (const auto& factor : *factors_) {
     if (factor.IsSparse()) {
+      linearized_factor_indices_.push_back(sparse_linearized_factors_.size());
       sparse_linearized_factors_.emplace_back();
     } else {
+      linearized_factor_indices_.push_back(dense_linearized_factors_.size());
       dense_linearized_factors_.emplace_back();
     }
   }
+
+  SetNumThreads(num_threads);
 }
 
 template <typename ScalarType>
@@ -39,28 +47,79 @@ void Linearizer<ScalarType>::Relinearize(const Values<Scalar>& values,
                                          Linearization<Scalar>* const linearization) {
   SYM_ASSERT(linearization != nullptr);
 
-  // Evaluate the factors
-  auto sparse_iter = std::begin(sparse_linearized_factors_);
-  auto dense_iter = std::begin(dense_linearized_factors_);
-  for (const auto& factor : *factors_) {
-    if (factor.IsSparse()) {
-      factor.Linearize(values, &*sparse_iter);
-      ++sparse_iter;
-    } else {
-      factor.Linearize(values, &*dense_iter);
-      ++dense_iter;
-    }
+  // Evaluate the factors, recording the values of their keys only if RelinearizeIncremental will
+  // need them
+  if (track_factor_keys_storage_) {
+    FillNextFactorKeysStorage(values);
   }
+  LinearizeFactors(values, nullptr);
 
   // Allocate matrices and create index if it's the first time
   if (!IsInitialized()) {
     InitializeStorageAndIndices();
   }
 
-  // Update combined problem from factors, using precomputed indices
+  // Update combined problem from factors, using precomputed indices.  This is done serially, so
+  // that contributions to the hessian and rhs are always summed in the same order
   BuildCombinedProblemSparse(dense_linearized_factors_, sparse_linearized_factors_, linearization);
 }
 
+template <typename ScalarType>
+void Linearizer<ScalarType>::RelinearizeIncremental(const Values<Scalar>& values,
+                                                    Linearization<Scalar>* const linearization) {
+  SYM_ASSERT(linearization != nullptr);
+
+  track_factor_keys_storage_ = true;
+  if (!IsInitialized() || !have_factor_keys_storage_) {
+    Relinearize(values, linearization);
+    return;
+  }
+
+  // Find the keys whose values changed since the last linearization
+  FillNextFactorKeysStorage(values);
+  changed_key_entries_.resize(factor_keys_index_.entries.size());
+  int32_t offset = 0;
+  for (int i = 0; i < factor_keys_index_.entries.size(); ++i) {
+    const int32_t storage_dim = factor_keys_index_.entries[i].storage_dim;
+    changed_key_entries_[i] = !std::equal(next_factor_keys_storage_.begin() + offset,
+                                          next_factor_keys_storage_.begin() + offset + storage_dim,
+                                          factor_keys_storage_.begin() + offset);
+    offset += storage_dim;
+  }
+
+  // Evaluate the factors touching any of them
+  changed_factor_indices_.clear();
+  for (int i = 0; i < factor_key_entries_.size(); ++i) {
+    for (const int entry_i : factor_key_entries_[i]) {
+      if (changed_key_entries_[entry_i]) {
+        changed_factor_indices_.push_back(i);
+        break;
+      }
+    }
+  }
+  LinearizeFactors(values, &changed_factor_indices_);
+
+  BuildCombinedProblemSparse(dense_linearized_factors_, sparse_linearized_factors_, linearization);
+}
+
+template <typename ScalarType>
+void Linearizer<ScalarType>::SetNumThreads(const int num_threads) {
+  if (num_threads == NumThreads()) {
+    return;
+  }
+
+  if (num_threads > 1) {
+    thread_pool_ = std::make_unique<internal::ThreadPool>(num_threads);
+  } else {
+    thread_pool_.reset();
+  }
+}
+
+template <typename ScalarType>
+int Linearizer<ScalarType>::NumThreads() const {
+  return thread_pool_ != nullptr ? thread_pool_->NumThreads() : 1;
+}
+
 template <typename ScalarType>
 bool Linearizer<ScalarType>::CheckKeysAreContiguousAtStart(const std::vector<Key>& keys,
                                                            size_t* const block_dim) const {
@@ -118,6 +177,67 @@ const std::unordered_map<key_t, index_entry_t>& Linearizer<ScalarType>::StateInd
 // Private Methods
 // ----------------------------------------------------------------------------
 
+template <typename ScalarType>
+void Linearizer<ScalarType>::LinearizeFactors(const Values<Scalar>& values,
+                                              const std::vector<int>* const factor_indices) {
+  // If evaluating a factor throws, the stored linearizations no longer all correspond to either
+  // the old or the new values, so RelinearizeIncremental must start over
+  have_factor_keys_storage_ = false;
+
+  // Each factor is linearized into its own storage, so this is safe to do in parallel
+  const auto linearize_factor = [this, &values, factor_indices](const int i) {
+    const int factor_index = factor_indices != nullptr ? (*factor_indices)[i] : i;
+    const Factor<Scalar>& factor = (*factors_)[factor_index];
+    const int linearized_factor_index = linearized_factor_indices_[factor_index];
+    if (factor.IsSparse()) {
+      factor.Linearize(values, &sparse_linearized_factors_[linearized_factor_index]);
+    } else {
+      factor.Linearize(values, &dense_linearized_factors_[linearized_factor_index]);
+    }
+  };
+
+  const int num_factors = factor_indices != nullptr ? factor_indices->size() : factors_->size();
+  if (thread_pool_ != nullptr) {
+    thread_pool_->ParallelFor(num_factors, linearize_factor);
+  } else {
+    for (int i = 0; i < num_factors; ++i) {
+      linearize_factor(i);
+    }
+  }
+
+  if (track_factor_keys_storage_) {
+    std::swap(factor_keys_storage_, next_factor_keys_storage_);
+    have_factor_keys_storage_ = true;
+  }
+}
+
+template <typename ScalarType>
+void Linearizer<ScalarType>::FillNextFactorKeysStorage(const Values<Scalar>& values) {
+  if (factor_key_entries_.size() != factors_->size()) {
+    // Index the keys of all the factors, in order of first appearance
+    std::unordered_map<Key, int> entry_for_key;
+    std::vector<Key> factor_keys;
+    factor_key_entries_.reserve(factors_->size());
+    for (const auto& factor : *factors_) {
+      std::vector<int> key_entries;
+      key_entries.reserve(factor.AllKeys().size());
+      for (const Key& key : factor.AllKeys()) {
+        const auto it = entry_for_key.emplace(key, factor_keys.size()).first;
+        if (it->second == factor_keys.size()) {
+          factor_keys.push_back(key);
+        }
+        key_entries.push_back(it->second);
+      }
+      factor_key_entries_.push_back(std::move(key_entries));
+    }
+
+    factor_keys_index_ = values.CreateIndex(factor_keys);
+  }
+
+  next_factor_keys_storage_.resize(factor_keys_index_.storage_dim);
+  values.FillStorage(factor_keys_index_, next_factor_keys_storage_.data());
+}
+
 template <typename ScalarType>
 void Linearizer<ScalarType>::InitializeStorageAndIndices() {
   SYM_ASSERT(!IsInitialized());
@@ -5,6 +5,7 @@
 
 #pragma once
 
+#include <memory>
 #include <unordered_set>
 
 #include <Eigen/Sparse>
@@ -13,6 +14,7 @@
 #include <lcmtypes/sym/linearization_sparse_factor_helper_t.hpp>
 
 #include "./factor.h"
+#include "./internal/thread_pool.h"
 #include "./linearization.h"
 #include "./values.h"
 
@@ -42,9 +44,11 @@ class Linearizer {
    *                to optimize. Can equal the set of all factor keys or a subset of all
    *                factor keys. If not provided, it is computed from all keys for all
    *                factors using a default ordering.
+   *     num_threads: Number of threads to evaluate the factors with.  If less than or equal to 1,
+   *                  the factors are evaluated serially on the calling thread.
    */
   Linearizer(const std::string& name, const std::vector<Factor<Scalar>>& factors,
-             const std::vector<Key>& key_order = {});
+             const std::vector<Key>& key_order = {}, int num_threads = 1);
 
   /**
    * Update linearization at a new evaluation point. Returns the total residual dimension M.
@@ -55,6 +59,32 @@ class Linearizer {
    */
   void Relinearize(const Values<Scalar>& values, Linearization<Scalar>* const linearization);
 
+  /**
+   * Update linearization at a new evaluation point, re-evaluating only the factors which have a
+   * key whose value is different from the last time this Linearizer was linearized (by either
+   * Relinearize or RelinearizeIncremental).  The other factors reuse their stored linearizations,
+   * so the result is the same as for Relinearize, as long as each factor only depends on the
+   * values of its keys.  The first call re-evaluates all of the factors, since the values of their
+   * keys are only recorded from then on.
+   *
+   * The combined problem is still assembled from all of the factors, so this is most useful when
+   * evaluating the factors is expensive compared to assembling the problem, and few keys change
+   * between linearizations.
+   */
+  void RelinearizeIncremental(const Values<Scalar>& values,
+                              Linearization<Scalar>* const linearization);
+
+  /**
+   * Set the number of threads used to evaluate the factors in Relinearize.  If less than or equal
+   * to 1, the factors are evaluated serially on the calling thread.
+   *
+   * The factors are evaluated in parallel, but combined into the problem linearization in the same
+   * order regardless of the number of threads, so the result does not depend on num_threads.
+   */
+  void SetNumThreads(int num_threads);
+
+  int NumThreads() const;
+
   /**
    * Check whether the keys in `keys` correspond 1-1 (and in the same order) with the start of the
    * key ordering in the problem linearization
@@ -99,6 +129,19 @@ class Linearizer {
    */
   void InitializeStorageAndIndices();
 
+  /**
+   * Linearize the factors with the given indices in factors_, or all factors if factor_indices is
+   * nullptr, then, if track_factor_keys_storage_ is set, make next_factor_keys_storage_ (which must
+   * already be filled in with values) the current factor_keys_storage_
+   */
+  void LinearizeFactors(const Values<Scalar>& values, const std::vector<int>* factor_indices);
+
+  /**
+   * Copy the current storage of all factor keys into next_factor_keys_storage_, creating
+   * factor_keys_index_ the first time
+   */
+  void FillNextFactorKeysStorage(const Values<Scalar>& values);
+
   /**
    * Hashmap of keys to information about the key's offset in the full problem.
    */
@@ -165,6 +208,31 @@ class Linearizer {
   std::vector<LinearizedDenseFactor> dense_linearized_factors_;
   std::vector<LinearizedSparseFactor> sparse_linearized_factors_;
 
+  // Index of each factor in dense_linearized_factors_ or sparse_linearized_factors_
+  std::vector<int> linearized_factor_indices_;
+
+  // Threads to evaluate the factors with, or nullptr to evaluate them serially
+  std::unique_ptr<internal::ThreadPool> thread_pool_;
+
+  // Index into the Values of the keys of all the factors, and the storage of those keys (in index
+  // order) the last time the factors were linearized, for RelinearizeIncremental to find which
+  // factors need to be relinearized.  factor_keys_storage_ is only valid if
+  // have_factor_keys_storage_ is true.  The storage is only recorded once RelinearizeIncremental
+  // has been called (which sets track_factor_keys_storage_), so that Relinearize does not pay for
+  // copying it otherwise
+  index_t factor_keys_index_;
+  std::vector<Scalar> factor_keys_storage_;
+  std::vector<Scalar> next_factor_keys_storage_;
+  bool have_factor_keys_storage_{false};
+  bool track_factor_keys_storage_{false};
+
+  // Positions in factor_keys_index_ of the keys of each factor
+  std::vector<std::vector<int>> factor_key_entries_;
+
+  // Scratch storage for RelinearizeIncremental
+  std::vector<bool> changed_key_entries_;
+  std::vector<int> changed_factor_indices_;
+
   // Keys that form the state vector
   std::vector<Key> keys_;
 
@@ -11,6 +11,64 @@ from symforce import cc_sym
 from symforce import typing as T
 from symforce.values import Values
 from symforce.codegen import codegen_util
+from symforce.opt.cpp_factor_compiler import CompiledLinearization
+
+
+class InPlaceLinearization:
+    """
+    A generated python linearization function which writes its outputs into arrays passed after
+    its inputs (see `PythonConfig.outputs_in_place`).
+
+    Construct factors with `cc_factor`, which pass the storage of the linearized factor to the
+    function directly, so that linearizing does not allocate or copy the outputs.  Calling this
+    object evaluates the linearization into new arrays, with the same arguments and outputs as the
+    equivalent generated python linearization function.
+
+    Args:
+        function: The generated linearization function
+        residual_dim: The dimension of the residual
+        tangent_dim: The total tangent dimension of the optimized arguments
+    """
+
+    def __init__(
+        self, function: T.Callable[..., None], residual_dim: int, tangent_dim: int
+    ) -> None:
+        self.function = function
+        self.residual_dim = residual_dim
+        self.tangent_dim = tangent_dim
+
+    def cc_factor(
+        self, keys_to_func: T.Sequence[cc_sym.Key], keys_to_optimize: T.Sequence[cc_sym.Key]
+    ) -> cc_sym.Factor:
+        """
+        Construct a factor on the given keys, which writes the linearization in place
+        """
+        function = self.function
+
+        # The index entries passed from C++ are the entries for keys_to_func in order
+        def wrapped(
+            values: cc_sym.Values,
+            index_entries: T.Sequence[T.Any],
+            residual: T.Optional[np.ndarray],
+            jacobian: T.Optional[np.ndarray],
+            hessian: T.Optional[np.ndarray],
+            rhs: T.Optional[np.ndarray],
+        ) -> None:
+            function(
+                *[values.at(entry) for entry in index_entries], residual, jacobian, hessian, rhs
+            )
+
+        return cc_sym.Factor.in_place(
+            wrapped, list(keys_to_func), list(keys_to_optimize), residual_dim=self.residual_dim
+        )
+
+    def __call__(self, *args: T.Any) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        residual = np.empty(self.residual_dim)
+        jacobian = np.empty((self.residual_dim, self.tangent_dim))
+        hessian = np.empty((self.tangent_dim, self.tangent_dim))
+        rhs = np.empty(self.tangent_dim)
+        self.function(*args, residual, jacobian, hessian, rhs)
+        return residual, jacobian, hessian, rhs
 
 
 class NumericFactor:
@@ -23,6 +81,11 @@ class NumericFactor:
                 function computes the jacobian with respect to.
         linearization_function: A function that returns the residual, jacobian, hessian
             approximation, and right-hand-side used with the levenberg marquardt optimizer.
+        batch_linearization_function: Optional vectorized version of `linearization_function`,
+            used when factors sharing the same linearization function are batched by the
+            optimizer. Takes the storage of each input stacked over N factors, with shape
+            (N, storage_dim), and returns the residuals, jacobians, hessians, and right-hand-sides
+            stacked along the first axis.
     """
 
     def __init__(
@@ -32,10 +95,14 @@ class NumericFactor:
         linearization_function: T.Callable[
             ..., T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
         ],
+        batch_linearization_function: T.Optional[
+            T.Callable[..., T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]
+        ] = None,
     ) -> None:
         self.keys = keys
         self.optimized_keys = optimized_keys
         self.linearization_function = linearization_function
+        self.batch_linearization_function = batch_linearization_function
 
     @classmethod
     def from_file_python(
@@ -100,7 +167,10 @@ class NumericFactor:
         Create a C++ Factor from this symbolic Factor, for use with the C++ Optimizer
         Note that while this is a C++ Factor object, the linearization function may be a compiled
         C++ function or a Python function passed into C++ through pybind, depending on
-        the language the linearization function was generated in.
+        the language the linearization function was generated in.  If the linearization function
+        is a CompiledLinearization, the factor is a native factor which does not call into Python,
+        and if it is an InPlaceLinearization, the factor passes the storage of the linearized
+        factor to the Python function to fill in place.
 
         Args:
             cc_key_map: Mapping from Python keys (strings, like returned by
@@ -108,10 +178,22 @@ class NumericFactor:
         Returns:
             A C++ wrapped Factor object
         """
+        if isinstance(self.linearization_function, (CompiledLinearization, InPlaceLinearization)):
+            return self.linearization_function.cc_factor(
+                [cc_key_map[key] for key in self.keys],
+                [cc_key_map[key] for key in self.optimized_keys],
+            )
 
+        # All keys are passed as keys_to_func, so that the C++ Linearizer knows which values the
+        # factor depends on, and the index entries passed to the wrapped function are the entries
+        # for self.keys in order
         def wrapped(
-            values: cc_sym.Values, _: T.Any
+            values: cc_sym.Values, index_entries: T.Sequence[T.Any]
         ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
-            return self.linearization_function(*[values.at(cc_key_map[key]) for key in self.keys])
+            return self.linearization_function(*[values.at(entry) for entry in index_entries])
 
-        return cc_sym.Factor(wrapped, [cc_key_map[key] for key in self.optimized_keys])
+        return cc_sym.Factor(
+            wrapped,
+            [cc_key_map[key] for key in self.keys],
+            [cc_key_map[key] for key in self.optimized_keys],
+        )
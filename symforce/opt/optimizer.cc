@@ -5,6 +5,8 @@
 
 #include "./optimizer.h"
 
+#include <algorithm>
+
 sym::optimizer_params_t sym::DefaultOptimizerParams() {
   const bool verbose = true;
   const double initial_lambda = 1.0;
@@ -19,6 +21,11 @@ sym::optimizer_params_t sym::DefaultOptimizerParams() {
   const int iterations = 50;
   const double early_exit_min_reduction = 1e-6;
   const bool enable_bold_updates = false;
+  const int num_threads = 1;
+  const sym::linear_solver_t linear_solver = sym::linear_solver_t::CHOLESKY;
+  const int cg_max_iterations = 500;
+  const double cg_tolerance = 1e-6;
+  const uint8_t schur_eliminated_key_letter = 0;
 
   return sym::optimizer_params_t{
       verbose,
@@ -34,9 +41,24 @@ sym::optimizer_params_t sym::DefaultOptimizerParams() {
       iterations,
       early_exit_min_reduction,
       enable_bold_updates,
+      num_threads,
+      linear_solver,
+      cg_max_iterations,
+      cg_tolerance,
+      schur_eliminated_key_letter,
   };
 }
 
+std::vector<sym::Key> sym::OrderKeysForLinearSolver(const optimizer_params_t& params,
+                                                    std::vector<Key> keys) {
+  if (params.linear_solver == linear_solver_t::SCHUR) {
+    std::stable_partition(keys.begin(), keys.end(), [&params](const Key& key) {
+      return static_cast<uint8_t>(key.Letter()) != params.schur_eliminated_key_letter;
+    });
+  }
+  return keys;
+}
+
 // Explicitly instantiate most commonly used optimizer templates to allow for faster compilation
 // times.
 template class sym::Optimizer<double>;
@@ -5,9 +5,14 @@
 
 #pragma once
 
+#include <atomic>
+#include <vector>
+
+#include "./internal/thread_pool.h"
 #include "./levenberg_marquardt_solver.h"
 #include "./linearizer.h"
 #include "./optimization_stats.h"
+#include "./sparse_schur_solver.h"
 
 namespace sym {
 
@@ -16,6 +21,9 @@ namespace sym {
  * efficient use, create once and call Optimize() multiple times with different initial guesses, as
  * long as the factors remain constant and the structure of the Values is identical.
  *
+ * The keys to optimize are ordered with OrderKeysForLinearSolver, so with the SCHUR linear solver
+ * the eliminated keys come last in Keys() and in the linearization.
+ *
  * Not thread safe! Create one per thread.
  *
  * Example usage:
@@ -175,8 +183,12 @@ class Optimizer {
 
   /**
    * Linearize the problem around the given values
+   *
+   * If incremental is true, only the factors touching keys whose values changed since the last
+   * linearization are re-evaluated, see Linearizer::RelinearizeIncremental.  Derivatives are not
+   * checked for incremental linearizations, even if check_derivatives is set.
    */
-  Linearization<Scalar> Linearize(const Values<Scalar>& values);
+  Linearization<Scalar> Linearize(const Values<Scalar>& values, bool incremental = false);
 
   /**
    * Get covariances for each optimized key at the given linearization
@@ -272,9 +284,15 @@ class Optimizer {
   // Covariance matrix and damped Hessian, only used by ComputeCovariances but cached here to save
   // reallocations. This may be the full problem covariance, or a subblock; it's always the full
   // problem Hessian
+  //
+  // The Schur solver used by ComputeCovariances is also cached, along with the dimension of the
+  // block it was used for, so that its symbolic sparsity is reused while the sparsity pattern of
+  // the Hessian (which is kept in H_damped) doesn't change
   struct ComputeCovariancesStorage {
     sym::MatrixX<Scalar> covariance;
     Eigen::SparseMatrix<Scalar> H_damped;
+    sym::SparseSchurSolver<Eigen::SparseMatrix<Scalar>> schur_solver;
+    size_t schur_block_dim{0};
   };
 
   mutable ComputeCovariancesStorage compute_covariances_storage_;
@@ -298,11 +316,59 @@ OptimizationStats<Scalar> Optimize(const optimizer_params_t& params,
   return optimizer.Optimize(values);
 }
 
+/**
+ * Optimize a batch of independent problems in place, in parallel with one thread per optimizer.
+ *
+ * The optimizers should all be constructed with the same factors, and the values should all have
+ * the same structure.  Each optimizer is reused for many of the problems, so its setup (the
+ * linearizer structure, and the symbolic analysis unless the optimizers share an analysis cache)
+ * is only done once per thread instead of once per problem.
+ *
+ * Args:
+ *     optimizers: The optimizers to use, one per thread
+ *     values: The initial guesses, updated in place with the optimized values
+ *     num_iterations: If < 0 (the default), uses the number of iterations specified by the params
+ *                     of each optimizer
+ *     populate_best_linearization: If true, the linearization at the best values will be filled
+ *                                  out in the stats
+ *
+ * Returns:
+ *     The optimization stats for each problem
+ */
+template <typename Scalar, typename NonlinearSolverType>
+std::vector<OptimizationStats<Scalar>> OptimizeBatch(
+    const std::vector<Optimizer<Scalar, NonlinearSolverType>*>& optimizers,
+    std::vector<Values<Scalar>>* const values, const int num_iterations = -1,
+    const bool populate_best_linearization = false) {
+  SYM_ASSERT(!optimizers.empty());
+  SYM_ASSERT(values != nullptr);
+
+  std::vector<OptimizationStats<Scalar>> stats(values->size());
+  std::atomic<size_t> next_problem{0};
+  internal::ThreadPool thread_pool(static_cast<int>(optimizers.size()));
+  thread_pool.ParallelFor(static_cast<int>(optimizers.size()), [&](const int thread_index) {
+    auto& optimizer = *optimizers[thread_index];
+    for (size_t i = next_problem++; i < values->size(); i = next_problem++) {
+      optimizer.Optimize(&(*values)[i], num_iterations, populate_best_linearization, &stats[i]);
+    }
+  });
+
+  return stats;
+}
+
 /**
  * Sensible default parameters for Optimizer
  */
 optimizer_params_t DefaultOptimizerParams();
 
+/**
+ * Order the keys to optimize as required by the linear solver selected in params.  For the SCHUR
+ * linear solver, the keys with letter params.schur_eliminated_key_letter are moved after all other
+ * keys, otherwise keeping their relative order.  For other linear solvers, the keys are returned
+ * unchanged.
+ */
+std::vector<Key> OrderKeysForLinearSolver(const optimizer_params_t& params, std::vector<Key> keys);
+
 }  // namespace sym
 
 #include "./optimizer.tcc"
@@ -7,15 +7,25 @@ from __future__ import annotations
 
 import dataclasses
 from dataclasses import dataclass
+import itertools
+import os
+
+import numpy as np
 
 from lcmtypes.sym._index_entry_t import index_entry_t
+from lcmtypes.sym._index_t import index_t
+from lcmtypes.sym._linear_solver_t import linear_solver_t
 from lcmtypes.sym._optimization_iteration_t import optimization_iteration_t
 from lcmtypes.sym._optimizer_params_t import optimizer_params_t
 from lcmtypes.sym._values_t import values_t
 
 from symforce import typing as T
 from symforce.opt.factor import Factor
+from symforce.opt import tic_toc
 from symforce.opt.numeric_factor import NumericFactor
+from symforce.opt._internal.numeric_factor_batch import NumericFactorBatch
+from symforce.opt._internal.numeric_factor_batch import batch_numeric_factors
+from symforce.values import IndexEntry
 from symforce.values import Values
 from symforce import cc_sym
 
@@ -73,15 +83,32 @@ class Optimizer:
         params: Params for the optimizer
         debug_stats: Whether the optimizer should record debuggins stats such as the optimized
             values, residual, jacobian, etc. computed at each iteration of the optimization.
+        batch_factors: Whether to linearize NumericFactors which share the same linearization
+            function together, with one call into Python per group instead of one per factor.
+            Each group is passed to the C++ optimizer as a single sparse factor, so the rows of
+            the problem residual and jacobian are ordered differently than without batching.
+            Symbolic factors are also generated as vectorized functions where possible, which
+            linearize a whole group with a single call.
+        analysis_cache: A `cc_sym.SymbolicAnalysisCache` to share the symbolic analysis of the
+            hessian with other optimizers which have the same sparsity pattern, for applications
+            which create many optimizers for problems with the same structure.
+        schur_eliminated_keys: Optimized keys to eliminate with the Schur complement when
+            `params.linear_solver` is `linear_solver_t.SCHUR`, e.g. the landmarks in bundle
+            adjustment.  The hessian block for these keys must be block diagonal, i.e. no factor
+            may touch more than one of them.
     """
 
+    # Letter of the C++ keys for schur_eliminated_keys
+    _SCHUR_ELIMINATED_KEY_LETTER = "e"
+
     @dataclass
     class Params:
         """
         Parameters for the Python Optimizer
 
         Mirrors the optimizer_params_t LCM type, see documentation there for information on each
-        parameter
+        parameter.  The keys eliminated by the SCHUR linear solver are passed to the Optimizer
+        instead, as `schur_eliminated_keys`
         """
 
         verbose: bool = True
@@ -97,6 +124,10 @@ class Optimizer:
         iterations: int = 50
         early_exit_min_reduction: float = 1e-6
         enable_bold_updates: bool = False
+        num_threads: int = 1
+        linear_solver: linear_solver_t = linear_solver_t.CHOLESKY
+        cg_max_iterations: int = 500
+        cg_tolerance: float = 1e-6
 
     @dataclass
     class Result:
@@ -122,6 +153,12 @@ class Optimizer:
             `result.iteration_stats[best_index].values == optimized_values`.  This is not guaranteed
             to be the last iteration, if the optimizer tried additional steps which did not reduce
             the error
+
+        timing:
+            The time spent in each C++ block timed with SYM_TIME_SCOPE during the optimization,
+            keyed by block name, if requested with `optimize(timing=True)` and timing is enabled
+            (see `symforce.opt.tic_toc`).  The timers are process-global, so this also includes
+            blocks run concurrently on other threads, e.g. by other optimizers.
         """
 
         initial_values: Values
@@ -129,18 +166,126 @@ class Optimizer:
         iteration_stats: T.Sequence[optimization_iteration_t]
         early_exited: bool
         best_index: int
+        timing: T.Dict[str, tic_toc.BlockTiming] = dataclasses.field(default_factory=dict)
 
         def error(self) -> float:
             return self.iteration_stats[self.best_index].new_error
 
+    @dataclass
+    class BatchResult:
+        """
+        The results of `Optimizer.optimize_batch`, stacked over the problems in the batch
+
+        values_template:
+            A Values with the structure of each problem
+
+        initial_storage:
+            The initial guess for each problem, one row per problem, as the storage of
+            values_template
+
+        optimized_storage:
+            The best values achieved for each problem, in the same layout as initial_storage
+
+        stats:
+            The stats for each problem, see `Optimizer.Result`
+        """
+
+        values_template: Values
+        initial_storage: np.ndarray
+        optimized_storage: np.ndarray
+        stats: T.Sequence[cc_sym.OptimizationStats]
+
+        def __len__(self) -> int:
+            return len(self.stats)
+
+        def optimized_values(self, i: int) -> Values:
+            """
+            The optimized Values for problem i
+            """
+            return Values.from_storage_index(
+                self.optimized_storage[i], self.values_template.index()
+            )
+
+        def errors(self) -> np.ndarray:
+            """
+            The error at the optimized values of each problem
+            """
+            return np.array([stats.iterations[stats.best_index].new_error for stats in self.stats])
+
+        def early_exited(self) -> np.ndarray:
+            """
+            Whether each optimization exited early, see `Optimizer.Result`
+            """
+            return np.array([stats.early_exited for stats in self.stats], dtype=bool)
+
+        def result(self, i: int) -> Optimizer.Result:
+            """
+            The results of problem i, as if it had been optimized with `Optimizer.optimize`
+            """
+            index = self.values_template.index()
+            return Optimizer.Result(
+                initial_values=Values.from_storage_index(self.initial_storage[i], index),
+                optimized_values=self.optimized_values(i),
+                iteration_stats=self.stats[i].iterations,
+                best_index=self.stats[i].best_index,
+                early_exited=self.stats[i].early_exited,
+            )
+
     def __init__(
         self,
         factors: T.Iterable[T.Union[Factor, NumericFactor]],
         optimized_keys: T.Sequence[str] = None,
         params: Optimizer.Params = None,
         debug_stats: bool = False,
+        batch_factors: bool = False,
+        analysis_cache: T.Optional[cc_sym.SymbolicAnalysisCache] = None,
+        schur_eliminated_keys: T.Optional[T.Sequence[str]] = None,
     ):
 
+        # Set default params if none given
+        if params is None:
+            self.params = Optimizer.Params()
+        else:
+            self.params = params
+
+        self.debug_stats = debug_stats
+        self.batch_factors = batch_factors
+        self._analysis_cache = analysis_cache
+
+        # Mapping from python identifier string keys to fixed-size C++ Key objects, filled in by
+        # `update_factors` with the keys of the factors, which are needed to construct them.  Other
+        # keys in the Values are added in `_initialize`
+        self._cc_keys_map: T.Dict[str, cc_sym.Key] = {}
+        self._cc_key_indices = itertools.count()
+
+        # The C++ factor for each NumericFactor, and the C++ keys it was created with, so that
+        # `update_factors` can reuse it
+        self._cc_factors_by_id: T.Dict[
+            int, T.Tuple[NumericFactor, T.Tuple[cc_sym.Key, ...], cc_sym.Factor]
+        ] = {}
+
+        self.update_factors(factors, optimized_keys, schur_eliminated_keys)
+
+    def update_factors(
+        self,
+        factors: T.Iterable[T.Union[Factor, NumericFactor]],
+        optimized_keys: T.Sequence[str] = None,
+        schur_eliminated_keys: T.Optional[T.Sequence[str]] = None,
+    ) -> None:
+        """
+        Replace the factors and optimized keys, keeping the other settings of the optimizer
+
+        Keys keep their C++ keys, and NumericFactors which were already in the optimizer keep their
+        C++ factors, so this is cheaper than constructing a new Optimizer when only some of the
+        factors change.  The C++ optimizer is still recreated, and the next Values passed to the
+        optimizer is treated as the first.
+
+        Args:
+            factors: The new factors, see the constructor
+            optimized_keys: The new keys to optimize, see the constructor
+            schur_eliminated_keys: The new keys to eliminate with the Schur complement, see the
+                constructor
+        """
         if optimized_keys is None:
             # This will be filled with the optimized keys of the numeric factors
             self.optimized_keys = []
@@ -160,7 +305,11 @@ class Optimizer:
                 # We compute the linearization in the same order as `optimized_keys`
                 # so that e.g. columns of the generated jacobians are in the same order
                 factor_opt_keys = [opt_key for opt_key in optimized_keys if opt_key in factor.keys]
-                numeric_factors.append(factor.to_numeric_factor(factor_opt_keys))
+                numeric_factors.append(
+                    factor.to_numeric_factor(
+                        factor_opt_keys, batch_linearization=self.batch_factors
+                    )
+                )
             else:
                 # Add unique keys to optimized keys
                 self.optimized_keys.extend(
@@ -170,21 +319,45 @@ class Optimizer:
                 )
                 numeric_factors.append(factor)
 
-        # Set default params if none given
-        if params is None:
-            self.params = Optimizer.Params()
+        self.schur_eliminated_keys = (
+            [] if schur_eliminated_keys is None else list(schur_eliminated_keys)
+        )
+        schur_eliminated_keys_set = set(self.schur_eliminated_keys)
+        missing_keys = schur_eliminated_keys_set.difference(self.optimized_keys)
+        if missing_keys:
+            raise ValueError(f"Schur eliminated keys are not optimized keys: {missing_keys}")
+        if self.params.linear_solver == linear_solver_t.SCHUR and not self.schur_eliminated_keys:
+            raise ValueError("schur_eliminated_keys must be given to use the SCHUR linear solver")
+
+        cc_factor_sources: T.Sequence[T.Union[NumericFactor, NumericFactorBatch]]
+        if self.batch_factors:
+            cc_factor_sources = batch_numeric_factors(numeric_factors)
         else:
-            self.params = params
-
-        self.debug_stats = debug_stats
+            cc_factor_sources = numeric_factors
 
         self._initialized = False
 
-        # Create a mapping from python identifier string keys to fixed-size C++ Key objects
-        # Initialize the keys map with the optimized keys, which are needed to construct the factors
-        # This works because the factors maintain a reference to this, so everything is fine as long
-        # as the unoptimized keys are also in here before we attempt to linearize any of the factors
-        self._cc_keys_map = {key: cc_sym.Key("x", i) for i, key in enumerate(self.optimized_keys)}
+        # Keep the C++ keys of keys which are still used, unless an optimized key needs a different
+        # letter
+        previous_cc_keys_map = self._cc_keys_map
+        self._cc_keys_map = {}
+        for key in self.optimized_keys:
+            letter = (
+                Optimizer._SCHUR_ELIMINATED_KEY_LETTER if key in schur_eliminated_keys_set else "x"
+            )
+            previous_cc_key = previous_cc_keys_map.get(key)
+            if previous_cc_key is not None and previous_cc_key.letter == letter:
+                self._cc_keys_map[key] = previous_cc_key
+            else:
+                self._cc_keys_map[key] = self._new_cc_key(letter)
+        for factor in cc_factor_sources:
+            for key in factor.keys:
+                if key not in self._cc_keys_map:
+                    # Give these a different name (`v`) so we don't have to deal with numbering
+                    previous_cc_key = previous_cc_keys_map.get(key)
+                    self._cc_keys_map[key] = (
+                        previous_cc_key if previous_cc_key is not None else self._new_cc_key("v")
+                    )
 
         # This stores the list of keys in the python Values, which are necessary for reconstructing
         # a Python Values from C++, in particular for methods that don't otherwise have a Python
@@ -193,79 +366,258 @@ class Optimizer:
         self.values_keys_ordered: T.Optional[T.List[str]] = None
 
         # Construct the C++ optimizer
+        previous_cc_factors_by_id = self._cc_factors_by_id
+        self._cc_factors_by_id = {}
+        self._cc_factors = []
+        for factor in cc_factor_sources:
+            if isinstance(factor, NumericFactorBatch):
+                self._cc_factors.append(factor.cc_factor(self._cc_keys_map))
+                continue
+
+            cc_keys = tuple(self._cc_keys_map[key] for key in factor.keys)
+            previous = previous_cc_factors_by_id.get(id(factor))
+            if previous is not None and previous[0] is factor and previous[1] == cc_keys:
+                cc_factor = previous[2]
+            else:
+                cc_factor = factor.cc_factor(self._cc_keys_map)
+            self._cc_factors_by_id[id(factor)] = (factor, cc_keys, cc_factor)
+            self._cc_factors.append(cc_factor)
+
         self._cc_optimizer = cc_sym.Optimizer(
-            optimizer_params_t(**dataclasses.asdict(self.params)),
-            [factor.cc_factor(self._cc_keys_map) for factor in numeric_factors],
+            self._cc_params(),
+            self._cc_factors,
             debug_stats=self.debug_stats,
+            analysis_cache=self._analysis_cache,
         )
 
+        # C++ optimizers for optimize_batch, one per thread, which are created on first use
+        self._cc_batch_optimizers: T.List[cc_sym.Optimizer] = []
+
+    def _new_cc_key(self, letter: str) -> cc_sym.Key:
+        """
+        Returns a C++ key with the given letter, which is not used for any other key
+        """
+        return cc_sym.Key(letter, next(self._cc_key_indices))
+
+    def _cc_params(self) -> optimizer_params_t:
+        """
+        Returns the params for the C++ optimizer
+        """
+        params = optimizer_params_t(**dataclasses.asdict(self.params))
+        params.schur_eliminated_key_letter = ord(Optimizer._SCHUR_ELIMINATED_KEY_LETTER)
+        return params
+
     def _initialize(self, values: Values) -> None:
         # Add unoptimized keys into the keys map
-        for i, key in enumerate(values.keys_recursive()):
+        for key in values.keys_recursive():
             if key not in self._cc_keys_map:
-                # Give these a different name (`v`) so we don't have to deal with numbering
-                self._cc_keys_map[key] = cc_sym.Key("v", i)
+                self._cc_keys_map[key] = self._new_cc_key("v")
 
         self.values_keys_ordered = list(values.keys_recursive())
 
+        # Keep a C++ Values with the keys in the same order as the storage of the Python Values, so
+        # that Values with the same structure are transferred with a single copy of their storage
+        self._values_index = values.index()
+        self._cc_values_buffer = cc_sym.Values()
+        for key in self.values_keys_ordered:
+            self._cc_values_buffer.set(self._cc_keys_map[key], values[key])
+
         self._initialized = True
 
-    def _cc_values(self, values: Values) -> cc_sym.Values:
+    def _cc_values(
+        self, values: Values
+    ) -> T.Tuple[cc_sym.Values, T.Dict[str, IndexEntry], T.Optional[index_t]]:
         """
         Create a cc_sym.Values from the given Python Values
 
         This uses the stored cc_keys_map, which will be initialized if it does not exist yet.
+
+        If values has the same structure (keys, types and storage layout) as the Values the
+        optimizer was initialized with, this updates and returns the optimizer's C++ Values
+        buffer, which is overwritten by the next call.  Otherwise, this returns a new C++ Values,
+        with the keys in the same order as the buffer where possible, since the C++ optimizer
+        keeps the offsets of the keys in the first Values it optimizes.
+
+        Returns:
+            The C++ Values, the index of the numerical values, and if the storage of the C++
+            Values is not in the same order as the storage of values, the index of the keys of
+            values in the C++ Values.  These are the arguments to `_py_values`.
         """
         values = values.to_numerical()
 
         if not self._initialized:
             self._initialize(values)
 
+        index = values.index()
+        if index == self._values_index:
+            self._cc_values_buffer.update(np.array(values.to_storage(), dtype=np.float64))
+            return self._cc_values_buffer, index, None
+
+        assert self.values_keys_ordered is not None
+        keys = values.keys_recursive()
+        keys_set = set(keys)
+        buffer_keys_set = set(self.values_keys_ordered)
+        ordered_keys = [key for key in self.values_keys_ordered if key in keys_set] + [
+            key for key in keys if key not in buffer_keys_set
+        ]
+
         cc_values = cc_sym.Values()
-        for key, cc_key in self._cc_keys_map.items():
-            cc_values.set(cc_key, values[key])
+        for key in ordered_keys:
+            if key not in self._cc_keys_map:
+                self._cc_keys_map[key] = self._new_cc_key("v")
+            cc_values.set(self._cc_keys_map[key], values[key])
+
+        cc_index = (
+            cc_values.create_index([self._cc_keys_map[key] for key in keys])
+            if ordered_keys != keys
+            else None
+        )
+        return cc_values, index, cc_index
 
-        return cc_values
+    @staticmethod
+    def _py_values(
+        cc_values: cc_sym.Values, index: T.Dict[str, IndexEntry], cc_index: T.Optional[index_t]
+    ) -> Values:
+        """
+        Create a Python Values with the given index from a C++ Values returned by `_cc_values`
+        """
+        storage = cc_values.to_storage() if cc_index is None else cc_values.to_storage(cc_index)
+        return Values.from_storage_index(storage, index)
 
-    def optimize(self, initial_guess: Values) -> Optimizer.Result:
+    def optimize(self, initial_guess: Values, timing: bool = False) -> Optimizer.Result:
         """
         Optimize from the given initial guess, and return the optimized Values and stats
 
         Args:
             initial_guess: A Values containing the initial guess, should contain at least all the
                            keys required by the `factors` passed to the constructor
+            timing: Whether to fill out `Result.timing`, which reads the process-global timers
+                    before and after the optimization
 
         Returns:
             The optimization results, with additional stats and debug information.  See the
             `Optimizer.Result` documentation for more information
         """
-        cc_values = self._cc_values(initial_guess)
+        cc_values, index, cc_index = self._cc_values(initial_guess)
+
+        timing_enabled = timing and cc_sym.tic_toc_enabled()
+        if timing_enabled:
+            previous_tic_toc_stats = tic_toc.get_stats()
 
         try:
             stats = self._cc_optimizer.optimize(cc_values)
         except ZeroDivisionError as ex:
             raise ZeroDivisionError("ERROR: Division by zero - check your use of epsilon!") from ex
 
-        optimized_values = Values(
-            **{
-                key: cc_values.at(self._cc_keys_map[key])
-                for key in initial_guess.dataclasses_to_values().keys_recursive()
-            }
-        )
-
         return Optimizer.Result(
             initial_values=initial_guess,
-            optimized_values=optimized_values,
+            optimized_values=self._py_values(cc_values, index, cc_index),
             iteration_stats=stats.iterations,
             best_index=stats.best_index,
             early_exited=stats.early_exited,
+            timing=tic_toc.timing_since(previous_tic_toc_stats) if timing_enabled else {},
         )
 
-    def linearize(self, values: Values) -> cc_sym.Linearization:
+    def optimize_batch(
+        self,
+        initial_guesses: T.Union[T.Sequence[Values], np.ndarray],
+        values_template: T.Optional[Values] = None,
+        num_threads: T.Optional[int] = None,
+    ) -> Optimizer.BatchResult:
+        """
+        Optimize many independent problems with these factors, from different initial guesses
+
+        All of the optimizations run in C++ with a single call, in parallel on a pool of threads.
+        Each thread has its own C++ optimizer, reused for all of its problems and on later calls,
+        and the symbolic analysis of the hessian is shared between all of them.
+
+        Args:
+            initial_guesses: Either a sequence of Values with the same structure, or an array with
+                the storage of one initial guess per row, in which case values_template is required
+            values_template: A Values with the structure of each problem, only used if
+                initial_guesses is an array
+            num_threads: The number of threads to use, defaults to the number of CPUs
+
+        Returns:
+            The stacked optimization results, see `Optimizer.BatchResult`
+        """
+        if isinstance(initial_guesses, np.ndarray):
+            if values_template is None:
+                raise ValueError("values_template is required when initial_guesses is an array")
+            values_template = values_template.to_numerical()
+            initial_storage = np.array(initial_guesses, dtype=np.float64, ndmin=2, order="C")
+        else:
+            if not initial_guesses:
+                raise ValueError("initial_guesses must not be empty")
+            initial_guesses = [values.to_numerical() for values in initial_guesses]
+            values_template = initial_guesses[0]
+            template_keys = list(values_template.keys_recursive())
+            for values in initial_guesses[1:]:
+                if list(values.keys_recursive()) != template_keys:
+                    raise ValueError(
+                        "All initial guesses must have the same structure, got keys "
+                        f"{template_keys} and {list(values.keys_recursive())}"
+                    )
+            initial_storage = np.array(
+                [values.to_storage() for values in initial_guesses], dtype=np.float64
+            )
+
+        if not self._initialized:
+            self._initialize(values_template)
+
+        # A C++ Values with the keys in the storage order of the template
+        cc_values_template = cc_sym.Values()
+        for key in values_template.keys_recursive():
+            if key not in self._cc_keys_map:
+                self._cc_keys_map[key] = self._new_cc_key("v")
+            cc_values_template.set(self._cc_keys_map[key], values_template[key])
+
+        if num_threads is None:
+            num_threads = os.cpu_count() or 1
+        num_threads = max(1, min(num_threads, len(initial_storage)))
+
+        if self._analysis_cache is None:
+            # Share the analysis between the optimizers of the batch
+            self._analysis_cache = cc_sym.SymbolicAnalysisCache(max_size=1)
+        while len(self._cc_batch_optimizers) < num_threads:
+            self._cc_batch_optimizers.append(
+                cc_sym.Optimizer(
+                    self._cc_params(),
+                    self._cc_factors,
+                    debug_stats=self.debug_stats,
+                    analysis_cache=self._analysis_cache,
+                )
+            )
+
+        try:
+            optimized_storage, stats = cc_sym.optimize_batch(
+                self._cc_batch_optimizers[:num_threads], cc_values_template, initial_storage
+            )
+        except ZeroDivisionError as ex:
+            raise ZeroDivisionError("ERROR: Division by zero - check your use of epsilon!") from ex
+
+        return Optimizer.BatchResult(
+            values_template=values_template,
+            initial_storage=initial_storage,
+            optimized_storage=optimized_storage,
+            stats=stats,
+        )
+
+    def linearize(self, values: Values, incremental: bool = False) -> cc_sym.Linearization:
         """
         Compute and return the linearization at the given Values
+
+        Args:
+            values: The Values to linearize at
+            incremental: If True, only re-evaluate the factors touching keys whose values have
+                changed since the last linearization (including the linearizations during
+                `optimize`), and reuse the previous linearizations of the other factors.  Only
+                valid if each factor depends only on the values of its keys.  The values of the
+                keys are only recorded from the first incremental linearization on, so that one
+                re-evaluates all of the factors.
         """
-        return self._cc_optimizer.linearize(self._cc_values(values))
+        cc_values, _, _ = self._cc_values(values)
+        return self._cc_optimizer.linearize(cc_values, incremental=incremental)
 
     def load_iteration_values(self, values_msg: values_t) -> Values:
         """
@@ -24,9 +24,10 @@ Optimizer<ScalarType, NonlinearSolverType>::Optimizer(const optimizer_params_t&
       nonlinear_solver_(params, name, epsilon),
       epsilon_(epsilon),
       debug_stats_(debug_stats),
-      keys_(keys.empty() ? ComputeKeysToOptimize(factors_) : keys),
+      keys_(
+          OrderKeysForLinearSolver(params, keys.empty() ? ComputeKeysToOptimize(factors_) : keys)),
       index_(),
-      linearizer_(name_, factors_, keys_),
+      linearizer_(name_, factors_, keys_, params.num_threads),
       linearize_func_(BuildLinearizeFunc(check_derivatives)) {}
 
 template <typename ScalarType, typename NonlinearSolverType>
@@ -41,9 +42,10 @@ Optimizer<ScalarType, NonlinearSolverType>::Optimizer(
                         std::forward<NonlinearSolverArgs>(nonlinear_solver_args)...),
       epsilon_(epsilon),
       debug_stats_(debug_stats),
-      keys_(keys.empty() ? ComputeKeysToOptimize(factors_) : keys),
+      keys_(
+          OrderKeysForLinearSolver(params, keys.empty() ? ComputeKeysToOptimize(factors_) : keys)),
       index_(),
-      linearizer_(name_, factors_, keys_),
+      linearizer_(name_, factors_, keys_, params.num_threads),
       linearize_func_(BuildLinearizeFunc(check_derivatives)) {}
 
 template <typename ScalarType, typename NonlinearSolverType>
@@ -57,9 +59,10 @@ Optimizer<ScalarType, NonlinearSolverType>::Optimizer(const optimizer_params_t&
       nonlinear_solver_(params, name, epsilon),
       epsilon_(epsilon),
       debug_stats_(debug_stats),
-      keys_(keys.empty() ? ComputeKeysToOptimize(factors_) : std::move(keys)),
+      keys_(OrderKeysForLinearSolver(
+          params, keys.empty() ? ComputeKeysToOptimize(factors_) : std::move(keys))),
       index_(),
-      linearizer_(name_, factors_, keys_),
+      linearizer_(name_, factors_, keys_, params.num_threads),
       linearize_func_(BuildLinearizeFunc(check_derivatives)) {}
 
 template <typename ScalarType, typename NonlinearSolverType>
@@ -73,9 +76,10 @@ Optimizer<ScalarType, NonlinearSolverType>::Optimizer(
                         std::forward<NonlinearSolverArgs>(nonlinear_solver_args)...),
       epsilon_(epsilon),
       debug_stats_(debug_stats),
-      keys_(keys.empty() ? ComputeKeysToOptimize(factors_) : std::move(keys)),
+      keys_(OrderKeysForLinearSolver(
+          params, keys.empty() ? ComputeKeysToOptimize(factors_) : std::move(keys))),
       index_(),
-      linearizer_(name_, factors_, keys_),
+      linearizer_(name_, factors_, keys_, params.num_threads),
       linearize_func_(BuildLinearizeFunc(check_derivatives)) {}
 
 // ----------------------------------------------------------------------------
@@ -128,11 +132,15 @@ void Optimizer<ScalarType, NonlinearSolverType>::Optimize(Values<Scalar>* values
 
 template <typename ScalarType, typename NonlinearSolverType>
 Linearization<ScalarType> Optimizer<ScalarType, NonlinearSolverType>::Linearize(
-    const Values<Scalar>& values) {
+    const Values<Scalar>& values, const bool incremental) {
   Initialize(values);
 
   Linearization<Scalar> linearization;
-  linearize_func_(values, &linearization);
+  if (incremental) {
+    linearizer_.RelinearizeIncremental(values, &linearization);
+  } else {
+    linearize_func_(values, &linearization);
+  }
   return linearization;
 }
 
@@ -155,12 +163,20 @@ void Optimizer<ScalarType, NonlinearSolverType>::ComputeCovariances(
   const bool contiguous = linearizer_.CheckKeysAreContiguousAtStart(keys, &block_dim);
   SYM_ASSERT(contiguous);
 
+  // Start over with a new Schur solver if the structure changed since the last call
+  ComputeCovariancesStorage& storage = compute_covariances_storage_;
+  if (storage.schur_solver.IsInitialized() &&
+      (storage.schur_block_dim != block_dim ||
+       !internal::HaveSameSparsityPattern(storage.H_damped, linearization.hessian_lower))) {
+    storage.schur_solver = sym::SparseSchurSolver<Eigen::SparseMatrix<Scalar>>{};
+  }
+  storage.schur_block_dim = block_dim;
+
   // Copy into modifiable storage
-  compute_covariances_storage_.H_damped = linearization.hessian_lower;
+  storage.H_damped = linearization.hessian_lower;
 
-  internal::ComputeCovarianceBlockWithSchurComplement(&compute_covariances_storage_.H_damped,
-                                                      block_dim, epsilon_,
-                                                      &compute_covariances_storage_.covariance);
+  internal::ComputeCovarianceBlockWithSchurComplement(&storage.H_damped, block_dim, epsilon_,
+                                                      &storage.covariance, &storage.schur_solver);
   linearizer_.SplitCovariancesByKey(compute_covariances_storage_.covariance, keys,
                                     covariances_by_key);
 }
@@ -188,6 +204,7 @@ Linearizer<ScalarType>& Optimizer<ScalarType, NonlinearSolverType>::Linearizer()
 template <typename ScalarType, typename NonlinearSolverType>
 void Optimizer<ScalarType, NonlinearSolverType>::UpdateParams(const optimizer_params_t& params) {
   nonlinear_solver_.UpdateParams(params);
+  linearizer_.SetNumThreads(params.num_threads);
 }
 
 // ----------------------------------------------------------------------------
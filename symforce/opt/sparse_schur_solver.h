@@ -79,7 +79,8 @@ class SparseSchurSolver {
   // Analyzes A and precomputes/allocates some things (some additional initialization is also done
   // on the first call to Factorize)
   //
-  // `A` should be lower triangular
+  // `A` should be lower triangular.  The solver may then be reused for any matrices with the same
+  // sparsity pattern as `A`; this may be called again to reuse it for a different pattern.
   void ComputeSymbolicSparsity(const MatrixType& A, const int C_dim);
 
   void Factorize(const MatrixType& A);
@@ -127,6 +128,9 @@ class SparseSchurSolver {
   SparsityInformation sparsity_information_;
   FactorizationData factorization_data_;
   SMatrixSolverType S_solver_;
+
+  // Whether S_solver_ has analyzed the sparsity of S for the current sparsity of A
+  bool S_solver_analyzed_{false};
 };
 
 }  // namespace sym
@@ -18,6 +18,7 @@ void SparseSchurSolver<_MatrixType>::ComputeSymbolicSparsity(const MatrixType& A
   sparsity_information_.total_dim_ = A.rows();
   sparsity_information_.B_dim_ = sparsity_information_.total_dim_ - C_dim;
   sparsity_information_.C_dim_ = C_dim;
+  sparsity_information_.C_blocks_.clear();
 
   // Iterate over blocks along the diagonal of C
   bool currently_in_block = false;
@@ -86,6 +87,10 @@ void SparseSchurSolver<_MatrixType>::ComputeSymbolicSparsity(const MatrixType& A
   Eigen::SparseMatrix<Scalar>& C_inv_lower = factorization_data_.C_inv_lower;
   C_inv_lower = Eigen::SparseMatrix<Scalar>(C_dim, C_dim);
   C_inv_lower.setFromTriplets(triplets.begin(), triplets.end());
+
+  // The sparsity of S is computed on the first call to Factorize
+  S_solver_analyzed_ = false;
+  is_initialized_ = true;
 }
 
 // TODO(aaron): Record conditioning information here, and have a way for the user to get it
@@ -122,8 +127,9 @@ void SparseSchurSolver<_MatrixType>::Factorize(const MatrixType& A) {
        E_transpose.transpose() * C_inv_lower.template selfadjointView<Eigen::Lower>() * E_transpose)
           .template selfadjointView<Eigen::Lower>();
 
-  if (!S_solver_.IsInitialized()) {
+  if (!S_solver_analyzed_) {
     S_solver_.ComputeSymbolicSparsity(S_lower);
+    S_solver_analyzed_ = true;
   }
 
   S_solver_.Factorize(S_lower);
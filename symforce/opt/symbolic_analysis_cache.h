@@ -0,0 +1,202 @@
+/* ----------------------------------------------------------------------------
+ * SymForce - Copyright 2022, Skydio, Inc.
+ * This source code is under the Apache 2.0 license found in the LICENSE file.
+ * ---------------------------------------------------------------------------- */
+
+#pragma once
+
+#include <iterator>
+#include <list>
+#include <memory>
+#include <mutex>
+#include <unordered_map>
+#include <vector>
+
+#include <Eigen/Sparse>
+
+#include "./internal/hash_combine.h"
+
+namespace sym {
+
+// Cache of the symbolic analysis of sparse linear systems (the fill-reducing ordering, elimination
+// tree, and allocation of the factor), keyed by the sparsity pattern of the matrix.
+//
+// Computing the symbolic analysis is typically much more expensive than a single numerical
+// factorization, so applications which solve many problems with identical structure (e.g. the same
+// factor graph with different measurements) can share one cache between all of their solvers, so
+// that the analysis is computed once per sparsity pattern instead of once per solver.
+//
+// The cache stores analyzed copies of LinearSolver, so LinearSolver must be copyable, and all
+// solvers sharing a cache should be configured identically (e.g. with the same ordering).  It may
+// be shared between threads.  It holds at most max_size patterns, evicting the least recently used
+// pattern when full.
+//
+// Example usage:
+//
+//     using Solver = sym::LevenbergMarquardtSolverd;
+//     const auto cache = std::make_shared<Solver::AnalysisCache>(100);
+//     for (const auto& measurements : problems) {
+//       sym::Optimizerd optimizer(params, BuildFactors(measurements), epsilon, name, keys,
+//                                 debug_stats, check_derivatives, Solver::LinearSolver(), cache);
+//       optimizer.Optimize(&values);
+//     }
+template <typename LinearSolverType>
+class SymbolicAnalysisCache {
+ public:
+  using LinearSolver = LinearSolverType;
+  using MatrixType = typename LinearSolver::MatrixType;
+  using StorageIndex = typename MatrixType::StorageIndex;
+
+  explicit SymbolicAnalysisCache(const size_t max_size = 64) : max_size_(max_size) {}
+
+  // Make linear_solver ready to factorize matrices with the sparsity pattern of A, equivalent to
+  // calling linear_solver->ComputeSymbolicSparsity(A).
+  //
+  // If a solver with this sparsity pattern is cached, linear_solver is set to a copy of it.
+  // Otherwise, the analysis is computed by linear_solver and a copy of it is added to the cache.
+  void ComputeSymbolicSparsity(const MatrixType& A, LinearSolver* const linear_solver) {
+    Pattern pattern(A);
+
+    std::shared_ptr<const LinearSolver> cached_solver;
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      const auto it = Find(pattern);
+      if (it != entries_.end()) {
+        // Move to the front, as the most recently used
+        entries_.splice(entries_.begin(), entries_, it);
+        cached_solver = it->solver;
+        hits_++;
+      } else {
+        misses_++;
+      }
+    }
+
+    if (cached_solver) {
+      *linear_solver = *cached_solver;
+      return;
+    }
+
+    // Analyze without holding the lock, so that other threads aren't blocked.  If another thread
+    // analyzes the same pattern concurrently, the first one to finish is kept
+    linear_solver->ComputeSymbolicSparsity(A);
+    auto solver = std::make_shared<const LinearSolver>(*linear_solver);
+
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (max_size_ == 0 || Find(pattern) != entries_.end()) {
+      return;
+    }
+
+    const size_t hash = pattern.hash;
+    entries_.push_front(Entry{std::move(pattern), std::move(solver)});
+    index_.emplace(hash, entries_.begin());
+    EvictToSize(max_size_);
+  }
+
+  // Number of sparsity patterns in the cache
+  size_t Size() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return entries_.size();
+  }
+
+  size_t MaxSize() const {
+    return max_size_;
+  }
+
+  // Number of calls to ComputeSymbolicSparsity which did and did not find their sparsity pattern in
+  // the cache
+  size_t Hits() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return hits_;
+  }
+
+  size_t Misses() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return misses_;
+  }
+
+  void Clear() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    EvictToSize(0);
+  }
+
+ private:
+  // The sparsity pattern of a matrix, in compressed form
+  struct Pattern {
+    explicit Pattern(const MatrixType& A) : rows(A.rows()), cols(A.cols()) {
+      outer.reserve(A.outerSize() + 1);
+      inner.reserve(A.nonZeros());
+      outer.push_back(0);
+      for (Eigen::Index k = 0; k < A.outerSize(); ++k) {
+        for (typename MatrixType::InnerIterator it(A, k); it; ++it) {
+          inner.push_back(it.index());
+        }
+        outer.push_back(static_cast<StorageIndex>(inner.size()));
+      }
+
+      hash = 0;
+      internal::hash_combine(hash, rows, cols);
+      for (const StorageIndex i : outer) {
+        internal::hash_combine(hash, i);
+      }
+      for (const StorageIndex i : inner) {
+        internal::hash_combine(hash, i);
+      }
+    }
+
+    bool operator==(const Pattern& other) const {
+      return hash == other.hash && rows == other.rows && cols == other.cols &&
+             outer == other.outer && inner == other.inner;
+    }
+
+    Eigen::Index rows;
+    Eigen::Index cols;
+    std::vector<StorageIndex> outer;
+    std::vector<StorageIndex> inner;
+    size_t hash;
+  };
+
+  struct Entry {
+    Pattern pattern;
+    std::shared_ptr<const LinearSolver> solver;
+  };
+
+  using EntryList = std::list<Entry>;
+
+  // Must be called with mutex_ held
+  typename EntryList::iterator Find(const Pattern& pattern) {
+    const auto range = index_.equal_range(pattern.hash);
+    for (auto it = range.first; it != range.second; ++it) {
+      if (it->second->pattern == pattern) {
+        return it->second;
+      }
+    }
+    return entries_.end();
+  }
+
+  // Must be called with mutex_ held
+  void EvictToSize(const size_t size) {
+    while (entries_.size() > size) {
+      const auto range = index_.equal_range(entries_.back().pattern.hash);
+      for (auto it = range.first; it != range.second; ++it) {
+        if (it->second == std::prev(entries_.end())) {
+          index_.erase(it);
+          break;
+        }
+      }
+      entries_.pop_back();
+    }
+  }
+
+  const size_t max_size_;
+
+  mutable std::mutex mutex_;
+
+  // Ordered from most to least recently used
+  EntryList entries_;
+  std::unordered_multimap<size_t, typename EntryList::iterator> index_;
+
+  size_t hits_{0};
+  size_t misses_{0};
+};
+
+}  // namespace sym
@@ -20,6 +20,10 @@
  *         }
  *     }
  *
+ * With the default implementation, the stats can also be fetched while the program runs, and every
+ * run of each scope can be recorded as a trace, see sym::internal::TicTocManager.  These are
+ * available from Python in symforce.opt.tic_toc.
+ *
  * SymForce has a default implementation of this timing and aggregation mechanism; if you have some
  * other timing system that you'd like SymForce to hook into, you can define a header to include
  * with SYMFORCE_TIC_TOC_HEADER and provide your own definition of the SYM_TIME_SCOPE macro
@@ -0,0 +1,114 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+"""
+Access to the timing of the C++ blocks timed with SYM_TIME_SCOPE, e.g. the steps of each
+optimization
+
+Collection is enabled by default, and is controlled with `cc_sym.set_tic_toc_enabled` and
+`cc_sym.reset_tic_toc`.  The timers are process-global: the stats include the blocks run on every
+thread, so with concurrent optimizations they are not attributable to any one of them.  Example
+usage:
+
+    cc_sym.reset_tic_toc()
+    optimizer.optimize(initial_guess)
+    for name, stats in tic_toc.get_stats().items():
+        print(f"{name}: {stats.count} runs, {stats.total_time} s")
+
+To record a timeline of every run of each block, call `cc_sym.set_tic_toc_trace_enabled(True)`,
+and write it with `cc_sym.write_tic_toc_chrome_trace(path)` for viewing in chrome://tracing or
+Perfetto.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from symforce import cc_sym
+from symforce import typing as T
+
+# dtype of the array returned by get_stats_array, with times in seconds
+STATS_DTYPE = np.dtype(
+    [
+        ("name", object),
+        ("thread_index", np.int32),
+        ("count", np.int64),
+        ("total_time", np.float64),
+        ("average_time", np.float64),
+        ("min_time", np.float64),
+        ("max_time", np.float64),
+    ]
+)
+
+
+@dataclass
+class BlockTiming:
+    """
+    Time spent in a block over some interval, e.g. an optimization
+
+    count:
+        Number of runs of the block
+
+    total_time:
+        Total time of the runs of the block, in seconds
+    """
+
+    count: int
+    total_time: float
+
+
+def get_stats(per_thread: bool = False) -> T.Dict[T.Any, cc_sym.TicTocBlockStats]:
+    """
+    Get the stats of each block, keyed by name if per_thread is False, otherwise by the tuple
+    (name, thread_index)
+    """
+    if per_thread:
+        return {
+            (stats.name, stats.thread_index): stats
+            for stats in cc_sym.get_tic_toc_stats(per_thread=True)
+        }
+    else:
+        return {stats.name: stats for stats in cc_sym.get_tic_toc_stats()}
+
+
+def get_stats_array(per_thread: bool = False) -> np.ndarray:
+    """
+    Get the stats of each block as a structured array with dtype STATS_DTYPE, sorted by name.  If
+    per_thread is False, the thread_index of each entry is -1.
+    """
+    return np.array(
+        [
+            (
+                stats.name,
+                stats.thread_index,
+                stats.count,
+                stats.total_time,
+                stats.average_time,
+                stats.min_time,
+                stats.max_time,
+            )
+            for stats in cc_sym.get_tic_toc_stats(per_thread=per_thread)
+        ],
+        dtype=STATS_DTYPE,
+    )
+
+
+def timing_since(
+    previous_stats: T.Mapping[str, cc_sym.TicTocBlockStats]
+) -> T.Dict[str, BlockTiming]:
+    """
+    Get the time spent in each block since previous_stats was fetched with `get_stats()`, for the
+    blocks which ran in that interval.  This includes blocks run on all threads.
+    """
+    timing = {}
+    for name, stats in get_stats().items():
+        previous = previous_stats.get(name)
+        count = stats.count - (previous.count if previous is not None else 0)
+        if count > 0:
+            total_time = stats.total_time - (previous.total_time if previous is not None else 0.0)
+            timing[name] = BlockTiming(count=count, total_time=total_time)
+    return timing
@@ -210,6 +210,22 @@ void Values<Scalar>::Update(const index_t& index_this, const index_t& index_othe
   }
 }
 
+template <typename Scalar>
+void Values<Scalar>::Update(const index_t& index, const Scalar* data) {
+  for (const index_entry_t& entry : index.entries) {
+    std::copy_n(data, entry.storage_dim, data_.begin() + entry.offset);
+    data += entry.storage_dim;
+  }
+}
+
+template <typename Scalar>
+void Values<Scalar>::FillStorage(const index_t& index, Scalar* data) const {
+  for (const index_entry_t& entry : index.entries) {
+    std::copy_n(data_.begin() + entry.offset, entry.storage_dim, data);
+    data += entry.storage_dim;
+  }
+}
+
 /**
  * Polymorphic helper to apply a retraction.
  */
@@ -212,6 +212,19 @@ class Values {
    */
   void Update(const index_t& index_this, const index_t& index_other, const Values<Scalar>& other);
 
+  /**
+   * Efficiently update the keys given by this index from a flat array of their storage, in the
+   * order of the index. This purely copies slices of the array, the index MUST be valid for this
+   * object and data MUST be of size index.storage_dim!
+   */
+  void Update(const index_t& index, const Scalar* data);
+
+  /**
+   * Copy the storage of the keys given by this index into a flat array, in the order of the index.
+   * Opposite of Update(index, data); data MUST be of size index.storage_dim!
+   */
+  void FillStorage(const index_t& index, Scalar* data) const;
+
   /**
    * Perform a retraction from an update vector.
    *
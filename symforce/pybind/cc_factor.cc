@@ -5,14 +5,17 @@
 
 #include "./cc_factor.h"
 
+#include <algorithm>
 #include <cstring>
 #include <functional>
+#include <memory>
 
 #include <Eigen/Dense>
 #include <fmt/format.h>
 #include <fmt/ostream.h>
 #include <pybind11/eigen.h>
 #include <pybind11/functional.h>
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
@@ -33,8 +36,9 @@ namespace sym {
 
 namespace {
 
+// The values are passed by pointer so that pybind does not copy them into each call
 using PyHessianFunc =
-    std::function<py::tuple(const sym::Valuesd&, const std::vector<index_entry_t>&)>;
+    std::function<py::tuple(const sym::Valuesd*, const std::vector<index_entry_t>&)>;
 
 /**
  * If Matrix is Eigen::SparseMatrix<double> and matrix is not a scipy.sparse.csc_matrix, or
@@ -48,32 +52,61 @@ void ThrowIfSparsityMismatch(const py::object& matrix) {
 }
 template <>
 void ThrowIfSparsityMismatch<Eigen::SparseMatrix<double>>(const py::object& matrix) {
-  if (!py::isinstance(matrix, py::module_::import("scipy.sparse").attr("csc_matrix"))) {
+  // Looked up once, and intentionally leaked so it isn't destroyed after the interpreter
+  static const py::handle csc_matrix =
+      py::object(py::module_::import("scipy.sparse").attr("csc_matrix")).release();
+  if (!py::isinstance(matrix, csc_matrix)) {
     throw py::value_error(
         fmt::format("scipy.sparse.csc_matrix expected, found {} instead.", py::type::of(matrix)));
   }
 }
 
+/**
+ * Copies the matrix src into *dst. The storage of *dst is reused if it already has the right size,
+ * and src is read in place if it is a float64 array, with any strides.
+ */
+template <typename Matrix>
+void CastInto(const py::handle& src, Matrix* const dst) {
+  using RefType = Eigen::Ref<const Matrix, 0, Eigen::Stride<Eigen::Dynamic, Eigen::Dynamic>>;
+  // The caster owns any converted copy of src, so it must outlive the assignment
+  py::detail::make_caster<RefType> caster;
+  if (!caster.load(src, /* convert */ true)) {
+    throw py::cast_error(fmt::format("Unable to cast Python instance of type {} to C++ type '{}'",
+                                     py::str(py::type::of(src)).cast<std::string>(),
+                                     py::type_id<Matrix>()));
+  }
+  *dst = py::detail::cast_op<RefType>(caster);
+}
+template <>
+void CastInto<Eigen::SparseMatrix<double>>(const py::handle& src,
+                                           Eigen::SparseMatrix<double>* const dst) {
+  *dst = py::cast<Eigen::SparseMatrix<double>>(src);
+}
+
 template <typename Matrix>
 auto WrapPyHessianFunc(PyHessianFunc&& hessian_func) {
   using Vec = Eigen::VectorXd;
   return [hessian_func = std::move(hessian_func)](
              const sym::Valuesd& values, const std::vector<index_entry_t>& keys,
              Vec* const residual, Matrix* const jacobian, Matrix* const hessian, Vec* const rhs) {
-    const py::tuple out_tuple = hessian_func(values, keys);
+    // The optimizer releases the GIL, and may linearize factors on other threads, which also need
+    // somewhere to keep temporaries created while casting the outputs
+    py::gil_scoped_acquire gil;
+    py::detail::loader_life_support life_support;
+    const py::tuple out_tuple = hessian_func(&values, keys);
     if (residual != nullptr) {
-      *residual = py::cast<Vec>(out_tuple[0]);
+      CastInto(out_tuple[0], residual);
     }
     if (jacobian != nullptr) {
       ThrowIfSparsityMismatch<Matrix>(out_tuple[1]);
-      *jacobian = py::cast<Matrix>(out_tuple[1]);
+      CastInto(out_tuple[1], jacobian);
     }
     if (hessian != nullptr) {
       ThrowIfSparsityMismatch<Matrix>(out_tuple[2]);
-      *hessian = py::cast<Matrix>(out_tuple[2]);
+      CastInto(out_tuple[2], hessian);
     }
     if (rhs != nullptr) {
-      *rhs = py::cast<Vec>(out_tuple[3]);
+      CastInto(out_tuple[3], rhs);
     }
   };
 }
@@ -90,7 +123,7 @@ sym::Factord MakeHessianFactor(PyHessianFunc hessian_func, const std::vector<Key
 }
 
 using PyJacobianFunc =
-    std::function<py::tuple(const sym::Valuesd&, const std::vector<index_entry_t>&)>;
+    std::function<py::tuple(const sym::Valuesd*, const std::vector<index_entry_t>&)>;
 
 template <typename Matrix>
 sym::Factord::JacobianFunc<Matrix> WrapPyJacobianFunc(PyJacobianFunc&& jacobian_func) {
@@ -98,13 +131,15 @@ sym::Factord::JacobianFunc<Matrix> WrapPyJacobianFunc(PyJacobianFunc&& jacobian_
       [jacobian_func = std::move(jacobian_func)](
           const sym::Valuesd& values, const std::vector<index_entry_t>& keys,
           Eigen::VectorXd* const residual, Matrix* const jacobian) {
-        const py::tuple out_tuple = jacobian_func(values, keys);
+        py::gil_scoped_acquire gil;
+        py::detail::loader_life_support life_support;
+        const py::tuple out_tuple = jacobian_func(&values, keys);
         if (residual != nullptr) {
-          *residual = py::cast<Eigen::VectorXd>(out_tuple[0]);
+          CastInto(out_tuple[0], residual);
         }
         if (jacobian != nullptr) {
           ThrowIfSparsityMismatch<Matrix>(out_tuple[1]);
-          *jacobian = py::cast<Matrix>(out_tuple[1]);
+          CastInto(out_tuple[1], jacobian);
         }
       });
 }
@@ -121,6 +156,100 @@ sym::Factord MakeJacobianFactor(PyJacobianFunc jacobian_func, const std::vector<
   }
 }
 
+/**
+ * Returns a writable numpy array viewing the storage of matrix, or None if matrix is nullptr.
+ *
+ * The view does not own the storage, so it's only valid while matrix is alive and not resized.
+ */
+template <typename Matrix>
+py::object WritableView(Matrix* const matrix) {
+  if (matrix == nullptr) {
+    return py::none();
+  }
+
+  // Giving the array a base object makes it reference the data instead of copying it
+  const py::capsule base(matrix, [](void*) {});
+  constexpr py::ssize_t kScalarSize = sizeof(typename Matrix::Scalar);
+  if (Matrix::ColsAtCompileTime == 1) {
+    return py::array_t<typename Matrix::Scalar>({matrix->rows()}, {kScalarSize}, matrix->data(),
+                                                base);
+  }
+  return py::array_t<typename Matrix::Scalar>({matrix->rows(), matrix->cols()},
+                                              {kScalarSize, kScalarSize * matrix->rows()},
+                                              matrix->data(), base);
+}
+
+/**
+ * State of a factor created from a Python in-place hessian function, see
+ * WrapPyInPlaceHessianFunc. Destroyed with the GIL held, since it owns Python objects.
+ */
+struct PyInPlaceHessianFuncState {
+  py::function hessian_func;
+  std::vector<sym::Key> keys_to_optimize;
+  int residual_dim;
+
+  // The Python list of index entries passed to hessian_func, which is converted again only if the
+  // index entries change
+  std::vector<index_entry_t> keys;
+  py::object py_keys;
+};
+
+auto WrapPyInPlaceHessianFunc(py::function hessian_func, std::vector<sym::Key> keys_to_optimize,
+                              const int residual_dim) {
+  const auto state = std::shared_ptr<PyInPlaceHessianFuncState>(
+      new PyInPlaceHessianFuncState{
+          std::move(hessian_func), std::move(keys_to_optimize), residual_dim, {}, py::none()},
+      [](PyInPlaceHessianFuncState* const state) {
+        py::gil_scoped_acquire gil;
+        delete state;
+      });
+
+  return [state](const sym::Valuesd& values, const std::vector<index_entry_t>& keys,
+                 Eigen::VectorXd* const residual, Eigen::MatrixXd* const jacobian,
+                 Eigen::MatrixXd* const hessian, Eigen::VectorXd* const rhs) {
+    int tangent_dim = 0;
+    for (const index_entry_t& entry : keys) {
+      if (std::find(state->keys_to_optimize.begin(), state->keys_to_optimize.end(),
+                    sym::Key(entry.key)) != state->keys_to_optimize.end()) {
+        tangent_dim += entry.tangent_dim;
+      }
+    }
+
+    // Resizing is a no-op if the outputs already have the right size, e.g. when a Linearizer
+    // relinearizes into the same LinearizedDenseFactor
+    if (residual != nullptr) {
+      residual->resize(state->residual_dim);
+    }
+    if (jacobian != nullptr) {
+      jacobian->resize(state->residual_dim, tangent_dim);
+    }
+    if (hessian != nullptr) {
+      hessian->resize(tangent_dim, tangent_dim);
+    }
+    if (rhs != nullptr) {
+      rhs->resize(tangent_dim);
+    }
+
+    py::gil_scoped_acquire gil;
+    if (state->py_keys.is_none() || state->keys != keys) {
+      state->keys = keys;
+      state->py_keys = py::cast(keys);
+    }
+    state->hessian_func(py::cast(&values, py::return_value_policy::reference), state->py_keys,
+                        WritableView(residual), WritableView(jacobian), WritableView(hessian),
+                        WritableView(rhs));
+  };
+}
+
+sym::Factord MakeInPlaceHessianFactor(py::function hessian_func,
+                                      const std::vector<sym::Key>& keys_to_func,
+                                      const std::vector<sym::Key>& keys_to_optimize,
+                                      const int residual_dim) {
+  return sym::Factord(
+      WrapPyInPlaceHessianFunc(std::move(hessian_func), keys_to_optimize, residual_dim),
+      keys_to_func, keys_to_optimize);
+}
+
 }  // namespace
 
 //================================================================================================//
@@ -159,6 +288,38 @@ void AddFactorWrapper(pybind11::module_ module) {
               Precondition:
                 The jacobian and hessian returned by hessian_func have type scipy.sparse.csc_matrix if and only if sparse = True.
            )")
+      .def_static(
+          "in_place",
+          [](py::function hessian_func, const std::vector<sym::Key>& keys, const int residual_dim) {
+            return MakeInPlaceHessianFactor(std::move(hessian_func), keys, keys, residual_dim);
+          },
+          py::arg("hessian_func"), py::arg("keys"), py::arg("residual_dim"), R"(
+            Create a dense factor from a hessian function which writes its outputs in place, to
+            avoid allocating and copying the outputs on each linearization.
+
+            hessian_func is called as hessian_func(values, index_entries, residual, jacobian,
+            hessian, rhs), where the outputs are writable numpy arrays of shape (residual_dim,),
+            (residual_dim, tangent_dim), (tangent_dim, tangent_dim), and (tangent_dim,), which
+            view the storage of the linearized factor.  Outputs which are not needed for a given
+            linearization are None.  hessian_func should fill them in place (e.g.
+            `residual[:] = ...`), and must not keep references to the values or the outputs after
+            it returns.
+
+            Args:
+              keys: The set of input arguments, in order, accepted by func.
+              residual_dim: The dimension of the residual.
+          )")
+      .def_static("in_place", &MakeInPlaceHessianFactor, py::arg("hessian_func"),
+                  py::arg("keys_to_func"), py::arg("keys_to_optimize"), py::arg("residual_dim"),
+                  R"(
+            Create a dense factor from a hessian function which writes its outputs in place, see
+            above.
+
+            Args:
+              keys_to_func: The set of input arguments, in order, accepted by func.
+              keys_to_optimize: The set of input arguments that correspond to the derivative in func. Must be a subset of keys_to_func.
+              residual_dim: The dimension of the residual.
+          )")
       .def("is_sparse", &sym::Factord::IsSparse,
            "Does this factor use a sparse jacobian/hessian matrix?")
       .def_static("jacobian", &MakeJacobianFactor<sym::Key>, py::arg("jacobian_func"),
@@ -5,8 +5,11 @@
 
 #include "./cc_optimizer.h"
 
+#include <memory>
+#include <utility>
 #include <vector>
 
+#include <fmt/format.h>
 #include <pybind11/eigen.h>
 #include <pybind11/stl.h>
 
@@ -25,19 +28,43 @@
 namespace sym {
 
 void AddOptimizerWrapper(pybind11::module_ module) {
+  using AnalysisCache = Optimizerd::NonlinearSolver::AnalysisCache;
+  using RowMajorMatrixXd = Eigen::Matrix<double, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor>;
+  py::class_<AnalysisCache, std::shared_ptr<AnalysisCache>>(
+      module, "SymbolicAnalysisCache",
+      "Cache of the symbolic analysis of the hessian (the variable ordering and elimination tree), "
+      "keyed by its sparsity pattern, which may be shared between Optimizers with identical "
+      "structure to only compute the analysis once.  Holds at most max_size sparsity patterns, "
+      "evicting the least recently used.")
+      .def(py::init<size_t>(), py::arg("max_size") = 64)
+      .def("size", &AnalysisCache::Size, "Number of sparsity patterns in the cache.")
+      .def("max_size", &AnalysisCache::MaxSize)
+      .def("hits", &AnalysisCache::Hits,
+           "Number of analyses which found their sparsity pattern in the cache.")
+      .def("misses", &AnalysisCache::Misses,
+           "Number of analyses which did not find their sparsity pattern in the cache.")
+      .def("clear", &AnalysisCache::Clear, "Remove all entries from the cache.");
+
   py::class_<Optimizerd>(module, "Optimizer",
                          "Class for optimizing a nonlinear least-squares problem specified as a "
                          "list of Factors. For efficient use, create once and call Optimize() "
                          "multiple times with different initial guesses, as long as the factors "
                          "remain constant and the structure of the Values is identical.")
-      .def(py::init<const optimizer_params_t&, const std::vector<Factord>&, const double,
-                    const std::string&, const std::vector<Key>&, bool, bool>(),
+      .def(py::init([](const optimizer_params_t& params, const std::vector<Factord>& factors,
+                       const double epsilon, const std::string& name, const std::vector<Key>& keys,
+                       const bool debug_stats, const bool check_derivatives,
+                       std::shared_ptr<AnalysisCache> analysis_cache) {
+             return std::make_unique<Optimizerd>(
+                 params, factors, epsilon, name, keys, debug_stats, check_derivatives,
+                 Optimizerd::NonlinearSolver::LinearSolver(), std::move(analysis_cache));
+           }),
            py::arg("params"), py::arg("factors"), py::arg("epsilon") = 1e-9,
            py::arg("name") = "sym::Optimize", py::arg("keys") = std::vector<Key>(),
-           py::arg("debug_stats") = false, py::arg("check_derivatives") = false)
+           py::arg("debug_stats") = false, py::arg("check_derivatives") = false,
+           py::arg("analysis_cache") = nullptr)
       .def("optimize", py::overload_cast<Valuesd*, int, bool>(&Optimizerd::Optimize),
-           py::arg("values"), py::arg("num_iterations") = -1,
-           py::arg("populate_best_linearization") = false, R"(
+           py::call_guard<py::gil_scoped_release>(), py::arg("values"),
+           py::arg("num_iterations") = -1, py::arg("populate_best_linearization") = false, R"(
               Optimize the given values in-place
               
               Args:
@@ -50,8 +77,8 @@ void AddOptimizerWrapper(pybind11::module_ module) {
            )")
       .def("optimize",
            py::overload_cast<Valuesd*, int, bool, OptimizationStatsd*>(&Optimizerd::Optimize),
-           py::arg("values"), py::arg("num_iterations"), py::arg("populate_best_linearization"),
-           py::arg("stats"), R"(
+           py::call_guard<py::gil_scoped_release>(), py::arg("values"), py::arg("num_iterations"),
+           py::arg("populate_best_linearization"), py::arg("stats"), R"(
               Optimize the given values in-place
               
               This overload takes the stats as an argument, and stores into there.  This allows users to
@@ -66,7 +93,8 @@ void AddOptimizerWrapper(pybind11::module_ module) {
                 stats: An OptimizationStats to fill out with the result - if filling out dynamically allocated fields here, will not reallocate if memory is already allocated in the required shape (e.g. for repeated calls to Optimize)
            )")
       .def("optimize", py::overload_cast<Valuesd*, int, OptimizationStatsd*>(&Optimizerd::Optimize),
-           py::arg("values"), py::arg("num_iterations"), py::arg("stats"), R"(
+           py::call_guard<py::gil_scoped_release>(), py::arg("values"), py::arg("num_iterations"),
+           py::arg("stats"), R"(
               Optimize the given values in-place
               
               This overload takes the stats as an argument, and stores into there.  This allows users to
@@ -79,7 +107,7 @@ void AddOptimizerWrapper(pybind11::module_ module) {
                 stats: An OptimizationStats to fill out with the result - if filling out dynamically allocated fields here, will not reallocate if memory is already allocated in the required shape (e.g. for repeated calls to Optimize)
            )")
       .def("optimize", py::overload_cast<Valuesd*, OptimizationStatsd*>(&Optimizerd::Optimize),
-           py::arg("values"), py::arg("stats"), R"(
+           py::call_guard<py::gil_scoped_release>(), py::arg("values"), py::arg("stats"), R"(
               Optimize the given values in-place
               
               This overload takes the stats as an argument, and stores into there.  This allows users to
@@ -89,8 +117,13 @@ void AddOptimizerWrapper(pybind11::module_ module) {
               Args:
                 stats: An OptimizationStats to fill out with the result - if filling out dynamically allocated fields here, will not reallocate if memory is already allocated in the required shape (e.g. for repeated calls to Optimize)
            )")
-      .def("linearize", &Optimizerd::Linearize, py::arg("values"),
-           "Linearize the problem around the given values.")
+      .def("linearize", &Optimizerd::Linearize, py::call_guard<py::gil_scoped_release>(),
+           py::arg("values"), py::arg("incremental") = false, R"(
+              Linearize the problem around the given values.
+
+              Args:
+                incremental: If true, only re-evaluate the factors touching keys whose values changed since the last linearization.  The first incremental linearization re-evaluates all of the factors
+           )")
       .def(
           "compute_all_covariances",
           [](Optimizerd& opt, const Linearizationd& linearization) {
@@ -142,9 +175,60 @@ void AddOptimizerWrapper(pybind11::module_ module) {
           py::arg("key"));
 
   // Wrapping free functions
-  module.def("optimize", &Optimize<double>, py::arg("params"), py::arg("factors"),
-             py::arg("values"), py::arg("epsilon") = 1e-9,
+  module.def("optimize", &Optimize<double>, py::call_guard<py::gil_scoped_release>(),
+             py::arg("params"), py::arg("factors"), py::arg("values"), py::arg("epsilon") = 1e-9,
              "Simple wrapper to make optimization one function call.");
+  module.def(
+      "optimize_batch",
+      [](const std::vector<Optimizerd*>& optimizers, const Valuesd& values_template,
+         const Eigen::Ref<const RowMajorMatrixXd>& initial_storage, const int num_iterations,
+         const bool populate_best_linearization) {
+        const index_t index = values_template.CreateIndex(values_template.Keys(
+            /* sort_by_offset */ true));
+        if (index.storage_dim != initial_storage.cols()) {
+          throw std::runtime_error(fmt::format(
+              "The number of columns of initial_storage [{}] must match the storage dimension of "
+              "values_template [{}]",
+              initial_storage.cols(), index.storage_dim));
+        }
+        if (optimizers.empty()) {
+          throw std::runtime_error("optimize_batch requires at least one optimizer");
+        }
+
+        std::vector<Valuesd> values(initial_storage.rows(), values_template);
+        for (int i = 0; i < initial_storage.rows(); ++i) {
+          values[i].Update(index, initial_storage.row(i).data());
+        }
+
+        std::vector<OptimizationStatsd> stats =
+            OptimizeBatch(optimizers, &values, num_iterations, populate_best_linearization);
+
+        RowMajorMatrixXd optimized_storage(initial_storage.rows(), initial_storage.cols());
+        for (int i = 0; i < initial_storage.rows(); ++i) {
+          values[i].FillStorage(index, optimized_storage.row(i).data());
+        }
+        return std::make_pair(std::move(optimized_storage), std::move(stats));
+      },
+      py::call_guard<py::gil_scoped_release>(), py::arg("optimizers"), py::arg("values_template"),
+      py::arg("initial_storage"), py::arg("num_iterations") = -1,
+      py::arg("populate_best_linearization") = false, R"(
+        Optimize a batch of independent problems with the same structure, in parallel with one
+        thread per optimizer.  The optimizers should all have the same factors.
+
+        Args:
+          optimizers: The optimizers to use, one per thread
+
+          values_template: A Values with the structure of each problem
+
+          initial_storage: The initial guess for each problem, one per row, as the storage of values_template in storage order (the order of keys(sort_by_offset=True))
+
+          num_iterations: If < 0 (the default), uses the number of iterations specified by the params of each optimizer
+
+          populate_best_linearization: If true, the linearization at the best values will be filled out in the stats
+
+        Returns:
+          The optimized storage for each problem, in the same layout as initial_storage, and the optimization stats for each problem
+      )");
   module.def("default_optimizer_params", &DefaultOptimizerParams,
              "Sensible default parameters for Optimizer.");
 }
@@ -11,6 +11,7 @@
 #include "./cc_logger.h"
 #include "./cc_optimization_stats.h"
 #include "./cc_optimizer.h"
+#include "./cc_tic_toc.h"
 #include "./cc_values.h"
 
 PYBIND11_MODULE(cc_sym, generated_module) {
@@ -25,4 +26,5 @@ PYBIND11_MODULE(cc_sym, generated_module) {
   sym::AddOptimizationStatsWrapper(generated_module);
   sym::AddOptimizerWrapper(generated_module);
   sym::AddLoggerWrapper(generated_module);
+  sym::AddTicTocWrapper(generated_module);
 }
@@ -38,10 +38,20 @@ __all__ = [
     "Linearization",
     "OptimizationStats",
     "Optimizer",
+    "SymbolicAnalysisCache",
+    "TicTocBlockStats",
     "Values",
     "default_optimizer_params",
+    "get_tic_toc_stats",
     "optimize",
+    "optimize_batch",
+    "reset_tic_toc",
     "set_log_level",
+    "set_tic_toc_enabled",
+    "set_tic_toc_trace_enabled",
+    "tic_toc_enabled",
+    "tic_toc_trace_enabled",
+    "write_tic_toc_chrome_trace",
 ]
 
 class Factor:
@@ -94,6 +104,43 @@ class Factor:
         """
         Get all keys required to evaluate this factor.
         """
+    @staticmethod
+    @typing.overload
+    def in_place(hessian_func: typing.Callable, keys: typing.List[Key], residual_dim: int) -> Factor:
+        """
+        Create a dense factor from a hessian function which writes its outputs in place, to
+        avoid allocating and copying the outputs on each linearization.
+
+        hessian_func is called as hessian_func(values, index_entries, residual, jacobian,
+        hessian, rhs), where the outputs are writable numpy arrays of shape (residual_dim,),
+        (residual_dim, tangent_dim), (tangent_dim, tangent_dim), and (tangent_dim,), which
+        view the storage of the linearized factor.  Outputs which are not needed for a given
+        linearization are None.  hessian_func should fill them in place (e.g.
+        `residual[:] = ...`), and must not keep references to the values or the outputs after
+        it returns.
+
+        Args:
+          keys: The set of input arguments, in order, accepted by func.
+          residual_dim: The dimension of the residual.
+
+
+
+        Create a dense factor from a hessian function which writes its outputs in place, see
+        above.
+
+        Args:
+          keys_to_func: The set of input arguments, in order, accepted by func.
+          keys_to_optimize: The set of input arguments that correspond to the derivative in func. Must be a subset of keys_to_func.
+          residual_dim: The dimension of the residual.
+        """
+    @staticmethod
+    @typing.overload
+    def in_place(
+        hessian_func: typing.Callable,
+        keys_to_func: typing.List[Key],
+        keys_to_optimize: typing.List[Key],
+        residual_dim: int,
+    ) -> Factor: ...
     def is_sparse(self) -> bool:
         """
         Does this factor use a sparse jacobian/hessian matrix?
@@ -328,6 +375,7 @@ class Optimizer:
         keys: typing.List[Key] = [],
         debug_stats: bool = False,
         check_derivatives: bool = False,
+        analysis_cache: typing.Optional[SymbolicAnalysisCache] = None,
     ) -> None: ...
     def compute_all_covariances(
         self, linearization: Linearization
@@ -361,9 +409,12 @@ class Optimizer:
         """
     def linearization_index(self) -> dict: ...
     def linearization_index_entry(self, key: Key) -> index_entry_t: ...
-    def linearize(self, values: Values) -> Linearization:
+    def linearize(self, values: Values, incremental: bool = False) -> Linearization:
         """
         Linearize the problem around the given values.
+
+        Args:
+          incremental: If true, only re-evaluate the factors touching keys whose values changed since the last linearization
         """
     @typing.overload
     def optimize(
@@ -437,6 +488,84 @@ class Optimizer:
         """
     pass
 
+class SymbolicAnalysisCache:
+    """
+    Cache of the symbolic analysis of the hessian (the variable ordering and elimination tree), keyed by its sparsity pattern, which may be shared between Optimizers with identical structure to only compute the analysis once.  Holds at most max_size sparsity patterns, evicting the least recently used.
+    """
+
+    def __init__(self, max_size: int = 64) -> None: ...
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+    def hits(self) -> int:
+        """
+        Number of analyses which found their sparsity pattern in the cache.
+        """
+    def max_size(self) -> int: ...
+    def misses(self) -> int:
+        """
+        Number of analyses which did not find their sparsity pattern in the cache.
+        """
+    def size(self) -> int:
+        """
+        Number of sparsity patterns in the cache.
+        """
+    pass
+
+class TicTocBlockStats:
+    """
+    Timing statistics for a block timed with SYM_TIME_SCOPE.
+    """
+
+    def __repr__(self) -> str: ...
+    @property
+    def average_time(self) -> float:
+        """
+        Average time in seconds.
+
+        :type: float
+        """
+    @property
+    def count(self) -> int:
+        """
+        :type: int
+        """
+    @property
+    def max_time(self) -> float:
+        """
+        Max time in seconds.
+
+        :type: float
+        """
+    @property
+    def min_time(self) -> float:
+        """
+        Min time in seconds.
+
+        :type: float
+        """
+    @property
+    def name(self) -> str:
+        """
+        :type: str
+        """
+    @property
+    def thread_index(self) -> int:
+        """
+        Index of the thread the block ran on, or -1 for the total over all threads.
+
+        :type: int
+        """
+    @property
+    def total_time(self) -> float:
+        """
+        Total time in seconds.
+
+        :type: float
+        """
+    pass
+
 class Values:
     """
     Efficient polymorphic data structure to store named types with a dict-like interface and
@@ -965,14 +1094,43 @@ class Values:
     @typing.overload
     def set(self, key: index_entry_t, value: numpy.ndarray) -> None: ...
     @typing.overload
+    def to_storage(self, index: index_t) -> numpy.ndarray:
+        """
+        Returns the storage of the keys given by this index as a flat array, in the order of the
+        index. Opposite of update(index, data).
+
+        Returns the storage of all keys as a flat array, in storage order (the order of
+        keys(sort_by_offset=True)). Opposite of update(data).
+        """
+    @typing.overload
+    def to_storage(self) -> numpy.ndarray: ...
+    @typing.overload
     def update(self, index: index_t, other: Values) -> None:
         """
         Efficiently update the keys given by this index from other into this. This purely copies slices of the data arrays, the index MUST be valid for both objects!
 
         Efficiently update the keys from a different structured Values, given by this index and other index. This purely copies slices of the data arrays. index_this MUST be valid for this object; index_other MUST be valid for other object.
+
+        Efficiently update the keys given by this index from a flat array of their storage, in
+        the order of the index. This purely copies slices of the array, the index MUST be valid
+        for this object!
+
+        Args:
+          index: Ordered list of keys in the data array
+          data: Storage of the keys - MUST be the size of index.storage_dim!
+
+        Efficiently update all keys from a flat array of their storage, in storage order (the
+        order of keys(sort_by_offset=True)). This avoids converting an index from Python.
+
+        Args:
+          data: Storage of all keys - MUST be the size of the storage of all keys!
         """
     @typing.overload
     def update(self, index_this: index_t, index_other: index_t, other: Values) -> None: ...
+    @typing.overload
+    def update(self, index: index_t, data: numpy.ndarray) -> None: ...
+    @typing.overload
+    def update(self, data: numpy.ndarray) -> None: ...
     def update_or_set(self, index: index_t, other: Values) -> None:
         """
         Update or add keys to this Values base on other Values of different structure.
@@ -987,6 +1145,11 @@ def default_optimizer_params() -> optimizer_params_t:
     Sensible default parameters for Optimizer.
     """
 
+def get_tic_toc_stats(per_thread: bool = False) -> typing.List[TicTocBlockStats]:
+    """
+    Get the stats of each block, sorted by name.  If per_thread is True, there is one entry for each block on each thread, otherwise one entry for each block with the total over all threads.
+    """
+
 def optimize(
     params: optimizer_params_t, factors: typing.List[Factor], values: Values, epsilon: float = 1e-09
 ) -> OptimizationStats:
@@ -994,5 +1157,61 @@ def optimize(
     Simple wrapper to make optimization one function call.
     """
 
+def optimize_batch(
+    optimizers: typing.List[Optimizer],
+    values_template: Values,
+    initial_storage: numpy.ndarray,
+    num_iterations: int = -1,
+    populate_best_linearization: bool = False,
+) -> typing.Tuple[numpy.ndarray, typing.List[OptimizationStats]]:
+    """
+    Optimize a batch of independent problems with the same structure, in parallel with one
+    thread per optimizer.  The optimizers should all have the same factors.
+
+    Args:
+      optimizers: The optimizers to use, one per thread
+
+      values_template: A Values with the structure of each problem
+
+      initial_storage: The initial guess for each problem, one per row, as the storage of values_template in storage order (the order of keys(sort_by_offset=True))
+
+      num_iterations: If < 0 (the default), uses the number of iterations specified by the params of each optimizer
+
+      populate_best_linearization: If true, the linearization at the best values will be filled out in the stats
+
+    Returns:
+      The optimized storage for each problem, in the same layout as initial_storage, and the optimization stats for each problem
+    """
+
+def reset_tic_toc() -> None:
+    """
+    Clear the stats and trace of all blocks.
+    """
+
 def set_log_level(arg0: str) -> None:
     pass
+
+def set_tic_toc_enabled(enabled: bool) -> None:
+    """
+    Start or stop timing blocks.  Enabled by default.
+    """
+
+def set_tic_toc_trace_enabled(trace_enabled: bool) -> None:
+    """
+    Start or stop recording every run of each block, for write_tic_toc_chrome_trace.  Uses memory proportional to the number of runs.  Disabled by default.
+    """
+
+def tic_toc_enabled() -> bool:
+    """
+    Whether blocks are being timed.
+    """
+
+def tic_toc_trace_enabled() -> bool:
+    """
+    Whether every run of each block is being recorded.
+    """
+
+def write_tic_toc_chrome_trace(path: str) -> None:
+    """
+    Write the recorded runs of each block to path, as JSON in the Chrome trace event format, which can be viewed with chrome://tracing or Perfetto.
+    """
@@ -0,0 +1,79 @@
+/* ----------------------------------------------------------------------------
+ * SymForce - Copyright 2022, Skydio, Inc.
+ * This source code is under the Apache 2.0 license found in the LICENSE file.
+ * ---------------------------------------------------------------------------- */
+
+#include "./cc_tic_toc.h"
+
+#include <fstream>
+
+#include <fmt/format.h>
+#include <pybind11/stl.h>
+
+#include <symforce/opt/internal/tic_toc.h>
+
+namespace py = pybind11;
+
+namespace sym {
+
+void AddTicTocWrapper(pybind11::module_ module) {
+  py::class_<internal::TicTocBlockStats>(module, "TicTocBlockStats",
+                                         "Timing statistics for a block timed with SYM_TIME_SCOPE.")
+      .def_readonly("name", &internal::TicTocBlockStats::name)
+      .def_readonly("thread_index", &internal::TicTocBlockStats::thread_index,
+                    "Index of the thread the block ran on, or -1 for the total over all threads.")
+      .def_readonly("count", &internal::TicTocBlockStats::count)
+      .def_readonly("total_time", &internal::TicTocBlockStats::total_time, "Total time in seconds.")
+      .def_readonly("average_time", &internal::TicTocBlockStats::average_time,
+                    "Average time in seconds.")
+      .def_readonly("min_time", &internal::TicTocBlockStats::min_time, "Min time in seconds.")
+      .def_readonly("max_time", &internal::TicTocBlockStats::max_time, "Max time in seconds.")
+      .def("__repr__", [](const internal::TicTocBlockStats& stats) {
+        return fmt::format(
+            "<TicTocBlockStats name={}, thread_index={}, count={}, total_time={}, "
+            "average_time={}, min_time={}, max_time={}>",
+            stats.name, stats.thread_index, stats.count, stats.total_time, stats.average_time,
+            stats.min_time, stats.max_time);
+      });
+
+  module.def(
+      "set_tic_toc_enabled",
+      [](const bool enabled) { internal::GetTicTocManager().SetEnabled(enabled); },
+      py::arg("enabled"), "Start or stop timing blocks.  Enabled by default.");
+  module.def(
+      "tic_toc_enabled", []() { return internal::GetTicTocManager().Enabled(); },
+      "Whether blocks are being timed.");
+  module.def(
+      "set_tic_toc_trace_enabled",
+      [](const bool trace_enabled) { internal::GetTicTocManager().SetTraceEnabled(trace_enabled); },
+      py::arg("trace_enabled"),
+      "Start or stop recording every run of each block, for write_tic_toc_chrome_trace.  Uses "
+      "memory proportional to the number of runs.  Disabled by default.");
+  module.def(
+      "tic_toc_trace_enabled", []() { return internal::GetTicTocManager().TraceEnabled(); },
+      "Whether every run of each block is being recorded.");
+  module.def(
+      "reset_tic_toc", []() { internal::GetTicTocManager().Reset(); },
+      "Clear the stats and trace of all blocks.");
+  module.def(
+      "get_tic_toc_stats",
+      [](const bool per_thread) { return internal::GetTicTocManager().GetStats(per_thread); },
+      py::arg("per_thread") = false,
+      "Get the stats of each block, sorted by name.  If per_thread is True, there is one entry for "
+      "each block on each thread, otherwise one entry for each block with the total over all "
+      "threads.");
+  module.def(
+      "write_tic_toc_chrome_trace",
+      [](const std::string& path) {
+        std::ofstream out(path);
+        if (!out) {
+          throw std::runtime_error(fmt::format("Could not open {} for writing", path));
+        }
+        internal::GetTicTocManager().WriteChromeTrace(out);
+      },
+      py::arg("path"),
+      "Write the recorded runs of each block to path, as JSON in the Chrome trace event format, "
+      "which can be viewed with chrome://tracing or Perfetto.");
+}
+
+}  // namespace sym
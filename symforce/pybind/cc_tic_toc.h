@@ -0,0 +1,18 @@
+/* ----------------------------------------------------------------------------
+ * SymForce - Copyright 2022, Skydio, Inc.
+ * This source code is under the Apache 2.0 license found in the LICENSE file.
+ * ---------------------------------------------------------------------------- */
+
+#pragma once
+
+#include <pybind11/pybind11.h>
+
+namespace sym {
+
+/**
+ * Add bindings for the tic-toc timers used by SYM_TIME_SCOPE, i.e. functions to enable, disable,
+ * and reset collection, fetch the stats of each block, and write a trace of the blocks
+ */
+void AddTicTocWrapper(pybind11::module_ module);
+
+}  // namespace sym
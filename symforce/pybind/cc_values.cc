@@ -93,6 +93,28 @@ py::object ValuesAt(const sym::Valuesd& v, const sym::Key& key) {
   return ValuesAtIndexEntry(v, index_entry);
 }
 
+/**
+ * Calls v.Update(index, data.data()), after checking that data is the size of the index.
+ */
+void UpdateFromArray(sym::Valuesd& v, const sym::index_t& index,
+                     const Eigen::Ref<const Eigen::VectorXd>& data) {
+  if (index.storage_dim != data.size()) {
+    throw std::runtime_error(
+        fmt::format("The length of data [{}] must match index.storage_dim [{}]", data.size(),
+                    index.storage_dim));
+  }
+  v.Update(index, data.data());
+}
+
+/**
+ * Returns the storage of the keys in index as a flat array, see Valuesd::FillStorage.
+ */
+Eigen::VectorXd ToArray(const sym::Valuesd& v, const sym::index_t& index) {
+  Eigen::VectorXd data(index.storage_dim);
+  v.FillStorage(index, data.data());
+  return data;
+}
+
 /**
  * Registers the set methods of Valuesd with a python wrapper of the class for the template
  * specializations of T.
@@ -218,6 +240,47 @@ void AddValuesWrapper(pybind11::module_ module) {
            "Efficiently update the keys from a different structured Values, given by this index "
            "and other index. This purely copies slices of the data arrays. index_this MUST be "
            "valid for this object; index_other MUST be valid for other object.")
+      .def(
+          "update",
+          [](sym::Valuesd& v, const sym::index_t& index,
+             const Eigen::Ref<const Eigen::VectorXd>& data) { UpdateFromArray(v, index, data); },
+          py::arg("index"), py::arg("data"), R"(
+            Efficiently update the keys given by this index from a flat array of their storage, in
+            the order of the index. This purely copies slices of the array, the index MUST be valid
+            for this object!
+
+            Args:
+              index: Ordered list of keys in the data array
+              data: Storage of the keys - MUST be the size of index.storage_dim!
+          )")
+      .def(
+          "update",
+          [](sym::Valuesd& v, const Eigen::Ref<const Eigen::VectorXd>& data) {
+            UpdateFromArray(v, v.CreateIndex(v.Keys(/* sort_by_offset */ true)), data);
+          },
+          py::arg("data"), R"(
+            Efficiently update all keys from a flat array of their storage, in storage order (the
+            order of keys(sort_by_offset=True)). This avoids converting an index from Python.
+
+            Args:
+              data: Storage of all keys - MUST be the size of the storage of all keys!
+          )")
+      .def(
+          "to_storage",
+          [](const sym::Valuesd& v, const sym::index_t& index) { return ToArray(v, index); },
+          py::arg("index"), R"(
+            Returns the storage of the keys given by this index as a flat array, in the order of the
+            index. Opposite of update(index, data).
+          )")
+      .def(
+          "to_storage",
+          [](const sym::Valuesd& v) {
+            return ToArray(v, v.CreateIndex(v.Keys(/* sort_by_offset */ true)));
+          },
+          R"(
+            Returns the storage of all keys as a flat array, in storage order (the order of
+            keys(sort_by_offset=True)). Opposite of update(data).
+          )")
       .def(
           "retract",
           [](sym::Valuesd& v, const sym::index_t& index, const std::vector<double>& delta,
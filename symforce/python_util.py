@@ -7,7 +7,9 @@
 General python utilities.
 """
 import functools
+import hashlib
 import inspect
+import multiprocessing
 import numpy as np
 import os
 import random
@@ -37,6 +39,32 @@ def remove_if_exists(path: T.Openable) -> None:
         os.remove(path)
 
 
+def write_if_changed(path: T.Openable, contents: str) -> bool:
+    """
+    Write contents to the file at path, creating its directory if needed, unless the file already
+    has exactly these contents.  Leaving unchanged files alone preserves their modification times,
+    so build systems don't rebuild anything that depends on them.
+
+    Returns:
+        True if the file was written
+    """
+    try:
+        with open(path) as f:
+            if f.read() == contents:
+                logger.debug(f"Unchanged: {path}")
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w") as f:
+        f.write(contents)
+    return True
+
+
 def execute_subprocess(
     cmd: T.Union[str, T.Sequence[str]],
     stdin_data: T.Optional[str] = None,
@@ -86,6 +114,43 @@ def execute_subprocess(
     return stdout_decoded
 
 
+# The function and items of the forked_map call being run in this process's workers
+_forked_map_args: T.Optional[T.Tuple[T.Callable, T.Sequence]] = None
+
+
+def _forked_map_at_index(index: int) -> T.Any:
+    assert _forked_map_args is not None
+    func, items = _forked_map_args
+    return func(items[index])
+
+
+def forked_map(func: T.Callable[[T.Any], T.Any], items: T.Sequence, jobs: int) -> T.List:
+    """
+    Returns [func(item) for item in items], evaluated in up to jobs forked processes.
+
+    Unlike multiprocessing.Pool.map, func and items don't need to be picklable (symbolic
+    expressions often aren't), since the workers inherit them when forked; only the results are
+    pickled.  The items are evaluated serially in this process if jobs is 1, if fork is not
+    available, or if this is already a worker process.
+    """
+    global _forked_map_args  # pylint: disable=global-statement
+
+    jobs = min(jobs, len(items))
+    if (
+        jobs <= 1
+        or "fork" not in multiprocessing.get_all_start_methods()
+        or multiprocessing.current_process().daemon
+    ):
+        return [func(item) for item in items]
+
+    _forked_map_args = (func, items)
+    try:
+        with multiprocessing.get_context("fork").Pool(jobs) as pool:
+            return pool.map(_forked_map_at_index, range(len(items)), chunksize=1)
+    finally:
+        _forked_map_args = None
+
+
 def camelcase_to_snakecase(s: str) -> str:
     """
     Convert CamelCase -> snake_case.
@@ -163,6 +228,30 @@ def files_in_dir(dirname: T.Openable, relative: bool = False) -> T.Iterator[str]
                 yield abspath
 
 
+def files_hash(dirname: T.Openable, suffixes: T.Iterable[str]) -> str:
+    """
+    Returns a hex digest of the relative paths and contents of the files in the given directory
+    (recursively) ending in one of suffixes, to detect changes to them (e.g. to invalidate cached
+    outputs generated from them).
+
+    The result is cached, so changes to the files after the first call for a directory are not
+    detected.
+    """
+    return _files_hash(os.path.abspath(dirname), tuple(suffixes))
+
+
+@functools.lru_cache
+def _files_hash(dirname: str, suffixes: T.Tuple[str, ...]) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(files_in_dir(dirname, relative=True)):
+        if not path.endswith(suffixes):
+            continue
+        digest.update(path.encode())
+        with open(os.path.join(dirname, path), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
 def id_generator(size: int = 6, chars: str = string.ascii_uppercase + string.digits) -> str:
     """
     Generate a random string within a character set - for example "6U1S75".
@@ -35,6 +35,7 @@ class SymforceTestCaseMixin(unittest.TestCase):
     KEEP_PATHS = [
         r".*/__pycache__/.*",
         r".*\.pyc",
+        r"(.*/)?\.symforce_codegen_manifest\.json",
     ]
 
     def __init__(self, methodName: str = "runTest") -> None:
@@ -164,13 +165,7 @@ class SymforceTestCaseMixin(unittest.TestCase):
         """
         if SymforceTestCaseMixin.UPDATE:
             logger.debug(f'Updating data at: "{path}"')
-
-            dirname = os.path.dirname(path)
-            if dirname and not os.path.exists(dirname):
-                os.makedirs(dirname)
-
-            with open(path, "w") as f:
-                f.write(data)
+            python_util.write_if_changed(path, data)
         else:
             logger.debug(f'Comparing data at: "{path}"')
             with open(path) as f:
@@ -9,6 +9,7 @@ import collections
 import contextlib
 import copy
 import dataclasses
+import functools
 import numpy as np
 
 from symforce import geo
@@ -21,6 +22,24 @@ from .attr_accessor import AttrAccessor
 from .index_entry import IndexEntry
 
 
+@functools.lru_cache(maxsize=1 << 17)
+def _parse_key_part(part: str) -> T.Tuple[str, T.Tuple[int, ...]]:
+    """
+    Parse one dot-separated part of a key, such as "f[1][0]", into its base name and indices.
+
+    Cached, since the same keys are typically looked up many times (e.g. once per factor per
+    optimizer construction), and parsing dominates the cost of a lookup.
+
+    Raises:
+        InvalidKeyError: If the part is not of the form base[i][j]...
+        InvalidPythonIdentifierError: If the base name is not a valid identifier
+    """
+    base, indices = python_util.base_and_indices(part)
+    if not base.isidentifier():
+        raise python_util.InvalidPythonIdentifierError(base)
+    return base, tuple(indices)
+
+
 class Values(T.MutableMapping[str, T.Any]):
     """
     Ordered dictionary serializable storage. This class is the basis for specifying both inputs
@@ -526,7 +545,10 @@ class Values(T.MutableMapping[str, T.Any]):
     # -------------------------------------------------------------------------
 
     def _get_subvalues_key_and_indices(
-        self, key: str, create: bool = False
+        self,
+        key: str,
+        create: bool = False,
+        subvalues_cache: T.Optional[T.Dict[str, Values]] = None,
     ) -> T.Tuple[Values, str, T.List[int]]:
         """
         Given a key, compute the full key name by applying name scopes, and find
@@ -545,6 +567,9 @@ class Values(T.MutableMapping[str, T.Any]):
         Args:
             key (str):
             create (bool): If True, create inner Values along the way
+            subvalues_cache: If given, a map from the full path of inner Values (the full key
+                without its last part) to the inner Values, used to skip walking the path for
+                keys which share a path, and updated with the path of key
 
         Returns:
             Values: Innermost sub-values containing key
@@ -552,44 +577,50 @@ class Values(T.MutableMapping[str, T.Any]):
             T.List[int]: The indices used to index into the key's value
         """
         # Prepend the key scopes if not the latest symbol scopes already
-        key_scope_is_subset = sf.__scopes__[-len(self.__scopes__) :] == self.__scopes__
-        if len(sf.__scopes__) > len(self.__scopes__) and key_scope_is_subset:
+        if not self.__scopes__:
+            full_key = key
+        elif (
+            len(sf.__scopes__) > len(self.__scopes__)
+            and sf.__scopes__[-len(self.__scopes__) :] == self.__scopes__
+        ):
             full_key = key
         else:
             full_key = ".".join(self.__scopes__ + [key])
 
-        split_key = full_key.split(".")
-        *key_path, key_name = split_key
-
-        values = self
-        for i, part in enumerate(key_path):
-            base, indices = python_util.base_and_indices(part)
-            if not base.isidentifier():
-                raise python_util.InvalidPythonIdentifierError(base)
-            if base not in values.dict:
-                if not create:
-                    # Returning an empty Values causes methods that don't mutate (e.g. __getitem__)
-                    # to raise
-                    return Values(), key_name, []
+        key_path, separator, key_name = full_key.rpartition(".")
 
+        if subvalues_cache is not None and key_path in subvalues_cache:
+            values = subvalues_cache[key_path]
+        else:
+            values = self
+            split_key_path = key_path.split(".") if separator else []
+            for i, part in enumerate(split_key_path):
+                base, indices = _parse_key_part(part)
+                if base not in values.dict:
+                    if not create:
+                        # Returning an empty Values causes methods that don't mutate (e.g.
+                        # __getitem__) to raise
+                        return Values(), key_name, []
+
+                    if indices:
+                        values.dict[base] = []
+                    else:
+                        values.dict[base] = Values()
+
+                item = values.dict[base]
                 if indices:
-                    values.dict[base] = []
-                else:
-                    values.dict[base] = Values()
+                    item = self._recurse_into_sequence(item, indices, create=create)
 
-            item = values.dict[base]
-            if indices:
-                item = self._recurse_into_sequence(item, indices, create=create)
+                values = item
+                assert isinstance(values, Values), 'Cannot set "{}", "{}" not a Values!'.format(
+                    full_key, ".".join(split_key_path[: i + 1])
+                )
 
-            values = item
-            assert isinstance(values, Values), 'Cannot set "{}", "{}" not a Values!'.format(
-                full_key, ".".join(split_key[: i + 1])
-            )
+            if subvalues_cache is not None:
+                subvalues_cache[key_path] = values
 
-        key_name_base, key_name_indices = python_util.base_and_indices(key_name)
-        if not key_name_base.isidentifier():
-            raise python_util.InvalidPythonIdentifierError(key_name_base)
-        return values, key_name_base, key_name_indices
+        key_name_base, key_name_indices = _parse_key_part(key_name)
+        return values, key_name_base, list(key_name_indices)
 
     @staticmethod
     def _recurse_into_sequence(
@@ -666,6 +697,13 @@ class Values(T.MutableMapping[str, T.Any]):
 
     def __getitem__(self, key: str) -> T.Any:
         values, key_name, indices = self._get_subvalues_key_and_indices(key)
+        return self._get_item(values, key, key_name, indices)
+
+    @staticmethod
+    def _get_item(values: Values, key: str, key_name: str, indices: T.List[int]) -> T.Any:
+        """
+        Get the entry key_name[indices...] in values, where key is the full key for error messages
+        """
         try:
             item = values.dict[key_name]
         except KeyError as ex:
@@ -685,13 +723,20 @@ class Values(T.MutableMapping[str, T.Any]):
         6 to the `foo` list if it previosly had length 1.
         """
         values, key_name, indices = self._get_subvalues_key_and_indices(key, create=True)
+        self._set_item(values, key_name, indices, value)
+
+    @classmethod
+    def _set_item(cls, values: Values, key_name: str, indices: T.List[int], value: T.Any) -> None:
+        """
+        Set the entry key_name[indices...] in values, see __setitem__
+        """
         if not indices:
             values.dict[key_name] = value
         else:
             if key_name not in values.dict:
                 values.dict[key_name] = []
             item = values.dict[key_name]
-            self._recurse_into_sequence(
+            cls._recurse_into_sequence(
                 item, indices, create=True, should_set=True, set_target=value
             )
 
@@ -724,6 +769,60 @@ class Values(T.MutableMapping[str, T.Any]):
                 return False
             return True
 
+    def get_many(self, keys: T.Iterable[str]) -> T.List[T.Any]:
+        """
+        Get the entries for many keys at once, equivalent to `[self[key] for key in keys]`.
+
+        Keys which share a path (e.g. `states.x0` and `states.x1`) only walk that path once, which
+        makes this faster than indexing repeatedly for large numbers of nested keys.
+
+        Raises:
+            KeyError: If any of the keys is not present
+        """
+        subvalues_cache: T.Dict[str, Values] = {}
+        items = []
+        for key in keys:
+            values, key_name, indices = self._get_subvalues_key_and_indices(
+                key, subvalues_cache=subvalues_cache
+            )
+            items.append(self._get_item(values, key, key_name, indices))
+        return items
+
+    def set_many(
+        self, items: T.Union[T.Mapping[str, T.Any], T.Iterable[T.Tuple[str, T.Any]]]
+    ) -> None:
+        """
+        Set the entries for many keys at once, in order, equivalent to `self[key] = value` for each
+        (key, value) in items.
+
+        Like get_many, keys which share a path only walk that path once.
+
+        Args:
+            items: Mapping from keys to values, or iterable of (key, value) pairs
+        """
+        if isinstance(items, T.Mapping):
+            items = items.items()
+
+        subvalues_cache: T.Dict[str, Values] = {}
+        for key, value in items:
+            values, key_name, indices = self._get_subvalues_key_and_indices(
+                key, create=True, subvalues_cache=subvalues_cache
+            )
+
+            # Cached paths only go through existing Values and sequences, so they're only
+            # invalidated if one of those is replaced
+            replaced = values.dict.get(key_name)
+            if indices:
+                try:
+                    for i in indices:
+                        replaced = replaced[i]
+                except (IndexError, TypeError):
+                    replaced = None
+            if isinstance(replaced, (Values, list, tuple)):
+                subvalues_cache.clear()
+
+            self._set_item(values, key_name, indices, value)
+
     # -------------------------------------------------------------------------
     # Name scope management
     # -------------------------------------------------------------------------
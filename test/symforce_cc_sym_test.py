@@ -342,6 +342,29 @@ class SymforceCCSymTest(TestCase):
             self.assertEqual(values_1.at(key_b), 4)
             self.assertEqual(values_1.at(key_c), 5)
 
+        with self.subTest(msg="Test Values.update (array overloads) and Values.to_storage"):
+            key_a = cc_sym.Key("a")
+            key_b = cc_sym.Key("b")
+
+            values = cc_sym.Values()
+            values.set(key_a, 1)
+            values.set(key_b, sym.Rot3())
+
+            index = values.create_index([key_b, key_a])
+            np.testing.assert_array_equal(values.to_storage(index), [0, 0, 0, 1, 1])
+            np.testing.assert_array_equal(values.to_storage(), [1, 0, 0, 0, 1])
+
+            values.update(index, np.array([0, 0, 1, 0, 2.0]))
+            self.assertEqual(values.at(key_a), 2)
+            self.assertEqual(values.at(key_b), sym.Rot3([0, 0, 1, 0]))
+
+            values.update(np.array([3, 0, 1, 0, 0.0]))
+            self.assertEqual(values.at(key_a), 3)
+            self.assertEqual(values.at(key_b), sym.Rot3([0, 1, 0, 0]))
+
+            with self.assertRaises(RuntimeError):
+                values.update(index, np.zeros(4))
+
         with self.subTest(msg="Test that Values.retract works roughly"):
             a = cc_sym.Key("a")
             values_1 = cc_sym.Values()
@@ -559,6 +582,64 @@ class SymforceCCSymTest(TestCase):
             with self.assertRaises(ValueError):
                 dense_factor_sparse_jacobian.linearize(pi_values)
 
+        with self.subTest(msg="Test that Factor.in_place fills the linearized factor in place"):
+            pi_values = cc_sym.Values()
+            pi_values.set(pi_key, 3.0)
+            other_key = cc_sym.Key("o")
+            pi_values.set(other_key, 1.0)
+
+            calls = []
+
+            def in_place_pi_hessian(
+                values: cc_sym.Values,
+                index_entries: T.List[index_entry_t],
+                residual: T.Optional[np.ndarray],
+                jacobian: T.Optional[np.ndarray],
+                hessian: T.Optional[np.ndarray],
+                rhs: T.Optional[np.ndarray],
+            ) -> None:
+                calls.append([output is None for output in (residual, jacobian, hessian, rhs)])
+                outputs = SymforceCCSymTest.pi_residual(values.at(index_entries[0]))
+                for output, value in zip((residual, jacobian, hessian, rhs), outputs):
+                    if output is not None:
+                        output[...] = np.reshape(value, output.shape)
+
+            in_place_factors = [
+                cc_sym.Factor.in_place(
+                    hessian_func=in_place_pi_hessian, keys=[pi_key], residual_dim=1
+                ),
+                cc_sym.Factor.in_place(
+                    hessian_func=in_place_pi_hessian,
+                    keys_to_func=[pi_key, other_key],
+                    keys_to_optimize=[pi_key],
+                    residual_dim=1,
+                ),
+            ]
+            for factor in in_place_factors:
+                self.assertFalse(factor.is_sparse())
+
+                linearized_factor = factor.linearized_factor(pi_values)
+                expected_linearized_factor = pi_factor.linearized_factor(pi_values)
+                for field in ("residual", "jacobian", "hessian", "rhs"):
+                    np.testing.assert_array_equal(
+                        getattr(linearized_factor, field),
+                        getattr(expected_linearized_factor, field),
+                    )
+
+                residual, jacobian = factor.linearize(pi_values)
+                self.assertEqual(residual.shape, (1,))
+                self.assertEqual(jacobian.shape, (1, 1))
+
+            self.assertEqual(
+                calls,
+                [
+                    [False, False, False, False],
+                    [False, False, True, True],
+                    [False, False, False, False],
+                    [False, False, True, True],
+                ],
+            )
+
         with self.subTest(msg="Test that Factor.all_keys and optimized_keys are wrapped"):
             self.assertEqual(pi_factor.all_keys(), [pi_key])
             self.assertEqual(pi_factor.optimized_keys(), [pi_key])
@@ -814,6 +895,61 @@ class SymforceCCSymTest(TestCase):
                 opt.compute_covariances(linearization=opt.linearize(values), keys=[pi_key]), dict
             )
 
+        with self.subTest(msg="Optimizer.compute_covariances reuses its solver"):
+            center_key = cc_sym.Key("c")
+            leaf_keys = [cc_sym.Key("l", i) for i in range(3)]
+
+            def quadratic_factor(keys: T.List[cc_sym.Key], weights: T.List[float]) -> cc_sym.Factor:
+                """
+                Factor with residual r(x) = y + y^2 / 2, with y = weights^T x
+                """
+                w = np.array(weights, dtype=float)
+
+                def hessian_func(
+                    values: cc_sym.Values, index_entries: T.Sequence[index_entry_t]
+                ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+                    y = w @ np.array([values.at(entry) for entry in index_entries])
+                    residual = np.array([y + y ** 2 / 2])
+                    jacobian = ((1 + y) * w)[np.newaxis, :]
+                    return residual, jacobian, jacobian.T @ jacobian, jacobian.T @ residual
+
+                return cc_sym.Factor(hessian_func=hessian_func, keys=keys)
+
+            star_factors = [quadratic_factor([center_key], [1.0])]
+            for i, leaf_key in enumerate(leaf_keys):
+                star_factors.append(quadratic_factor([leaf_key], [0.5 + i]))
+                star_factors.append(quadratic_factor([center_key, leaf_key], [1.0, -1.0 - i]))
+
+            def make_star_opt() -> cc_sym.Optimizer:
+                return cc_sym.Optimizer(
+                    params=cc_sym.default_optimizer_params(),
+                    factors=star_factors,
+                    keys=[center_key] + leaf_keys,
+                )
+
+            def star_values(x: float) -> cc_sym.Values:
+                values = cc_sym.Values()
+                for i, key in enumerate([center_key] + leaf_keys):
+                    values.set(key, x * (i + 1))
+                return values
+
+            opt = make_star_opt()
+            for x in (0.1, 0.3):
+                linearization = opt.linearize(star_values(x))
+                covariance = opt.compute_covariances(linearization, keys=[center_key])[center_key]
+
+                fresh_opt = make_star_opt()
+                np.testing.assert_array_equal(
+                    covariance,
+                    fresh_opt.compute_covariances(
+                        fresh_opt.linearize(star_values(x)), keys=[center_key]
+                    )[center_key],
+                )
+
+                hessian_lower = linearization.hessian_lower.toarray()
+                hessian = hessian_lower + np.tril(hessian_lower, -1).T
+                self.assertAlmostEqual(covariance[0, 0], np.linalg.inv(hessian)[0, 0], places=6)
+
         with self.subTest(msg="Optimzer.keys is wrapped"):
             opt = make_opt()
             self.assertEqual(opt.keys(), [pi_key])
@@ -14,6 +14,7 @@ import sys
 import os
 from pathlib import Path
 import unittest
+from unittest import mock
 
 import symforce
 from symforce import logger
@@ -25,6 +26,7 @@ from symforce import codegen
 from symforce.codegen import geo_package_codegen
 from symforce.codegen import codegen_util
 from symforce.codegen import template_util
+from symforce.codegen.lcm_types_cache import LcmTypesCache
 from symforce.test_util import TestCase, slow_on_sympy, symengine_only
 from symforce.values import Values
 
@@ -306,11 +308,135 @@ class SymforceCodegenTest(TestCase):
             "sym", numba_test_func_codegen_data.function_dir
         )
 
-        x = np.array([1, 2, 3])
+        x = np.array([1.0, 2.0, 3.0])
         y = gen_module.numba_test_func(x)
         self.assertTrue((y == np.array([1, 2])).all())
         self.assertTrue(hasattr(gen_module.numba_test_func, "__numba__"))
 
+        # The batch function evaluates each row of its inputs
+        xs = np.arange(12, dtype=float).reshape(4, 3)
+        ys = gen_module.numba_test_func_batch(xs)
+        np.testing.assert_array_equal(ys, xs[:, :2])
+
+        with self.assertRaises(ValueError):
+            codegen.Codegen(
+                inputs=Values(x=sf.Symbol("x")),
+                outputs=Values(out=sf.V2(sf.Symbol("x"), 0)),
+                config=codegen.PythonConfig(use_numba=True),
+                sparse_matrices=["out"],
+            )
+
+    def test_function_codegen_python_vectorized(self) -> None:
+        """
+        Check that a vectorized function evaluated over N inputs at once matches the scalar
+        function evaluated on each input
+        """
+        output_dir = self.make_output_dir("sf_codegen_vectorized_")
+
+        az_el_codegen = codegen.Codegen.function(
+            func=az_el_from_point, config=codegen.PythonConfig()
+        ).with_linearization(which_args=["nav_T_cam", "nav_t_point"])
+        az_el_codegen_data = az_el_codegen.generate_function(output_dir, namespace="scalar")
+        scalar_func = getattr(
+            codegen_util.load_generated_package("scalar", az_el_codegen_data.function_dir),
+            az_el_codegen.name,
+        )
+
+        vectorized_codegen = codegen.Codegen.function(
+            func=az_el_from_point, config=codegen.PythonConfig(vectorized=True)
+        ).with_linearization(which_args=["nav_T_cam", "nav_t_point"])
+        vectorized_codegen_data = vectorized_codegen.generate_function(
+            output_dir, namespace="vectorized"
+        )
+        vectorized_func = getattr(
+            codegen_util.load_generated_package("vectorized", vectorized_codegen_data.function_dir),
+            vectorized_codegen.name,
+        )
+
+        num_rows = 20
+        rng = np.random.default_rng(seed=42)
+        poses = [sf.Pose3.from_tangent(rng.normal(size=6)) for _ in range(num_rows)]
+        points = rng.normal(size=(num_rows, 3))
+
+        import sym
+
+        outputs = vectorized_func(
+            np.array([pose.to_storage() for pose in poses], dtype=float),
+            points,
+            sf.numeric_epsilon,
+        )
+        self.assertEqual(
+            [output.shape for output in outputs],
+            [(num_rows, 2), (num_rows, 2, 9), (num_rows, 9, 9), (num_rows, 9)],
+        )
+
+        for i in range(num_rows):
+            expected = scalar_func(
+                sym.Pose3.from_storage(poses[i].to_storage()), points[i], sf.numeric_epsilon
+            )
+            for output, expected_output in zip(outputs, expected):
+                self.assertStorageNear(output[i], np.reshape(expected_output, output[i].shape))
+
+        with self.assertRaises(ValueError):
+            codegen.Codegen(
+                inputs=Values(x=sf.Symbol("x")),
+                outputs=Values(out=sf.V2(sf.Symbol("x"), 0)),
+                config=codegen.PythonConfig(vectorized=True),
+                sparse_matrices=["out"],
+            )
+
+        with self.assertRaises(ValueError):
+            codegen.PythonConfig(vectorized=True, use_numba=True)
+
+    def test_function_codegen_python_outputs_in_place(self) -> None:
+        """
+        Check that a function which writes its outputs in place matches the function returning
+        its outputs, and skips outputs passed as None
+        """
+        output_dir = self.make_output_dir("sf_codegen_outputs_in_place_")
+
+        def load(config: codegen.PythonConfig, namespace: str) -> T.Callable:
+            az_el_codegen = codegen.Codegen.function(
+                func=az_el_from_point, config=config
+            ).with_linearization(which_args=["nav_T_cam", "nav_t_point"])
+            az_el_codegen_data = az_el_codegen.generate_function(output_dir, namespace=namespace)
+            return getattr(
+                codegen_util.load_generated_package(namespace, az_el_codegen_data.function_dir),
+                az_el_codegen.name,
+            )
+
+        returning_func = load(codegen.PythonConfig(), "returning")
+        in_place_func = load(codegen.PythonConfig(outputs_in_place=True), "in_place")
+
+        import sym
+
+        nav_T_cam = sym.Pose3.from_storage(
+            sf.Pose3.from_tangent(np.random.default_rng(42).normal(size=6)).to_storage()
+        )
+        nav_t_point = [1.0, 2.0, 3.0]
+        expected = returning_func(nav_T_cam, nav_t_point, sf.numeric_epsilon)
+
+        # Column-major outputs, like the storage of C++ matrices
+        residual = np.full(2, np.nan)
+        jacobian = np.full((2, 9), np.nan, order="F")
+        rhs = np.full(9, np.nan)
+        self.assertIsNone(
+            in_place_func(nav_T_cam, nav_t_point, sf.numeric_epsilon, residual, jacobian, None, rhs)
+        )
+        for output, expected_output in zip((residual, jacobian, rhs), expected[:2] + expected[3:]):
+            self.assertStorageNear(output, np.reshape(expected_output, output.shape))
+
+        with self.assertRaises(ValueError):
+            codegen.Codegen.function(
+                func=lambda x: x,
+                input_types=[sf.Symbol],
+                config=codegen.PythonConfig(outputs_in_place=True),
+                name="scalar_out",
+            )
+
+        with self.assertRaises(ValueError):
+            codegen.PythonConfig(outputs_in_place=True, vectorized=True)
+
     # -------------------------------------------------------------------------
     # C++
     # -------------------------------------------------------------------------
@@ -352,6 +478,68 @@ class SymforceCodegenTest(TestCase):
         output_function = az_el_codegen_data.function_dir / "az_el_from_point.h"
         self.compare_or_update_file(expected_code_file, output_function)
 
+    def test_function_codegen_incremental(self) -> None:
+        """
+        Tests that generating a function with incremental=True is skipped when it is up to date,
+        and that only files whose contents change are rewritten
+        """
+        output_dir = self.make_output_dir("sf_codegen_incremental_")
+
+        def generate(func: T.Callable) -> codegen.GeneratedPaths:
+            return codegen.Codegen.function(
+                func=func, name="incremental_test_func", config=codegen.PythonConfig()
+            ).generate_function(output_dir=output_dir, incremental=True)
+
+        def mtimes(paths: codegen.GeneratedPaths) -> T.Dict[Path, int]:
+            return {path: path.stat().st_mtime_ns for path in paths.generated_files}
+
+        data = generate(az_el_from_point)
+        original_mtimes = mtimes(data)
+        self.assertEqual(
+            set(original_mtimes),
+            {data.function_dir / "incremental_test_func.py", data.function_dir / "__init__.py"},
+        )
+
+        with self.subTest(msg="Up to date functions are not regenerated"):
+            with mock.patch.object(
+                template_util.TemplateList, "render", side_effect=AssertionError
+            ):
+                skipped_data = generate(az_el_from_point)
+            self.assertEqual(skipped_data, data)
+            self.assertEqual(mtimes(skipped_data), original_mtimes)
+
+        with self.subTest(msg="Functions are regenerated when the codegen sources change"):
+            with mock.patch.object(
+                codegen_util, "codegen_sources_hash", return_value="modified"
+            ), mock.patch.object(
+                template_util.TemplateList, "render", side_effect=RuntimeError("rendered")
+            ):
+                with self.assertRaisesRegex(RuntimeError, "rendered"):
+                    generate(az_el_from_point)
+
+        with self.subTest(msg="Deleted files are regenerated"):
+            (data.function_dir / "__init__.py").unlink()
+            self.assertEqual(
+                mtimes(generate(az_el_from_point))[data.function_dir / "incremental_test_func.py"],
+                original_mtimes[data.function_dir / "incremental_test_func.py"],
+            )
+
+        with self.subTest(msg="Changed functions are regenerated"):
+
+            def changed_az_el_from_point(
+                nav_T_cam: sf.Pose3, nav_t_point: sf.Vector3, epsilon: sf.Scalar = 0
+            ) -> sf.Matrix:
+                return 2 * az_el_from_point(nav_T_cam, nav_t_point, epsilon)
+
+            function_file = data.function_dir / "incremental_test_func.py"
+            original_code = function_file.read_text()
+            init_mtime = (data.function_dir / "__init__.py").stat().st_mtime_ns
+
+            changed_mtimes = mtimes(generate(changed_az_el_from_point))
+            self.assertNotEqual(function_file.read_text(), original_code)
+            # The __init__.py is the same for both functions, so it is not rewritten
+            self.assertEqual(changed_mtimes[data.function_dir / "__init__.py"], init_mtime)
+
     def test_cpp_nan(self) -> None:
         inputs = Values()
         inputs["R1"] = sf.Rot3.symbolic("R1")
@@ -488,6 +676,94 @@ class SymforceCodegenTest(TestCase):
             output_dir, expected_dir=os.path.join(TEST_DATA_DIR, namespace + "_data")
         )
 
+    def test_lcm_types_cache(self) -> None:
+        """
+        Tests that LCM bindings for the same types are generated once and then copied from the
+        cache, and that they aren't generated at all if disabled
+        """
+        self.addCleanup(codegen_util.set_lcm_types_cache, codegen_util._lcm_types_cache)
+        codegen_util.set_lcm_types_cache(
+            LcmTypesCache(self.make_output_dir("sf_codegen_lcm_types_cache_"))
+        )
+
+        params = Values(a=sf.Symbol("a"), b=sf.Symbol("b"))
+        lcm_codegen = codegen.Codegen(
+            name="lcm_types_cache_test_func",
+            inputs=Values(params=params),
+            outputs=Values(out=params["a"] * params["b"]),
+            config=codegen.PythonConfig(),
+        )
+
+        with mock.patch.object(
+            codegen_util, "_run_skymarshal", wraps=codegen_util._run_skymarshal
+        ) as run_skymarshal:
+            data = lcm_codegen.generate_function(
+                output_dir=self.make_output_dir("sf_codegen_lcm_types_cache_first_"),
+                namespace="lcm_types_cache_test",
+            )
+            self.assertEqual(run_skymarshal.call_count, 1)
+
+            cached_data = lcm_codegen.generate_function(
+                output_dir=self.make_output_dir("sf_codegen_lcm_types_cache_second_"),
+                namespace="lcm_types_cache_test",
+            )
+            self.assertEqual(run_skymarshal.call_count, 1)
+
+            for types_dir in ("python_types_dir", "cpp_types_dir"):
+                expected_dir = getattr(data, types_dir)
+                actual_dir = getattr(cached_data, types_dir)
+                self.assertTrue(any(python_util.files_in_dir(expected_dir)))
+                for path in python_util.files_in_dir(expected_dir, relative=True):
+                    self.assertEqual(
+                        (actual_dir / path).read_text(), (expected_dir / path).read_text()
+                    )
+
+            params_t = codegen_util.load_generated_lcmtype(
+                "lcm_types_cache_test", "params_t", cached_data.python_types_dir
+            )
+            self.assertEqual(
+                codegen_util.load_generated_package(
+                    "lcm_types_cache_test", cached_data.function_dir
+                ).lcm_types_cache_test_func(params_t(a=2.0, b=3.0)),
+                6.0,
+            )
+
+            with self.subTest(msg="Bindings aren't generated if disabled"):
+                data = lcm_codegen.generate_function(
+                    output_dir=self.make_output_dir("sf_codegen_lcm_types_cache_disabled_"),
+                    namespace="lcm_types_cache_test",
+                    generate_lcm_bindings=False,
+                )
+                self.assertFalse((data.python_types_dir / "lcmtypes").exists())
+                self.assertFalse(data.cpp_types_dir.exists())
+
+    def test_lcm_types_cache_configuration(self) -> None:
+        """
+        Tests that the LCM types cache is disabled unless configured, and that its key depends on
+        the skymarshal sources
+        """
+        with mock.patch.dict("os.environ"):
+            os.environ.pop("SYMFORCE_LCM_TYPES_CACHE_DIR", None)
+            self.assertIsNone(LcmTypesCache.from_environment())
+
+        with mock.patch.dict(
+            "os.environ",
+            {
+                "SYMFORCE_LCM_TYPES_CACHE_DIR": "/some/dir",
+                "SYMFORCE_LCM_TYPES_CACHE_MAX_SIZE": "1000",
+            },
+        ):
+            cache = LcmTypesCache.from_environment()
+            assert cache is not None
+            self.assertEqual(str(cache.directory), "/some/dir")
+            self.assertEqual(cache.max_size, 1000)
+
+        lcm_type_dir = self.make_output_dir("sf_codegen_lcm_types_cache_key_")
+        (Path(lcm_type_dir) / "foo.lcm").write_text("package foo; struct foo_t { double x; }")
+        key = LcmTypesCache.key(lcm_type_dir)
+        with mock.patch.object(python_util, "files_hash", return_value="changed"):
+            self.assertNotEqual(LcmTypesCache.key(lcm_type_dir), key)
+
     def test_invalid_codegen_raises(self) -> None:
         """
         Tests:
@@ -6,8 +6,10 @@
 from pathlib import Path
 import sys
 
+import symforce.symbolic as sf
 from symforce import typing as T
 from symforce.test_util import TestCase
+from symforce import codegen
 from symforce.codegen import codegen_util
 
 
@@ -48,6 +50,49 @@ class SymforceCodegenUtilTest(TestCase):
         self.assertEqual(pkg2.package_id, 2)
         self.assertEqual(pkg2.sub_module.sub_module_id, 2)
 
+    def test_print_code_cse_groups(self) -> None:
+        """
+        Tests:
+            codegen_util.print_code
+
+        Tests that outputs in separate cse_groups get separate temporaries, and that the code
+        printed in multiple processes is identical to the code printed serially
+        """
+
+        def residual(
+            a: sf.Pose3, b: sf.Pose3, epsilon: sf.Scalar
+        ) -> T.Tuple[sf.V6, sf.M66, sf.M66]:
+            res = sf.V6(a.local_coordinates(b, epsilon=epsilon))
+            return res, res.jacobian(a), res.jacobian(b)
+
+        def print_code(config: codegen.CodegenConfig) -> codegen_util.PrintCodeResult:
+            co = codegen.Codegen.function(
+                func=residual, config=config, output_names=["res", "res_D_a", "res_D_b"]
+            )
+            return codegen_util.print_code(
+                inputs=co.inputs, outputs=co.outputs, sparse_mat_data={}, config=config
+            )
+
+        ungrouped = print_code(codegen.PythonConfig())
+        serial = print_code(codegen.PythonConfig(cse_groups=[["res_D_a", "res_D_b"]]))
+        parallel = print_code(codegen.PythonConfig(cse_groups=[["res_D_a", "res_D_b"]], cse_jobs=2))
+
+        self.assertEqual(serial, parallel)
+
+        self.assertEqual(
+            [term.name for term in serial.dense_terms],
+            [term.name for term in ungrouped.dense_terms],
+        )
+        # The jacobians are in group 0, and the residual is in group 1
+        temp_groups = {name.split("_")[1] for name, _ in serial.intermediate_terms}
+        self.assertEqual(temp_groups, {"tmp0", "tmp1"})
+        self.assertFalse(any("_tmp0_" in code for _, code in serial.dense_terms[0].terms))
+
+        with self.assertRaises(ValueError):
+            print_code(codegen.PythonConfig(cse_groups=[["res"], ["res"]]))
+        with self.assertRaises(ValueError):
+            print_code(codegen.PythonConfig(cse_groups=[["not_an_output"]]))
+
 
 if __name__ == "__main__":
     TestCase.main()
@@ -0,0 +1,186 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+from pathlib import Path
+import sys
+from unittest import mock
+
+import numpy as np
+
+import sym
+import symforce.symbolic as sf
+from symforce import cc_sym
+from symforce import python_util
+from symforce import typing as T
+from symforce.codegen import CppConfig
+from symforce.codegen.similarity_index import SimilarityIndex
+from symforce.opt._internal.generated_residual_cache import GeneratedResidualCache
+from symforce.opt.cpp_factor_compiler import CompiledLinearization
+from symforce.opt.cpp_factor_compiler import CppFactorCompiler
+from symforce.opt.factor import Factor
+from symforce.opt.numeric_factor import NumericFactor
+from symforce.opt.optimizer import Optimizer
+from symforce.test_util import TestCase
+from symforce.values import Values
+
+
+def between(a: sf.Rot3, b: sf.Rot3, epsilon: sf.Scalar) -> sf.V3:
+    return sf.V3(a.local_coordinates(b, epsilon=epsilon))
+
+
+class SymforceCppFactorCompilerTest(TestCase):
+    """
+    Tests symforce.opt.cpp_factor_compiler, and its use in Factor.to_numeric_factor for factors
+    generated with CppConfig
+
+    The compiler, include directories, and libraries are given by the environment, see
+    CppFactorCompiler.from_environment
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.addCleanup(
+            setattr, Factor, "_generated_residual_cache", Factor._generated_residual_cache
+        )
+        self.addCleanup(setattr, Factor, "_cpp_factor_compiler", Factor._cpp_factor_compiler)
+
+        environment_compiler = CppFactorCompiler.from_environment()
+        Factor.set_cpp_factor_compiler(
+            CppFactorCompiler(
+                self.make_output_dir("sf_cpp_factor_compiler_test_"),
+                compiler=environment_compiler.compiler,
+                compile_flags=environment_compiler.compile_flags,
+                link_flags=environment_compiler.link_flags,
+            )
+        )
+
+    @staticmethod
+    def to_numeric_factor(keys: T.Sequence[str], optimized_keys: T.Sequence[str]) -> NumericFactor:
+        """
+        Compile or load the factor, as if from a new process (i.e. with an empty in-process cache)
+        """
+        Factor._generated_residual_cache = GeneratedResidualCache()
+        Factor._cpp_factor_compiler = CppFactorCompiler(
+            Factor._cpp_factor_compiler.directory,
+            compiler=Factor._cpp_factor_compiler.compiler,
+            compile_flags=Factor._cpp_factor_compiler.compile_flags,
+            link_flags=Factor._cpp_factor_compiler.link_flags,
+        )
+        return Factor(keys=keys, residual=between, config=CppConfig()).to_numeric_factor(
+            optimized_keys
+        )
+
+    def test_compiled_factor(self) -> None:
+        """
+        Tests that the compiled factor matches the python factor, and is loaded from the cache
+        instead of being compiled again
+        """
+        compiled_factor = self.to_numeric_factor(["x", "y", "epsilon"], ["x"])
+        self.assertIsInstance(compiled_factor.linearization_function, CompiledLinearization)
+
+        python_factor = Factor(keys=["x", "y", "epsilon"], residual=between).to_numeric_factor(
+            ["x"]
+        )
+
+        values = Values(
+            x=sym.Rot3.from_tangent([0.1, -0.2, 0.3]),
+            y=sym.Rot3.from_tangent([-0.3, 0.2, 0.1]),
+            epsilon=sf.numeric_epsilon,
+        )
+        for expected, actual in zip(
+            python_factor.linearize(values), compiled_factor.linearize(values)
+        ):
+            self.assertStorageNear(expected, actual)
+
+        with mock.patch.object(
+            python_util, "execute_subprocess", side_effect=AssertionError
+        ) as execute_subprocess:
+            loaded_factor = self.to_numeric_factor(["z", "w", "epsilon"], ["z"])
+            execute_subprocess.assert_not_called()
+
+        for expected, actual in zip(
+            compiled_factor.linearize(values),
+            loaded_factor.linearize(
+                Values(z=values["x"], w=values["y"], epsilon=values["epsilon"])
+            ),
+        ):
+            self.assertStorageNear(expected, actual)
+
+        with self.subTest(msg="The native factor is used by the C++ optimizer"):
+            cc_factor = compiled_factor.cc_factor(
+                {"x": cc_sym.Key("x"), "y": cc_sym.Key("y"), "epsilon": cc_sym.Key("e")}
+            )
+            self.assertEqual(cc_factor.optimized_keys(), [cc_sym.Key("x")])
+
+            factors = [
+                Factor(keys=[f"x{i}", f"x{i + 1}", "epsilon"], residual=between, config=CppConfig())
+                for i in range(3)
+            ]
+            initial_values = Values(
+                epsilon=sf.numeric_epsilon,
+                **{f"x{i}": sym.Rot3.from_tangent(np.random.normal(size=3)) for i in range(4)},
+            )
+            result = Optimizer(
+                factors=factors,
+                optimized_keys=["x1", "x2", "x3"],
+                params=Optimizer.Params(verbose=False),
+            ).optimize(initial_values)
+            self.assertLess(result.error(), 1e-12)
+            for i in range(1, 4):
+                self.assertLieGroupNear(result.optimized_values[f"x{i}"], initial_values["x0"])
+
+    def test_from_environment(self) -> None:
+        """
+        Tests configuring the default compiler with environment variables
+        """
+        with mock.patch.dict(
+            "os.environ",
+            {
+                "SYMFORCE_CPP_FACTOR_CACHE_DIR": "/tmp/some_cache",
+                "CXX": "clang++",
+                "SYMFORCE_CPP_FACTOR_CXXFLAGS": "-I/opt/eigen -DFOO",
+                "SYMFORCE_CPP_FACTOR_LDFLAGS": "-L/opt/lib",
+                "SYMFORCE_CPP_FACTOR_CACHE_MAX_SIZE": "1000",
+            },
+        ):
+            compiler = CppFactorCompiler.from_environment()
+        self.assertEqual(str(compiler.directory), "/tmp/some_cache")
+        self.assertEqual(compiler.compiler, "clang++")
+        self.assertEqual(compiler.compile_flags, ["-I/opt/eigen", "-DFOO"])
+        self.assertEqual(compiler.link_flags, ["-L/opt/lib"])
+        self.assertEqual(compiler.max_size, 1000)
+
+    def test_key(self) -> None:
+        """
+        Tests that the key depends on the symforce_opt library and on cc_sym, so that modules are
+        rebuilt when symforce is rebuilt
+        """
+        compiler = Factor._cpp_factor_compiler
+        index = SimilarityIndex.from_codegen(
+            Factor(keys=["x", "y", "epsilon"], residual=between).codegen
+        )
+        key = compiler.key(index, ["x"])
+        self.assertEqual(compiler.key(index, ["x"]), key)
+
+        library_dir = self.make_output_dir("sf_cpp_factor_compiler_lib_")
+        library_file = Path(library_dir) / "libsymforce_opt.so"
+        library_file.write_bytes(b"library")
+        link_flags = [*compiler.link_flags, f"-L{library_dir}"]
+        with_library = CppFactorCompiler(compiler.directory, link_flags=link_flags)
+        library_key = with_library.key(index, ["x"])
+
+        library_file.write_bytes(b"rebuilt library")
+        self.assertNotEqual(with_library.key(index, ["x"]), library_key)
+
+        # The extension module, rather than the symforce.cc_sym wrapper
+        cc_sym_file = sys.modules["cc_sym"].__file__
+        dependencies = compiler._dependencies()  # pylint: disable=protected-access
+        self.assertTrue(
+            any(dependency.startswith(f"{cc_sym_file}:") for dependency in dependencies)
+        )
+
+
+if __name__ == "__main__":
+    TestCase.main()
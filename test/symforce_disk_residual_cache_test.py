@@ -0,0 +1,185 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+import os
+from unittest import mock
+
+import numpy as np
+
+import symforce.symbolic as sf
+from symforce import typing as T
+from symforce.codegen import codegen_util
+from symforce.codegen.similarity_index import SimilarityIndex
+from symforce.opt._internal.disk_residual_cache import DiskResidualCache
+from symforce.opt._internal.generated_residual_cache import GeneratedResidualCache
+from symforce.opt.factor import Factor
+from symforce.test_util import TestCase
+from symforce.values import Values
+
+
+def between(a: sf.V3, b: sf.V3) -> sf.V3:
+    return a - b
+
+
+def prior(a: sf.Rot3, b: sf.Rot3) -> sf.V3:
+    return sf.V3(a.local_coordinates(b, epsilon=sf.numeric_epsilon))
+
+
+class DiskResidualCacheTest(TestCase):
+    """
+    Tests symforce.opt._internal.disk_residual_cache.DiskResidualCache, and its use in
+    Factor.to_numeric_factor
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_dir = self.make_output_dir("sf_disk_residual_cache_test_")
+        self.addCleanup(
+            setattr, Factor, "_generated_residual_cache", Factor._generated_residual_cache
+        )
+        self.addCleanup(setattr, Factor, "_disk_residual_cache", Factor._disk_residual_cache)
+        Factor.set_disk_cache(self.cache_dir)
+
+    @staticmethod
+    def to_numeric_factor(
+        residual: T.Callable, keys: T.Sequence[str], optimized_keys: T.Sequence[str]
+    ) -> T.Callable:
+        """
+        Generate or load the linearization function, as if from a new process (i.e. with an empty
+        in-process cache)
+        """
+        Factor._generated_residual_cache = GeneratedResidualCache()
+        return (
+            Factor(keys=keys, residual=residual)
+            .to_numeric_factor(optimized_keys=optimized_keys)
+            .linearization_function
+        )
+
+    def test_residual_can_be_retrieved(self) -> None:
+        """
+        Tests that functions generated by to_numeric_factor are loaded from disk instead of being
+        generated again
+        """
+        linearization_function = self.to_numeric_factor(between, ["x", "y"], ["x"])
+        cache = Factor._disk_residual_cache
+        assert cache is not None
+        self.assertEqual(len(cache._entries()), 1)
+
+        with mock.patch.object(Factor, "generate", side_effect=AssertionError) as generate:
+            loaded_function = self.to_numeric_factor(between, ["z", "w"], ["z"])
+            generate.assert_not_called()
+
+        a = np.array([1.0, 2.0, 3.0])
+        b = np.array([3.0, 2.0, 1.0])
+        for expected, actual in zip(linearization_function(a, b), loaded_function(a, b)):
+            self.assertStorageNear(expected, actual)
+
+        with self.subTest(msg="Different optimized keys are cached separately"):
+            self.to_numeric_factor(between, ["x", "y"], ["y"])
+            self.to_numeric_factor(between, ["x", "y"], ["y", "x"])
+            self.assertEqual(len(cache._entries()), 3)
+
+        with self.subTest(msg="Clearing the cache removes all entries"):
+            Factor.clear_disk_cache()
+            self.assertEqual(cache.size(), 0)
+
+        with self.subTest(msg="Unreadable entries are regenerated"):
+            self.to_numeric_factor(between, ["x", "y"], ["x"])
+            (entry_dir,) = [entry_dir for entry_dir, _ in cache._entries()]
+            (entry_dir / DiskResidualCache.METADATA_FILE).write_text("{}")
+            self.to_numeric_factor(between, ["x", "y"], ["x"])
+            self.assertEqual(len(cache._entries()), 1)
+
+    def test_eviction(self) -> None:
+        """
+        Tests that the least recently used entries are evicted once the cache is over its size
+        limit
+        """
+        self.to_numeric_factor(between, ["x", "y"], ["x"])
+        cache = Factor._disk_residual_cache
+        assert cache is not None
+        (between_entry,) = [entry_dir.name for entry_dir, _ in cache._entries()]
+
+        # Room for about two entries
+        Factor.set_disk_cache(self.cache_dir, max_size=int(2.5 * cache.size()))
+        cache = Factor._disk_residual_cache
+        assert cache is not None
+
+        self.to_numeric_factor(between, ["x", "y"], ["y"])
+        # Using the first entry makes the second the least recently used
+        self.to_numeric_factor(between, ["x", "y"], ["x"])
+        self.to_numeric_factor(between, ["x", "y"], ["x", "y"])
+
+        entries = [entry_dir.name for entry_dir, _ in cache._entries()]
+        self.assertEqual(len(entries), 2)
+        self.assertIn(between_entry, entries)
+        self.assertLessEqual(cache.size(), cache.max_size)
+
+    def test_disabled(self) -> None:
+        """
+        Tests that nothing is written when the cache is disabled, or for factors which can't be
+        cached
+        """
+        Factor.set_disk_cache(None)
+        self.to_numeric_factor(between, ["x", "y"], ["x"])
+        self.assertEqual(DiskResidualCache(self.cache_dir).size(), 0)
+
+        Factor.set_disk_cache(self.cache_dir)
+        Factor._generated_residual_cache = GeneratedResidualCache()
+        Factor(
+            keys=["x", "y"],
+            residual=prior,
+            custom_jacobian_func=lambda keys: sf.M33.eye(),
+        ).to_numeric_factor(optimized_keys=["x"])
+        self.assertEqual(DiskResidualCache(self.cache_dir).size(), 0)
+
+    def test_from_environment(self) -> None:
+        """
+        Tests configuring the default cache with environment variables
+        """
+        # The cache is disabled by default
+        with mock.patch.dict("os.environ"):
+            os.environ.pop("SYMFORCE_FACTOR_CACHE_DIR", None)
+            self.assertIsNone(DiskResidualCache.from_environment())
+
+        with mock.patch.dict(
+            "os.environ",
+            {"SYMFORCE_FACTOR_CACHE_DIR": "", "SYMFORCE_FACTOR_CACHE_MAX_SIZE": "1000"},
+        ):
+            self.assertIsNone(DiskResidualCache.from_environment())
+
+        with mock.patch.dict(
+            "os.environ",
+            {"SYMFORCE_FACTOR_CACHE_DIR": "/some/dir", "SYMFORCE_FACTOR_CACHE_MAX_SIZE": "1000"},
+        ):
+            cache = DiskResidualCache.from_environment()
+            assert cache is not None
+            self.assertEqual(str(cache.directory), "/some/dir")
+            self.assertEqual(cache.max_size, 1000)
+
+    def test_key(self) -> None:
+        """
+        Tests that keys depend on the order of the optimized keys
+        """
+        similarity_index = SimilarityIndex.from_codegen(
+            Factor(keys=["x", "y"], residual=between).codegen
+        )
+        self.assertEqual(
+            DiskResidualCache.key(similarity_index, ["a", "b"]),
+            DiskResidualCache.key(similarity_index, ["a", "b"]),
+        )
+        self.assertNotEqual(
+            DiskResidualCache.key(similarity_index, ["a", "b"]),
+            DiskResidualCache.key(similarity_index, ["b", "a"]),
+        )
+
+        # Changes to the code generator invalidate the cache
+        key = DiskResidualCache.key(similarity_index, ["a", "b"])
+        with mock.patch.object(codegen_util, "codegen_sources_hash", return_value="modified"):
+            self.assertNotEqual(DiskResidualCache.key(similarity_index, ["a", "b"]), key)
+
+
+if __name__ == "__main__":
+    TestCase.main()
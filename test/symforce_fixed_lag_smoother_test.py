@@ -0,0 +1,198 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+import numpy as np
+
+import symforce.symbolic as sf
+from symforce import typing as T
+from symforce.opt.factor import Factor
+from symforce.opt.fixed_lag_smoother import FixedLagSmoother
+from symforce.opt.optimizer import Optimizer
+from symforce.test_util import TestCase
+from symforce.values import Values
+
+
+def prior(x: sf.V2, x_prior: sf.V2) -> sf.V2:
+    return x - x_prior
+
+
+def between(x: sf.V2, y: sf.V2, delta: sf.V2) -> sf.V2:
+    return 2 * (y - x - delta)
+
+
+def rot_prior(x: sf.Rot3, x_prior: sf.Rot3, epsilon: sf.Scalar) -> sf.V3:
+    return sf.V3(x.local_coordinates(x_prior, epsilon=epsilon))
+
+
+def rot_between(x: sf.Rot3, y: sf.Rot3, delta: sf.Rot3, epsilon: sf.Scalar) -> sf.V3:
+    return sf.V3((x * delta).local_coordinates(y, epsilon=epsilon))
+
+
+class SymforceFixedLagSmootherTest(TestCase):
+    """
+    Test the FixedLagSmoother
+    """
+
+    def test_linear_problem(self) -> None:
+        """
+        Marginalization is exact for a linear problem, so the window should match the same keys in
+        a batch optimization over the whole history
+        """
+        num_steps = 8
+        window_size = 3
+        rng = np.random.default_rng(42)
+        priors = rng.normal(size=(num_steps, 2))
+        deltas = rng.normal(size=(num_steps, 2))
+
+        def step_factors(i: int) -> T.List[Factor]:
+            factors = [Factor(keys=[f"x{i}", f"prior{i}"], residual=prior)]
+            if i > 0:
+                factors.append(Factor(keys=[f"x{i - 1}", f"x{i}", f"delta{i}"], residual=between))
+            return factors
+
+        def step_values(i: int) -> Values:
+            return Values(**{f"x{i}": np.zeros(2), f"prior{i}": priors[i], f"delta{i}": deltas[i]})
+
+        params = Optimizer.Params(verbose=False)
+        smoother = FixedLagSmoother(params=params)
+        optimizers = []
+        for i in range(num_steps):
+            smoother.add(factors=step_factors(i), values=step_values(i), optimized_keys=[f"x{i}"])
+            smoother.optimize()
+            optimizers.append(smoother.optimizer())
+            if i >= window_size - 1:
+                smoother.marginalize([f"x{i - window_size + 1}"])
+
+        # The optimizer is updated in place as the window moves
+        self.assertTrue(all(optimizer is optimizers[0] for optimizer in optimizers))
+
+        self.assertEqual(
+            smoother.optimized_keys,
+            [f"x{i}" for i in range(num_steps - window_size + 1, num_steps)],
+        )
+        for key in smoother.values.keys():
+            self.assertTrue(key.startswith(("x", "prior", "delta")))
+        self.assertNotIn("prior0", smoother.values)
+
+        batch_values = Values()
+        batch_factors = []
+        for i in range(num_steps):
+            batch_values.update(step_values(i))
+            batch_factors.extend(step_factors(i))
+        batch_result = Optimizer(
+            factors=batch_factors,
+            optimized_keys=[f"x{i}" for i in range(num_steps)],
+            params=params,
+        ).optimize(batch_values)
+
+        smoother.optimize()
+        for key in smoother.optimized_keys:
+            self.assertStorageNear(
+                smoother.values[key], batch_result.optimized_values[key], places=6
+            )
+
+    def test_marginalize_partially_observed_key(self) -> None:
+        """
+        Marginalizing a key with a direction no factor constrains should not fail, and the
+        unconstrained direction should add no information to the remaining keys
+        """
+
+        def first_component_between(x: sf.V2, l: sf.V2, delta: sf.V2) -> sf.V1:
+            return sf.V1(l[0] - x[0] - delta[0])
+
+        params = Optimizer.Params(verbose=False)
+        smoother = FixedLagSmoother(params=params)
+        smoother.add(
+            factors=[
+                Factor(keys=["x", "x_prior"], residual=prior),
+                Factor(keys=["x", "l", "delta"], residual=first_component_between),
+                Factor(keys=["x", "y", "delta"], residual=between),
+            ],
+            values=Values(
+                x=np.zeros(2),
+                l=np.zeros(2),
+                y=np.zeros(2),
+                x_prior=np.array([1.0, 2.0]),
+                delta=np.array([0.5, -0.5]),
+            ),
+            optimized_keys=["x", "l", "y"],
+        )
+        smoother.optimize()
+
+        smoother.marginalize(["l"])
+        self.assertEqual(smoother.optimized_keys, ["x", "y"])
+        self.assertNotIn("l", smoother.values)
+
+        smoother.optimize()
+        self.assertStorageNear(smoother.values["x"], np.array([1.0, 2.0]), places=6)
+        self.assertStorageNear(smoother.values["y"], np.array([1.5, 1.5]), places=6)
+
+        # Marginalizing x, whose factors fully constrain it, keeps a prior on y
+        smoother.marginalize(["x"])
+        smoother.optimize()
+        self.assertEqual(smoother.optimized_keys, ["y"])
+        self.assertStorageNear(smoother.values["y"], np.array([1.5, 1.5]), places=6)
+
+    def test_rotations(self) -> None:
+        """
+        Check that marginalizing Lie group variables gives a close result to batch optimization
+        """
+        num_steps = 6
+        window_size = 3
+        rotations = [
+            sf.Rot3.from_yaw_pitch_roll(0.1 * i, -0.05 * i, 0.02 * i) for i in range(num_steps)
+        ]
+
+        def step_factors(i: int) -> T.List[Factor]:
+            factors = [Factor(keys=[f"x{i}", f"prior{i}", "epsilon"], residual=rot_prior)]
+            if i > 0:
+                factors.append(
+                    Factor(
+                        keys=[f"x{i - 1}", f"x{i}", f"delta{i}", "epsilon"], residual=rot_between
+                    )
+                )
+            return factors
+
+        def step_values(i: int) -> Values:
+            values = Values(epsilon=sf.numeric_epsilon)
+            values[f"x{i}"] = sf.Rot3()
+            values[f"prior{i}"] = rotations[i] * sf.Rot3.from_yaw_pitch_roll(0.01, 0.0, 0.0)
+            if i > 0:
+                values[f"delta{i}"] = rotations[i - 1].inverse() * rotations[i]
+            return values
+
+        params = Optimizer.Params(verbose=False)
+        smoother = FixedLagSmoother(params=params)
+        batch_values = Values()
+        batch_factors = []
+        for i in range(num_steps):
+            smoother.add(factors=step_factors(i), values=step_values(i), optimized_keys=[f"x{i}"])
+            smoother.optimize()
+            if i >= window_size - 1:
+                smoother.marginalize([f"x{i - window_size + 1}"])
+
+            batch_values.update(step_values(i))
+            batch_factors.extend(step_factors(i))
+
+        batch_result = Optimizer(
+            factors=batch_factors,
+            optimized_keys=[f"x{i}" for i in range(num_steps)],
+            params=params,
+        ).optimize(batch_values)
+
+        smoother.optimize()
+        for key in smoother.optimized_keys:
+            self.assertLess(
+                np.linalg.norm(
+                    smoother.values[key].local_coordinates(
+                        batch_result.optimized_values[key], epsilon=sf.numeric_epsilon
+                    )
+                ),
+                1e-3,
+            )
+
+
+if __name__ == "__main__":
+    TestCase.main()
@@ -15,9 +15,9 @@ import sym  # pylint: disable=unused-import
 # pylint: disable=too-many-locals,too-many-lines,too-many-statements,unused-argument
 
 
-@numba.njit
+@numba.njit("(float64[:],)", cache=True)
 def numba_test_func(x):
-    # type: (T.Sequence[float]) -> T.List[float]
+    # type: (numpy.ndarray) -> numpy.ndarray
     """
     This function was autogenerated from a symbolic function. Do not modify by hand.
 
@@ -37,7 +37,25 @@ def numba_test_func(x):
     # Intermediate terms (0)
 
     # Output terms
-    _res = [0.0] * 2
+    _res = numpy.zeros(2)
     _res[0] = x[0]
     _res[1] = x[1]
     return _res
+
+
+@numba.njit("(float64[:, :],)", parallel=True, cache=True)
+def numba_test_func_batch(x):
+    # type: (numpy.ndarray) -> numpy.ndarray
+    """
+    Evaluates numba_test_func for each of N inputs in parallel.
+
+    Each input is an array of shape (N, storage_dim), or (N,) for scalars, and outputs are arrays
+    of shape (N, storage_dim), (N, rows, cols) for matrices, or (N,) for scalars.
+    """
+
+    _N = x.shape[0]
+
+    _res = numpy.empty((_N, 2))
+    for _i in numba.prange(_N):  # pylint: disable=not-an-iterable
+        _res[_i] = numba_test_func(x[_i])
+    return _res
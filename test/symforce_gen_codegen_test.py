@@ -133,6 +133,28 @@ class SymforceGenCodegenTest(TestCase):
         for i in range(len(identity_expected.data)):
             self.assertAlmostEqual(identity_expected.data[i], identity_actual.data[i], places=7)
 
+    def test_gen_package_codegen_jobs(self) -> None:
+        """
+        Test that generating the geo package in multiple processes gives the same output as
+        generating it serially
+        """
+        config = codegen.PythonConfig()
+        serial_dir = self.make_output_dir("sf_gen_codegen_test_serial_")
+        parallel_dir = self.make_output_dir("sf_gen_codegen_test_parallel_")
+
+        geo_package_codegen.generate(config=config, output_dir=serial_dir)
+        geo_package_codegen.generate(config=config, output_dir=parallel_dir, jobs=2)
+
+        serial_files = sorted(python_util.files_in_dir(serial_dir, relative=True))
+        self.assertEqual(
+            serial_files, sorted(python_util.files_in_dir(parallel_dir, relative=True))
+        )
+        for path in serial_files:
+            with open(os.path.join(serial_dir, path), "rb") as serial_file, open(
+                os.path.join(parallel_dir, path), "rb"
+            ) as parallel_file:
+                self.assertEqual(serial_file.read(), parallel_file.read(), msg=path)
+
     # This is so slow on sympy that we disable it entirely
     @symengine_only
     def test_gen_package_codegen_cpp(self) -> None:
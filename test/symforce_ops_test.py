@@ -190,6 +190,26 @@ class SymforceOpsTest(TestCase):
         # Note, TypeParent1 is the first class after TypeChild in TypeChild's mro
         self.assertEqual(ImplementationType1, OpsParent.implementation(TypeChild))
 
+    def test_implementation_cache_invalidated_on_register(self) -> None:
+        """
+        Tests:
+            Ops.implementation
+            Ops.register
+        Check that a cached implementation is replaced when a more specific type is registered
+        """
+        TypeParent, TypeChild = self.get_type_parent_child()
+        OpsParent, _ = self.get_ops_parent_child()
+        ImplementationType1 = self.get_implementation_type()
+        ImplementationType2 = self.get_implementation_type()
+
+        OpsParent.register(TypeParent, ImplementationType1)
+        self.assertEqual(OpsParent.implementation(TypeChild), ImplementationType1)
+        self.assertEqual(OpsParent.implementation(TypeChild), ImplementationType1)
+
+        OpsParent.register(TypeChild, ImplementationType2)
+        self.assertEqual(OpsParent.implementation(TypeChild), ImplementationType2)
+        self.assertEqual(OpsParent.implementation(TypeParent), ImplementationType1)
+
 
 if __name__ == "__main__":
     TestCase.main()
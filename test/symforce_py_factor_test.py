@@ -7,6 +7,7 @@ import functools
 from pathlib import Path
 import numpy as np
 
+from symforce import codegen
 from symforce import ops
 import symforce.symbolic as sf
 from symforce import typing as T
@@ -98,6 +99,41 @@ class SymforcePyFactorTest(TestCase):
         residual, _, _, _ = loaded_factor.linearize(inputs)
         self.assertStorageNear(residual, np.zeros((3,)))
 
+    def test_cse_groups(self) -> None:
+        """
+        Tests generating a factor whose config has cse_groups, which are used in the (hashed)
+        SimilarityIndex of the factor
+        """
+        inputs = Values(x=sf.Rot3.from_yaw_pitch_roll(0.1, 0.2, 0.3), y=sf.Rot3.identity())
+
+        def between(x: sf.Rot3, y: sf.Rot3) -> sf.V3:
+            return sf.V3(x.local_coordinates(y, epsilon=sf.numeric_epsilon))
+
+        numeric_factor = Factor(
+            keys=["x", "y"],
+            residual=between,
+            config=codegen.PythonConfig(autoformat=False, cse_groups=[["res"]]),
+        ).to_numeric_factor(optimized_keys=["x"])
+        expected_factor = Factor(keys=["x", "y"], residual=between).to_numeric_factor(
+            optimized_keys=["x"]
+        )
+        for actual, expected in zip(
+            numeric_factor.linearize(inputs), expected_factor.linearize(inputs)
+        ):
+            self.assertStorageNear(actual, expected)
+
+        # cse_jobs doesn't change the generated code, so the function is reused
+        self.assertIs(
+            Factor(
+                keys=["x", "y"],
+                residual=between,
+                config=codegen.PythonConfig(autoformat=False, cse_groups=[["res"]], cse_jobs=2),
+            )
+            .to_numeric_factor(optimized_keys=["x"])
+            .linearization_function,
+            numeric_factor.linearization_function,
+        )
+
     def test_visualize(self) -> None:
         """
         Test the `visualize_factors` method.
@@ -10,15 +10,51 @@ from symforce import cc_sym
 import symforce.symbolic as sf
 from symforce import typing as T
 from symforce.opt.factor import Factor
+from symforce.opt.numeric_factor import InPlaceLinearization
+from symforce.opt.numeric_factor import NumericFactor
 from symforce.opt.optimizer import Optimizer
 from symforce.test_util import TestCase
 from symforce.values import Values
 
 from lcmtypes.sym._index_entry_t import index_entry_t
 from lcmtypes.sym._key_t import key_t
+from lcmtypes.sym._linear_solver_t import linear_solver_t
 from lcmtypes.sym._type_t import type_t
 
 
+def rotation_between(x: sf.Rot3, y: sf.Rot3, epsilon: sf.Scalar) -> sf.V3:
+    return sf.V3(x.local_coordinates(y, epsilon=epsilon))
+
+
+def rotation_prior(x: sf.Rot3, epsilon: sf.Scalar, x_prior: sf.Rot3) -> sf.V3:
+    return sf.V3(x.local_coordinates(x_prior, epsilon=epsilon))
+
+
+def rotation_smoothing_problem(num_samples: int) -> T.Tuple[T.List[Factor], T.List[str], Values]:
+    """
+    Returns the factors, optimized keys and initial values of the problem in
+    test_rotation_smoothing: a chain of 3D orientations with prior and between factors
+    """
+    xs = [f"x{i}" for i in range(num_samples)]
+
+    factors = [
+        Factor(keys=[xs[i], xs[i + 1], "epsilon"], residual=rotation_between)
+        for i in range(num_samples - 1)
+    ]
+    factors.extend(
+        Factor(keys=[xs[i], "epsilon", f"x_prior{i}"], name="prior", residual=rotation_prior)
+        for i in range(num_samples)
+    )
+
+    initial_values = Values(epsilon=sf.numeric_epsilon)
+    for i in range(num_samples):
+        initial_values[xs[i]] = sf.Rot3.from_yaw_pitch_roll(yaw=0.0, pitch=0.1 * i, roll=0.0)
+    for i in range(num_samples):
+        initial_values[f"x_prior{i}"] = sf.Rot3.from_yaw_pitch_roll(roll=0.1 * i)
+
+    return factors, xs, initial_values
+
+
 class SymforcePyOptimizerTest(TestCase):
     """
     Test the symforce optimizer in Python.
@@ -92,6 +128,529 @@ class SymforcePyOptimizerTest(TestCase):
         index_entry2 = optimizer.linearization_index_entry("x1")
         self.assertEqual(index_entry, index_entry2)
 
+    def test_repeated_optimize(self) -> None:
+        """
+        Check that optimizing repeatedly with the same optimizer, which reuses its C++ Values,
+        gives the same results, including for Values with keys in a different order or with
+        different types
+        """
+
+        def prior(x: sf.Rot3, x_prior: sf.Rot3, epsilon: sf.Scalar) -> sf.V3:
+            return sf.V3(x.local_coordinates(x_prior, epsilon=epsilon))
+
+        optimizer = Optimizer(
+            factors=[Factor(keys=["x", "x_prior", "epsilon"], residual=prior)],
+            optimized_keys=["x"],
+            params=Optimizer.Params(verbose=False),
+        )
+
+        x_prior = sf.Rot3.from_yaw_pitch_roll(0.1, 0.2, 0.3)
+        initial_values = Values(
+            x=sf.Rot3(), x_prior=x_prior, epsilon=sf.numeric_epsilon, extra=sf.Rot3()
+        )
+        reordered_values = Values(
+            epsilon=sf.numeric_epsilon, x_prior=x_prior, x=sf.Rot3(), extra=sf.Rot3()
+        )
+        # The same keys and storage layout as initial_values, but with a different type
+        retyped_values = Values(
+            x=sf.Rot3(), x_prior=x_prior, epsilon=sf.numeric_epsilon, extra=np.arange(4.0)
+        )
+
+        all_values = (initial_values, initial_values, reordered_values, retyped_values)
+        results = [optimizer.optimize(values) for values in all_values]
+        for values, result in zip(all_values, results):
+            self.assertEqual(list(result.optimized_values.keys()), list(values.keys()))
+            self.assertStorageNear(result.optimized_values["x"], x_prior, places=6)
+            self.assertEqual(
+                type(result.optimized_values["extra"]), type(values.to_numerical()["extra"])
+            )
+            self.assertStorageNear(result.optimized_values["extra"], values["extra"])
+            self.assertEqual(len(result.iteration_stats), len(results[0].iteration_stats))
+
+    def test_update_factors(self) -> None:
+        """
+        Check that updating the factors of an optimizer reuses the C++ factors of the factors it
+        already had, and gives the same results as a new optimizer
+        """
+        factors, xs, values = rotation_smoothing_problem(num_samples=10)
+        numeric_factors = [
+            factor.to_numeric_factor(optimized_keys=[key for key in xs if key in factor.keys])
+            for factor in factors
+        ]
+        params = Optimizer.Params(verbose=False)
+
+        optimizer = Optimizer(factors=numeric_factors[:5], params=params)
+        optimizer.optimize(values)
+        cc_factors = list(optimizer._cc_factors)  # pylint: disable=protected-access
+
+        optimizer.update_factors(numeric_factors)
+        for cc_factor, updated_cc_factor in zip(
+            cc_factors, optimizer._cc_factors  # pylint: disable=protected-access
+        ):
+            self.assertIs(cc_factor, updated_cc_factor)
+
+        result = optimizer.optimize(values)
+        expected_result = Optimizer(factors=numeric_factors, params=params).optimize(values)
+        self.assertEqual(set(optimizer.optimized_keys), set(xs))
+        self.assertAlmostEqual(result.error(), expected_result.error())
+        for x in xs:
+            self.assertStorageNear(
+                result.optimized_values[x], expected_result.optimized_values[x], places=9
+            )
+
+    def test_in_place_factors(self) -> None:
+        """
+        Check that factors which write their linearization in place (which is the default for
+        factors generated from symbolic Factors) give the same result as factors returning their
+        linearization
+        """
+        numeric_factor = Factor(
+            keys=["x", "y", "epsilon"], residual=rotation_between
+        ).to_numeric_factor(optimized_keys=["x", "y"])
+        self.assertIsInstance(numeric_factor.linearization_function, InPlaceLinearization)
+        self.assertEqual(numeric_factor.linearization_function.residual_dim, 3)
+        # Calling the InPlaceLinearization returns the outputs in new arrays
+        returning_factor = NumericFactor(
+            keys=numeric_factor.keys,
+            optimized_keys=numeric_factor.optimized_keys,
+            linearization_function=lambda *args: numeric_factor.linearization_function(*args),
+        )
+
+        values = Values(
+            x=sf.Rot3.from_yaw_pitch_roll(0.1, 0.2, 0.3),
+            y=sf.Rot3.from_yaw_pitch_roll(-0.1, 0.2, 0.0),
+            epsilon=sf.numeric_epsilon,
+        )
+        params = Optimizer.Params(verbose=False)
+        linearization = Optimizer([numeric_factor], params=params).linearize(values)
+        expected = Optimizer([returning_factor], params=params).linearize(values)
+        for field in ("residual", "jacobian", "hessian_lower", "rhs"):
+            actual_field = getattr(linearization, field)
+            expected_field = getattr(expected, field)
+            if field in ("jacobian", "hessian_lower"):
+                actual_field = actual_field.toarray()
+                expected_field = expected_field.toarray()
+            np.testing.assert_array_equal(actual_field, expected_field)
+
+    def test_num_threads(self) -> None:
+        """
+        Check that linearizing the factors on multiple threads gives exactly the same result as
+        linearizing them serially
+        """
+        factors, xs, initial_values = rotation_smoothing_problem(num_samples=20)
+
+        optimizer = Optimizer(
+            factors=factors, optimized_keys=xs, params=Optimizer.Params(verbose=False)
+        )
+        threaded_optimizer = Optimizer(
+            factors=factors,
+            optimized_keys=xs,
+            params=Optimizer.Params(verbose=False, num_threads=4),
+        )
+
+        linearization = optimizer.linearize(initial_values)
+        threaded_linearization = threaded_optimizer.linearize(initial_values)
+        np.testing.assert_array_equal(linearization.residual, threaded_linearization.residual)
+        np.testing.assert_array_equal(
+            linearization.jacobian.toarray(), threaded_linearization.jacobian.toarray()
+        )
+        np.testing.assert_array_equal(
+            linearization.hessian_lower.toarray(), threaded_linearization.hessian_lower.toarray()
+        )
+        np.testing.assert_array_equal(linearization.rhs, threaded_linearization.rhs)
+
+        result = optimizer.optimize(initial_values)
+        threaded_result = threaded_optimizer.optimize(initial_values)
+        self.assertEqual(len(result.iteration_stats), len(threaded_result.iteration_stats))
+        self.assertEqual(result.error(), threaded_result.error())
+        for x in xs:
+            np.testing.assert_array_equal(
+                result.optimized_values[x].to_storage(),
+                threaded_result.optimized_values[x].to_storage(),
+            )
+
+    def test_analysis_cache(self) -> None:
+        """
+        Check that optimizers with the same structure share the symbolic analysis from the cache,
+        and get the same results as without it
+        """
+
+        def offset_between(x: sf.V2, y: sf.V2) -> sf.V2:
+            return y - x - sf.V2(1, 2)
+
+        def vector_prior(x: sf.V2, x_prior: sf.V2) -> sf.V2:
+            return x - x_prior
+
+        def make_problem(num_samples: int) -> T.Tuple[T.List[Factor], T.List[str], Values]:
+            xs = [f"x{i}" for i in range(num_samples)]
+            factors = [
+                Factor(keys=[xs[i], xs[i + 1]], residual=offset_between)
+                for i in range(num_samples - 1)
+            ]
+            factors.extend(
+                Factor(keys=[xs[i], f"x_prior{i}"], residual=vector_prior)
+                for i in range(num_samples)
+            )
+            values = Values()
+            for i in range(num_samples):
+                values[xs[i]] = sf.V2()
+                values[f"x_prior{i}"] = sf.V2(i, -i)
+            return factors, xs, values
+
+        params = Optimizer.Params(verbose=False)
+        cache = cc_sym.SymbolicAnalysisCache(max_size=1)
+
+        factors, xs, values = make_problem(5)
+        expected = Optimizer(factors=factors, optimized_keys=xs, params=params).optimize(values)
+        for _ in range(3):
+            result = Optimizer(
+                factors=factors, optimized_keys=xs, params=params, analysis_cache=cache
+            ).optimize(values)
+            for x in xs:
+                np.testing.assert_array_equal(
+                    result.optimized_values[x], expected.optimized_values[x]
+                )
+        self.assertEqual(cache.size(), 1)
+        self.assertEqual(cache.misses(), 1)
+        self.assertEqual(cache.hits(), 2)
+
+        # A different structure evicts the first one
+        factors, xs, values = make_problem(6)
+        Optimizer(factors=factors, optimized_keys=xs, params=params, analysis_cache=cache).optimize(
+            values
+        )
+        self.assertEqual(cache.size(), 1)
+        self.assertEqual(cache.misses(), 2)
+
+        cache.clear()
+        self.assertEqual(cache.size(), 0)
+
+    def test_conjugate_gradient(self) -> None:
+        """
+        Check that the conjugate gradient linear solver converges to the same optimum as the
+        Cholesky solver
+        """
+
+        num_samples = 10
+        factors, xs, values = rotation_smoothing_problem(num_samples)
+
+        rng = np.random.default_rng(7)
+        for i in range(num_samples):
+            values[xs[i]] = sf.Rot3()
+            values[f"x_prior{i}"] = sf.Rot3.from_tangent(rng.normal(scale=0.3, size=3))
+
+        cholesky_result = Optimizer(
+            factors=factors, optimized_keys=xs, params=Optimizer.Params(verbose=False)
+        ).optimize(values)
+
+        cg_result = Optimizer(
+            factors=factors,
+            optimized_keys=xs,
+            params=Optimizer.Params(
+                verbose=False,
+                linear_solver=linear_solver_t.CONJUGATE_GRADIENT,
+                cg_tolerance=1e-10,
+            ),
+        ).optimize(values)
+
+        self.assertAlmostEqual(cg_result.error(), cholesky_result.error(), places=8)
+        for x in xs:
+            self.assertLess(
+                np.linalg.norm(
+                    cg_result.optimized_values[x].local_coordinates(
+                        cholesky_result.optimized_values[x], epsilon=sf.numeric_epsilon
+                    )
+                ),
+                1e-6,
+            )
+
+    def test_schur(self) -> None:
+        """
+        Check that the Schur complement linear solver converges to the same optimum as the
+        Cholesky solver on a small bundle-adjustment-like problem
+        """
+
+        def observation_residual(camera: sf.Pose3, landmark: sf.V3, measurement: sf.V3) -> sf.V3:
+            return camera * landmark - measurement
+
+        def camera_prior_residual(
+            camera: sf.Pose3, camera_prior: sf.Pose3, epsilon: sf.Scalar
+        ) -> sf.V6:
+            return sf.V6(camera.local_coordinates(camera_prior, epsilon=epsilon))
+
+        num_cameras = 3
+        num_landmarks = 5
+        rng = np.random.default_rng(3)
+
+        values = Values(epsilon=sf.numeric_epsilon)
+        cameras = [f"camera{i}" for i in range(num_cameras)]
+        landmarks = [f"landmark{j}" for j in range(num_landmarks)]
+        factors = []
+        for i, camera in enumerate(cameras):
+            camera_true = sf.Pose3.from_tangent(rng.normal(scale=0.5, size=6))
+            values[camera] = sf.Pose3()
+            values[f"camera_prior{i}"] = camera_true
+            factors.append(
+                Factor(keys=[camera, f"camera_prior{i}", "epsilon"], residual=camera_prior_residual)
+            )
+            for j, landmark in enumerate(landmarks):
+                values[f"measurement{i}_{j}"] = sf.V3(rng.normal(size=3))
+                factors.append(
+                    Factor(
+                        keys=[camera, landmark, f"measurement{i}_{j}"],
+                        residual=observation_residual,
+                    )
+                )
+        for landmark in landmarks:
+            values[landmark] = sf.V3()
+
+        # Landmarks first, to check that the optimizer orders them last for the Schur solver
+        optimized_keys = landmarks + cameras
+
+        cholesky_result = Optimizer(
+            factors=factors, optimized_keys=optimized_keys, params=Optimizer.Params(verbose=False)
+        ).optimize(values)
+
+        schur_params = Optimizer.Params(verbose=False, linear_solver=linear_solver_t.SCHUR)
+        schur_result = Optimizer(
+            factors=factors,
+            optimized_keys=optimized_keys,
+            params=schur_params,
+            schur_eliminated_keys=landmarks,
+        ).optimize(values)
+
+        self.assertAlmostEqual(schur_result.error(), cholesky_result.error(), places=8)
+        for landmark in landmarks:
+            self.assertStorageNear(
+                schur_result.optimized_values[landmark],
+                cholesky_result.optimized_values[landmark],
+                places=6,
+            )
+        for camera in cameras:
+            self.assertStorageNear(
+                schur_result.optimized_values[camera],
+                cholesky_result.optimized_values[camera],
+                places=6,
+            )
+
+        with self.assertRaises(ValueError):
+            Optimizer(factors=factors, optimized_keys=optimized_keys, params=schur_params)
+
+    def test_optimize_batch(self) -> None:
+        """
+        Check that optimize_batch gives the same results as optimizing each problem separately
+        """
+        num_samples = 5
+        num_problems = 7
+        factors, xs, _ = rotation_smoothing_problem(num_samples)
+
+        rng = np.random.default_rng(0)
+        initial_guesses = []
+        for _ in range(num_problems):
+            values = Values(epsilon=sf.numeric_epsilon)
+            for i in range(num_samples):
+                values[xs[i]] = sf.Rot3.from_tangent(rng.normal(size=3) * 0.1)
+                values[f"x_prior{i}"] = sf.Rot3.from_tangent(rng.normal(size=3))
+            initial_guesses.append(values)
+
+        optimizer = Optimizer(
+            factors=factors, optimized_keys=xs, params=Optimizer.Params(verbose=False)
+        )
+        expected = [optimizer.optimize(values) for values in initial_guesses]
+
+        batch_result = optimizer.optimize_batch(initial_guesses, num_threads=3)
+        self.assertEqual(len(batch_result), num_problems)
+        for i in range(num_problems):
+            result = batch_result.result(i)
+            for x in xs:
+                np.testing.assert_array_equal(
+                    result.optimized_values[x].to_storage(),
+                    expected[i].optimized_values[x].to_storage(),
+                )
+            self.assertEqual(result.error(), expected[i].error())
+            self.assertEqual(result.best_index, expected[i].best_index)
+        np.testing.assert_array_equal(
+            batch_result.errors(), [result.error() for result in expected]
+        )
+
+        # Stacked storage input
+        array_result = optimizer.optimize_batch(
+            np.array([values.to_storage() for values in initial_guesses]),
+            values_template=initial_guesses[0],
+        )
+        np.testing.assert_array_equal(
+            array_result.optimized_storage, batch_result.optimized_storage
+        )
+
+        with self.assertRaises(ValueError):
+            optimizer.optimize_batch([initial_guesses[0], Values(epsilon=sf.numeric_epsilon)])
+
+    def test_incremental_linearize(self) -> None:
+        """
+        Check that incremental linearization only re-evaluates factors touching changed keys, and
+        gives the same result as a full linearization
+        """
+        num_samples = 5
+        xs = [f"x{i}" for i in range(num_samples)]
+        calls: T.List[str] = []
+
+        def prior(
+            x: np.ndarray, x_prior: np.ndarray
+        ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            calls.append("prior")
+            residual = x - x_prior
+            return residual, np.eye(3), np.eye(3), residual
+
+        def between(
+            x: np.ndarray, y: np.ndarray
+        ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            calls.append("between")
+            residual = y - x
+            jacobian = np.hstack([-np.eye(3), np.eye(3)])
+            return residual, jacobian, jacobian.T @ jacobian, jacobian.T @ residual
+
+        factors = [
+            NumericFactor(keys=[x, f"{x}_prior"], optimized_keys=[x], linearization_function=prior)
+            for x in xs
+        ]
+        factors.extend(
+            NumericFactor(
+                keys=[xs[i], xs[i + 1]],
+                optimized_keys=[xs[i], xs[i + 1]],
+                linearization_function=between,
+            )
+            for i in range(num_samples - 1)
+        )
+
+        values = Values()
+        for i, x in enumerate(xs):
+            values[x] = np.zeros(3)
+            values[f"{x}_prior"] = np.array([i, 2.0 * i, 3.0 * i])
+
+        optimizer = Optimizer(factors=factors, params=Optimizer.Params(verbose=False))
+
+        # The values of the keys are only recorded once incremental linearization is requested, so
+        # the first incremental linearization evaluates every factor
+        optimizer.linearize(values)
+        self.assertEqual(len(calls), len(factors))
+        calls.clear()
+        optimizer.linearize(values, incremental=True)
+        self.assertEqual(len(calls), len(factors))
+
+        # Nothing changed
+        calls.clear()
+        optimizer.linearize(values, incremental=True)
+        self.assertEqual(calls, [])
+
+        # Changing x2 relinearizes its prior and the two between factors touching it, and changing
+        # a constant key relinearizes the factors using it
+        values["x2"] = np.array([1.0, 2.0, 3.0])
+        values["x0_prior"] = np.array([0.0, 0.0, 1.0])
+        calls.clear()
+        linearization = optimizer.linearize(values, incremental=True)
+        self.assertEqual(sorted(calls), ["between", "between", "prior", "prior"])
+
+        full_linearization = optimizer.linearize(values)
+        np.testing.assert_array_equal(linearization.residual, full_linearization.residual)
+        np.testing.assert_array_equal(
+            linearization.jacobian.toarray(), full_linearization.jacobian.toarray()
+        )
+        np.testing.assert_array_equal(
+            linearization.hessian_lower.toarray(), full_linearization.hessian_lower.toarray()
+        )
+        np.testing.assert_array_equal(linearization.rhs, full_linearization.rhs)
+
+    def test_batch_factors(self) -> None:
+        """
+        Check that batching factors which share a linearization function gives the same result as
+        linearizing each factor separately
+        """
+        factors, xs, initial_values = rotation_smoothing_problem(num_samples=10)
+        # Loop closures with the keys in the opposite order to the optimized keys
+        factors.extend(
+            Factor(keys=[xs[i + 4], xs[i], "epsilon"], residual=rotation_between) for i in range(6)
+        )
+
+        params = Optimizer.Params(verbose=False)
+        optimizer = Optimizer(factors=factors, optimized_keys=xs, params=params)
+        batch_optimizer = Optimizer(
+            factors=factors, optimized_keys=xs, params=params, batch_factors=True
+        )
+
+        # The batched factors are linearized with generated vectorized functions
+        self.assertIsNotNone(
+            factors[0]
+            .to_numeric_factor(xs[:2], batch_linearization=True)
+            .batch_linearization_function
+        )
+
+        # Batching reorders the residual, but not the state
+        linearization = optimizer.linearize(initial_values)
+        batch_linearization = batch_optimizer.linearize(initial_values)
+        self.assertAlmostEqual(linearization.error(), batch_linearization.error())
+        self.assertStorageNear(
+            linearization.hessian_lower.toarray(), batch_linearization.hessian_lower.toarray()
+        )
+        self.assertStorageNear(linearization.rhs, batch_linearization.rhs)
+
+        result = optimizer.optimize(initial_values)
+        batch_result = batch_optimizer.optimize(initial_values)
+        self.assertEqual(len(result.iteration_stats), len(batch_result.iteration_stats))
+        self.assertAlmostEqual(result.error(), batch_result.error())
+        for x in xs:
+            self.assertStorageNear(
+                result.optimized_values[x], batch_result.optimized_values[x], places=6
+            )
+
+    def test_batch_linearization_function(self) -> None:
+        """
+        Check that a vectorized batch_linearization_function is called once for a batch of factors
+        """
+        num_samples = 5
+        xs = [f"x{i}" for i in range(num_samples)]
+
+        def prior(
+            x: np.ndarray, x_prior: np.ndarray
+        ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            residual = x - x_prior
+            return residual, np.eye(3), np.eye(3), residual
+
+        calls = []
+
+        def batch_prior(
+            x: np.ndarray, x_prior: np.ndarray
+        ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            calls.append(x.shape)
+            residual = x - x_prior
+            jacobian = np.broadcast_to(np.eye(3), (x.shape[0], 3, 3))
+            return residual, jacobian, jacobian, residual
+
+        factors = [
+            NumericFactor(
+                keys=[x, f"{x}_prior"],
+                optimized_keys=[x],
+                linearization_function=prior,
+                batch_linearization_function=batch_prior,
+            )
+            for x in xs
+        ]
+
+        initial_values = Values()
+        for i, x in enumerate(xs):
+            initial_values[x] = np.zeros(3)
+            initial_values[f"{x}_prior"] = np.array([i, 2.0 * i, 3.0 * i])
+
+        optimizer = Optimizer(
+            factors=factors, params=Optimizer.Params(verbose=False), batch_factors=True
+        )
+        linearization = optimizer.linearize(initial_values)
+        self.assertEqual(calls, [(num_samples, 3)])
+        self.assertStorageNear(linearization.hessian_lower.toarray(), np.eye(3 * num_samples))
+
+        result = optimizer.optimize(initial_values)
+        for i, x in enumerate(xs):
+            self.assertStorageNear(result.optimized_values[x], [i, 2.0 * i, 3.0 * i], places=6)
+
 
 if __name__ == "__main__":
     TestCase.main()
@@ -3,6 +3,7 @@
 # This source code is under the Apache 2.0 license found in the LICENSE file.
 # ----------------------------------------------------------------------------
 
+import os
 import unittest
 
 from symforce import typing as T
@@ -84,6 +85,26 @@ class SymforceUtilTest(TestCase):
                 with self.assertRaises(python_util.InvalidKeyError):
                     python_util.base_and_indices(malformed_index)
 
+    def test_forked_map(self) -> None:
+        """
+        Tests:
+            python_util.forked_map
+        """
+        offset = 10
+        # A lambda, which could not be pickled for multiprocessing.Pool.map
+        func = lambda x: (x + offset, os.getpid())
+
+        for jobs in (1, 3):
+            results = python_util.forked_map(func, list(range(5)), jobs=jobs)
+            self.assertEqual([value for value, _ in results], list(range(10, 15)))
+            pids = {pid for _, pid in results}
+            if jobs == 1:
+                self.assertEqual(pids, {os.getpid()})
+            else:
+                self.assertNotIn(os.getpid(), pids)
+
+        self.assertEqual(python_util.forked_map(func, [], jobs=3), [])
+
 
 if __name__ == "__main__":
     TestCase.main()
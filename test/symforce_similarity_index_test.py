@@ -72,6 +72,26 @@ class SymforceSimilarityIndexTest(TestCase):
                 SimilarityIndex.from_codegen(co_with_numba),
             )
 
+        with self.subTest(msg="cse_jobs doesn't affect similarity"):
+            co_serial = codegen.Codegen.function(
+                func=sf.Rot3.compose, config=codegen.PythonConfig(cse_groups=[["res"]])
+            )
+            co_parallel = codegen.Codegen.function(
+                func=sf.Rot3.compose, config=codegen.PythonConfig(cse_groups=[["res"]], cse_jobs=2)
+            )
+
+            self.assertEqual(
+                SimilarityIndex.from_codegen(co_serial), SimilarityIndex.from_codegen(co_parallel)
+            )
+            self.assertEqual(
+                hash(SimilarityIndex.from_codegen(co_serial)),
+                hash(SimilarityIndex.from_codegen(co_parallel)),
+            )
+            self.assertEqual(
+                SimilarityIndex.from_codegen(co_serial).stable_hash(),
+                SimilarityIndex.from_codegen(co_parallel).stable_hash(),
+            )
+
         with self.subTest(msg="Different functions are dissimilar"):
             config = codegen.PythonConfig()
 
@@ -141,6 +161,38 @@ class SymforceSimilarityIndexTest(TestCase):
                 SimilarityIndex.from_codegen(co_1), SimilarityIndex.from_codegen(co_2)
             )
 
+    def test_stable_hash(self) -> None:
+        """
+        Tests:
+            SimilarityIndex.stable_hash
+
+        Test that stable_hash agrees for similar functions, and differs for dissimilar ones.
+        """
+        config = codegen.PythonConfig()
+
+        index_1 = SimilarityIndex.from_codegen(
+            codegen.Codegen.function(func=sf.Rot3.compose, name="some_name", config=config)
+        )
+        index_2 = SimilarityIndex.from_codegen(
+            codegen.Codegen.function(func=sf.Rot3.compose, name="alternate_name", config=config)
+        )
+        self.assertEqual(index_1.stable_hash(), index_2.stable_hash())
+
+        for other_index in (
+            SimilarityIndex.from_codegen(
+                codegen.Codegen.function(func=sf.Rot2.compose, config=config)
+            ),
+            SimilarityIndex.from_codegen(
+                codegen.Codegen.function(func=sf.Rot3.compose, config=codegen.CppConfig())
+            ),
+            SimilarityIndex.from_codegen(
+                codegen.Codegen.function(
+                    func=sf.Rot3.compose, config=codegen.PythonConfig(use_numba=True)
+                )
+            ),
+        ):
+            self.assertNotEqual(index_1.stable_hash(), other_index.stable_hash())
+
 
 if __name__ == "__main__":
     TestCase.main()
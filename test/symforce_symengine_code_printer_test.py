@@ -0,0 +1,92 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+import sympy
+
+import symforce.symbolic as sf
+from symforce import _sympy_count_ops
+from symforce import typing as T
+from symforce.codegen.backends.cpp.cpp_code_printer import CppCodePrinter
+from symforce.codegen.backends.cpp.cpp_code_printer import SymengineCppCodePrinter
+from symforce.codegen.backends.python.python_code_printer import PythonCodePrinter
+from symforce.codegen.backends.python.python_code_printer import SymenginePythonCodePrinter
+from symforce.test_util import TestCase
+from symforce.test_util import symengine_only
+
+
+class SymforceSymengineCodePrinterTest(TestCase):
+    """
+    Test that printing and counting the ops of symengine expressions directly matches converting
+    them to sympy first
+    """
+
+    @staticmethod
+    def expressions() -> T.List[sf.Expr]:
+        x, y, z = sf.symbols("x y z")
+        rot = sf.Rot3.symbolic("R")
+        return [
+            x,
+            sf.S(2),
+            sf.Rational(1, 3),
+            x - y,
+            -x - y,
+            x + 2.1 * y,
+            1.0 * x,
+            x / y,
+            -x / (2 * y),
+            (x + y) / (x - z),
+            x ** 2 * y ** -3,
+            sf.sqrt(x),
+            1 / sf.sqrt(x + y),
+            (x + y) ** sf.Rational(3, 2),
+            x ** z,
+            2 * (x + y) + z,
+            sf.sin(x) * sf.cos(y) - sf.atan2(x, y),
+            sf.Max(x, y) * sf.pi,
+            *rot.to_rotation_matrix(),
+            *rot.inverse().to_tangent(),
+        ]
+
+    @symengine_only
+    def test_matches_sympy(self) -> None:
+        """
+        Check the printed code and op counts of various expressions against the sympy printers
+        """
+        for symengine_printer, sympy_printer in (
+            (SymengineCppCodePrinter(), CppCodePrinter()),
+            (SymenginePythonCodePrinter(), PythonCodePrinter()),
+        ):
+            for expr in self.expressions():
+                with self.subTest(printer=type(sympy_printer).__name__, expr=str(expr)):
+                    self.assertEqual(
+                        symengine_printer.doprint(expr), sympy_printer.doprint(sympy.S(expr))
+                    )
+                    self.assertEqual(
+                        symengine_printer.count_ops(expr),
+                        _sympy_count_ops.count_ops(sympy.S(expr)),
+                    )
+
+    def test_pow(self) -> None:
+        """
+        Check the special cases of the power formatting shared between the SymPy and symengine
+        printers, which runs with either symbolic API
+        """
+        x, y = sympy.symbols("x y")
+        cases = [
+            (1 / x, "Scalar(1.0) / (x)", "x**(-1)"),
+            (x ** 3, "[&]() { const Scalar base = x; return base * base * base; }()", "x**3"),
+            (sympy.sqrt(x + 1), "std::sqrt(Scalar(x + 1))", "math.sqrt(x + 1)"),
+            (1 / sympy.sqrt(x), "std::pow(x, Scalar(Scalar(-1)/Scalar(2)))", "1/math.sqrt(x)"),
+            (x ** y, "std::pow(x, y)", "x**y"),
+            ((x + y) ** 2, "std::pow(Scalar(x + y), Scalar(2))", "(x + y)**2"),
+        ]
+        for expr, cpp_code, python_code in cases:
+            with self.subTest(expr=str(expr)):
+                self.assertEqual(CppCodePrinter().doprint(expr), cpp_code)
+                self.assertEqual(PythonCodePrinter().doprint(expr), python_code)
+
+
+if __name__ == "__main__":
+    TestCase.main()
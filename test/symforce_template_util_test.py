@@ -0,0 +1,105 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+import os
+from pathlib import Path
+from unittest import mock
+
+from symforce import codegen
+from symforce.codegen import format_util
+from symforce.codegen import template_util
+from symforce.test_util import TestCase
+
+
+class SymforceTemplateUtilTest(TestCase):
+    """
+    Tests contents of symforce.codegen.template_util.
+    """
+
+    def test_jinja_env(self) -> None:
+        """
+        Tests:
+            template_util.jinja_env
+        """
+        template_dir = codegen.PythonConfig.template_dir()
+
+        # The environment is shared however the directory is spelled
+        self.assertIs(
+            template_util.jinja_env(template_dir), template_util.jinja_env(str(template_dir))
+        )
+        self.assertIs(
+            template_util.jinja_env(template_dir),
+            template_util.jinja_env(Path(template_dir, "function", "..")),
+        )
+
+        # Compiled templates are written to the bytecode cache, if one is set
+        bytecode_cache_dir = self.make_output_dir("sf_template_util_test_")
+        with mock.patch.dict(
+            os.environ, {"SYMFORCE_TEMPLATE_BYTECODE_CACHE_DIR": os.fspath(bytecode_cache_dir)}
+        ):
+            template_util.jinja_env(template_dir).get_template("function/FUNCTION.py.jinja")
+        self.assertNotEqual(os.listdir(bytecode_cache_dir), [])
+
+    def test_template_list(self) -> None:
+        """
+        Tests:
+            template_util.TemplateList.render
+
+        Rendering a TemplateList gives the same result as rendering each template separately
+        """
+        template_dir = codegen.PythonConfig.template_dir()
+        output_dir = self.make_output_dir("sf_template_util_test_")
+
+        templates = template_util.TemplateList(template_dir)
+        for name in ("a", "b"):
+            templates.add(
+                "ops/__init__.py.jinja", data={}, output_path=Path(output_dir, name, "__init__.py")
+            )
+        rendered = templates.render(autoformat=False)
+
+        expected = template_util.render_template(
+            "ops/__init__.py.jinja", data={}, template_dir=template_dir, autoformat=False
+        )
+        self.assertEqual(rendered, [expected, expected])
+        for name in ("a", "b"):
+            self.assertEqual(Path(output_dir, name, "__init__.py").read_text(), expected)
+
+    def test_format_cpp_files(self) -> None:
+        """
+        Tests:
+            format_util.format_cpp_files
+
+        Formatting files in a batch gives the same result as formatting them one at a time, and
+        formatted files are cached if the cache is enabled
+        """
+        filename = os.fspath(template_util.CURRENT_DIR / "example.cc")
+        files = [
+            ('#include "b.h"\n#include "example.h"\nint  f( int x ){return x;}\n', filename),
+            ("namespace  sym {\nvoid g() {}\n}\n", filename),
+            ("int  h( ) ;\n", os.fspath(template_util.CURRENT_DIR / "other.h")),
+        ]
+        expected = [format_util.format_cpp(*file) for file in files]
+
+        # Without a cache directory, the cache keys (which need the clang-format version) aren't
+        # computed
+        with mock.patch.dict(os.environ), mock.patch.object(
+            format_util, "_clang_format_version", side_effect=AssertionError
+        ):
+            os.environ.pop("SYMFORCE_FORMAT_CACHE_DIR", None)
+            self.assertEqual(format_util.format_cpp_files(files), expected)
+
+        cache_dir = self.make_output_dir("sf_template_util_test_")
+        with mock.patch.dict(os.environ, {"SYMFORCE_FORMAT_CACHE_DIR": os.fspath(cache_dir)}):
+            self.assertEqual(format_util.format_cpp_files(files), expected)
+            self.assertEqual(len(os.listdir(cache_dir)), len(files))
+
+            with mock.patch.object(
+                format_util.python_util, "execute_subprocess", side_effect=AssertionError
+            ):
+                self.assertEqual(format_util.format_cpp_files(files), expected)
+
+
+if __name__ == "__main__":
+    TestCase.main()
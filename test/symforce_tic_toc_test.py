@@ -0,0 +1,154 @@
+# ----------------------------------------------------------------------------
+# SymForce - Copyright 2022, Skydio, Inc.
+# This source code is under the Apache 2.0 license found in the LICENSE file.
+# ----------------------------------------------------------------------------
+
+import json
+import os
+import tempfile
+import threading
+
+from symforce import cc_sym
+import symforce.symbolic as sf
+from symforce.opt import tic_toc
+from symforce.opt.factor import Factor
+from symforce.opt.optimizer import Optimizer
+from symforce.test_util import TestCase
+from symforce.values import Values
+
+
+def prior_residual(x: sf.V2) -> sf.V2:
+    return x - sf.V2(1, 2)
+
+
+class SymforceTicTocTest(TestCase):
+    """
+    Test the Python access to the C++ tic-toc timers
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        cc_sym.set_tic_toc_enabled(True)
+        cc_sym.set_tic_toc_trace_enabled(False)
+        cc_sym.reset_tic_toc()
+
+    def tearDown(self) -> None:
+        cc_sym.set_tic_toc_enabled(True)
+        cc_sym.set_tic_toc_trace_enabled(False)
+        super().tearDown()
+
+    @staticmethod
+    def make_optimizer() -> Optimizer:
+        return Optimizer(
+            factors=[Factor(keys=["x"], residual=prior_residual)],
+            optimized_keys=["x"],
+            params=Optimizer.Params(verbose=False),
+        )
+
+    def test_stats(self) -> None:
+        """
+        Check collecting, resetting, and disabling the stats, and the per-thread breakdown
+        """
+        optimizer = self.make_optimizer()
+        optimizer.optimize(Values(x=sf.V2()))
+
+        stats = tic_toc.get_stats()
+        iterate_blocks = [name for name in stats if name.endswith("::Iterate()")]
+        self.assertEqual(len(iterate_blocks), 1)
+        iterate_stats = stats[iterate_blocks[0]]
+        self.assertEqual(iterate_stats.thread_index, -1)
+        self.assertGreater(iterate_stats.count, 0)
+        self.assertLessEqual(iterate_stats.min_time, iterate_stats.average_time)
+        self.assertLessEqual(iterate_stats.average_time, iterate_stats.max_time)
+        self.assertAlmostEqual(
+            iterate_stats.average_time * iterate_stats.count, iterate_stats.total_time
+        )
+
+        stats_array = tic_toc.get_stats_array()
+        self.assertEqual(stats_array.dtype, tic_toc.STATS_DTYPE)
+        self.assertEqual(list(stats_array["name"]), sorted(stats))
+
+        # Optimize again on another thread, which should show up separately per thread
+        thread = threading.Thread(target=lambda: optimizer.optimize(Values(x=sf.V2())))
+        thread.start()
+        thread.join()
+
+        per_thread_stats = tic_toc.get_stats(per_thread=True)
+        thread_indices = {
+            thread_index for name, thread_index in per_thread_stats if name == iterate_blocks[0]
+        }
+        self.assertEqual(len(thread_indices), 2)
+        self.assertEqual(
+            sum(per_thread_stats[(iterate_blocks[0], i)].count for i in thread_indices),
+            tic_toc.get_stats()[iterate_blocks[0]].count,
+        )
+
+        cc_sym.reset_tic_toc()
+        self.assertEqual(tic_toc.get_stats(), {})
+
+        # Blocks run after the reset on a thread which ran blocks before it are counted from zero
+        optimizer.optimize(Values(x=sf.V2()))
+        self.assertEqual(
+            tic_toc.get_stats()[iterate_blocks[0]].count,
+            per_thread_stats[(iterate_blocks[0], min(thread_indices))].count,
+        )
+
+        cc_sym.reset_tic_toc()
+        cc_sym.set_tic_toc_enabled(False)
+        self.assertFalse(cc_sym.tic_toc_enabled())
+        result = optimizer.optimize(Values(x=sf.V2()), timing=True)
+        self.assertEqual(tic_toc.get_stats(), {})
+        self.assertEqual(result.timing, {})
+
+    def test_result_timing(self) -> None:
+        """
+        Check that the Result of each optimization has the timing for just that optimization
+        """
+        optimizer = self.make_optimizer()
+        first_result = optimizer.optimize(Values(x=sf.V2()), timing=True)
+        second_result = optimizer.optimize(Values(x=sf.V2(3, 4)), timing=True)
+
+        stats = tic_toc.get_stats()
+        self.assertEqual(set(first_result.timing), set(stats))
+        for name, timing in second_result.timing.items():
+            self.assertEqual(
+                first_result.timing[name].count + timing.count,
+                stats[name].count,
+            )
+            self.assertGreaterEqual(timing.total_time, 0)
+
+        # Timing is only collected when requested
+        self.assertEqual(optimizer.optimize(Values(x=sf.V2())).timing, {})
+
+    def test_chrome_trace(self) -> None:
+        """
+        Check that the recorded runs are written as a valid Chrome trace
+        """
+        optimizer = self.make_optimizer()
+
+        # Not recorded
+        optimizer.optimize(Values(x=sf.V2()))
+
+        cc_sym.set_tic_toc_trace_enabled(True)
+        self.assertTrue(cc_sym.tic_toc_trace_enabled())
+        optimizer.optimize(Values(x=sf.V2()))
+        cc_sym.set_tic_toc_trace_enabled(False)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            trace_path = os.path.join(output_dir, "trace.json")
+            cc_sym.write_tic_toc_chrome_trace(trace_path)
+            with open(trace_path) as f:
+                trace = json.load(f)
+
+        events = trace["traceEvents"]
+        stats = tic_toc.get_stats()
+        iterate_block = next(name for name in stats if name.endswith("::Iterate()"))
+        iterate_events = [event for event in events if event["name"] == iterate_block]
+        self.assertEqual(2 * len(iterate_events), stats[iterate_block].count)
+        for event in events:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["dur"], 0)
+
+
+if __name__ == "__main__":
+    TestCase.main()
@@ -367,6 +367,60 @@ class SymforceValuesTest(LieGroupOpsTestMixin, TestCase):
                 with self.assertRaises(InvalidKeyError):
                     invalid_key in v
 
+    def test_get_set_many(self) -> None:
+        """
+        Tests:
+            Values.get_many
+            Values.set_many
+        """
+        with self.subTest(msg="set_many is equivalent to setting each item"):
+            items = [
+                ("a", 1),
+                ("states.x0", 2),
+                ("states.x1", 3),
+                ("lst[0].b", 4),
+                ("lst[0].c", 5),
+                ("lst[1].b", 6),
+                ("states.nested.y", 7),
+            ]
+            v = Values()
+            v.set_many(items)
+            v_expected = Values()
+            for key, value in items:
+                v_expected[key] = value
+            self.assertEqual(v, v_expected)
+
+            v2 = Values()
+            v2.set_many(dict(items))
+            self.assertEqual(v2, v_expected)
+
+        with self.subTest(msg="get_many is equivalent to getting each item"):
+            keys = [key for key, _ in items] + ["states", "lst[1]"]
+            self.assertEqual(v.get_many(keys), [v[key] for key in keys])
+
+            with self.assertRaises(KeyError):
+                v.get_many(["states.x0", "states.x2"])
+
+        with self.subTest(msg="set_many sees Values it replaces along the way"):
+            v = Values()
+            v.set_many([("a.b", 1), ("a", Values(c=2)), ("a.d", 3), ("e[0].f", 4), ("e", [])])
+            self.assertEqual(v, Values(a=Values(c=2, d=3), e=[]))
+
+        with self.subTest(msg="get_many and set_many respect scopes"):
+            v = Values()
+            with v.scope("states"):
+                v.set_many({"x0": 1, "x1": 2})
+                self.assertEqual(v.get_many(["x0", "x1"]), [1, 2])
+            self.assertEqual(v, Values(states=Values(x0=1, x1=2)))
+
+        with self.subTest(msg="Strings which are not python identifiers are not valid keys either"):
+            v = Values()
+            for invalid_key in self.INVALID_KEYS:
+                with self.assertRaises(InvalidKeyError):
+                    v.set_many([(invalid_key, 0)])
+                with self.assertRaises(InvalidKeyError):
+                    v.get_many([invalid_key])
+
     def test_mixing_scopes(self) -> None:
         v1 = Values()
         v1.add("x")